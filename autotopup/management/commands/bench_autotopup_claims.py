@@ -0,0 +1,158 @@
+import threading
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.utils import timezone
+
+from accounts.models import Profile
+from autotopup.models import AutoTopUp
+from autotopup.scheduler import due
+from autotopup.tasks import execute_auto_topup_batch, process_auto_topups
+
+
+class Dispatches:
+    """Stand-in for ``execute_auto_topup_batch.delay`` recording what each scheduler dispatched."""
+
+    def __init__(self):
+        self.ids = []
+        self.batches = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, claim_token, auto_topup_ids):
+        with self._lock:
+            self.ids.extend(auto_topup_ids)
+            self.batches += 1
+
+
+class Command(BaseCommand):
+    help = (
+        "Drain many due auto top-ups with several schedulers running "
+        "process_auto_topups at once, checking every row is dispatched "
+        "exactly once and timing each tick. Dispatched batches are recorded "
+        "instead of queued; the bench rows are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--schedules", type=int, default=100000)
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument(
+            "--schedulers",
+            type=int,
+            default=4,
+            help="Concurrent schedulers; PostgreSQL only, other databases run one",
+        )
+
+    def handle(self, *args, **options):
+        schedulers = options["schedulers"]
+        if connection.vendor != "postgresql" and schedulers > 1:
+            self.stdout.write(self.style.WARNING(
+                f"SKIP LOCKED needs PostgreSQL; running one scheduler on {connection.vendor}"
+            ))
+            schedulers = 1
+        if due(timezone.now()).exists():
+            # The schedulers would lease real rows without running them
+            raise CommandError("Run against a database without due auto top-ups")
+
+        users = self.make_users(options["users"])
+        try:
+            ids = self.make_schedules(users, options["schedules"])
+            dispatches, ticks, elapsed = self.drain(schedulers)
+        finally:
+            AutoTopUp.objects.filter(user__in=users).delete()
+            Profile.objects.filter(id__in=[user.id for user in users]).delete()
+        self.report(ids, schedulers, dispatches, ticks, elapsed)
+
+    def make_users(self, size):
+        run = uuid.uuid4().hex[:8]
+        return Profile.objects.bulk_create(
+            [
+                Profile(
+                    email=f"bench-{run}-{n}@example.com",
+                    phone=f"0900{n:07d}",
+                    surname="Bench",
+                    other_names=str(n),
+                    # Random codes collide at this scale
+                    referral_code=f"{n:06d}",
+                )
+                for n in range(size)
+            ]
+        )
+
+    def make_schedules(self, users, size):
+        now = timezone.now()
+        schedules = AutoTopUp.objects.bulk_create(
+            [
+                AutoTopUp(
+                    user=users[n % len(users)],
+                    service_type="airtime",
+                    amount=Decimal("100.00"),
+                    phone_number="08012345678",
+                    network="mtn",
+                    start_date=now - timedelta(days=1),
+                    next_run=now - timedelta(seconds=n % 3600),
+                    is_locked=True,
+                    locked_amount=Decimal("100.00"),
+                )
+                for n in range(size)
+            ],
+            batch_size=5000,
+        )
+        return {schedule.id for schedule in schedules}
+
+    def drain(self, schedulers):
+        """Run every scheduler's ticks back to back until nothing is left to claim."""
+        dispatches = Dispatches()
+        ticks = []
+        ticks_lock = threading.Lock()
+
+        def scheduler():
+            try:
+                while True:
+                    before = dispatches.batches
+                    started = time.perf_counter()
+                    process_auto_topups()
+                    tick = time.perf_counter() - started
+                    with ticks_lock:
+                        ticks.append(tick)
+                    # Nothing claimable and no other scheduler dispatching
+                    if dispatches.batches == before:
+                        return
+            finally:
+                if threading.current_thread() is not threading.main_thread():
+                    connections.close_all()
+
+        with mock.patch.object(execute_auto_topup_batch, "delay", dispatches):
+            started = time.perf_counter()
+            if schedulers == 1:
+                scheduler()
+            else:
+                threads = [threading.Thread(target=scheduler) for _ in range(schedulers)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            elapsed = time.perf_counter() - started
+        return dispatches, sorted(ticks), elapsed
+
+    def report(self, ids, schedulers, dispatches, ticks, elapsed):
+        dispatched = [i for i in dispatches.ids if i in ids]
+        duplicates = len(dispatched) - len(set(dispatched))
+        missed = len(ids - set(dispatched))
+        per_tick = settings.AUTO_TOPUP_BATCH_SIZE * settings.AUTO_TOPUP_MAX_BATCHES_PER_RUN
+        p95 = ticks[int(len(ticks) * 0.95)] if ticks else 0
+        style = self.style.SUCCESS if not duplicates and not missed else self.style.ERROR
+        self.stdout.write(style(
+            f"{len(ids)} due schedules, {schedulers} schedulers: {len(dispatched)} dispatched "
+            f"in {dispatches.batches} batches over {elapsed:.2f} s "
+            f"({len(dispatched) / elapsed:.0f}/s), {duplicates} duplicates, {missed} missed"
+        ))
+        self.stdout.write(style(
+            f"{len(ticks)} ticks of at most {per_tick} rows: p95 {p95 * 1000:.0f} ms, "
+            f"max {(ticks[-1] if ticks else 0) * 1000:.0f} ms"
+        ))
@@ -0,0 +1,34 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autotopup', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='autotopup',
+            name='claim_token',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='autotopup',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='autotopup',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='autotopup',
+            index=models.Index(condition=models.Q(('claim_token__isnull', True), ('is_active', True), ('is_locked', True)), fields=['next_run'], name='autotopup_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='autotopup',
+            index=models.Index(condition=models.Q(('claim_token__isnull', False)), fields=['claimed_until'], name='autotopup_lease_idx'),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('autotopup', '0002_autotopup_claims'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='autotopup',
+            name='requery_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
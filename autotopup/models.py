@@ -5,6 +5,7 @@ from decimal import Decimal
 from django.utils import timezone
 
 from accounts.models import Profile
+from wallet import ledger
 
 SERVICE_TYPE_CHOICES = [
     ('airtime', 'Airtime'),
@@ -33,6 +34,14 @@ class AutoTopUp(models.Model):
     total_runs = models.IntegerField(default=0)
     failed_runs = models.IntegerField(default=0)
     
+    # Scheduler claim: the batch holding the row and when its lease expires
+    claim_token = models.UUIDField(blank=True, null=True)
+    claimed_until = models.DateTimeField(blank=True, null=True)
+    # Errored attempts at the current run, retried until AUTO_TOPUP_MAX_RETRIES
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Requeries of the current run without a final status, capped by AUTO_TOPUP_MAX_REQUERIES
+    requery_attempts = models.PositiveSmallIntegerField(default=0)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -41,6 +50,17 @@ class AutoTopUp(models.Model):
         indexes = [
             models.Index(fields=['user', 'is_active']),
             models.Index(fields=['next_run', 'is_active']),
+            # Unclaimed funded rows by due time, and held leases by expiry
+            models.Index(
+                fields=['next_run'],
+                condition=models.Q(is_active=True, is_locked=True, claim_token__isnull=True),
+                name='autotopup_due_idx',
+            ),
+            models.Index(
+                fields=['claimed_until'],
+                condition=models.Q(claim_token__isnull=False),
+                name='autotopup_lease_idx',
+            ),
         ]
     
     def __str__(self):
@@ -52,25 +72,20 @@ class AutoTopUp(models.Model):
         return None
     
     def lock_funds(self):
-        wallet = self.user.wallet
-        if wallet.balance >= self.amount:
-            wallet.balance -= self.amount
-            wallet.locked_balance = (wallet.locked_balance or Decimal('0.00')) + self.amount
-            wallet.save()
-            
-            self.is_locked = True
-            self.locked_amount = self.amount
-            self.save()
-            return True
-        return False
+        try:
+            ledger.lock(self.user.wallet.id, self.amount)
+        except ledger.InsufficientFunds:
+            return False
+
+        self.is_locked = True
+        self.locked_amount = self.amount
+        self.save()
+        return True
     
     def unlock_funds(self):
         """Unlock funds back to user's wallet"""
         if self.is_locked and self.locked_amount > 0:
-            wallet = self.user.wallet
-            wallet.locked_balance = (wallet.locked_balance or Decimal('0.00')) - self.locked_amount
-            wallet.balance += self.locked_amount
-            wallet.save()
+            ledger.unlock(self.user.wallet.id, self.locked_amount)
             
             self.is_locked = False
             self.locked_amount = Decimal('0.00')
@@ -0,0 +1,69 @@
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import AutoTopUp
+
+
+def due(now):
+    """Active, funded top-ups whose run is due, leased or not."""
+    return AutoTopUp.objects.filter(is_active=True, is_locked=True, next_run__lte=now)
+
+
+def expired_leases(now):
+    return due(now).filter(claim_token__isnull=False, claimed_until__lte=now)
+
+
+def unclaimed(now):
+    # Rows backing off after an error keep ``claimed_until`` without a token
+    return due(now).filter(claim_token__isnull=True).exclude(claimed_until__gt=now)
+
+
+def claim_due(size=None):
+    """
+    Lease up to ``size`` due top-ups to a new claim token for
+    ``AUTO_TOPUP_LEASE_SECONDS``. Returns ``(token, ids)``, with no ids
+    when nothing is due.
+
+    ``SKIP LOCKED`` lets several schedulers claim disjoint batches at once,
+    and the lease keeps claimed rows out of later claims until they settle
+    or their holder is presumed dead. Expired leases are taken first, then
+    unclaimed rows; each comes off its own partial index, so rows already
+    leased are never scanned past.
+    """
+    size = size or settings.AUTO_TOPUP_BATCH_SIZE
+    now = timezone.now()
+    token = uuid.uuid4()
+    with transaction.atomic():
+        ids = _lock(expired_leases(now).order_by("claimed_until", "id"), size)
+        if len(ids) < size:
+            ids += _lock(unclaimed(now).order_by("next_run", "id"), size - len(ids))
+        if ids:
+            AutoTopUp.objects.filter(id__in=ids).update(
+                claim_token=token,
+                claimed_until=now + timedelta(seconds=settings.AUTO_TOPUP_LEASE_SECONDS),
+            )
+    return token, ids
+
+
+def _lock(queryset, size):
+    return list(queryset.select_for_update(skip_locked=True).values_list("id", flat=True)[:size])
+
+
+def holds(auto_topup, claim_token, now=None):
+    now = now or timezone.now()
+    return (
+        claim_token is not None
+        and str(auto_topup.claim_token) == str(claim_token)
+        and auto_topup.claimed_until is not None
+        and auto_topup.claimed_until > now
+    )
+
+
+def clear_claim(auto_topup, retry_at=None):
+    """Drop the claim; with ``retry_at`` the row stays out of claims until then."""
+    auto_topup.claim_token = None
+    auto_topup.claimed_until = retry_at
@@ -1,126 +1,255 @@
 from celery import shared_task
+from django.conf import settings
 from django.utils import timezone
 from django.db import transaction
 from decimal import Decimal
+from datetime import timedelta
 import logging
 from .models import AutoTopUp, AutoTopUpHistory
-from payments.vtpass import generate_reference_id, top_up
-from payments.vtpass import mtn_dict, airtel_dict, glo_dict, etisalat_dict
+from .scheduler import claim_due, clear_claim, holds
+from payments.orders import vtu_outcome
+from payments.vtpass import generate_reference_id, get_receipt, top_up
+from payments.catalog import plan_catalog
+from wallet import ledger
+from bluesea_mobile.utils import ProviderDegradedException
 
 from notifications.utils import send_notification
 
 logger = logging.getLogger(__name__)
 
 
-@shared_task(bind=True, max_retries=3)
-def process_auto_topups(self):
+@shared_task
+def process_auto_topups():
+    """
+    Every minute: lease due top-ups ``AUTO_TOPUP_BATCH_SIZE`` at a time and
+    dispatch each batch as one task, up to ``AUTO_TOPUP_MAX_BATCHES_PER_RUN``
+    batches. A batch whose task never runs is claimed again once its lease
+    expires.
+    """
+    batches = claimed = 0
+    for _ in range(settings.AUTO_TOPUP_MAX_BATCHES_PER_RUN):
+        claim_token, auto_topup_ids = claim_due()
+        if not auto_topup_ids:
+            break
+        execute_auto_topup_batch.delay(str(claim_token), auto_topup_ids)
+        batches += 1
+        claimed += len(auto_topup_ids)
 
-    now = timezone.now()
-    
-    # Get all active auto top-ups that are due
-    due_topups = AutoTopUp.objects.filter(is_active=True, next_run__lte=now, is_locked=True).select_related('user__wallet')
-    
-    logger.info(f"Found {due_topups.count()} due auto top-ups")
-    
-    for auto_topup in due_topups:
+    logger.info(f"Dispatched {claimed} due auto top-ups in {batches} batches")
+    return f"Dispatched {claimed} auto top-ups in {batches} batches"
+
+
+@shared_task
+def execute_auto_topup_batch(claim_token, auto_topup_ids):
+    """Run one claimed batch in order; rows whose lease passed to another claim are skipped."""
+    outcomes = {}
+    for auto_topup_id in auto_topup_ids:
         try:
-            execute_auto_topup.delay(auto_topup.id)
+            outcome = execute_auto_topup(auto_topup_id, claim_token)
         except Exception as e:
-            logger.error(f"Error queuing auto top-up {auto_topup.id}: {str(e)}")
-    
-    return f"Processed {due_topups.count()} auto top-ups"
+            logger.error(f"Error executing auto top-up {auto_topup_id}: {str(e)}")
+            outcome = "error"
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    return f"Auto top-up batch {claim_token}: {outcomes}"
+
 
+@shared_task
+def execute_auto_topup(auto_topup_id, claim_token=None):
+    """
+    Run one top-up held by ``claim_token``. Returns "successful", "failed",
+    "retry", "pending" (VTPass still processing) or "skipped".
+
+    VTPass is called outside any transaction. The request id is stored on
+    the pending history row first, so an attempt that dies or times out
+    mid-call is requeried by the next one instead of paid twice. A request
+    that never reached VTPass fails its history row, so the next attempt
+    sends a fresh one.
+    """
+    started = start_attempt(auto_topup_id, claim_token)
+    if started is None:
+        return "skipped"
+    auto_topup, history, requery = started
 
-@shared_task(bind=True, max_retries=3)
-def execute_auto_topup(self, auto_topup_id):
     try:
-        auto_topup = AutoTopUp.objects.select_related('user__wallet').get(id=auto_topup_id)
-    except AutoTopUp.DoesNotExist:
-        logger.error(f"AutoTopUp {auto_topup_id} not found")
-        return
-    
+        if requery:
+            vtu_response = get_receipt({"request_id": history.vtu_reference})
+        else:
+            vtu_response = top_up(vtu_data(auto_topup, history.vtu_reference))
+    except ProviderDegradedException as e:
+        if not requery:
+            # VTPass never saw this request id; requerying it would only say "not found"
+            history.status = 'failed'
+            history.error_message = str(e.detail)
+            history.save(update_fields=['status', 'error_message'])
+        logger.error(f"Error executing auto top-up {auto_topup_id}: {str(e.detail)}")
+        return retry_later(auto_topup_id, claim_token, history, str(e.detail))
+    except Exception as e:
+        logger.error(f"Error executing auto top-up {auto_topup_id}: {str(e)}")
+        return retry_later(auto_topup_id, claim_token, history, str(e))
+
+    outcome = vtu_outcome(vtu_response)
+    if outcome == "unknown":
+        return retry_later(auto_topup_id, claim_token, history, None)
+    if requery and outcome == "failed":
+        # The interrupted request never went through; pay afresh next attempt
+        history.status = 'failed'
+        history.vtu_response = vtu_response
+        history.save(update_fields=['status', 'vtu_response'])
+        return retry_later(auto_topup_id, claim_token, history, "Interrupted request failed")
+
     with transaction.atomic():
-        # Double check it's still active and locked
+        auto_topup = locked(auto_topup_id)
+        if not holds(auto_topup, claim_token):
+            logger.warning(f"AutoTopUp {auto_topup_id} lost its claim during the VTPass call")
+        if outcome == "successful":
+            topup_success(auto_topup, history, vtu_response)
+            logger.info(f"Auto top-up {auto_topup_id} executed successfully")
+        else:
+            topup_failure(auto_topup, history, vtu_response)
+    return outcome
+
+
+def locked(auto_topup_id):
+    return (
+        AutoTopUp.objects.select_for_update(of=("self",))
+        .select_related('user__wallet')
+        .get(id=auto_topup_id)
+    )
+
+
+def start_attempt(auto_topup_id, claim_token):
+    """
+    Check the claim still holds the row and renew its lease to cover this
+    call. Returns ``(auto_topup, history, requery)``, or None to skip.
+    ``requery`` is set when an earlier attempt left its request pending.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        try:
+            auto_topup = locked(auto_topup_id)
+        except AutoTopUp.DoesNotExist:
+            logger.error(f"AutoTopUp {auto_topup_id} not found")
+            return None
+
+        if not holds(auto_topup, claim_token, now):
+            logger.warning(f"AutoTopUp {auto_topup_id} is not held by claim {claim_token}")
+            return None
+
         if not auto_topup.is_active or not auto_topup.is_locked:
             logger.warning(f"AutoTopUp {auto_topup_id} is not active or locked")
-            return
-        
-        request_id = generate_reference_id()
-        history = AutoTopUpHistory.objects.create(
-            auto_topup=auto_topup,
-            amount=auto_topup.amount,
-            status='pending'
+            clear_claim(auto_topup)
+            auto_topup.save(update_fields=['claim_token', 'claimed_until', 'updated_at'])
+            return None
+
+        history = (
+            auto_topup.history.filter(status='pending')
+            .exclude(vtu_reference__isnull=True)
+            .order_by('-executed_at')
+            .first()
         )
-        
-        try:
-            vtu_payload = vtu_data(auto_topup, request_id)
-            vtu_response = top_up(vtu_payload)
-            
-            if vtu_response.get("response_description") == "TRANSACTION SUCCESSFUL":
-                wallet = auto_topup.user.wallet
-                wallet.locked_balance -= auto_topup.locked_amount
-                wallet.save()
-                
-                history.status = 'success'
-                history.vtu_reference = vtu_response.get('requestId')
-                history.vtu_response = vtu_response
-                history.save()
-                
-                auto_topup.last_run = timezone.now()
-                auto_topup.total_runs += 1
-                auto_topup.is_locked = False
-                auto_topup.locked_amount = Decimal('0.00')
-                
-                if auto_topup.repeat_days > 0:
-                    next_run = auto_topup.calculate_next_run()
-                    if next_run:
-                        auto_topup.next_run = next_run
-                        # Lock funds for next run
-                        if not auto_topup.lock_funds():
-                            auto_topup.is_active = False
-                            send_notification(
-                                user=auto_topup.user,
-                                title="Auto Top-Up Deactivated",
-                                message=f"Your {auto_topup.service_type} auto top-up has been deactivated due to insufficient funds.",
-                                notification_type='warning'
-                            )
-                    else:
-                        auto_topup.is_active = False
-                else:
-                    auto_topup.is_active = False
-                
-                auto_topup.save()
-                
-                # Send success notification
+        requery = history is not None
+        if history is None:
+            history = AutoTopUpHistory.objects.create(
+                auto_topup=auto_topup,
+                amount=auto_topup.amount,
+                status='pending',
+                vtu_reference=generate_reference_id(),
+            )
+
+        auto_topup.claimed_until = now + timedelta(seconds=settings.AUTO_TOPUP_LEASE_SECONDS)
+        auto_topup.save(update_fields=['claimed_until', 'updated_at'])
+    return auto_topup, history, requery
+
+
+def retry_later(auto_topup_id, claim_token, history, error):
+    """
+    Release the claim and keep the row out of claims for
+    ``AUTO_TOPUP_RETRY_DELAY`` seconds. ``error`` counts towards
+    ``AUTO_TOPUP_MAX_RETRIES``, after which the run fails; None (no final
+    status from VTPass yet) counts towards ``AUTO_TOPUP_MAX_REQUERIES``
+    instead.
+    """
+    with transaction.atomic():
+        auto_topup = locked(auto_topup_id)
+        if not holds(auto_topup, claim_token):
+            return "skipped"
+
+        if error is not None:
+            auto_topup.attempts += 1
+            if auto_topup.attempts > settings.AUTO_TOPUP_MAX_RETRIES:
+                topup_failure(auto_topup, history, {'error': f"Max retries exceeded: {error}"})
+                return "failed"
+            if history.status == 'pending':
+                history.error_message = f"Attempt {auto_topup.attempts} failed: {error}. Retrying..."
+                history.save(update_fields=['error_message'])
+        else:
+            auto_topup.requery_attempts += 1
+            if auto_topup.requery_attempts > settings.AUTO_TOPUP_MAX_REQUERIES:
+                logger.error(
+                    f"Auto top-up {auto_topup_id} request {history.vtu_reference} "
+                    f"has no final status after {settings.AUTO_TOPUP_MAX_REQUERIES} requeries"
+                )
+                topup_failure(auto_topup, history, {'error': "No final status from the provider"})
+                return "failed"
+
+        clear_claim(
+            auto_topup,
+            retry_at=timezone.now() + timedelta(seconds=settings.AUTO_TOPUP_RETRY_DELAY),
+        )
+        auto_topup.save(
+            update_fields=['claim_token', 'claimed_until', 'attempts', 'requery_attempts', 'updated_at']
+        )
+    return "retry" if error is not None else "pending"
+
+
+def topup_success(auto_topup, history, vtu_response):
+    ledger.capture(
+        auto_topup.user.wallet.id,
+        auto_topup.locked_amount,
+        description=f"Auto top-up: {auto_topup.service_type} for {auto_topup.phone_number}",
+        reference=history.vtu_reference,
+    )
+    
+    history.status = 'success'
+    history.vtu_reference = vtu_response.get('requestId') or history.vtu_reference
+    history.vtu_response = vtu_response
+    history.save()
+    
+    auto_topup.last_run = timezone.now()
+    auto_topup.total_runs += 1
+    auto_topup.is_locked = False
+    auto_topup.locked_amount = Decimal('0.00')
+    auto_topup.attempts = 0
+    auto_topup.requery_attempts = 0
+    clear_claim(auto_topup)
+    
+    if auto_topup.repeat_days > 0:
+        next_run = auto_topup.calculate_next_run()
+        if next_run:
+            auto_topup.next_run = next_run
+            # Lock funds for next run
+            if not auto_topup.lock_funds():
+                auto_topup.is_active = False
                 send_notification(
                     user=auto_topup.user,
-                    title="Auto Top-Up Successful",
-                    message=f"Your {auto_topup.service_type} top-up of ₦{auto_topup.amount} to {auto_topup.phone_number} was successful.",
-                    notification_type='success'
+                    title="Auto Top-Up Deactivated",
+                    message=f"Your {auto_topup.service_type} auto top-up has been deactivated due to insufficient funds.",
+                    notification_type='warning'
                 )
-                
-                logger.info(f"Auto top-up {auto_topup_id} executed successfully")
-                
-            else:
-                # VTU API failed - unlock funds
-                topup_failure(auto_topup, history, vtu_response)
-                
-        except Exception as e:
-            logger.error(f"Error executing auto top-up {auto_topup_id}: {str(e)}")
-            
-            # Only record failure and unlock if we've exhausted retries
-            if self.request.retries >= self.max_retries:
-                topup_failure(
-                    auto_topup,
-                    history,
-                    {'error': f"Max retries exceeded: {str(e)}"}
-                )
-            else:
-                # Update history to indicate a retry is coming
-                history.status = 'pending'
-                history.error_message = f"Attempt {self.request.retries + 1} failed: {str(e)}. Retrying..."
-                history.save()
-                raise self.retry(exc=e, countdown=60)
+        else:
+            auto_topup.is_active = False
+    else:
+        auto_topup.is_active = False
+    
+    auto_topup.save()
+    
+    # Send success notification
+    send_notification(
+        user=auto_topup.user,
+        title="Auto Top-Up Successful",
+        message=f"Your {auto_topup.service_type} top-up of ₦{auto_topup.amount} to {auto_topup.phone_number} was successful.",
+        notification_type='success'
+    )
 
 
 def vtu_data(auto_topup, request_id):
@@ -133,18 +262,10 @@ def vtu_data(auto_topup, request_id):
         }
     
     elif auto_topup.service_type == 'data':
-        plan_dicts = {
-            'mtn': mtn_dict,
-            'airtel': airtel_dict,
-            'glo': glo_dict,
-            'etisalat': etisalat_dict
-        }
-        
-        plan_dict = plan_dicts.get(auto_topup.network, {})
-        plan_info = plan_dict.get(auto_topup.plan, [None, auto_topup.amount])
+        plan_info = plan_catalog.get(f"{auto_topup.network}-data", auto_topup.plan)
         
-        variation_code = plan_info[0] if plan_info[0] else auto_topup.plan
-        amount = plan_info[1]
+        variation_code = plan_info.variation_code if plan_info else auto_topup.plan
+        amount = plan_info.amount if plan_info else auto_topup.amount
         
         return {
             "request_id": request_id,
@@ -157,6 +278,9 @@ def vtu_data(auto_topup, request_id):
 
 
 def topup_failure(auto_topup, history, vtu_response):
+    auto_topup.attempts = 0
+    auto_topup.requery_attempts = 0
+    clear_claim(auto_topup)
     auto_topup.unlock_funds()
     
     # Update history
@@ -1,3 +1,170 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
 from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import Profile
+from bluesea_mobile.utils import ProviderDegradedException
+from wallet.models import Wallet
+from .models import AutoTopUp
+from .scheduler import claim_due
+from .tasks import execute_auto_topup, process_auto_topups
+
+SUCCESS = {"response_description": "TRANSACTION SUCCESSFUL", "requestId": "REQ-1"}
+NOT_FOUND = {"code": "015", "response_description": "INVALID REQUEST ID"}
+
+
+class AutoTopUpSchedulerTestCase(TestCase):
+    def setUp(self):
+        self.user = Profile.objects.create_user(
+            email="scheduled@example.com",
+            phone="08010000400",
+            surname="Scheduled",
+            other_names="User",
+            role="user",
+        )
+        self.wallet = Wallet.objects.create(user=self.user, balance=Decimal("10000.00"))
+
+    def schedule(self, count=1, due=True, repeat_days=0):
+        next_run = timezone.now() + timedelta(minutes=-5 if due else 5)
+        schedules = []
+        for _ in range(count):
+            auto_topup = AutoTopUp.objects.create(
+                user=self.user,
+                service_type="airtime",
+                amount=Decimal("100.00"),
+                phone_number="08012345678",
+                network="mtn",
+                start_date=next_run,
+                next_run=next_run,
+                repeat_days=repeat_days,
+            )
+            auto_topup.lock_funds()
+            schedules.append(auto_topup)
+        return schedules
+
+    def test_claims_are_disjoint_and_skip_leased_rows(self):
+        self.schedule(5)
+        self.schedule(2, due=False)
+
+        first_token, first = claim_due(3)
+        second_token, second = claim_due(3)
+
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 2)
+        self.assertFalse(set(first) & set(second))
+        self.assertEqual(claim_due(3)[1], [])
+        self.assertEqual(
+            AutoTopUp.objects.filter(claim_token=first_token).count(), 3
+        )
+
+    def test_expired_lease_is_claimed_again(self):
+        self.schedule()
+        token, ids = claim_due()
+        AutoTopUp.objects.filter(id__in=ids).update(
+            claimed_until=timezone.now() - timedelta(seconds=1)
+        )
+
+        new_token, reclaimed = claim_due()
+
+        self.assertEqual(reclaimed, ids)
+        self.assertNotEqual(new_token, token)
+        # The old holder's task no longer owns the row
+        self.assertEqual(execute_auto_topup(ids[0], str(token)), "skipped")
+
+    @mock.patch("autotopup.tasks.execute_auto_topup_batch.delay")
+    def test_process_dispatches_each_due_row_once(self, delay):
+        self.schedule(3)
+        with self.settings(AUTO_TOPUP_BATCH_SIZE=2):
+            process_auto_topups()
+            process_auto_topups()
+
+        self.assertEqual(delay.call_count, 2)
+        dispatched = [i for call in delay.call_args_list for i in call.args[1]]
+        self.assertEqual(len(dispatched), 3)
+        self.assertEqual(len(set(dispatched)), 3)
+
+    @mock.patch("autotopup.tasks.top_up", return_value=SUCCESS)
+    def test_execute_settles_and_releases_claim(self, top_up):
+        auto_topup, = self.schedule(repeat_days=7)
+        token, ids = claim_due()
+
+        self.assertEqual(execute_auto_topup(auto_topup.id, str(token)), "successful")
+
+        auto_topup.refresh_from_db()
+        self.wallet.refresh_from_db()
+        top_up.assert_called_once()
+        self.assertIsNone(auto_topup.claim_token)
+        self.assertIsNone(auto_topup.claimed_until)
+        self.assertEqual(auto_topup.total_runs, 1)
+        self.assertGreater(auto_topup.next_run, timezone.now())
+        # Paid for this run and locked again for the next
+        self.assertEqual(self.wallet.balance, Decimal("9800.00"))
+        self.assertEqual(self.wallet.locked_balance, Decimal("100.00"))
+        self.assertEqual(auto_topup.history.get().status, "success")
+
+    @mock.patch("autotopup.tasks.get_receipt", return_value=SUCCESS)
+    @mock.patch("autotopup.tasks.top_up", side_effect=TimeoutError("read timed out"))
+    def test_interrupted_call_is_requeried_not_repaid(self, top_up, get_receipt):
+        auto_topup, = self.schedule()
+        token, _ = claim_due()
+
+        self.assertEqual(execute_auto_topup(auto_topup.id, str(token)), "retry")
+        auto_topup.refresh_from_db()
+        self.assertEqual(auto_topup.attempts, 1)
+        self.assertGreater(auto_topup.claimed_until, timezone.now())
+        # Backing off: not claimable until the retry delay passes
+        self.assertEqual(claim_due()[1], [])
+
+        AutoTopUp.objects.filter(id=auto_topup.id).update(claimed_until=timezone.now())
+        token, _ = claim_due()
+        self.assertEqual(execute_auto_topup(auto_topup.id, str(token)), "successful")
+
+        top_up.assert_called_once()
+        request_id = top_up.call_args.args[0]["request_id"]
+        get_receipt.assert_called_once_with({"request_id": request_id})
+        self.assertEqual(auto_topup.history.get().status, "success")
+
+    def retry_now(self, auto_topup):
+        AutoTopUp.objects.filter(id=auto_topup.id).update(claimed_until=timezone.now())
+        token, _ = claim_due()
+        return execute_auto_topup(auto_topup.id, str(token))
+
+    @mock.patch("autotopup.tasks.get_receipt")
+    @mock.patch("autotopup.tasks.top_up", side_effect=[ProviderDegradedException(), SUCCESS])
+    def test_degraded_call_is_sent_again_not_requeried(self, top_up, get_receipt):
+        auto_topup, = self.schedule()
+        token, _ = claim_due()
+
+        self.assertEqual(execute_auto_topup(auto_topup.id, str(token)), "retry")
+        self.assertEqual(auto_topup.history.get().status, "failed")
+        self.assertEqual(self.retry_now(auto_topup), "successful")
+
+        get_receipt.assert_not_called()
+        first, second = [call.args[0]["request_id"] for call in top_up.call_args_list]
+        self.assertNotEqual(first, second)
+        self.assertEqual(
+            list(auto_topup.history.order_by("executed_at").values_list("status", flat=True)),
+            ["failed", "success"],
+        )
+
+    @mock.patch("autotopup.tasks.get_receipt", return_value=NOT_FOUND)
+    @mock.patch("autotopup.tasks.top_up", side_effect=TimeoutError("read timed out"))
+    def test_requeries_without_final_status_are_capped(self, top_up, get_receipt):
+        auto_topup, = self.schedule()
+        token, _ = claim_due()
+        execute_auto_topup(auto_topup.id, str(token))
+
+        with self.settings(AUTO_TOPUP_MAX_REQUERIES=2):
+            outcomes = [self.retry_now(auto_topup) for _ in range(3)]
 
-# Create your tests here.
+        self.assertEqual(outcomes, ["pending", "pending", "failed"])
+        self.assertEqual(get_receipt.call_count, 3)
+        auto_topup.refresh_from_db()
+        self.wallet.refresh_from_db()
+        self.assertEqual((auto_topup.attempts, auto_topup.requery_attempts), (0, 0))
+        self.assertFalse(auto_topup.is_locked)
+        self.assertEqual(self.wallet.locked_balance, Decimal("0.00"))
+        self.assertEqual(auto_topup.history.get().status, "failed")
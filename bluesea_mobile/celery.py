@@ -21,6 +21,54 @@ app.conf.beat_schedule = {
         "task": "market_place.tasks.send_event_reminder_notifications",
         "schedule": crontab(hour=9, minute=0),
     },
+    "reconcile-purchase-orders-every-2-minutes": {
+        "task": "payments.tasks.reconcile_purchase_orders",
+        "schedule": 120.0,
+    },
+    "refresh-plan-catalog": {
+        "task": "payments.tasks.refresh_plan_catalog",
+        "schedule": crontab(minute=30, hour="*/6"),
+    },
+    "purge-idempotency-records": {
+        "task": "payments.tasks.purge_idempotency_records",
+        "schedule": crontab(hour=2, minute=15),
+    },
+    "reconcile-wallet-ledgers": {
+        "task": "wallet.tasks.reconcile_wallet_ledgers",
+        "schedule": crontab(hour=1, minute=30),
+    },
+    "process-paystack-events-every-minute": {
+        "task": "transactions.tasks.process_paystack_events",
+        "schedule": 60.0,
+    },
+    "refresh-paystack-banks": {
+        "task": "transactions.tasks.refresh_paystack_banks",
+        "schedule": crontab(hour=3, minute=0),
+    },
+    "process-withdrawal-payouts-every-5-minutes": {
+        "task": "payments.tasks.process_withdrawal_payouts",
+        "schedule": 300.0,
+    },
+    "verify-stale-payouts-every-15-minutes": {
+        "task": "payments.tasks.verify_stale_payouts_task",
+        "schedule": 900.0,
+    },
+    "reconcile-group-payments-every-5-minutes": {
+        "task": "payments.tasks.reconcile_group_payments",
+        "schedule": 300.0,
+    },
+    "repair-unread-notification-counters": {
+    "send-notification-digests": {
+        "task": "notifications.tasks.send_notification_digests",
+        "schedule": crontab(hour="8,18", minute=0),
+    },
+    "purge-expired-notifications": {
+        "task": "notifications.tasks.purge_expired_notifications",
+        "schedule": crontab(hour=3, minute=30),
+    },
+        "task": "notifications.tasks.repair_unread_counters",
+        "schedule": crontab(hour=4, minute=0),
+    },
 }
 
 
@@ -0,0 +1,133 @@
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def pooled_session(headers=None, pool_maxsize=20, connect_retries=2):
+    """
+    Build a keep-alive requests session with a bounded connection pool.
+
+    Only connection failures are retried: the request never reached the
+    provider, so retrying cannot double-charge anybody.
+    """
+    session = requests.Session()
+    if headers:
+        session.headers.update(headers)
+
+    retry = Retry(
+        total=connect_retries,
+        connect=connect_retries,
+        read=0,
+        status=0,
+        other=0,
+        backoff_factor=0.2,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class CircuitBreaker:
+    """
+    Per-process circuit breaker over a rolling window of recent calls.
+
+    The breaker opens when the share of failed calls, or of calls slower
+    than ``slow_call_seconds``, reaches ``failure_rate`` once at least
+    ``min_calls`` have been observed. While open every call fails fast;
+    after ``cooldown`` seconds a single trial call is let through
+    (half-open) and its outcome decides whether the breaker closes again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name,
+        failure_rate=0.5,
+        slow_call_seconds=10.0,
+        min_calls=10,
+        window=20,
+        cooldown=30.0,
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self._calls = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if (
+            self._state == self.OPEN
+            and time.monotonic() - self._opened_at >= self.cooldown
+        ):
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def allow_request(self):
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record(self, success, elapsed):
+        slow = elapsed >= self.slow_call_seconds
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                if success and not slow:
+                    self._state = self.CLOSED
+                    self._calls.clear()
+                else:
+                    self._trip()
+                return
+
+            self._calls.append((success, slow))
+            if len(self._calls) < self.min_calls:
+                return
+
+            total = len(self._calls)
+            failures = sum(1 for ok, _ in self._calls if not ok)
+            slow_calls = sum(1 for _, was_slow in self._calls if was_slow)
+            if (
+                failures / total >= self.failure_rate
+                or slow_calls / total >= self.failure_rate
+            ):
+                self._trip()
+
+    def _trip(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._trial_in_flight = False
+        self._calls.clear()
+
+    def reset(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._trial_in_flight = False
+            self._calls.clear()
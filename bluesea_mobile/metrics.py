@@ -0,0 +1,35 @@
+import logging
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "metrics:"
+
+
+def incr(name, delta=1):
+    """
+    Bump a process-shared counter kept in the default (Redis) cache.
+
+    Metrics must never break the code path they observe, so cache errors
+    are logged and swallowed.
+    """
+    key = f"{PREFIX}{name}"
+    try:
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            # First hit: add() only wins if nobody created the key meanwhile
+            if not cache.add(key, delta, timeout=None):
+                cache.incr(key, delta)
+    except Exception as e:
+        logger.warning(f"Could not record metric {name}: {str(e)}")
+
+
+def get_counters(*names):
+    values = cache.get_many([f"{PREFIX}{name}" for name in names])
+    return {name: values.get(f"{PREFIX}{name}", 0) for name in names}
+
+
+def reset(*names):
+    cache.delete_many([f"{PREFIX}{name}" for name in names])
@@ -0,0 +1,89 @@
+import base64
+import binascii
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Newest-first cursor pagination on ``(created_at, pk)``.
+
+    Each page is ``WHERE (created_at, pk) < cursor ORDER BY created_at DESC,
+    pk DESC LIMIT n + 1`` — one range scan on a ``(owner, -created_at, -pk)``
+    index however deep the client scrolls, and no ``COUNT(*)``. The extra row
+    only tells us whether there is a next page.
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 50
+    cursor_query_param = "cursor"
+    ordering_field = "created_at"
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def encode_cursor(self, obj):
+        position = f"{getattr(obj, self.ordering_field).isoformat()}|{obj.pk}"
+        return base64.urlsafe_b64encode(position.encode()).decode()
+
+    def decode_cursor(self, request, queryset):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = base64.urlsafe_b64decode(encoded.encode()).decode()
+            value, pk = position.rsplit("|", 1)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        value = parse_datetime(value)
+        if value is None or not pk:
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            # int() for auto keys, UUID() for UUID keys
+            pk = queryset.model._meta.pk.to_python(pk)
+        except ValidationError:
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        field = self.ordering_field
+
+        queryset = queryset.order_by(f"-{field}", "-pk")
+        cursor = self.decode_cursor(request, queryset)
+        if cursor is not None:
+            value, pk = cursor
+            # The plain <= bound lets the database seek straight to the cursor
+            queryset = queryset.filter(**{f"{field}__lte": value}).filter(
+                Q(**{f"{field}__lt": value}) | Q(pk__lt=pk)
+            )
+
+        rows = list(queryset[: self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        self.next_cursor = self.encode_cursor(rows[-1]) if self.has_next else None
+        return rows
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
@@ -254,6 +254,7 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
+    "bluesea_mobile.transaction_metrics.TransactionTimingMiddleware",
 ]
 
 REST_FRAMEWORK = {
@@ -445,6 +446,15 @@ FROM_EMAIL = EMAIL_HOST_USER
 PAYSTACK_SECRET_KEY = os.environ.get("PAYSTACK_SECRET_KEY")
 PAYSTACK_PUBLIC_KEY = os.environ.get("PAYSTACK_PUBLIC_KEY")
 
+# Paystack client pool and timeouts (seconds); bank list and resolved
+# account lifetimes, and how long an unresolvable account is remembered
+PAYSTACK_POOL_MAXSIZE = int(os.environ.get("PAYSTACK_POOL_MAXSIZE", 10))
+PAYSTACK_CONNECT_TIMEOUT = float(os.environ.get("PAYSTACK_CONNECT_TIMEOUT", 5))
+PAYSTACK_READ_TIMEOUT = float(os.environ.get("PAYSTACK_READ_TIMEOUT", 15))
+PAYSTACK_BANKS_CACHE_TTL = int(os.environ.get("PAYSTACK_BANKS_CACHE_TTL", 7 * 24 * 60 * 60))
+PAYSTACK_ACCOUNT_NAME_TTL = int(os.environ.get("PAYSTACK_ACCOUNT_NAME_TTL", 30 * 24 * 60 * 60))
+PAYSTACK_ACCOUNT_NAME_NEGATIVE_TTL = int(os.environ.get("PAYSTACK_ACCOUNT_NAME_NEGATIVE_TTL", 10 * 60))
+
 
 LOGGING = {
     "version": 1,
@@ -528,6 +538,24 @@ else:
 SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
 SESSION_CACHE_ALIAS = "default"
 
+# Channel layer carrying realtime pushes (notifications, balances, purchase
+# status) from web and Celery processes to the sockets daphne holds open
+if not DEBUG:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {
+                "hosts": [REDIS_LOCATION],
+                "prefix": "bluesea:ws",
+            },
+        }
+    }
+else:
+    # In-memory layer only reaches sockets held by the same process
+    CHANNEL_LAYERS = {
+        "default": {"BACKEND": "channels.layers.InMemoryChannelLayer"},
+    }
+
 GOOGLE_CLIENT_ID = os.environ.get("GOOGLE_CLIENT_ID")
 GOOGLE_CLIENT_SECRET = os.environ.get("GOOGLE_CLIENT_SECRET")
 APPLE_CLIENT_ID = os.environ.get("APPLE_CLIENT_ID")
@@ -537,6 +565,133 @@ VTPASS_API_KEY = os.environ.get("VTPASS_API_KEY")
 VTPASS_SECRET_KEY = os.environ.get("VTPASS_SECRET_KEY")
 VTPASS_PUBLIC_KEY = os.environ.get("VTPASS_PUBLIC_KEY")
 
+# VTPass client: connection pool, timeouts (seconds) and circuit breaker
+VTPASS_POOL_MAXSIZE = int(os.environ.get("VTPASS_POOL_MAXSIZE", 20))
+VTPASS_CONNECT_TIMEOUT = float(os.environ.get("VTPASS_CONNECT_TIMEOUT", 5))
+VTPASS_READ_TIMEOUT = float(os.environ.get("VTPASS_READ_TIMEOUT", 15))
+VTPASS_PAY_READ_TIMEOUT = float(os.environ.get("VTPASS_PAY_READ_TIMEOUT", 45))
+VTPASS_ASYNC_MAX_CONNECTIONS = int(os.environ.get("VTPASS_ASYNC_MAX_CONNECTIONS", 500))
+VTPASS_BREAKER_FAILURE_RATE = float(os.environ.get("VTPASS_BREAKER_FAILURE_RATE", 0.5))
+VTPASS_BREAKER_SLOW_CALL_SECONDS = float(
+    os.environ.get("VTPASS_BREAKER_SLOW_CALL_SECONDS", 15)
+)
+VTPASS_BREAKER_MIN_CALLS = int(os.environ.get("VTPASS_BREAKER_MIN_CALLS", 10))
+VTPASS_BREAKER_WINDOW = int(os.environ.get("VTPASS_BREAKER_WINDOW", 20))
+VTPASS_BREAKER_COOLDOWN = float(os.environ.get("VTPASS_BREAKER_COOLDOWN", 30))
+
+# VTPass requery reconciler for purchase orders with no definite outcome
+VTPASS_REQUERY_BATCH_SIZE = int(os.environ.get("VTPASS_REQUERY_BATCH_SIZE", 100))
+VTPASS_REQUERY_CONCURRENCY = int(os.environ.get("VTPASS_REQUERY_CONCURRENCY", 8))
+VTPASS_REQUERY_MAX_ATTEMPTS = int(os.environ.get("VTPASS_REQUERY_MAX_ATTEMPTS", 12))
+VTPASS_REQUERY_BACKOFF = int(os.environ.get("VTPASS_REQUERY_BACKOFF", 60))
+VTPASS_REQUERY_MAX_BACKOFF = int(os.environ.get("VTPASS_REQUERY_MAX_BACKOFF", 3600))
+# Pending/processing orders untouched for this long lost their worker
+VTPASS_REQUERY_STALE_SECONDS = int(os.environ.get("VTPASS_REQUERY_STALE_SECONDS", 300))
+
+# Transactions held open at least this long count as slow in the
+# per-endpoint DB transaction metrics
+DB_TRANSACTION_SLOW_MS = int(os.environ.get("DB_TRANSACTION_SLOW_MS", 250))
+
+# Plan catalog: seconds between checks of the shared catalog version
+PLAN_CATALOG_SYNC_INTERVAL = float(os.environ.get("PLAN_CATALOG_SYNC_INTERVAL", 30))
+
+# Idempotency-Key: how long first responses are replayed, how long an
+# in-flight lock lives, and how long a duplicate waits for the first request
+IDEMPOTENCY_TTL = int(os.environ.get("IDEMPOTENCY_TTL", 24 * 60 * 60))
+IDEMPOTENCY_LOCK_TIMEOUT = int(os.environ.get("IDEMPOTENCY_LOCK_TIMEOUT", 120))
+IDEMPOTENCY_LOCK_WAIT = float(os.environ.get("IDEMPOTENCY_LOCK_WAIT", 30))
+
+# Statement exports: rows per server-side cursor fetch, largest export streamed
+# inline (bigger ones become background jobs), and download link lifetime
+STATEMENT_EXPORT_CHUNK_SIZE = int(os.environ.get("STATEMENT_EXPORT_CHUNK_SIZE", 2000))
+STATEMENT_EXPORT_SYNC_LIMIT = int(os.environ.get("STATEMENT_EXPORT_SYNC_LIMIT", 50000))
+STATEMENT_EXPORT_LINK_MAX_AGE = int(os.environ.get("STATEMENT_EXPORT_LINK_MAX_AGE", 7 * 24 * 60 * 60))
+
+# Ledger reconciliation: wallet ids aggregated per query, and ranges the
+# management command runs in parallel when not dispatching to Celery
+LEDGER_RECONCILE_RANGE_SIZE = int(os.environ.get("LEDGER_RECONCILE_RANGE_SIZE", 5000))
+LEDGER_RECONCILE_WORKERS = int(os.environ.get("LEDGER_RECONCILE_WORKERS", 4))
+
+# Wallet balance cache lifetime; writes go through, so this only bounds
+# how long a balance changed outside the ledger can be served stale
+WALLET_BALANCE_CACHE_TTL = int(os.environ.get("WALLET_BALANCE_CACHE_TTL", 10 * 60))
+
+# Paystack webhook inbox: events handled per consumer pass, and handler
+# attempts before an event is marked FAILED
+PAYSTACK_WEBHOOK_BATCH_SIZE = int(os.environ.get("PAYSTACK_WEBHOOK_BATCH_SIZE", 100))
+PAYSTACK_WEBHOOK_MAX_ATTEMPTS = int(os.environ.get("PAYSTACK_WEBHOOK_MAX_ATTEMPTS", 5))
+
+# Withdrawal payouts: withdrawals per Paystack bulk transfer, batches
+# dispatched per scheduler pass, transfer attempts before a refund, base
+# retry backoff (doubling per attempt), and how long a transfer may stay
+# processing without a webhook before it is verified
+PAYOUT_BATCH_SIZE = int(os.environ.get("PAYOUT_BATCH_SIZE", 100))
+PAYOUT_MAX_BATCHES_PER_RUN = int(os.environ.get("PAYOUT_MAX_BATCHES_PER_RUN", 20))
+PAYOUT_MAX_ATTEMPTS = int(os.environ.get("PAYOUT_MAX_ATTEMPTS", 3))
+PAYOUT_RETRY_BACKOFF = int(os.environ.get("PAYOUT_RETRY_BACKOFF", 5 * 60))
+PAYOUT_STALE_SECONDS = int(os.environ.get("PAYOUT_STALE_SECONDS", 30 * 60))
+
+# Largest number of recipients one bulk transfer request may pay
+BULK_TRANSFER_MAX_RECIPIENTS = int(os.environ.get("BULK_TRANSFER_MAX_RECIPIENTS", 100))
+
+# Bulk notifications: emails per Celery task, all sent over one mail
+# connection
+NOTIFICATION_EMAIL_CHUNK_SIZE = int(os.environ.get("NOTIFICATION_EMAIL_CHUNK_SIZE", 200))
+
+# Cached unread-notification counts; every change adjusts or drops the key,
+# so this only bounds how long a count that drifted can be served
+NOTIFICATION_UNREAD_CACHE_TTL = int(os.environ.get("NOTIFICATION_UNREAD_CACHE_TTL", 10 * 60))
+
+# Notification retention: days kept per notification_type, any other type
+# NOTIFICATION_RETENTION_DEFAULT_DAYS. The nightly purge deletes expired rows
+# NOTIFICATION_PURGE_BATCH_SIZE per transaction, at most
+# NOTIFICATION_PURGE_MAX_BATCHES batches per run
+NOTIFICATION_RETENTION_DAYS = {
+    "info": 30,
+    "success": 30,
+    "warning": 60,
+    "group": 90,
+    "contribution": 180,
+    "wallet": 365,
+    "payment": 365,
+    "payment_success": 365,
+    "payment_failed": 365,
+}
+NOTIFICATION_RETENTION_DEFAULT_DAYS = int(os.environ.get("NOTIFICATION_RETENTION_DEFAULT_DAYS", 90))
+NOTIFICATION_PURGE_BATCH_SIZE = int(os.environ.get("NOTIFICATION_PURGE_BATCH_SIZE", 5000))
+NOTIFICATION_PURGE_MAX_BATCHES = int(os.environ.get("NOTIFICATION_PURGE_MAX_BATCHES", 200))
+
+# Once the table is partitioned (manage.py partition_notifications), monthly
+# partitions are kept this many months ahead
+NOTIFICATION_PARTITION_MONTHS_AHEAD = int(os.environ.get("NOTIFICATION_PARTITION_MONTHS_AHEAD", 3))
+
+# Delivery channel per notification_type for users who have not picked one
+# (user_preference.NotificationPreference): "email" sends at once, "digest"
+# waits for the twice-daily digest, "in_app" sends no email. Unlisted types
+# are emailed
+NOTIFICATION_DEFAULT_CHANNELS = {
+    "info": "digest",
+    "success": "digest",
+    "contribution": "digest",
+    "group": "digest",
+    "earned": "digest",
+    "redeemed": "digest",
+}
+# Users claimed per digest transaction, and notifications listed per digest
+NOTIFICATION_DIGEST_USER_BATCH = int(os.environ.get("NOTIFICATION_DIGEST_USER_BATCH", 500))
+NOTIFICATION_DIGEST_MAX_ITEMS = int(os.environ.get("NOTIFICATION_DIGEST_MAX_ITEMS", 20))
+
+# Auto top-up scheduler: rows leased per claim (and per dispatched task),
+# claims per scheduler tick, how long a claim holds its rows, how errored
+# VTPass calls are retried, and how often a call without a final status is
+# requeried before the run fails
+AUTO_TOPUP_BATCH_SIZE = int(os.environ.get("AUTO_TOPUP_BATCH_SIZE", 20))
+AUTO_TOPUP_MAX_BATCHES_PER_RUN = int(os.environ.get("AUTO_TOPUP_MAX_BATCHES_PER_RUN", 500))
+AUTO_TOPUP_LEASE_SECONDS = int(os.environ.get("AUTO_TOPUP_LEASE_SECONDS", 600))
+AUTO_TOPUP_MAX_RETRIES = int(os.environ.get("AUTO_TOPUP_MAX_RETRIES", 3))
+AUTO_TOPUP_RETRY_DELAY = int(os.environ.get("AUTO_TOPUP_RETRY_DELAY", 60))
+AUTO_TOPUP_MAX_REQUERIES = int(os.environ.get("AUTO_TOPUP_MAX_REQUERIES", 30))
+
 
 ANYMAIL = {
     "BREVO_API_KEY": os.environ.get("BREVO_API_KEY"),
@@ -0,0 +1,115 @@
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.urls import URLResolver, get_resolver
+
+from . import metrics
+
+PREFIX = "db_transaction"
+FIELDS = ("count", "total_ms", "slow")
+
+
+def _outermost_block(conn):
+    """The connection's outermost atomic block, ignoring the test runner's own."""
+    for block in conn.atomic_blocks:
+        if not getattr(block, "_from_testcase", False):
+            return block
+    return None
+
+
+class TransactionTimer:
+    """
+    ``execute_wrapper`` timing every transaction a request opens.
+
+    A transaction is timed from its first statement, which is when the
+    database actually opens it, until it commits. One that rolls back ends
+    at the next statement outside it, or when the request finishes.
+    """
+
+    def __init__(self):
+        self.durations = []
+        self._block = None
+        self._started = None
+
+    def __call__(self, execute, sql, params, many, context):
+        conn = context["connection"]
+        block = _outermost_block(conn)
+        if self._block is not None and block is not self._block:
+            self.stop(self._block)
+        if block is not None and self._block is None:
+            self._block, self._started = block, time.perf_counter()
+            conn.on_commit(lambda: self.stop(block))
+        return execute(sql, params, many, context)
+
+    def stop(self, block=None):
+        if self._block is None or (block is not None and block is not self._block):
+            return
+        self.durations.append((time.perf_counter() - self._started) * 1000)
+        self._block = self._started = None
+
+
+def _key(endpoint, field):
+    # Some URL names contain spaces, which cache backends reject in keys
+    return f"{PREFIX}.{endpoint.replace(' ', '_')}.{field}"
+
+
+def record(endpoint, durations):
+    slow = sum(1 for ms in durations if ms >= settings.DB_TRANSACTION_SLOW_MS)
+    metrics.incr(_key(endpoint, "count"), len(durations))
+    metrics.incr(_key(endpoint, "total_ms"), round(sum(durations)))
+    if slow:
+        metrics.incr(_key(endpoint, "slow"), slow)
+
+
+class TransactionTimingMiddleware:
+    """
+    Records how long each endpoint holds database transactions open, keyed
+    by URL name, in the shared ``metrics`` counters.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = TransactionTimer()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        timer.stop()
+
+        match = getattr(request, "resolver_match", None)
+        if timer.durations and match is not None and match.view_name:
+            record(match.view_name, timer.durations)
+        return response
+
+
+def route_names(patterns=None, namespace=""):
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            prefix = f"{namespace}{pattern.namespace}:" if pattern.namespace else namespace
+            yield from route_names(pattern.url_patterns, prefix)
+        elif pattern.name:
+            yield f"{namespace}{pattern.name}"
+
+
+def endpoint_stats():
+    """Per endpoint: transactions timed, their mean and total duration, and how many were slow."""
+    names = {
+        name: [_key(name, field) for field in FIELDS]
+        for name in set(route_names())
+    }
+    counters = metrics.get_counters(*(key for keys in names.values() for key in keys))
+
+    stats = {}
+    for name, keys in sorted(names.items()):
+        count, total_ms, slow = (counters[key] for key in keys)
+        if count:
+            stats[name] = {
+                "transactions": count,
+                "total_ms": total_ms,
+                "mean_ms": round(total_ms / count, 2),
+                "slow": slow,
+            }
+    return stats
@@ -115,4 +115,13 @@ class InvalidAmountException(APIException):
                     detail = f"Invalid amount: ₦{amount}"
             else:
                 detail = self.default_detail
-        super().__init__(detail)
\ No newline at end of file
+        super().__init__(detail)
+
+class ProviderDegradedException(ServiceUnavailableException):
+    default_detail = 'Our service provider is currently degraded. Please try again shortly.'
+    default_code = 'provider_degraded'
+
+
+class BalanceHistoryUnavailable(ServiceUnavailableException):
+    default_detail = 'Balance history for this period is still being prepared. Please try again later.'
+    default_code = 'balance_history_unavailable'
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bonus', '0003_alter_referral_referral_code'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bonushistory',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='bonus_history_recent_idx'),
+        ),
+    ]
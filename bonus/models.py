@@ -78,6 +78,9 @@ class BonusHistory(models.Model):
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = "Bonus Histories"
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='bonus_history_recent_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.email} - {self.transaction_type} - {self.points} pts"
@@ -0,0 +1,7 @@
+from bluesea_mobile.pagination import KeysetPagination
+
+
+class BonusHistoryPagination(KeysetPagination):
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 50
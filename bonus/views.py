@@ -21,6 +21,8 @@ from .utils import (
     user_points_summary,
     award_signup_bonus,
 )
+from .pagination import BonusHistoryPagination
+from rest_framework.exceptions import NotFound
 import logging
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExample
 from drf_spectacular.types import OpenApiTypes
@@ -83,12 +85,15 @@ class BonusHistoryView(APIView):
                 required=False,
             ),
             OpenApiParameter(
-                name="page", type=int, description="Page number", required=False
+                name="cursor",
+                type=str,
+                description="Cursor from the previous page's `next` link",
+                required=False,
             ),
             OpenApiParameter(
                 name="page_size",
                 type=int,
-                description="Items per page (default: 20)",
+                description="Items per page (default: 20, max: 50)",
                 required=False,
             ),
         ],
@@ -104,28 +109,22 @@ class BonusHistoryView(APIView):
             if transaction_type:
                 history = history.filter(transaction_type=transaction_type)
 
-            # Pagination
-            page_size = int(request.query_params.get("page_size", 20))
-            page = int(request.query_params.get("page", 1))
-            start = (page - 1) * page_size
-            end = start + page_size
-
-            total_count = history.count()
-            history = history[start:end]
-
-            serializer = BonusHistorySerializer(history, many=True)
+            paginator = BonusHistoryPagination()
+            page = paginator.paginate_queryset(history, request, view=self)
+            serializer = BonusHistorySerializer(page, many=True)
 
             return Response(
                 {
                     "success": True,
-                    "count": total_count,
-                    "page": page,
-                    "page_size": page_size,
+                    "next": paginator.get_next_link(),
+                    "page_size": paginator.page_size,
                     "data": serializer.data,
                 },
                 status=status.HTTP_200_OK,
             )
 
+        except NotFound:
+            raise
         except Exception as e:
             logger.error(f"Error getting history for {request.user.email}: {str(e)}")
             return Response(
@@ -6,8 +6,8 @@ from .models import Group, GroupMember
 class GroupMemberInline(admin.TabularInline):
     model = GroupMember
     extra = 0
-    fields = ['user', 'role', 'joined_at']
-    readonly_fields = ['joined_at']
+    fields = ['user', 'role', 'payment_status', 'locked_amount', 'paid_amount', 'joined_at']
+    readonly_fields = ['payment_status', 'locked_amount', 'paid_amount', 'joined_at']
 
 
 @admin.register(Group)
@@ -0,0 +1,166 @@
+import logging
+import math
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+
+from payments.models import GroupPayment, GroupPaymentContribution
+from payments.vtpass import generate_reference_id
+from wallet import ledger
+from wallet.ledger import Posting
+from wallet.models import Wallet
+from .models import Group, GroupMember
+
+logger = logging.getLogger(__name__)
+
+OPEN_STATUSES = ("pending", "partial")
+
+
+class ContributionError(ValueError):
+    pass
+
+
+def member_share(group):
+    """Each member's share: the target split across the owner and every invitee."""
+    invited = [email for email in (group.invite_members or "").split(",") if email.strip()]
+    return math.ceil(group.target_amount / (len(invited) + 1))
+
+
+def group_service_details(group):
+    """
+    VTPass details for the group's purchase. Groups keep the network (or
+    disco) in ``plan_type`` and the phone, smartcard or meter number in
+    ``sub_number``.
+    """
+    return {
+        "network": group.plan_type,
+        "disco": group.plan_type,
+        "plan_id": group.plan,
+        "meter_type": group.plan,
+        "phone_number": group.sub_number,
+        "billersCode": group.sub_number,
+    }
+
+
+def lock_contribution(member):
+    """
+    Reserve the member's share of the group's target in their wallet's
+    ``locked_balance`` and add it to the group's running total.
+
+    The group row is held only for this short transaction, so members lock
+    one at a time as they join instead of all at once at payment time. The
+    last share is capped at what the target still needs; reaching the
+    target queues the group's capture. Raises ``ContributionError`` or
+    ``ledger.InsufficientFunds``. Returns the locked amount.
+    """
+    from .tasks import capture_group_contributions
+
+    with transaction.atomic():
+        group = Group.objects.select_for_update().get(id=member.group_id)
+        member = GroupMember.objects.select_for_update().get(id=member.id)
+        if not group.active or group.status not in OPEN_STATUSES:
+            raise ContributionError("Group is not collecting contributions")
+        if member.payment_status in ("locked", "paid"):
+            raise ContributionError("Contribution already locked")
+
+        amount = min(member_share(group), group.target_amount - group.current_amount)
+        if amount <= 0:
+            raise ContributionError("Group target already reached")
+
+        wallet_id = Wallet.objects.values_list("id", flat=True).get(user_id=member.user_id)
+        ledger.lock(wallet_id, amount)
+        GroupMember.objects.filter(id=member.id).update(
+            payment_status="locked", locked_amount=amount
+        )
+        Group.objects.filter(id=group.id).update(
+            current_amount=F("current_amount") + amount, status="partial"
+        )
+
+        if group.current_amount + amount >= group.target_amount:
+            transaction.on_commit(lambda: capture_group_contributions.delay(str(group.id)))
+    return amount
+
+
+def release_contribution(member):
+    """
+    Hand a member's locked share back to their wallet and take it off the
+    group's running total. Returns the released amount (0 if none).
+    """
+    with transaction.atomic():
+        member = GroupMember.objects.select_for_update().get(id=member.id)
+        if member.payment_status != "locked" or member.locked_amount <= 0:
+            return 0
+
+        amount = member.locked_amount
+        wallet_id = Wallet.objects.values_list("id", flat=True).get(user_id=member.user_id)
+        ledger.unlock(wallet_id, amount)
+        GroupMember.objects.filter(id=member.id).update(
+            payment_status="pending", locked_amount=0
+        )
+        Group.objects.filter(id=member.group_id).update(
+            current_amount=F("current_amount") - amount
+        )
+    return amount
+
+
+def capture_group(group_id):
+    """
+    Turn a funded group's locked shares into a ``GroupPayment``: capture
+    every share with one set-based ledger step, record the contributions in
+    bulk and queue the purchase once that commits. Returns the payment, or
+    None if the group is not (or no longer) ready.
+    """
+    from payments.tasks import purchase_group_payment
+
+    with transaction.atomic():
+        group = Group.objects.select_for_update().get(id=group_id)
+        if group.status != "partial" or group.current_amount < group.target_amount:
+            return None
+
+        members = list(
+            GroupMember.objects.filter(group=group, payment_status="locked")
+            .select_related("user__wallet")
+        )
+        payment = GroupPayment.objects.create(
+            group=group,
+            initiated_by=group.created_by,
+            payment_type=group.service_type,
+            total_amount=sum((Decimal(m.locked_amount) for m in members), Decimal("0")),
+            service_details=group_service_details(group),
+            status="processing",
+            vtu_reference=generate_reference_id(),
+            progressive=True,
+        )
+        ledger.capture_all(
+            [
+                Posting(
+                    member.user.wallet.id,
+                    member.locked_amount,
+                    "DEBIT",
+                    f"Group payment contribution - {group.service_type}",
+                    f"GP-{payment.id}-{member.user.id}",
+                )
+                for member in members
+            ]
+        )
+        GroupPaymentContribution.objects.bulk_create(
+            [
+                GroupPaymentContribution(
+                    group_payment=payment,
+                    member=member,
+                    amount=member.locked_amount,
+                    status="completed",
+                )
+                for member in members
+            ]
+        )
+        GroupMember.objects.filter(id__in=[member.id for member in members]).update(
+            payment_status="paid", paid_amount=F("locked_amount"), locked_amount=0
+        )
+        group.status = "completed"
+        group.save(update_fields=["status", "updated_at"])
+
+        transaction.on_commit(lambda: purchase_group_payment.delay(payment.id))
+    logger.info(f"Captured {len(members)} contributions for group {group.id}")
+    return payment
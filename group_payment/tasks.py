@@ -0,0 +1,11 @@
+from celery import shared_task
+
+from .contributions import capture_group
+
+
+@shared_task
+def capture_group_contributions(group_id):
+    payment = capture_group(group_id)
+    if payment is None:
+        return f"Group {group_id} is not ready for capture"
+    return f"Group {group_id} captured as group payment {payment.id}"
@@ -1,3 +1,202 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from accounts.models import Profile
+from bluesea_mobile.utils import VTUAPIException
+from payments.group_purchases import requery_group_payments
+from payments.models import GroupPayment
+from payments.tasks import purchase_group_payment
+from wallet.models import Wallet
+from .contributions import capture_group, lock_contribution
+from .models import Group, GroupMember
+
+
+def make_user(n, balance="1000.00"):
+    user = Profile.objects.create_user(
+        email=f"saver{n}@example.com",
+        phone=f"0801000030{n}",
+        surname="Saver",
+        other_names=str(n),
+        role="user",
+    )
+    user.set_transaction_pin("1234")
+    Wallet.objects.create(user=user, balance=Decimal(balance))
+    return user
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class GroupContributionLockingTestCase(APITestCase):
+    def setUp(self):
+        self.owner = make_user(0)
+        self.invitees = [make_user(1), make_user(2, balance="100.00")]
+        self.group = Group.objects.create(
+            name="Family",
+            service_type="airtime",
+            sub_number="08012345678",
+            plan_type="mtn",
+            target_amount=900,
+            invite_members="saver1@example.com,saver2@example.com",
+            created_by=self.owner,
+        )
+        self.owner_member = GroupMember.objects.create(
+            group=self.group, user=self.owner, role="owner"
+        )
+
+    def join(self, user):
+        self.client.force_authenticate(user)
+        with mock.patch("group_payment.tasks.capture_group_contributions.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse("join-group"),
+                    {"transaction_pin": "1234", "join_code": self.group.join_code},
+                )
+        return response, delay
+
+    def wallet(self, user):
+        return Wallet.objects.get(user=user)
+
+    def test_joining_locks_share_and_advances_total(self):
+        lock_contribution(self.owner_member)
+        response, delay = self.join(self.invitees[0])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["locked_amount"], 300)
+        wallet = self.wallet(self.invitees[0])
+        self.assertEqual((wallet.balance, wallet.locked_balance), (Decimal("700.00"), Decimal("300.00")))
+        self.group.refresh_from_db()
+        self.assertEqual((self.group.current_amount, self.group.status), (600, "partial"))
+        delay.assert_not_called()
+
+    def test_short_member_cannot_join(self):
+        response, _ = self.join(self.invitees[1])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(GroupMember.objects.filter(user=self.invitees[1]).exists())
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.current_amount, 0)
+
+    def test_leaving_releases_locked_share(self):
+        lock_contribution(self.owner_member)
+        self.join(self.invitees[0])
+
+        response = self.client.post(reverse("leave-group"), {"group_id": str(self.group.id)})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        wallet = self.wallet(self.invitees[0])
+        self.assertEqual((wallet.balance, wallet.locked_balance), (Decimal("1000.00"), Decimal("0.00")))
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.current_amount, 300)
+
+
+class GroupCaptureTestCase(TestCase):
+    def setUp(self):
+        self.users = [make_user(n) for n in range(3)]
+        self.group = Group.objects.create(
+            name="Flatmates",
+            service_type="airtime",
+            sub_number="08012345678",
+            plan_type="mtn",
+            target_amount=1000,
+            invite_members="saver1@example.com,saver2@example.com",
+            created_by=self.users[0],
+        )
+        self.members = [
+            GroupMember.objects.create(group=self.group, user=user, role="owner" if n == 0 else "member")
+            for n, user in enumerate(self.users)
+        ]
+
+    def fund(self):
+        with mock.patch("group_payment.tasks.capture_group_contributions.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                amounts = [lock_contribution(member) for member in self.members]
+        return amounts, delay
+
+    def test_reaching_target_captures_locked_shares_once(self):
+        amounts, delay = self.fund()
+
+        # The last share is capped at what the target still needs
+        self.assertEqual(amounts, [334, 334, 332])
+        delay.assert_called_once_with(str(self.group.id))
+
+        with mock.patch("payments.tasks.purchase_group_payment.delay") as purchase:
+            with self.captureOnCommitCallbacks(execute=True):
+                payment = capture_group(self.group.id)
+        self.assertIsNone(capture_group(self.group.id))
+        purchase.assert_called_once_with(payment.id)
+
+        self.assertEqual(payment.total_amount, Decimal("1000.00"))
+        self.assertEqual(payment.contributions.count(), 3)
+        wallets = Wallet.objects.filter(user__in=self.users).order_by("user_id")
+        self.assertEqual(
+            [(w.balance, w.locked_balance) for w in wallets],
+            [(Decimal("666.00"), Decimal("0.00"))] * 2 + [(Decimal("668.00"), Decimal("0.00"))],
+        )
+        self.assertEqual(
+            list(GroupMember.objects.filter(group=self.group).values_list("payment_status", flat=True).distinct()),
+            ["paid"],
+        )
+
+    @mock.patch("payments.tasks.notify_group_payment.delay")
+    @mock.patch("payments.group_purchases.top_up")
+    def test_failed_purchase_refunds_contributors(self, top_up, notify):
+        top_up.return_value = {
+            "code": "016",
+            "content": {"transactions": {"status": "failed"}},
+            "response_description": "TRANSACTION FAILED",
+        }
+        self.fund()
+        with mock.patch("payments.tasks.purchase_group_payment.delay"):
+            payment = capture_group(self.group.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            purchase_group_payment(payment.id)
+
+        payment.refresh_from_db()
+        self.group.refresh_from_db()
+        self.assertEqual(payment.status, "failed")
+        self.assertEqual(self.group.status, "failed")
+        self.assertEqual(
+            set(Wallet.objects.filter(user__in=self.users).values_list("balance", flat=True)),
+            {Decimal("1000.00")},
+        )
+        notify.assert_called_once_with(payment.id, "TRANSACTION FAILED")
+        self.assertEqual(GroupPayment.objects.count(), 1)
+
+    @mock.patch("payments.group_purchases.get_receipt")
+    @mock.patch("payments.group_purchases.top_up")
+    def test_requeried_failure_fails_the_group(self, top_up, get_receipt):
+        top_up.side_effect = VTUAPIException(detail="VTU provider error: timed out")
+        self.fund()
+        with mock.patch("payments.tasks.purchase_group_payment.delay"):
+            payment = capture_group(self.group.id)
+        self.assertTrue(payment.progressive)
+
+        purchase_group_payment(payment.id)
+        GroupPayment.objects.filter(id=payment.id).update(
+            updated_at=timezone.now() - timedelta(hours=1)
+        )
+        get_receipt.return_value = {
+            "code": "000",
+            "content": {"transactions": {"status": "failed"}},
+            "response_description": "TRANSACTION FAILED",
+        }
+        with mock.patch("payments.tasks.notify_group_payment.delay"):
+            self.assertEqual(requery_group_payments(), 1)
+
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.status, "failed")
+        self.assertEqual(
+            set(GroupMember.objects.filter(group=self.group).values_list("payment_status", flat=True)),
+            {"failed"},
+        )
+        self.assertEqual(
+            set(Wallet.objects.filter(user__in=self.users).values_list("balance", flat=True)),
+            {Decimal("1000.00")},
+        )
@@ -1,9 +1,11 @@
-import math
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
+from django.db import transaction
 from django.shortcuts import get_object_or_404
+from wallet.ledger import InsufficientFunds
+from .contributions import ContributionError, lock_contribution, release_contribution
 from .models import Group, GroupMember
 from drf_spectacular.utils import extend_schema, OpenApiExample
 from drf_spectacular.types import OpenApiTypes
@@ -122,30 +124,39 @@ class CreateGroupView(APIView):
                         status=status.HTTP_400_BAD_REQUEST,
                     )
 
-            # Create group
-            group = Group.objects.create(
-                name=name,
-                description=description,
-                service_type=service_type,
-                sub_number=sub_number,
-                current_amount=math.ceil(target_amount / (len(valid_emails) + 1)),
-                target_amount=target_amount,
-                invite_members=",".join(sorted(valid_emails)),
-                plan=plan,
-                plan_type=plan_type,
-                created_by=request.user,
-                status="pending",
-            )
+            # Create group; the owner's share is locked straight away
+            try:
+                with transaction.atomic():
+                    group = Group.objects.create(
+                        name=name,
+                        description=description,
+                        service_type=service_type,
+                        sub_number=sub_number,
+                        target_amount=target_amount,
+                        invite_members=",".join(sorted(valid_emails)),
+                        plan=plan,
+                        plan_type=plan_type,
+                        created_by=request.user,
+                        status="pending",
+                    )
 
-            # Add creator as owner
-            GroupMember.objects.create(
-                group=group,
-                user=request.user,
-                role="owner",
-                payment_status="paid",
-                locked_amount=math.ceil(target_amount / (len(valid_emails) + 1)),
-                paid_amount=target_amount,
-            )
+                    # Add creator as owner
+                    owner = GroupMember.objects.create(
+                        group=group,
+                        user=request.user,
+                        role="owner",
+                    )
+                    locked_amount = lock_contribution(owner)
+            except InsufficientFunds:
+                return Response(
+                    {"error": "Insufficient funds to lock your contribution. Group not created."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            except ContributionError as e:
+                return Response(
+                    {"error": f"{e}. Group not created."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
 
             return Response(
                 {
@@ -157,6 +168,7 @@ class CreateGroupView(APIView):
                         "description": group.description,
                         "service_type": group.service_type,
                         "target_amount": group.target_amount,
+                        "locked_amount": locked_amount,
                         "status": group.status,
                         "join_code": group.join_code,
                         "created_at": group.created_at.isoformat(),
@@ -224,19 +236,7 @@ class AddGroupMemberView(APIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
             group.invite_members = group.invite_members + "," + user_email
-
-            count = GroupMember.objects.filter(
-                payment_status="paid", group=group
-            ).count()
-
-            invited_emails = group.invite_members.split(",")
-            target_amount = group.target_amount
-
-            # Update contribution balance
-            group.current_amount = (
-                math.ceil(target_amount / (len(invited_emails) + 1)) * count
-            )
-            group.save()
+            group.save(update_fields=["invite_members", "updated_at"])
 
             return Response(
                 {
@@ -534,29 +534,30 @@ class JoinGroupView(APIView):
                     status=status.HTTP_403_FORBIDDEN,
                 )
 
-            target_amount = group_obj.target_amount
-
-            # Update contribution balance
-            group_obj.current_amount += math.ceil(
-                target_amount / (len(invited_emails) + 1)
-            )
-            group_obj.save()
-
-            # Add member
-
-            member = GroupMember.objects.create(
-                group=group_obj,
-                user=user_profile,
-                role="member",
-                locked_amount=target_amount / (len(invited_emails) + 1),
-                paid_amount=target_amount,
-                payment_status="paid",
-            )
+            # Add member and lock their share of the target
+            try:
+                with transaction.atomic():
+                    member = GroupMember.objects.create(
+                        group=group_obj,
+                        user=user_profile,
+                        role="member",
+                    )
+                    locked_amount = lock_contribution(member)
+            except InsufficientFunds:
+                return Response(
+                    {"error": "Insufficient funds to lock your contribution"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            except ContributionError as e:
+                return Response(
+                    {"error": str(e)}, status=status.HTTP_400_BAD_REQUEST
+                )
 
             return Response(
                 {
                     "success": True,
                     "message": f"Successfully joined group '{group_obj.name}'",
+                    "locked_amount": locked_amount,
                     "group": {
                         "id": str(group_obj.id),
                         "name": group_obj.name,
@@ -623,13 +624,10 @@ class LeaveGroupView(APIView):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            target_amount = group.target_amount
-            invited_emails = group.invite_members.split(",")
-            # Update contribution balance
-            group.current_amount -= math.ceil(target_amount / (len(invited_emails) + 1))
-            group.save()
-            # Delete member
-            member.delete()
+            # Return the locked share, then delete member
+            with transaction.atomic():
+                release_contribution(member)
+                member.delete()
 
             return Response(
                 {"success": True, "message": "Successfully left the group"},
@@ -683,10 +681,19 @@ class CancelGroupView(APIView):
                     status=status.HTTP_403_FORBIDDEN,
                 )
 
-            # Cancel group
-            group.status = "canceled"
-            group.active = False
-            group.save()
+            # Cancel group and return every locked share
+            with transaction.atomic():
+                group = Group.objects.select_for_update().get(id=group.id)
+                if group.status == "completed":
+                    return Response(
+                        {"error": "Group has already been paid for"},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+                for locked in group.members.filter(payment_status="locked"):
+                    release_contribution(locked)
+                group.status = "canceled"
+                group.active = False
+                group.save(update_fields=["status", "active", "updated_at"])
 
             return Response(
                 {"success": True, "message": "Group payment canceled successfully"},
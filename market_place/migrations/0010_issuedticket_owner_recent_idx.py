@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("market_place", "0009_remove_eventwithdrawal_account_name_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="issuedticket",
+            index=models.Index(
+                fields=["owner_email", "-created_at", "-id"],
+                name="issued_ticket_owner_recent_idx",
+            ),
+        ),
+    ]
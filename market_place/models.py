@@ -324,6 +324,12 @@ class IssuedTicket(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["owner_email", "-created_at", "-id"],
+                name="issued_ticket_owner_recent_idx",
+            )
+        ]
 
     def __str__(self):
         ticket_type_name = self.ticket_type.name if self.ticket_type else "Free Entry"
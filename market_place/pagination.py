@@ -0,0 +1,7 @@
+from bluesea_mobile.pagination import KeysetPagination
+
+
+class TicketPagination(KeysetPagination):
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 100
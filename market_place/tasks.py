@@ -1,6 +1,7 @@
 from datetime import timedelta
 from celery import shared_task
 from django.utils import timezone
+from notifications.utils import send_bulk_notifications
 from .models import IssuedTicket
 import logging
 
@@ -42,9 +43,27 @@ def send_event_reminder_notifications():
         event__event_date__lte=tomorrow
     ).select_related('event', 'purchased_by')
     
-    # TODO: Send notifications
-    # for ticket in upcoming_tickets:
-    #     send_event_reminder(ticket)
-    
-    logger.info(f"Sent reminders for {upcoming_tickets.count()} upcoming events")
-    return f"Sent {upcoming_tickets.count()} reminders"
\ No newline at end of file
+    # One reminder per ticket holder per event, sent as a bulk notification
+    holders_by_event = {}
+    for ticket in upcoming_tickets.exclude(purchased_by=None):
+        event, holders = holders_by_event.setdefault(ticket.event_id, (ticket.event, {}))
+        holders[ticket.purchased_by_id] = ticket.purchased_by
+
+    reminded = 0
+    for event, holders in holders_by_event.values():
+        send_bulk_notifications(
+            list(holders.values()),
+            title='Event Reminder',
+            message='{event_title} starts {event_date} at {event_location}',
+            notification_type='info',
+            email_subject=f'BlueSea Mobile - Reminder: {event.event_title}',
+            context={
+                'event_title': event.event_title,
+                'event_date': timezone.localtime(event.event_date).strftime('%d %b %Y, %I:%M %p'),
+                'event_location': event.event_location,
+            }
+        )
+        reminded += len(holders)
+
+    logger.info(f"Sent reminders to {reminded} ticket holders for {len(holders_by_event)} upcoming events")
+    return f"Sent {reminded} reminders"
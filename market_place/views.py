@@ -28,10 +28,12 @@ import secrets
 from django.db import transaction
 import csv
 from wallet.models import Wallet
+from payments.idempotency import idempotent
 from bonus.models import BonusPoint
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
 from .utils import generate_ticket_qr_code, parse_qr_data
+from .pagination import TicketPagination
 import uuid
 import base64
 from django.core.files.base import ContentFile
@@ -534,6 +536,7 @@ class PurchaseTicketView(APIView):
         },
         tags=["Tickets"],
     )
+    @idempotent
     def post(self, request, event_id):
         """Purchase tickets for a specific event"""
         # Pass event_id to serializer context
@@ -1294,7 +1297,19 @@ class MyTicketsListView(APIView):
                 location=OpenApiParameter.QUERY,
                 description="Filter by status",
                 enum=["all", "upcoming", "used", "expired", "canceled"],
-            )
+            ),
+            OpenApiParameter(
+                name="cursor",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Cursor from the previous page's `next` link",
+            ),
+            OpenApiParameter(
+                name="page_size",
+                type=int,
+                location=OpenApiParameter.QUERY,
+                description="Tickets per page (default: 50, max: 100)",
+            ),
         ],
         responses={200: TicketListSerializer(many=True)},
         tags=["Tickets"],
@@ -1308,14 +1323,14 @@ class MyTicketsListView(APIView):
             owner_email=request.user.email
         ).select_related("event", "ticket_type", "event__vendor")
 
-        # Calculate statistics
-        stats = {
-            "all": base_tickets.count(),
-            "upcoming": base_tickets.filter(status="upcoming").count(),
-            "used": base_tickets.filter(status="used").count(),
-            "expired": base_tickets.filter(status="expired").count(),
-            "canceled": base_tickets.filter(status="canceled").count(),
-        }
+        # Calculate statistics in one aggregate query
+        stats = base_tickets.aggregate(
+            all=models.Count("id"),
+            **{
+                ticket_status: models.Count("id", filter=models.Q(status=ticket_status))
+                for ticket_status in ("upcoming", "used", "expired", "canceled")
+            },
+        )
 
         # Filter by status
         if status_filter != "all":
@@ -1323,12 +1338,19 @@ class MyTicketsListView(APIView):
         else:
             tickets = base_tickets
 
+        paginator = TicketPagination()
+        page = paginator.paginate_queryset(tickets, request, view=self)
         serializer = TicketListSerializer(
-            tickets, many=True, context={"request": request}
+            page, many=True, context={"request": request}
         )
 
         return Response(
-            {"state": True, "stats": stats, "tickets": serializer.data},
+            {
+                "state": True,
+                "stats": stats,
+                "next": paginator.get_next_link(),
+                "tickets": serializer.data,
+            },
             status=status.HTTP_200_OK,
         )
 
@@ -1595,8 +1617,10 @@ class CancelTicketView(APIView):
 
                 # Process refund for paid tickets
                 if refund_amount > 0 and ticket.ticket_type:
-                    wallet.balance += refund_amount
-                    wallet.save()
+                    wallet.credit(
+                        refund_amount,
+                        description=f"Refund for canceled ticket to {ticket.event}",
+                    )
 
                     # Restore ticket quantity
                     ticket.ticket_type.quantity_available += 1
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.contrib import messages
+from .counters import recount
 from .models import Notification
 
 
@@ -64,12 +65,30 @@ class NotificationAdmin(admin.ModelAdmin):
         )
     read_status.short_description = 'Read Status'
 
+    def _recount(self, queryset):
+        recount(set(queryset.values_list('user_id', flat=True)))
+
+    def delete_queryset(self, request, queryset):
+        user_ids = set(queryset.values_list('user_id', flat=True))
+        super().delete_queryset(request, queryset)
+        recount(user_ids)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        recount([obj.user_id])
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        recount([obj.user_id])
+
     def mark_as_read(self, request, queryset):
         updated = queryset.filter(is_read=False).update(is_read=True)
+        self._recount(queryset)
         self.message_user(request, f'{updated} notification(s) marked as read.', messages.SUCCESS)
     mark_as_read.short_description = 'Mark selected notifications as read'
 
     def mark_as_unread(self, request, queryset):
         updated = queryset.filter(is_read=True).update(is_read=False)
+        self._recount(queryset)
         self.message_user(request, f'{updated} notification(s) marked as unread.', messages.INFO)
     mark_as_unread.short_description = 'Mark selected notifications as unread'
@@ -0,0 +1,35 @@
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .realtime import user_group
+
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Pushes a user's new notifications, wallet balances and purchase status
+    changes as ``{"event": ..., "data": ...}`` frames.
+
+    An idle socket costs only its group membership: the consumer keeps no
+    timers, polls nothing and touches the database only to authenticate.
+    """
+
+    group_name = None
+
+    async def connect(self):
+        user = self.scope.get("user")
+        if user is None or not user.is_authenticated:
+            await self.close()
+            return
+        self.group_name = user_group(user.id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if self.group_name:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive(self, text_data=None, bytes_data=None):
+        # The socket is push-only; anything the client sends is ignored
+        pass
+
+    async def push(self, message):
+        await self.send_json({"event": message["event"], "data": message["data"]})
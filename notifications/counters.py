@@ -0,0 +1,153 @@
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+
+from .models import Notification, UnreadCounter, User
+
+logger = logging.getLogger(__name__)
+
+
+def _key(user_id):
+    return f"notifications:unread:{user_id}"
+
+
+def _actual(user_ids):
+    counts = dict(
+        Notification.objects.filter(user_id__in=user_ids, is_read=False)
+        .order_by()
+        .values_list("user_id")
+        .annotate(unread=Count("id"))
+    )
+    return {user_id: counts.get(user_id, 0) for user_id in user_ids}
+
+
+def _refresh_cache(deltas):
+    """
+    A single user's cached count is adjusted in place. A fan-out drops the
+    keys in one round trip instead, and the next reads reload the column.
+    """
+    try:
+        if len(deltas) > 1:
+            cache.delete_many([_key(user_id) for user_id in deltas])
+            return
+        for user_id, delta in deltas.items():
+            try:
+                cache.incr(_key(user_id), delta)
+            except ValueError:
+                pass  # Not cached; the next read loads the column
+    except Exception as e:
+        logger.warning(f"Unread counter cache update failed: {str(e)}")
+
+
+def add_many(deltas):
+    """
+    Add ``{user_id: delta}`` to the users' unread counters, never below
+    zero. Call it in the same transaction as the notification change it
+    counts. Rows missing for a user are created from a recount, which
+    already includes that change. The cache is updated after commit.
+    """
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        by_delta[delta].append(user_id)
+
+    with transaction.atomic():
+        missing = []
+        for delta, user_ids in by_delta.items():
+            updated = UnreadCounter.objects.filter(user_id__in=user_ids).update(
+                count=Greatest(F("count") + delta, 0)
+            )
+            if updated < len(user_ids):
+                missing.extend(user_ids)
+
+        if missing:
+            existing = set(
+                UnreadCounter.objects.filter(user_id__in=missing).values_list("user_id", flat=True)
+            )
+            created = _actual([user_id for user_id in missing if user_id not in existing])
+            UnreadCounter.objects.bulk_create(
+                [UnreadCounter(user_id=user_id, count=count) for user_id, count in created.items()],
+                ignore_conflicts=True,
+            )
+
+        transaction.on_commit(lambda: _refresh_cache(deltas))
+
+
+def add(user_id, delta):
+    add_many({user_id: delta})
+
+
+def unread_count(user_id):
+    """The user's unread count, from the cache when it has it and the counter column when not."""
+    try:
+        cached = cache.get(_key(user_id))
+    except Exception as e:
+        logger.warning(f"Unread counter cache read failed: {str(e)}")
+        cached = None
+    if cached is not None:
+        return max(cached, 0)
+
+    count = UnreadCounter.objects.filter(user_id=user_id).values_list("count", flat=True).first()
+    if count is None:
+        count = _actual([user_id])[user_id]
+    try:
+        cache.add(_key(user_id), count, settings.NOTIFICATION_UNREAD_CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"Unread counter cache write failed: {str(e)}")
+    return count
+
+
+def recount(user_ids):
+    """
+    Reset the given users' counters from their notifications. Returns how
+    many had drifted.
+
+    The existing counter rows are locked first, so a notification change
+    still in flight either commits before the recount sees it or adds its
+    delta on top of the recounted value afterwards.
+    """
+    user_ids = list(user_ids)
+    with transaction.atomic():
+        stored = dict(
+            UnreadCounter.objects.select_for_update()
+            .filter(user_id__in=user_ids)
+            .order_by("user_id")
+            .values_list("user_id", "count")
+        )
+        drifted = [
+            UnreadCounter(user_id=user_id, count=count)
+            for user_id, count in _actual(user_ids).items()
+            if stored.get(user_id, 0) != count
+        ]
+        UnreadCounter.objects.bulk_create(
+            drifted,
+            update_conflicts=True,
+            unique_fields=["user"],
+            update_fields=["count"],
+        )
+        keys = [_key(counter.user_id) for counter in drifted]
+        if keys:
+            transaction.on_commit(lambda: cache.delete_many(keys))
+    return len(drifted)
+
+
+def repair(batch_size=1000):
+    """Recount every user's counter, ``batch_size`` users per transaction. Returns how many had drifted."""
+    repaired, last_id = 0, None
+    while True:
+        users = User.objects.order_by("id").values_list("id", flat=True)
+        if last_id is not None:
+            users = users.filter(id__gt=last_id)
+        user_ids = list(users[:batch_size])
+        if not user_ids:
+            return repaired
+        repaired += recount(user_ids)
+        last_id = user_ids[-1]
@@ -0,0 +1,97 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+DIGEST_SUBJECT = "BlueSea Mobile - Your notification digest"
+DIGEST_TEMPLATE = "notifications/digest.html"
+
+
+def _pending_user_ids(after_id, limit):
+    return list(
+        Notification.objects.filter(pending_digest=True, user_id__gt=after_id)
+        .order_by("user_id")
+        .values_list("user_id", flat=True)
+        .distinct()[:limit]
+    )
+
+
+def claim_digests(user_ids, cutoff):
+    """
+    Take the users' notifications created up to ``cutoff`` off the digest
+    queue and return one bulk email recipient, ``[email, context]``, per
+    user. Rows another worker is already claiming are skipped.
+    """
+    with transaction.atomic():
+        notifications = list(
+            Notification.objects.select_for_update(skip_locked=True, of=("self",))
+            .filter(user_id__in=user_ids, pending_digest=True, created_at__lte=cutoff)
+            .select_related("user")
+            .order_by("user_id", "-id")
+        )
+        Notification.objects.filter(id__in=[n.id for n in notifications]).update(
+            pending_digest=False
+        )
+
+    digests = {}
+    for notification in notifications:
+        digests.setdefault(notification.user_id, (notification.user, []))[1].append(notification)
+
+    recipients = []
+    for user, items in digests.values():
+        if not user.email:
+            continue
+        shown = items[:settings.NOTIFICATION_DIGEST_MAX_ITEMS]
+        recipients.append([
+            user.email,
+            {
+                "user": {"first_name": user.first_name},
+                "count": len(items),
+                "more": len(items) - len(shown),
+                "items": [
+                    {
+                        "title": n.title,
+                        "message": n.message,
+                        "notification_type": n.notification_type,
+                        "created_at": timezone.localtime(n.created_at).strftime("%d %b, %H:%M"),
+                    }
+                    for n in shown
+                ],
+            },
+        ])
+    return recipients
+
+
+def send_digests(user_batch=None):
+    """
+    Send one digest email per user for everything queued since the last
+    run, ``user_batch`` users per claim. Emails go out through the bulk
+    email task, ``NOTIFICATION_EMAIL_CHUNK_SIZE`` per task. Returns how
+    many digests were queued.
+    """
+    from .tasks import send_bulk_email_notification
+
+    user_batch = user_batch or settings.NOTIFICATION_DIGEST_USER_BATCH
+    chunk_size = settings.NOTIFICATION_EMAIL_CHUNK_SIZE
+    cutoff = timezone.now()
+
+    queued, after_id = 0, 0
+    while True:
+        user_ids = _pending_user_ids(after_id, user_batch)
+        if not user_ids:
+            return queued
+        recipients = claim_digests(user_ids, cutoff)
+        for start in range(0, len(recipients), chunk_size):
+            send_bulk_email_notification.delay(
+                email_subject=DIGEST_SUBJECT,
+                email_template=DIGEST_TEMPLATE,
+                email_context={"title": "Your notification digest"},
+                recipients=recipients[start:start + chunk_size],
+            )
+        queued += len(recipients)
+        after_id = user_ids[-1]
@@ -0,0 +1,127 @@
+import time
+import uuid
+from unittest import mock
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import override_settings
+
+from accounts.models import Profile
+from notifications.tasks import send_bulk_email_notification, send_email_notification
+from notifications.utils import send_bulk_notifications, send_notification
+
+
+class Rollback(Exception):
+    pass
+
+
+class CountingBackend(EmailBackend):
+    """In-memory mail backend counting how many connections get opened."""
+
+    opened = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        CountingBackend.opened += 1
+
+
+def run_inline(task):
+    """Stand-in for ``task.delay`` that runs the task in-process and counts messages."""
+
+    def delay(*args, **kwargs):
+        run_inline.messages += 1
+        return task.apply(args=args, kwargs=kwargs)
+
+    return delay
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare notifying many users one send_notification at a time against "
+        "send_bulk_notifications. Celery tasks run in-process, mail goes to an "
+        "in-memory backend and the database work is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipients", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        size = options["recipients"]
+        try:
+            with transaction.atomic():
+                users = self.make_users(size)
+                one_by_one = self.measure(lambda: self.one_by_one(users))
+                bulk = self.measure(lambda: self.bulk(users))
+                raise Rollback
+        except Rollback:
+            pass
+        self.report(size, "one-by-one", one_by_one)
+        self.report(size, "bulk", bulk)
+
+    def make_users(self, size):
+        run = uuid.uuid4().hex[:8]
+        return Profile.objects.bulk_create(
+            [
+                Profile(
+                    email=f"bench-{run}-{n}@example.com",
+                    phone=f"0900{n:07d}",
+                    first_name=f"Bench{n}",
+                    surname="Bench",
+                    other_names=str(n),
+                    # Random codes collide at this scale
+                    referral_code=f"{n:06d}",
+                )
+                for n in range(size)
+            ]
+        )
+
+    def one_by_one(self, users):
+        for user in users:
+            send_notification(
+                user=user,
+                title="Service Update",
+                message="Scheduled maintenance tonight from 1am",
+                notification_type="warning",
+            )
+
+    def bulk(self, users):
+        send_bulk_notifications(
+            users,
+            title="Service Update",
+            message="Scheduled maintenance tonight from 1am",
+            notification_type="warning",
+        )
+
+    def measure(self, notify):
+        inserts = []
+
+        def count(execute, sql, params, many, context):
+            if sql.lstrip().upper().startswith("INSERT"):
+                inserts.append(sql)
+            return execute(sql, params, many, context)
+
+        mail.outbox = []
+        run_inline.messages = 0
+        CountingBackend.opened = 0
+        backend = f"{__name__}.CountingBackend"
+        with override_settings(EMAIL_BACKEND=backend), mock.patch.object(
+            send_email_notification, "delay", run_inline(send_email_notification)
+        ), mock.patch.object(
+            send_bulk_email_notification, "delay", run_inline(send_bulk_email_notification)
+        ), connection.execute_wrapper(count):
+            started = time.perf_counter()
+            notify()
+            elapsed = time.perf_counter() - started
+        return elapsed, len(inserts), run_inline.messages, CountingBackend.opened, len(mail.outbox)
+
+    def report(self, size, label, result):
+        elapsed, inserts, messages, connections, emails = result
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{size} recipients {label:>10}: {elapsed:7.2f} s "
+                f"({size / elapsed:8.0f}/s), {inserts} inserts, {messages} task "
+                f"messages, {connections} mail connections, {emails} emails"
+            )
+        )
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from notifications import partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Convert the notifications table to monthly range partitions on "
+        "created_at (PostgreSQL only), so expired months can be dropped "
+        "instead of deleted row by row. Writes to notifications block while "
+        "rows are copied."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=None,
+            help="Partitions to create past the current month",
+        )
+
+    def handle(self, *args, **options):
+        if not partitions.supported():
+            raise CommandError("Notification partitioning needs PostgreSQL")
+        if partitions.is_partitioned():
+            months = partitions.ensure_partitions(options["months_ahead"])
+            self.stdout.write(f"Already partitioned; partitions cover up to {months[-1]:%Y-%m}")
+            return
+
+        copied = partitions.partition_table(options["months_ahead"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Partitioned {partitions.TABLE} by month, {copied} rows copied")
+        )
@@ -0,0 +1,40 @@
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+
+def _raw_token(scope):
+    """
+    The access token from an ``Authorization: Bearer`` header (native
+    clients) or the ``token`` query parameter (browsers cannot set headers
+    on a WebSocket handshake).
+    """
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            parts = value.decode().split()
+            if len(parts) == 2 and parts[0] == "Bearer":
+                return parts[1]
+    tokens = parse_qs(scope.get("query_string", b"").decode()).get("token")
+    return tokens[0] if tokens else None
+
+
+@database_sync_to_async
+def _get_user(raw_token):
+    auth = JWTAuthentication()
+    try:
+        return auth.get_user(auth.get_validated_token(raw_token))
+    except (InvalidToken, TokenError):
+        return AnonymousUser()
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """Authenticates WebSocket connections with the same JWTs the REST API accepts."""
+
+    async def __call__(self, scope, receive, send):
+        raw_token = _raw_token(scope)
+        scope = dict(scope, user=await _get_user(raw_token) if raw_token else AnonymousUser())
+        return await super().__call__(scope, receive, send)
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0006_notification_pending_digest'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='notification_type',
+            field=models.CharField(choices=[('info', 'Information'), ('success', 'Success'), ('payment', 'Payment'), ('warning', 'Warning'), ('payment_success', 'Payment Success'), ('payment_failed', 'Payment Failed'), ('contribution', 'Contribution'), ('wallet', 'Wallet'), ('group', 'Group'), ('earned', 'Bonus Earned'), ('redeemed', 'Bonus Redeemed'), ('error', 'Error')], default='info', max_length=20),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 
@@ -15,6 +15,9 @@ class Notification(models.Model):
         ('contribution', 'Contribution'),
         ('wallet', 'Wallet'),
         ('group', 'Group'),
+        ('earned', 'Bonus Earned'),
+        ('redeemed', 'Bonus Redeemed'),
+        ('error', 'Error'),
     ]
     
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
@@ -24,15 +27,51 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     read_at = models.DateTimeField(null=True, blank=True)
+    # Waiting to go out in the user's next email digest
+    pending_digest = models.BooleanField(default=False)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='notification_recent_idx'),
+            models.Index(fields=['notification_type', 'created_at'], name='notification_expiry_idx'),
+            models.Index(
+                fields=['user', 'id'],
+                condition=models.Q(pending_digest=True),
+                name='notification_digest_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.title}"
     
     def mark_as_read(self):
-        if not self.is_read:
-            self.is_read = True
-            self.read_at = timezone.now()
-            self.save()
+        if self.is_read:
+            return
+        from .counters import add
+
+        read_at = timezone.now()
+        with transaction.atomic():
+            # Conditional update, so a concurrent mark decrements only once
+            marked = Notification.objects.filter(id=self.id, is_read=False).update(
+                is_read=True, read_at=read_at
+            )
+            if marked:
+                add(self.user_id, -1)
+        self.is_read = True
+        self.read_at = read_at
+
+
+class UnreadCounter(models.Model):
+    """
+    Denormalised count of a user's unread notifications. This column is the
+    source of truth; ``notifications.counters`` keeps a cached copy in Redis.
+    """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name='unread_counter'
+    )
+    count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.count} unread"
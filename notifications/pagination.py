@@ -1,7 +1,7 @@
-from rest_framework.pagination import PageNumberPagination
+from bluesea_mobile.pagination import KeysetPagination
 
 
-class NotificationPagination(PageNumberPagination):
+class NotificationPagination(KeysetPagination):
     page_size = 20
     page_size_query_param = "page_size"
     max_page_size = 50
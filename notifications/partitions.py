@@ -0,0 +1,182 @@
+"""
+Optional monthly range partitioning of ``Notification`` on PostgreSQL.
+
+``manage.py partition_notifications`` converts the table once. From then
+on the nightly purge keeps partitions ``NOTIFICATION_PARTITION_MONTHS_AHEAD``
+months ahead and drops each month once all of it is past the longest
+retention TTL, which is instant where deleting its rows one by one is not.
+"""
+import logging
+import re
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import counters
+from .models import Notification
+from .retention import max_retention_days
+
+logger = logging.getLogger(__name__)
+
+TABLE = Notification._meta.db_table
+SEQUENCE = f"{TABLE}_part_id_seq"
+DEFAULT_PARTITION = f"{TABLE}_default"
+_MONTHLY = re.compile(rf"^{TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+
+def supported():
+    return connection.vendor == "postgresql"
+
+
+def is_partitioned():
+    if not supported():
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [TABLE])
+        row = cursor.fetchone()
+    return row is not None and row[0] == "p"
+
+
+def _next_month(month):
+    return (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _months(first, last):
+    month = first.replace(day=1)
+    while month <= last:
+        yield month
+        month = _next_month(month)
+
+
+def _partition_name(month):
+    return f"{TABLE}_y{month.year}m{month.month:02d}"
+
+
+def _create_partition(cursor, parent, month):
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS "{_partition_name(month)}" PARTITION OF "{parent}" '
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+    )
+
+
+def monthly_partitions():
+    """``(name, month)`` of each monthly partition, oldest first."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s)",
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = []
+    for name in names:
+        match = _MONTHLY.match(name)
+        if match:
+            partitions.append((name, date(int(match[1]), int(match[2]), 1)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def ensure_partitions(months_ahead=None):
+    """Create this month's partition and the next ``months_ahead``. Returns the months covered."""
+    if months_ahead is None:
+        months_ahead = settings.NOTIFICATION_PARTITION_MONTHS_AHEAD
+    today = timezone.now().date()
+    last = today.replace(day=1)
+    for _ in range(months_ahead):
+        last = _next_month(last)
+
+    months = list(_months(today, last))
+    with connection.cursor() as cursor:
+        for month in months:
+            _create_partition(cursor, TABLE, month)
+    return months
+
+
+def drop_expired_partitions():
+    """
+    Detach and drop each monthly partition whose whole month is past the
+    longest retention TTL, taking its unread rows off the users' counters
+    in the same transaction. Returns the names dropped.
+    """
+    cutoff = (timezone.now() - timedelta(days=max_retention_days())).date()
+    dropped = []
+    for name, month in monthly_partitions():
+        if _next_month(month) > cutoff:
+            break
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{name}"')
+            cursor.execute(
+                f'SELECT user_id, COUNT(*) FROM "{name}" WHERE NOT is_read GROUP BY user_id'
+            )
+            counters.add_many({user_id: -unread for user_id, unread in cursor.fetchall()})
+            cursor.execute(f'DROP TABLE "{name}"')
+        logger.info(f"Dropped expired notification partition {name}")
+        dropped.append(name)
+    return dropped
+
+
+def partition_table(months_ahead=None):
+    """
+    Convert the plain table to one range-partitioned by month on
+    ``created_at``, in a single transaction: build the partitioned table,
+    copy every row, swap it in under the old name and recreate the
+    indexes and foreign keys. The primary key becomes ``(id, created_at)``,
+    as PostgreSQL requires, and ids continue from a new sequence.
+
+    Writes to notifications block while rows are copied, so run the purge
+    first and convert during a quiet period. Returns the number of rows
+    copied.
+    """
+    if months_ahead is None:
+        months_ahead = settings.NOTIFICATION_PARTITION_MONTHS_AHEAD
+    staging = f"{TABLE}_partitioned"
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE "{TABLE}" IN SHARE MODE')
+        cursor.execute(
+            "SELECT pg_get_indexdef(indexrelid) FROM pg_index "
+            "WHERE indrelid = to_regclass(%s) AND NOT indisprimary",
+            [TABLE],
+        )
+        indexes = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+            [TABLE],
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(f'SELECT MIN(created_at), COALESCE(MAX(id), 0) FROM "{TABLE}"')
+        first, last_id = cursor.fetchone()
+
+        cursor.execute(
+            f'CREATE TABLE "{staging}" (LIKE "{TABLE}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            "PARTITION BY RANGE (created_at)"
+        )
+        cursor.execute(f'ALTER TABLE "{staging}" ADD PRIMARY KEY (id, created_at)')
+        cursor.execute(f'CREATE SEQUENCE "{SEQUENCE}" OWNED BY "{staging}".id')
+        cursor.execute("SELECT setval(%s, %s, false)", [SEQUENCE, last_id + 1])
+        cursor.execute(
+            f"ALTER TABLE \"{staging}\" ALTER COLUMN id SET DEFAULT nextval('\"{SEQUENCE}\"')"
+        )
+
+        today = timezone.now().date()
+        last = today.replace(day=1)
+        for _ in range(months_ahead):
+            last = _next_month(last)
+        for month in _months(first.date() if first else today, last):
+            _create_partition(cursor, staging, month)
+        cursor.execute(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{staging}" DEFAULT')
+
+        cursor.execute(f'INSERT INTO "{staging}" SELECT * FROM "{TABLE}"')
+        copied = cursor.rowcount
+        cursor.execute(f'DROP TABLE "{TABLE}"')
+        cursor.execute(f'ALTER TABLE "{staging}" RENAME TO "{TABLE}"')
+        cursor.execute(f'ALTER INDEX "{staging}_pkey" RENAME TO "{TABLE}_pkey"')
+        # The old definitions name the table, which is now the partitioned one
+        for index in indexes:
+            cursor.execute(index)
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {definition}')
+    return copied
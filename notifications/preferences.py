@@ -0,0 +1,26 @@
+from django.conf import settings
+
+from user_preference.models import NotificationPreference
+
+IN_APP = NotificationPreference.IN_APP
+EMAIL = NotificationPreference.EMAIL
+DIGEST = NotificationPreference.DIGEST
+
+
+def default_channel(notification_type):
+    return settings.NOTIFICATION_DEFAULT_CHANNELS.get(notification_type, EMAIL)
+
+
+def channels_for(user_ids, notification_type):
+    """Each user's delivery channel for ``notification_type``: their own choice, else the type's default."""
+    chosen = dict(
+        NotificationPreference.objects.filter(
+            user_id__in=user_ids, notification_type=notification_type
+        ).values_list("user_id", "channel")
+    )
+    default = default_channel(notification_type)
+    return {user_id: chosen.get(user_id, default) for user_id in user_ids}
+
+
+def channel_for(user_id, notification_type):
+    return channels_for([user_id], notification_type)[user_id]
@@ -0,0 +1,52 @@
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def user_group(user_id):
+    return f"user_{user_id}"
+
+
+def _message(event, data):
+    return {"type": "push", "event": event, "data": data}
+
+
+def push_many(pushes):
+    """
+    Send each ``(user_id, event, data)`` to every socket that user has
+    open, over one event loop hop. ``data`` must be msgpack-serialisable
+    (no ``Decimal`` or ``datetime``). Best effort: a missing or unreachable
+    channel layer is logged, never raised, since clients can always fall
+    back to the REST endpoints.
+    """
+    pushes = list(pushes)
+    layer = get_channel_layer()
+    if layer is None or not pushes:
+        return
+
+    async def send_all():
+        for user_id, event, data in pushes:
+            await layer.group_send(user_group(user_id), _message(event, data))
+
+    try:
+        async_to_sync(send_all)()
+    except Exception as e:
+        logger.warning(f"Realtime push of {len(pushes)} events failed: {str(e)}")
+
+
+def push(user_id, event, data):
+    push_many([(user_id, event, data)])
+
+
+def push_on_commit(user_id, event, data):
+    """Push once the surrounding transaction commits, so rolled-back state never reaches a client."""
+    transaction.on_commit(lambda: push(user_id, event, data))
+
+
+def push_many_on_commit(pushes):
+    pushes = list(pushes)
+    transaction.on_commit(lambda: push_many(pushes))
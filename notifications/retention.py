@@ -0,0 +1,84 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import counters
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+
+def retention_days(notification_type):
+    return settings.NOTIFICATION_RETENTION_DAYS.get(
+        notification_type, settings.NOTIFICATION_RETENTION_DEFAULT_DAYS
+    )
+
+
+def max_retention_days():
+    """The longest any notification is kept; older rows are expired whatever their type."""
+    return max(
+        settings.NOTIFICATION_RETENTION_DEFAULT_DAYS,
+        *settings.NOTIFICATION_RETENTION_DAYS.values(),
+    )
+
+
+def _expired(now):
+    """A queryset of expired notifications per configured type, then one for every other type."""
+    configured = settings.NOTIFICATION_RETENTION_DAYS
+    for notification_type, days in configured.items():
+        yield Notification.objects.filter(
+            notification_type=notification_type, created_at__lt=now - timedelta(days=days)
+        )
+    yield Notification.objects.exclude(notification_type__in=configured).filter(
+        created_at__lt=now - timedelta(days=settings.NOTIFICATION_RETENTION_DEFAULT_DAYS)
+    )
+
+
+def delete_batch(ids):
+    """
+    Delete the given notifications in one short transaction, taking the
+    unread ones off their users' counters. The rows are locked first so a
+    concurrent mark-as-read cannot decrement the same notification twice.
+    """
+    with transaction.atomic():
+        rows = list(
+            Notification.objects.select_for_update()
+            .filter(id__in=ids)
+            .order_by("id")
+            .values_list("user_id", "is_read")
+        )
+        Notification.objects.filter(id__in=ids).delete()
+
+        unread = {}
+        for user_id, is_read in rows:
+            if not is_read:
+                unread[user_id] = unread.get(user_id, 0) - 1
+        counters.add_many(unread)
+    return len(rows)
+
+
+def purge_expired(batch_size=None, max_batches=None):
+    """
+    Delete notifications older than their type's TTL, ``batch_size`` rows
+    per transaction, so no lock is held for long. Stops after
+    ``max_batches`` and leaves the rest for the next run. Returns how many
+    were deleted.
+    """
+    batch_size = batch_size or settings.NOTIFICATION_PURGE_BATCH_SIZE
+    max_batches = max_batches or settings.NOTIFICATION_PURGE_MAX_BATCHES
+
+    deleted = batches = 0
+    for expired in _expired(timezone.now()):
+        while batches < max_batches:
+            ids = list(expired.order_by().values_list("id", flat=True)[:batch_size])
+            if not ids:
+                break
+            deleted += delete_batch(ids)
+            batches += 1
+
+    if batches >= max_batches:
+        logger.warning(f"Notification purge stopped after {batches} batches; expired rows may remain")
+    return deleted
@@ -11,8 +11,9 @@ class NotificationSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'read_at']
 
 class NotificationListResponse(serializers.Serializer):
-    count = serializers.IntegerField()
     next = serializers.CharField(allow_null=True)
-    previous = serializers.CharField(allow_null=True)
     results = NotificationSerializer(many=True)
     unread_count = serializers.IntegerField()
+
+class UnreadCountResponse(serializers.Serializer):
+    unread_count = serializers.IntegerField()
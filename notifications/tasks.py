@@ -1,7 +1,7 @@
 from celery import shared_task
-from django.core.mail import send_mail
+from django.core.mail import EmailMultiAlternatives, get_connection, send_mail
 from django.conf import settings
-from django.template.loader import render_to_string
+from django.template.loader import get_template, render_to_string
 from django.utils.html import strip_tags
 import logging
 
@@ -32,4 +32,105 @@ def send_email_notification(self, user_email, email_subject, email_template, ema
     except Exception as e:
         logger.error(f"Failed to send email to {user_email}: {str(e)}")
         # Retry with exponential backoff
-        raise self.retry(exc=e, countdown=60 * (2 ** self.request.retries))
\ No newline at end of file
+        raise self.retry(exc=e, countdown=60 * (2 ** self.request.retries))
+
+
+@shared_task(bind=True, max_retries=3)
+def send_bulk_email_notification(self, email_subject, email_template, email_context, recipients):
+    """
+    Send one chunk of a bulk notification. The template is loaded once for
+    the chunk and every message goes out over a single mail connection.
+    ``recipients`` is ``[[email, context], ...]``; each context is layered
+    over the shared ``email_context``. Messages are sent one by one, so a
+    retry only resends the ones that failed.
+    """
+    template = get_template(email_template)
+    messages = []
+    for user_email, recipient_context in recipients:
+        html_message = template.render({**email_context, **recipient_context})
+        message = EmailMultiAlternatives(
+            subject=email_subject,
+            body=strip_tags(html_message),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[user_email],
+        )
+        message.attach_alternative(html_message, "text/html")
+        messages.append(message)
+
+    delivered = set()
+    error = None
+    try:
+        with get_connection(fail_silently=False) as connection:
+            for index, message in enumerate(messages):
+                try:
+                    connection.send_messages([message])
+                except Exception as e:
+                    error = e
+                else:
+                    delivered.add(index)
+    except Exception as e:
+        # Opening or closing the connection failed
+        error = e
+
+    sent = len(delivered)
+    failed = [recipient for index, recipient in enumerate(recipients) if index not in delivered]
+    if failed:
+        logger.error(f"Failed to send {len(failed)} of {len(messages)} bulk emails: {str(error)}")
+        raise self.retry(
+            args=(),
+            kwargs={
+                "email_subject": email_subject,
+                "email_template": email_template,
+                "email_context": email_context,
+                "recipients": failed,
+            },
+            exc=error,
+            countdown=60 * (2 ** self.request.retries),
+        )
+
+    logger.info(f"Bulk email notification sent to {sent} users: {email_subject}")
+    return sent
+
+
+@shared_task
+def repair_unread_counters(batch_size=1000):
+    """
+    Nightly: recount every user's unread counter from their notifications,
+    fixing any drift left by writes that bypass ``notifications.counters``.
+    """
+    from .counters import repair
+
+    repaired = repair(batch_size)
+    if repaired:
+        logger.warning(f"Repaired {repaired} drifted unread notification counters")
+    return f"Repaired {repaired} unread notification counters"
+
+
+@shared_task
+def purge_expired_notifications():
+    """
+    Nightly: apply the retention policy. On a partitioned table, whole
+    expired months are dropped first; the remaining expired rows are then
+    deleted in bounded batches.
+    """
+    from .partitions import drop_expired_partitions, ensure_partitions, is_partitioned
+    from .retention import purge_expired
+
+    dropped = []
+    if is_partitioned():
+        ensure_partitions()
+        dropped = drop_expired_partitions()
+    deleted = purge_expired()
+    return f"Dropped {len(dropped)} notification partitions, purged {deleted} notifications"
+
+
+@shared_task
+def send_notification_digests():
+    """
+    Twice daily: one email per user rolling up the notifications their
+    preferences send by digest.
+    """
+    from .digests import send_digests
+
+    queued = send_digests()
+    return f"Queued {queued} notification digests"
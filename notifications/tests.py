@@ -1,3 +1,347 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends import locmem
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import Profile
+from notifications.counters import unread_count
+from notifications.middleware import JWTAuthMiddleware
+from notifications.models import Notification, UnreadCounter
+from notifications.routing import websocket_urlpatterns
+from notifications.tasks import (
+    purge_expired_notifications,
+    repair_unread_counters,
+    send_bulk_email_notification,
+    send_notification_digests,
+)
+from notifications.utils import send_bulk_notifications, send_notification
+from wallet import ledger
+from user_preference.models import NotificationPreference
+from wallet.models import Wallet
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class NotificationListViewTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = Profile.objects.create_user(
+            email="notify@example.com",
+            phone="08010000050",
+            surname="Notify",
+            other_names="User",
+            role="user",
+        )
+        self.client.force_authenticate(self.user)
+        Notification.objects.bulk_create(
+            Notification(user=self.user, title=f"Note {i}", message="Hello", is_read=i < 3)
+            for i in range(25)
+        )
+
+    def test_cursor_pagination_with_unread_count(self):
+        response = self.client.get(reverse("notification-list"), {"page_size": 20})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 20)
+        self.assertEqual(response.data["unread_count"], 22)
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual(len(response.data["results"]), 5)
+        self.assertIsNone(response.data["next"])
+
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class UnreadCounterTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = Profile.objects.create_user(
+            email="unread@example.com",
+            phone="08010000080",
+            surname="Unread",
+            other_names="User",
+            role="user",
+        )
+        self.client.force_authenticate(self.user)
+        with mock.patch("notifications.tasks.send_email_notification.delay"):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.notifications = [
+                    send_notification(user=self.user, title=f"Note {n}", message="Hello")
+                    for n in range(3)
+                ]
+
+    def unread(self):
+        response = self.client.get(reverse("notification-unread-count"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["unread_count"]
+
+    def test_counter_follows_reads_and_deletes(self):
+        self.assertEqual(self.unread(), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("mark-notification-read", args=[self.notifications[0].id]))
+            self.client.post(reverse("mark-notification-read", args=[self.notifications[0].id]))
+        self.assertEqual(self.unread(), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse("delete-notification", args=[self.notifications[1].id]))
+        self.assertEqual(self.unread(), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("mark-all-notifications-read"))
+        self.assertEqual(self.unread(), 0)
+        self.assertEqual(UnreadCounter.objects.get(user=self.user).count, 0)
+
+    def test_repair_recounts_drifted_counters(self):
+        self.assertEqual(self.unread(), 3)
+        Notification.objects.filter(id=self.notifications[0].id).update(is_read=True)
+        UnreadCounter.objects.filter(user=self.user).update(count=7)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = repair_unread_counters.apply().get()
+
+        self.assertEqual(result, "Repaired 1 unread notification counters")
+        self.assertEqual(self.unread(), 2)
+
+
+@override_settings(
+    NOTIFICATION_RETENTION_DAYS={"info": 30, "payment": 365},
+    NOTIFICATION_RETENTION_DEFAULT_DAYS=90,
+    NOTIFICATION_PURGE_BATCH_SIZE=1,
+)
+class NotificationRetentionTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = Profile.objects.create_user(
+            email="retention@example.com",
+            phone="08010000090",
+            surname="Retention",
+            other_names="User",
+            role="user",
+        )
+
+    def notify(self, notification_type, age_days, read=False):
+        with mock.patch("notifications.tasks.send_email_notification.delay"):
+            notification = send_notification(
+                user=self.user, title="Note", message="Hello", notification_type=notification_type
+            )
+        if read:
+            notification.mark_as_read()
+        Notification.objects.filter(id=notification.id).update(
+            created_at=timezone.now() - timedelta(days=age_days)
+        )
+        return notification.id
+
+    def test_purges_per_type_ttl_in_batches(self):
+        expired = [self.notify("info", 40), self.notify("info", 45, read=True), self.notify("group", 100)]
+        kept = [self.notify("info", 10), self.notify("payment", 100), self.notify("group", 60)]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = purge_expired_notifications.apply().get()
+
+        self.assertEqual(result, "Dropped 0 notification partitions, purged 3 notifications")
+        self.assertEqual(
+            set(Notification.objects.values_list("id", flat=True)), set(kept)
+        )
+        self.assertFalse(Notification.objects.filter(id__in=expired).exists())
+        # The two unread expired notifications came off the counter
+        self.assertEqual(UnreadCounter.objects.get(user=self.user).count, 3)
+        self.assertEqual(unread_count(self.user.id), 3)
+
+
+class NotificationDigestTestCase(TestCase):
+    def setUp(self):
+        self.users = [
+            Profile.objects.create_user(
+                email=f"digest{n}@example.com",
+                phone=f"0801000010{n}",
+                surname="Digest",
+                other_names=str(n),
+                first_name=f"Digest{n}",
+                role="user",
+            )
+            for n in range(2)
+        ]
+        NotificationPreference.objects.create(
+            user=self.users[1], notification_type="info", channel=NotificationPreference.EMAIL
+        )
+
+    def test_digest_rolls_up_pending_notifications_per_user(self):
+        with mock.patch("notifications.tasks.send_email_notification.delay") as email:
+            for n in range(3):
+                send_notification(user=self.users[0], title=f"Tip {n}", message="Hello")
+            send_notification(user=self.users[1], title="Tip", message="Hello")
+            send_notification(user=self.users[0], title="Paid", message="Done", notification_type="payment_success")
+        # Only the user who chose email for "info", and the payment, went out at once
+        self.assertEqual(
+            [(c.kwargs["user_email"], c.kwargs["email_subject"]) for c in email.call_args_list],
+            [("digest1@example.com", "Tip"), ("digest0@example.com", "Paid")],
+        )
+
+        with mock.patch("notifications.tasks.send_bulk_email_notification.delay") as delay:
+            self.assertEqual(send_notification_digests.apply().get(), "Queued 1 notification digests")
+            self.assertEqual(send_notification_digests.apply().get(), "Queued 0 notification digests")
+
+        delay.assert_called_once()
+        [[email_address, context]] = delay.call_args.kwargs["recipients"]
+        self.assertEqual(email_address, "digest0@example.com")
+        self.assertEqual(context["count"], 3)
+        self.assertEqual([item["title"] for item in context["items"]], ["Tip 2", "Tip 1", "Tip 0"])
+        self.assertFalse(Notification.objects.filter(pending_digest=True).exists())
+
+
+class BulkNotificationTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.users = [
+            Profile.objects.create_user(
+                email=f"bulk{n}@example.com",
+                phone=f"0801000006{n}",
+                surname="Bulk",
+                other_names=str(n),
+                first_name=f"Bulk{n}",
+                role="user",
+            )
+            for n in range(5)
+        ]
+
+    @override_settings(NOTIFICATION_EMAIL_CHUNK_SIZE=2)
+    def test_one_insert_and_one_email_task_per_chunk(self):
+        with mock.patch("notifications.tasks.send_bulk_email_notification.delay") as delay:
+            with CaptureQueriesContext(connection) as queries:
+                send_bulk_notifications(
+                    [(user, {"amount": f"{n}00"}) for n, user in enumerate(self.users)],
+                    title="Funds Received",
+                    message="₦{amount} received from {sender}",
+                    notification_type="payment",
+                    context={"sender": "boss@example.com"},
+                )
+
+        inserts = [
+            q for q in queries.captured_queries
+            if q["sql"].startswith('INSERT INTO "notifications_notification"')
+        ]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(unread_count(self.users[0].id), 1)
+        self.assertEqual(
+            Notification.objects.get(user=self.users[3]).message,
+            "₦300 received from boss@example.com",
+        )
+        self.assertEqual([len(c.kwargs["recipients"]) for c in delay.call_args_list], [2, 2, 1])
+
+    def test_chunk_is_sent_over_one_connection(self):
+        recipients = [
+            [user.email, {"user": {"first_name": user.first_name}, "title": "Hi", "message": "Hello"}]
+            for user in self.users
+        ]
+
+        with mock.patch("notifications.tasks.get_connection", wraps=mail.get_connection) as get_connection:
+            sent = send_bulk_email_notification.apply(
+                kwargs={
+                    "email_subject": "BlueSea Mobile - Hi",
+                    "email_template": "notifications/default_notification.html",
+                    "email_context": {"notification_type": "info"},
+                    "recipients": recipients,
+                }
+            ).get()
+
+        self.assertEqual(sent, 5)
+        get_connection.assert_called_once()
+        self.assertEqual([m.to for m in mail.outbox], [[user.email] for user in self.users])
+        self.assertIn("Bulk3", mail.outbox[3].alternatives[0][0])
+
+    def test_retry_resends_only_failed_messages(self):
+        recipients = [
+            [user.email, {"user": {"first_name": user.first_name}, "title": "Hi", "message": "Hello"}]
+            for user in self.users
+        ]
+        send_messages = locmem.EmailBackend.send_messages
+        refused = []
+
+        def flaky(backend, messages):
+            if messages[0].to == ["bulk2@example.com"] and not refused:
+                refused.append(messages[0])
+                raise ConnectionResetError("connection reset")
+            return send_messages(backend, messages)
+
+        with mock.patch.object(locmem.EmailBackend, "send_messages", flaky):
+            send_bulk_email_notification.apply(
+                kwargs={
+                    "email_subject": "BlueSea Mobile - Hi",
+                    "email_template": "notifications/default_notification.html",
+                    "email_context": {"notification_type": "info"},
+                    "recipients": recipients,
+                }
+            )
+
+        self.assertEqual(len(refused), 1)
+        self.assertEqual(
+            [m.to[0] for m in mail.outbox],
+            ["bulk0@example.com", "bulk1@example.com", "bulk3@example.com",
+             "bulk4@example.com", "bulk2@example.com"],
+        )
+
+
+class NotificationSocketTestCase(TransactionTestCase):
+    def setUp(self):
+        self.user = Profile.objects.create_user(
+            email="socket@example.com",
+            phone="08010000070",
+            surname="Socket",
+            other_names="User",
+            role="user",
+        )
+        self.wallet = Wallet.objects.create(user=self.user, balance=Decimal("100.00"))
+        self.application = JWTAuthMiddleware(URLRouter(websocket_urlpatterns))
+
+    def communicator(self, token):
+        return WebsocketCommunicator(self.application, f"/ws/notifications/?token={token}")
+
+    async def test_rejects_invalid_token(self):
+        communicator = self.communicator("not-a-jwt")
+        connected, _ = await communicator.connect()
+        self.assertFalse(connected)
+
+    async def test_asgi_application_accepts_any_origin(self):
+        from bluesea_mobile.asgi import application
+
+        path = f"/ws/notifications/?token={AccessToken.for_user(self.user)}"
+        for headers in ([], [(b"origin", b"https://app.example.com")]):
+            communicator = WebsocketCommunicator(application, path, headers=headers)
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected, headers)
+            await communicator.disconnect()
+
+    @mock.patch("notifications.tasks.send_email_notification.delay")
+    async def test_pushes_notifications_and_balances(self, delay):
+        communicator = self.communicator(AccessToken.for_user(self.user))
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+
+        await database_sync_to_async(send_notification)(
+            user=self.user, title="Welcome", message="Hello"
+        )
+        frame = await communicator.receive_json_from()
+        self.assertEqual(frame["event"], "notification")
+        self.assertEqual((frame["data"]["title"], frame["data"]["is_read"]), ("Welcome", False))
+
+        await database_sync_to_async(ledger.credit)(self.wallet.id, Decimal("50.00"))
+        frame = await communicator.receive_json_from()
+        self.assertEqual(
+            frame,
+            {"event": "wallet.balance", "data": {"balance": "150.00", "locked_balance": "0.00"}},
+        )
+        await communicator.disconnect()
@@ -1,6 +1,7 @@
 from django.urls import path
 from .views import (
     NotificationListView,
+    UnreadCountView,
     MarkNotificationAsReadView,
     MarkAllNotificationsAsReadView,
     DeleteNotificationView
@@ -8,6 +9,7 @@ from .views import (
 
 urlpatterns = [
     path('', NotificationListView.as_view(), name='notification-list'),
+    path('unread-count/', UnreadCountView.as_view(), name='notification-unread-count'),
     path('<int:notification_id>/read/', MarkNotificationAsReadView.as_view(), name='mark-notification-read'),
     path('mark-all-read/', MarkAllNotificationsAsReadView.as_view(), name='mark-all-notifications-read'),
     path('<int:notification_id>/delete/', DeleteNotificationView.as_view(), name='delete-notification'),
@@ -1,22 +1,44 @@
+from collections import Counter
+
 from django.conf import settings
+from django.db import transaction
+from .counters import add, add_many
 from .models import Notification
+from .preferences import DIGEST, EMAIL, channel_for, channels_for
+from .realtime import push_many_on_commit, push_on_commit
+from .serializers import NotificationSerializer
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _payload(notification):
+    return dict(NotificationSerializer(notification).data)
+
+
 def send_notification(user, title, message, notification_type='info', email_subject=None, email_template=None, context=None):    
     """
-    Create notification and queue email sending asynchronously
+    Create notification, push it to the user's open sockets and deliver it
+    on the user's channel for ``notification_type``: queue the email at
+    once, hold it for the next digest, or keep it in-app only
     """
+    channel = channel_for(user.id, notification_type)
+
     # Create in-app notification (fast, synchronous)
-    notification = Notification.objects.create(
-        user=user,
-        title=title,
-        message=message,
-        notification_type=notification_type,
-        is_read=False
-    )
+    with transaction.atomic():
+        notification = Notification.objects.create(
+            user=user,
+            title=title,
+            message=message,
+            notification_type=notification_type,
+            is_read=False,
+            pending_digest=channel == DIGEST
+        )
+        add(user.id, 1)
+    push_on_commit(user.id, 'notification', _payload(notification))
+
+    if channel != EMAIL:
+        return notification
     
     try:
         from .tasks import send_email_notification
@@ -52,70 +74,132 @@ def send_notification(user, title, message, notification_type='info', email_subj
     return notification
 
 
-def contribution_notification(member, amount, group_name, payment_type):
-    title = 'Payment Contribution'
-    message = f'₦{amount} debited for {group_name} group payment'
-    
-    context = {
-        'amount': amount,
-        'group_name': group_name,
-        'payment_type': payment_type,
-    }
-    
-    return send_notification(
-        user=member.user,
-        title=title,
-        message=message,
-        notification_type='payment',
-        email_subject=f'BlueSea Mobile - {title}',
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def send_bulk_notifications(recipients, title, message, notification_type='info', email_subject=None, email_template=None, context=None):
+    """
+    Notify many users at once.
+
+    ``recipients`` holds users, or ``(user, extra)`` pairs. ``title`` and
+    ``message`` are ``str.format`` templates filled from ``context`` and the
+    recipient's ``extra``, which is also added to their email context (keep
+    both JSON-serialisable). In-app notifications are written with one
+    ``bulk_create``. Recipients whose channel for ``notification_type`` is
+    email get it queued as one task per ``NOTIFICATION_EMAIL_CHUNK_SIZE``
+    recipients; digest recipients get it in their next digest. Each
+    recipient's open sockets get their notification once the transaction
+    commits. Returns the notifications.
+    """
+    from .tasks import send_bulk_email_notification
+
+    context = context or {}
+    recipients = [
+        recipient if isinstance(recipient, tuple) else (recipient, {})
+        for recipient in recipients
+    ]
+    channels = channels_for([user.id for user, _ in recipients], notification_type)
+    notifications, emails = [], []
+    for user, extra in recipients:
+        values = {**context, **extra}
+        notification = Notification(
+            user=user,
+            title=title.format(**values),
+            message=message.format(**values),
+            notification_type=notification_type,
+            is_read=False,
+            pending_digest=channels[user.id] == DIGEST
+        )
+        notifications.append(notification)
+        if user.email and channels[user.id] == EMAIL:
+            emails.append([
+                user.email,
+                {
+                    **extra,
+                    'user': {'first_name': user.first_name},
+                    'title': notification.title,
+                    'message': notification.message,
+                },
+            ])
+
+    with transaction.atomic():
+        Notification.objects.bulk_create(notifications)
+        add_many(Counter(notification.user_id for notification in notifications))
+    push_many_on_commit(
+        (notification.user_id, 'notification', _payload(notification))
+        for notification in notifications
+    )
+
+    email_context = {**context, 'notification_type': notification_type}
+    for chunk in _chunks(emails, settings.NOTIFICATION_EMAIL_CHUNK_SIZE):
+        try:
+            send_bulk_email_notification.delay(
+                email_subject=email_subject or title.format(**context),
+                email_template=email_template or 'notifications/default_notification.html',
+                email_context=email_context,
+                recipients=chunk
+            )
+        except Exception as e:
+            logger.error(f"Failed to queue {len(chunk)} bulk emails: {str(e)}")
+
+    logger.info(f"Bulk notification queued for {len(notifications)} users: {title}")
+    return notifications
+
+
+def contribution_notifications(shares, group_name, payment_type):
+    """``shares`` is ``[(member, amount), ...]``."""
+    return send_bulk_notifications(
+        [(member.user, {'amount': str(amount)}) for member, amount in shares],
+        title='Payment Contribution',
+        message='₦{amount} debited for {group_name} group payment',
+        notification_type='contribution',
+        email_subject='BlueSea Mobile - Payment Contribution',
         email_template='notifications/group_payment_contribution.html',
-        context=context
+        context={'group_name': group_name, 'payment_type': payment_type}
     )
 
 
-def group_payment_success(member, amount, group_name, payment_type, vtu_reference):
-    title = 'Group Purchase Successful'
-    message = f'{group_name}: {payment_type} purchase of ₦{amount} completed'
-    
-    context = {
-        'amount': amount,
-        'group_name': group_name,
-        'payment_type': payment_type,
-        'vtu_reference': vtu_reference,
-    }
-    
-    return send_notification(
-        user=member.user,
-        title=title,
-        message=message,
+def group_payment_successes(shares, group_name, payment_type, vtu_reference):
+    return send_bulk_notifications(
+        [(member.user, {'amount': str(amount)}) for member, amount in shares],
+        title='Group Purchase Successful',
+        message='{group_name}: {payment_type} purchase of ₦{amount} completed',
         notification_type='payment_success',
-        email_subject=f'BlueSea Mobile - {title}',
+        email_subject='BlueSea Mobile - Group Purchase Successful',
         email_template='notifications/group_payment_success.html',
-        context=context
+        context={
+            'group_name': group_name,
+            'payment_type': payment_type,
+            'vtu_reference': vtu_reference,
+        }
     )
 
 
-def group_payment_failed(member, amount, group_name, payment_type, reason):
-    title = 'Group Payment Failed'
-    message = f'{group_name}: {payment_type} payment failed. ₦{amount} has been refunded to your wallet'
-    
-    context = {
-        'amount': amount,
-        'group_name': group_name,
-        'payment_type': payment_type,
-        'reason': reason,
-    }
-    
-    return send_notification(
-        user=member.user,
-        title=title,
-        message=message,
+def group_payment_failures(shares, group_name, payment_type, reason):
+    return send_bulk_notifications(
+        [(member.user, {'amount': str(amount)}) for member, amount in shares],
+        title='Group Payment Failed',
+        message='{group_name}: {payment_type} payment failed. ₦{amount} has been refunded to your wallet',
         notification_type='payment_failed',
-        email_subject=f'BlueSea Mobile - {title}',
+        email_subject='BlueSea Mobile - Group Payment Failed',
         email_template='notifications/group_payment_failed.html',
-        context=context
+        context={'group_name': group_name, 'payment_type': payment_type, 'reason': reason}
     )
 
 
+def contribution_notification(member, amount, group_name, payment_type):
+    return contribution_notifications([(member, amount)], group_name, payment_type)[0]
+
+
+def group_payment_success(member, amount, group_name, payment_type, vtu_reference):
+    return group_payment_successes([(member, amount)], group_name, payment_type, vtu_reference)[0]
+
+
+def group_payment_failed(member, amount, group_name, payment_type, reason):
+    return group_payment_failures([(member, amount)], group_name, payment_type, reason)[0]
+
+
 def auto_topup_success():
     pass
\ No newline at end of file
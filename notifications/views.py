@@ -3,8 +3,10 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
+from django.db import transaction
+from .counters import add, unread_count
 from .models import Notification
-from .serializers import NotificationSerializer, NotificationListResponse
+from .serializers import NotificationSerializer, NotificationListResponse, UnreadCountResponse
 from .pagination import NotificationPagination
 from django.utils import timezone
 from drf_spectacular.utils import extend_schema, OpenApiParameter
@@ -17,42 +19,68 @@ class NotificationListView(APIView):
 
     @extend_schema(
         summary="List notifications",
-        description="List the authenticated user's notifications, newest first.",
+        description=(
+            "List the authenticated user's notifications, newest first. "
+            "Follow the `next` link to load older notifications."
+        ),
         parameters=[
             OpenApiParameter(
                 "is_read",
                 OpenApiTypes.BOOL,
                 required=False,
                 description="Filter by read status (true/false)",
-            )
+            ),
+            OpenApiParameter(
+                "cursor",
+                OpenApiTypes.STR,
+                required=False,
+                description="Cursor from the previous page's `next` link",
+            ),
+            OpenApiParameter(
+                "page_size",
+                OpenApiTypes.INT,
+                required=False,
+                description="Items per page (max 50)",
+            ),
         ],
         responses={200: NotificationListResponse},
         tags=["Notifications"],
     )
     def get(self, request):
-        notifications = Notification.objects.filter(user=request.user).order_by(
-            "-created_at"
-        )
+        notifications = Notification.objects.filter(user=request.user)
 
         is_read = request.query_params.get("is_read")
         if is_read is not None:
             is_read_bool = is_read.lower() == "true"
             notifications = notifications.filter(is_read=is_read_bool)
 
-        # Get unread count
-        unread_count = Notification.objects.filter(
-            user=request.user, is_read=False
-        ).count()
-
         page = self.paginator.paginate_queryset(notifications, request, view=self)
         serializer = NotificationSerializer(page, many=True)
 
         response = self.paginator.get_paginated_response(serializer.data)
-        response.data["unread_count"] = unread_count
+        response.data["unread_count"] = unread_count(request.user.id)
 
         return response
 
 
+class UnreadCountView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Unread notification count",
+        description=(
+            "The authenticated user's unread count, served from a cached "
+            "counter. Cheap enough to poll for a badge."
+        ),
+        responses={200: UnreadCountResponse},
+        tags=["Notifications"],
+    )
+    def get(self, request):
+        return Response(
+            {"unread_count": unread_count(request.user.id)}, status=status.HTTP_200_OK
+        )
+
+
 class MarkNotificationAsReadView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -98,9 +126,11 @@ class MarkAllNotificationsAsReadView(APIView):
         tags=["Notifications"],
     )
     def post(self, request):
-        updated_count = Notification.objects.filter(
-            user=request.user, is_read=False
-        ).update(is_read=True, read_at=timezone.now())
+        with transaction.atomic():
+            updated_count = Notification.objects.filter(
+                user=request.user, is_read=False
+            ).update(is_read=True, read_at=timezone.now())
+            add(request.user.id, -updated_count)
 
         return Response(
             {"message": f"{updated_count} notifications marked as read"},
@@ -123,10 +153,13 @@ class DeleteNotificationView(APIView):
     )
     def delete(self, request, notification_id):
         try:
-            notification = Notification.objects.get(
-                id=notification_id, user=request.user
-            )
-            notification.delete()
+            with transaction.atomic():
+                notification = Notification.objects.select_for_update().get(
+                    id=notification_id, user=request.user
+                )
+                notification.delete()
+                if not notification.is_read:
+                    add(request.user.id, -1)
 
             return Response(
                 {"message": "Notification deleted successfully"},
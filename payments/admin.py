@@ -8,6 +8,7 @@ from .models import (
     DSTVPayment, GOTVPayment, StartimesPayment, ShowMaxPayment,
     ElectricityPayment, WAECRegitration, WAECResultChecker, JAMBRegistration,
     Airtime2Cash, ElectricityPaymentCustomers, Withdrawal,
+    PlanCatalogVersion, CatalogPlan, PurchaseOrder, IdempotencyRecord, PayoutBatch,
 )
 
 
@@ -182,8 +183,8 @@ class JAMBRegistrationAdmin(admin.ModelAdmin):
 
 @admin.register(Airtime2Cash)
 class Airtime2CashAdmin(admin.ModelAdmin):
-    list_display = ['user', 'phone_number', 'network_badge', 'amount_display', 'request_id', 'created_at']
-    list_filter = ['network', 'created_at']
+    list_display = ['user', 'phone_number', 'network_badge', 'amount_display', 'request_id', 'status', 'created_at']
+    list_filter = ['network', 'status', 'created_at']
     search_fields = ['user__email', 'phone_number', 'request_id']
     readonly_fields = ['created_at']
     date_hierarchy = 'created_at'
@@ -237,8 +238,11 @@ def _notify_withdrawal(user, title, message, email_subject):
 class WithdrawalAdmin(admin.ModelAdmin):
     list_display = ['id', 'user', 'amount_display', 'status_display', 'account_number', 'bank_code', 'bank_name', 'created_at', 'completed_at']
     list_filter = ['status', 'created_at']
-    search_fields = ['account_name', 'account_number', 'payment_reference', 'user__email']
-    readonly_fields = ['user', 'payment_reference', 'created_at', 'completed_at']
+    search_fields = ['account_name', 'account_number', 'payment_reference', 'transfer_reference', 'user__email']
+    readonly_fields = [
+        'user', 'payment_reference', 'batch', 'transfer_reference', 'transfer_code',
+        'attempts', 'next_attempt_at', 'submitted_at', 'failure_reason', 'created_at', 'completed_at',
+    ]
     date_hierarchy = 'created_at'
     list_per_page = 30
     actions = ['mark_successful', 'mark_failed']
@@ -313,3 +317,56 @@ class WithdrawalAdmin(admin.ModelAdmin):
             level=messages.SUCCESS,
         )
     mark_failed.short_description = 'Mark selected withdrawals as failed (refunds wallet)'
+
+
+class CatalogPlanInline(admin.TabularInline):
+    model = CatalogPlan
+    extra = 0
+    can_delete = False
+    readonly_fields = ['service_id', 'variation_code', 'label', 'amount']
+
+
+@admin.register(PlanCatalogVersion)
+class PlanCatalogVersionAdmin(admin.ModelAdmin):
+    list_display = ['version', 'source', 'is_active', 'created_at']
+    list_filter = ['source', 'is_active']
+    readonly_fields = ['version', 'checksum', 'source', 'is_active', 'created_at']
+    inlines = [CatalogPlanInline]
+
+
+@admin.register(PurchaseOrder)
+class PurchaseOrderAdmin(admin.ModelAdmin):
+    list_display = ['request_id', 'user', 'kind', 'amount', 'status', 'attempts', 'created_at', 'settled_at']
+    list_filter = ['status', 'kind', 'created_at']
+    search_fields = ['user__email', 'request_id']
+    readonly_fields = [
+        'id', 'user', 'kind', 'request_id', 'amount', 'purchase', 'status',
+        'vtu_response', 'error_message', 'attempts', 'created_at', 'updated_at', 'settled_at',
+    ]
+
+
+@admin.register(IdempotencyRecord)
+class IdempotencyRecordAdmin(admin.ModelAdmin):
+    list_display = ['path', 'user', 'status_code', 'created_at', 'expires_at']
+    list_filter = ['status_code', 'created_at']
+    search_fields = ['user__email', 'path', 'key']
+    readonly_fields = [
+        'key', 'user', 'path', 'fingerprint', 'status_code', 'response_body',
+        'response_headers', 'created_at', 'expires_at',
+    ]
+
+
+class PayoutWithdrawalInline(admin.TabularInline):
+    model = Withdrawal
+    extra = 0
+    can_delete = False
+    fields = ['payment_reference', 'transfer_reference', 'amount', 'status', 'attempts', 'failure_reason']
+    readonly_fields = fields
+
+
+@admin.register(PayoutBatch)
+class PayoutBatchAdmin(admin.ModelAdmin):
+    list_display = ['id', 'status', 'item_count', 'total_amount', 'created_at', 'submitted_at']
+    list_filter = ['status', 'created_at']
+    readonly_fields = ['status', 'item_count', 'total_amount', 'error_message', 'created_at', 'submitted_at']
+    inlines = [PayoutWithdrawalInline]
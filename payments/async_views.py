@@ -0,0 +1,273 @@
+import logging
+
+from adrf.views import APIView
+from asgiref.sync import sync_to_async
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from bluesea_mobile.utils import ProviderDegradedException, VTUAPIException
+from .idempotency import idempotent
+from .orders import settle_order, wants_async
+from .serializers import (
+    AirtimeTopUpSerializer,
+    MTNDataTopUpSerializer,
+    AirtelDataTopUpSerializer,
+    GloDataTopUpSerializer,
+    EtisalatDataTopUpSerializer,
+    DSTVPaymentSerializer,
+    GOTVPaymentSerializer,
+    StartimesPaymentSerializer,
+    ShowMaxPaymentSerializer,
+    ElectricityPaymentSerializer,
+    WAECRegitrationSerializer,
+    WAECResultCheckerSerializer,
+    JAMBRegistrationSerializer,
+)
+from .views import ReservedPurchaseMixin
+from .vtpass import async_vtpass_client
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncPurchaseView(ReservedPurchaseMixin, APIView):
+    """
+    ASGI-native purchase flow.
+
+    Follows the same reserve-then-call steps as the sync views: the amount
+    is reserved on a ``PurchaseOrder`` before VTPass is called, and the
+    order is captured, released or left ``unknown`` for the reconciler
+    afterwards. The VTPass round trip is awaited on the event loop instead
+    of holding a sync worker thread, so one daphne process can keep many
+    purchases in flight. Blocking work (PIN hashing, the reservation and
+    settlement) is pushed to the thread pool and kept short.
+    """
+
+    permission_classes = [IsAuthenticated]
+    purchase_kind = None
+
+    @idempotent
+    async def post(self, request):
+        transaction_pin = request.data.get("transaction_pin")
+
+        if not transaction_pin:
+            return Response(
+                {"error": "Transaction PIN is required", "success": False},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if not request.user.pin_is_set:
+            return Response(
+                {"error": "Please set your transaction PIN first", "success": False},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        pin_is_valid = await sync_to_async(
+            request.user.verify_transaction_pin, thread_sensitive=False
+        )(transaction_pin)
+        if not pin_is_valid:
+            return Response(
+                {"error": "Invalid transaction PIN", "success": False},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        dispatch = wants_async(request)
+        order, error = await sync_to_async(self.reserve_validated_order)(request, dispatch)
+        if error is not None:
+            return error
+        if dispatch:
+            return self.order_accepted(order)
+
+        try:
+            vtu_response = await async_vtpass_client.top_up(order.purchase["payload"])
+        except ProviderDegradedException as e:
+            return await sync_to_async(self.order_released)(order, str(e.detail))
+        except VTUAPIException as e:
+            return await sync_to_async(self.order_unknown)(order, str(e.detail))
+
+        await sync_to_async(settle_order)(order.id, vtu_response)
+        return Response(vtu_response)
+
+
+class AsyncAirtimeTopUpView(AsyncPurchaseView):
+    purchase_kind = "airtime"
+
+    @extend_schema(
+        summary="Purchase airtime (async)",
+        description="ASGI-native variant of the airtime purchase endpoint.",
+        request=AirtimeTopUpSerializer,
+        responses={200: OpenApiTypes.OBJECT, 400: OpenApiTypes.OBJECT},
+        tags=["Payments"],
+    )
+    async def post(self, request):
+        return await super().post(request)
+
+
+class AsyncMTNDataTopUpView(AsyncPurchaseView):
+    purchase_kind = "mtn-data"
+
+    @extend_schema(
+        summary="Purchase MTN data (async)",
+        description="ASGI-native variant of the MTN data purchase endpoint.",
+        request=MTNDataTopUpSerializer,
+        responses={200: OpenApiTypes.OBJECT, 400: OpenApiTypes.OBJECT},
+        tags=["Payments"],
+    )
+    async def post(self, request):
+        return await super().post(request)
+
+
+class AsyncAirtelDataTopUpView(AsyncPurchaseView):
+    purchase_kind = "airtel-data"
+
+    @extend_schema(
+        summary="Purchase Airtel data (async)",
+        description="ASGI-native variant of the Airtel data purchase endpoint.",
+        request=AirtelDataTopUpSerializer,
+        responses={200: OpenApiTypes.OBJECT, 400: OpenApiTypes.OBJECT},
+        tags=["Payments"],
+    )
+    async def post(self, request):
+        return await super().post(request)
+
+
+class AsyncGloDataTopUpView(AsyncPurchaseView):
+    purchase_kind = "glo-data"
+
+    @extend_schema(
+        summary="Purchase Glo data (async)",
+        description="ASGI-native variant of the Glo data purchase endpoint.",
+        request=GloDataTopUpSerializer,
+        responses={200: OpenApiTypes.OBJECT, 400: OpenApiTypes.OBJECT},
+        tags=["Payments"],
+    )
+    async def post(self, request):
+        return await super().post(request)
+
+
+class AsyncEtisalatDataTopUpView(AsyncPurchaseView):
+    purchase_kind = "etisalat-data"
+
+    @extend_schema(
+        summary="Purchase 9mobile data (async)",
+        description="ASGI-native variant of the 9mobile data purchase endpoint.",
+        request=EtisalatDataTopUpSerializer,
+        responses={200: OpenApiTypes.OBJECT, 400: OpenApiTypes.OBJECT},
+        tags=["Payments"],
+    )
+    async def post(self, request):
+        return await super().post(request)
+
+
+class AsyncDSTVPaymentView(AsyncPurchaseView):
+    purchase_kind = "dstv"
+
+    @extend_schema(
+        summary="Pay DSTV subscription (async)",
+        description="ASGI-native variant of the DSTV subscription endpoint.",
+        request=DSTVPaymentSerializer,
+        responses={200: OpenApiTypes.OBJECT, 400: OpenApiTypes.OBJECT},
+        tags=["Payments"],
+    )
+    async def post(self, request):
+        return await super().post(request)
+
+
+class AsyncGOTVPaymentView(AsyncPurchaseView):
+    purchase_kind = "gotv"
+
+    @extend_schema(
+        summary="Pay GOTV subscription (async)",
+        description="ASGI-native variant of the GOTV subscription endpoint.",
+        request=GOTVPaymentSerializer,
+        responses={200: OpenApiTypes.OBJECT, 400: OpenApiTypes.OBJECT},
+        tags=["Payments"],
+    )
+    async def post(self, request):
+        return await super().post(request)
+
+
+class AsyncStartimesPaymentView(AsyncPurchaseView):
+    purchase_kind = "startimes"
+
+    @extend_schema(
+        summary="Pay Startimes subscription (async)",
+        description="ASGI-native variant of the Startimes subscription endpoint.",
+        request=StartimesPaymentSerializer,
+        responses={200: OpenApiTypes.OBJECT, 400: OpenApiTypes.OBJECT},
+        tags=["Payments"],
+    )
+    async def post(self, request):
+        return await super().post(request)
+
+
+class AsyncShowMaxPaymentView(AsyncPurchaseView):
+    purchase_kind = "showmax"
+
+    @extend_schema(
+        summary="Pay Showmax subscription (async)",
+        description="ASGI-native variant of the Showmax subscription endpoint.",
+        request=ShowMaxPaymentSerializer,
+        responses={200: OpenApiTypes.OBJECT, 400: OpenApiTypes.OBJECT},
+        tags=["Payments"],
+    )
+    async def post(self, request):
+        return await super().post(request)
+
+
+class AsyncElectricityPaymentView(AsyncPurchaseView):
+    purchase_kind = "electricity"
+
+    @extend_schema(
+        summary="Pay electricity bill (async)",
+        description="ASGI-native variant of the electricity payment endpoint.",
+        request=ElectricityPaymentSerializer,
+        responses={200: OpenApiTypes.OBJECT, 400: OpenApiTypes.OBJECT},
+        tags=["Payments"],
+    )
+    async def post(self, request):
+        return await super().post(request)
+
+
+class AsyncWAECRegitrationView(AsyncPurchaseView):
+    purchase_kind = "waec-registration"
+
+    @extend_schema(
+        summary="WAEC registration (async)",
+        description="ASGI-native variant of the WAEC registration endpoint.",
+        request=WAECRegitrationSerializer,
+        responses={200: OpenApiTypes.OBJECT, 400: OpenApiTypes.OBJECT},
+        tags=["Payments"],
+    )
+    async def post(self, request):
+        return await super().post(request)
+
+
+class AsyncWAECResultCheckerView(AsyncPurchaseView):
+    purchase_kind = "waec-result"
+
+    @extend_schema(
+        summary="WAEC result checker (async)",
+        description="ASGI-native variant of the WAEC result checker endpoint.",
+        request=WAECResultCheckerSerializer,
+        responses={200: OpenApiTypes.OBJECT, 400: OpenApiTypes.OBJECT},
+        tags=["Payments"],
+    )
+    async def post(self, request):
+        return await super().post(request)
+
+
+class AsyncJAMBRegistrationView(AsyncPurchaseView):
+    purchase_kind = "jamb"
+
+    @extend_schema(
+        summary="JAMB registration (async)",
+        description="ASGI-native variant of the JAMB registration endpoint.",
+        request=JAMBRegistrationSerializer,
+        responses={200: OpenApiTypes.OBJECT, 400: OpenApiTypes.OBJECT},
+        tags=["Payments"],
+    )
+    async def post(self, request):
+        return await super().post(request)
@@ -0,0 +1,286 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import namedtuple
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.db.models import Max
+from rest_framework.exceptions import APIException
+
+from .models import CatalogPlan, PlanCatalogVersion
+from .vtpass import (
+    get_variations,
+    mtn_dict,
+    airtel_dict,
+    glo_dict,
+    etisalat_dict,
+    dstv_dict,
+    gotv_dict,
+    startimes_dict,
+    showmax_dict,
+)
+
+logger = logging.getLogger(__name__)
+
+# Catalog used until the first successful refresh from VTPass
+SEED_PLANS = {
+    "mtn-data": mtn_dict,
+    "airtel-data": airtel_dict,
+    "glo-data": glo_dict,
+    "etisalat-data": etisalat_dict,
+    "dstv": dstv_dict,
+    "gotv": gotv_dict,
+    "startimes": startimes_dict,
+    "showmax": showmax_dict,
+}
+
+VERSION_CACHE_KEY = "plan_catalog:version"
+
+CatalogEntry = namedtuple(
+    "CatalogEntry", ["variation_code", "amount", "label", "service_id"]
+)
+
+
+def snapshot_cache_key(version):
+    return f"plan_catalog:v{version}"
+
+
+def _amount(value):
+    value = Decimal(str(value))
+    return int(value) if value == value.to_integral_value() else value
+
+
+def _row(service_id, variation_code, label, amount):
+    amount = Decimal(str(amount)).quantize(Decimal("0.01"))
+    return [service_id, variation_code, label, str(amount)]
+
+
+def seed_rows():
+    return sorted(
+        _row(service_id, variation_code, label, amount)
+        for service_id, plans in SEED_PLANS.items()
+        for label, (variation_code, amount) in plans.items()
+    )
+
+
+def load_active_rows():
+    """Return ``(version, rows)`` for the active catalog, or the seed."""
+    active = PlanCatalogVersion.objects.filter(is_active=True).first()
+    if active is None:
+        return 0, seed_rows()
+
+    rows = sorted(
+        _row(*plan)
+        for plan in active.plans.values_list(
+            "service_id", "variation_code", "label", "amount"
+        )
+    )
+    return active.version, rows
+
+
+def publish(version, rows):
+    """Share a catalog version with every process through the cache."""
+    cache.set(snapshot_cache_key(version), rows, timeout=None)
+    cache.set(VERSION_CACHE_KEY, version, timeout=None)
+
+
+class PlanCatalog:
+    """
+    In-process plan index keyed by ``(service_id, variation_code)`` and
+    ``(service_id, label)``.
+
+    The index is rebuilt in place whenever the shared version pointer in the
+    cache moves, so a catalog refresh reaches running workers within
+    ``sync_interval`` seconds without a restart. Between checks a lookup is a
+    plain dict access.
+    """
+
+    def __init__(self, sync_interval=None):
+        self.sync_interval = (
+            settings.PLAN_CATALOG_SYNC_INTERVAL
+            if sync_interval is None
+            else sync_interval
+        )
+        self.version = None
+        self.etag = None
+        self._by_code = {}
+        self._by_label = {}
+        self._payload = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def lookup(self, service_id, key):
+        """
+        Resolve a plan by variation code or display label.
+
+        Raises ``KeyError`` for unknown plans, like the old plan dicts did.
+        """
+        self._ensure_current()
+        entry = self._by_code.get((service_id, key)) or self._by_label.get(
+            (service_id, key)
+        )
+        if entry is None:
+            raise KeyError(key)
+        return entry
+
+    def get(self, service_id, key, default=None):
+        try:
+            return self.lookup(service_id, key)
+        except KeyError:
+            return default
+
+    def as_payload(self):
+        self._ensure_current()
+        return self._payload
+
+    def invalidate(self):
+        self._checked_at = 0.0
+
+    def _ensure_current(self):
+        if (
+            self.version is not None
+            and time.monotonic() - self._checked_at < self.sync_interval
+        ):
+            return
+
+        with self._lock:
+            if (
+                self.version is not None
+                and time.monotonic() - self._checked_at < self.sync_interval
+            ):
+                return
+
+            version = cache.get(VERSION_CACHE_KEY)
+            if version is None or version != self.version:
+                self._load(version)
+            self._checked_at = time.monotonic()
+
+    def _load(self, version):
+        rows = cache.get(snapshot_cache_key(version)) if version is not None else None
+        if rows is None:
+            try:
+                version, rows = load_active_rows()
+            except DatabaseError as e:
+                logger.error(f"Could not load plan catalog, using seed: {str(e)}")
+                self._build(0, seed_rows())
+                return
+            publish(version, rows)
+        self._build(version, rows)
+
+    def _build(self, version, rows):
+        by_code = {}
+        by_label = {}
+        services = {}
+        for service_id, variation_code, label, amount in rows:
+            entry = CatalogEntry(variation_code, _amount(amount), label, service_id)
+            by_code[(service_id, variation_code)] = entry
+            by_label[(service_id, label)] = entry
+            services.setdefault(service_id, []).append(
+                {"variation_code": variation_code, "label": label, "amount": amount}
+            )
+
+        checksum = hashlib.sha256(json.dumps(rows).encode()).hexdigest()
+        # Swap whole references so concurrent readers never see a half-built index
+        self._by_code = by_code
+        self._by_label = by_label
+        self._payload = {"version": version, "services": services}
+        self.etag = f'"{version}-{checksum[:16]}"'
+        self.version = version
+
+
+plan_catalog = PlanCatalog()
+
+
+def _variations(response):
+    content = response.get("content") or {}
+    # VTPass spells the key "varations" on some services
+    return content.get("variations") or content.get("varations") or []
+
+
+def refresh_catalog(service_ids=None):
+    """
+    Pull ``service-variations`` from VTPass and store a new catalog version
+    if anything changed. Returns the active version number.
+
+    Services that fail to refresh keep their plans from the current version.
+    Known variation codes keep their existing label so values already in use
+    by the app still resolve; prices always come from VTPass.
+    """
+    service_ids = service_ids or list(SEED_PLANS)
+    _, current_rows = load_active_rows()
+    current = {(row[0], row[1]): row for row in current_rows}
+
+    rows = []
+    refreshed = 0
+    for service_id in service_ids:
+        try:
+            variations = _variations(get_variations(service_id))
+        except APIException as e:
+            logger.error(f"Plan catalog refresh failed for {service_id}: {str(e)}")
+            variations = []
+
+        if not variations:
+            rows.extend(row for key, row in current.items() if key[0] == service_id)
+            continue
+
+        refreshed += 1
+        seen = set()
+        for variation in variations:
+            variation_code = variation["variation_code"]
+            if variation_code in seen:
+                continue
+            seen.add(variation_code)
+            existing = current.get((service_id, variation_code))
+            label = existing[2] if existing else variation["name"]
+            rows.append(
+                _row(service_id, variation_code, label, variation["variation_amount"])
+            )
+
+    rows.extend(row for key, row in current.items() if key[0] not in service_ids)
+    rows.sort()
+    checksum = hashlib.sha256(json.dumps(rows).encode()).hexdigest()
+
+    with transaction.atomic():
+        active = (
+            PlanCatalogVersion.objects.select_for_update().filter(is_active=True).first()
+        )
+        if active is not None and active.checksum == checksum:
+            logger.info(f"Plan catalog unchanged at v{active.version}")
+            return active.version
+
+        if not refreshed and active is not None:
+            return active.version
+
+        version = (
+            PlanCatalogVersion.objects.aggregate(latest=Max("version"))["latest"] or 0
+        ) + 1
+        catalog_version = PlanCatalogVersion.objects.create(
+            version=version,
+            checksum=checksum,
+            source="vtpass" if refreshed else "seed",
+        )
+        CatalogPlan.objects.bulk_create(
+            [
+                CatalogPlan(
+                    catalog_version=catalog_version,
+                    service_id=service_id,
+                    variation_code=variation_code,
+                    label=label,
+                    amount=Decimal(amount),
+                )
+                for service_id, variation_code, label, amount in rows
+            ]
+        )
+        PlanCatalogVersion.objects.filter(is_active=True).update(is_active=False)
+        catalog_version.is_active = True
+        catalog_version.save(update_fields=["is_active"])
+
+        transaction.on_commit(lambda: publish(version, rows))
+
+    logger.info(f"Plan catalog refreshed to v{version} ({len(rows)} plans)")
+    return version
@@ -0,0 +1,326 @@
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+
+from bluesea_mobile.utils import ProviderDegradedException, VTUAPIException
+from wallet import ledger
+from wallet.ledger import Posting
+from .catalog import plan_catalog
+from .models import GroupPayment
+from .orders import vtu_outcome
+from .vtpass import generate_reference_id, get_receipt, top_up
+
+logger = logging.getLogger(__name__)
+
+
+def group_vtu_details(payment_type, service_details, amount, request_id=None):
+    """
+    The VTPass /pay body for a group payment's service, or None for a
+    service groups cannot buy. Raises KeyError for a plan the catalog does
+    not know.
+    """
+    request_id = request_id or generate_reference_id()
+
+    if payment_type == "airtime":
+        airtime_amount = int(amount)
+        details = {
+            "request_id": request_id,
+            "serviceID": service_details.get("network"),
+            "amount": airtime_amount,
+            "phone": service_details.get("phone_number"),
+        }
+        return details
+
+    elif payment_type == "data":
+        if service_details.get("network") == "mtn":
+            plan = plan_catalog.lookup("mtn-data", service_details.get("plan_id"))
+            variation_code = plan.variation_code
+            amount = plan.amount
+
+            details = {
+                "request_id": request_id,
+                "serviceID": "mtn-data",
+                "billersCode": service_details.get("billersCode"),
+                "variation_code": variation_code,
+                "amount": amount,
+                "phone": service_details.get("phone_number"),
+            }
+            return details
+        elif service_details.get("network") == "airtel":
+            plan = plan_catalog.lookup("airtel-data", service_details.get("plan_id"))
+            variation_code = plan.variation_code
+            amount = plan.amount
+
+            details = {
+                "request_id": request_id,
+                "serviceID": "airtel-data",
+                "billersCode": service_details.get("billersCode"),
+                "variation_code": variation_code,
+                "amount": amount,
+                "phone": service_details.get("phone_number"),
+            }
+            return details
+
+        elif service_details.get("network") == "glo":
+            plan = plan_catalog.lookup("glo-data", service_details.get("plan_id"))
+            variation_code = plan.variation_code
+            amount = plan.amount
+
+            details = {
+                "request_id": request_id,
+                "serviceID": "glo-data",
+                "billersCode": service_details.get("billersCode"),
+                "variation_code": variation_code,
+                "amount": amount,
+                "phone": service_details.get("phone_number"),
+            }
+            return details
+
+        elif service_details.get("network") == "etisalat":
+            plan = plan_catalog.lookup("etisalat-data", service_details.get("plan_id"))
+            variation_code = plan.variation_code
+            amount = plan.amount
+
+            details = {
+                "request_id": request_id,
+                "serviceID": "etisalat-data",
+                "billersCode": service_details.get("billersCode"),
+                "variation_code": variation_code,
+                "amount": amount,
+                "phone": service_details.get("phone_number"),
+            }
+            return details
+
+    elif payment_type == "electricity":
+        # return vtu_service.purchase_electricity(
+        #     meter_number=service_details.get('meter_number'),
+        #     amount=amount,
+        #     disco=service_details.get('disco')
+        # )
+
+        electricity_amount = int(amount)
+        details = {
+            "request_id": request_id,
+            "serviceID": service_details.get("disco"),
+            "billersCode": service_details.get("billersCode"),
+            "variation_code": service_details.get("meter_type"),
+            "amount": electricity_amount,
+            "phone": service_details.get("phone_number"),
+        }
+        return details
+
+    elif payment_type in ["dstv", "gotv", "startimes", "showmax"]:
+        plan = plan_catalog.lookup(payment_type, service_details.get("plan_id"))
+        variation_code = plan.variation_code
+        amount = plan.amount
+
+        details = {
+            "request_id": request_id,
+            "serviceID": payment_type,
+            "billersCode": service_details.get("billersCode"),
+            "variation_code": variation_code,
+            "amount": amount,
+            "phone": service_details.get("phone_number"),
+        }
+        return details
+
+    elif payment_type == "jamb":
+        jamb_amount = (
+            7700 if service_details.get("exam_type") == "utme-mock" else 6200
+        )
+        details = {
+            "request_id": request_id,
+            "serviceID": "jamb",
+            "variation_code": service_details.get("exam_type"),
+            "billersCode": service_details.get("billersCode"),
+            "phone": service_details.get("phone_number"),
+        }
+        return details
+
+    elif payment_type == "waec-registration":
+        waec_reg_amount = 37500
+        details = {
+            "request_id": request_id,
+            "serviceID": "waec-registration",
+            "variation_code": "waec-registraion",
+            "quantity": 1,
+            "phone": service_details.get("phone_number"),
+        }
+        return details
+
+    elif payment_type == "waec-result":
+        waec_result_amount = 5350
+        details = {
+            "request_id": request_id,
+            "serviceID": "waec",
+            "variation_code": "waecdirect",
+            "quantity": 1,
+            "phone": service_details.get("phone_number"),
+        }
+        return details
+
+
+def refund_group_payment(group_payment):
+    """Credit every contribution back in one ledger batch and mark the payment failed."""
+    contributions = list(
+        group_payment.contributions.select_related("member__user__wallet")
+    )
+    ledger.post_many(
+        [
+            Posting(
+                contribution.member.user.wallet.id,
+                contribution.amount,
+                "CREDIT",
+                "Reversal - Group payment failed",
+                f"REV-{group_payment.id}-{contribution.member.user.id}-{uuid.uuid4().hex[:8]}",
+            )
+            for contribution in contributions
+        ]
+    )
+    group_payment.contributions.update(status="reversed")
+    group_payment.status = "failed"
+    group_payment.save(update_fields=["status", "updated_at"])
+
+
+def settle_group_payment(group_payment_id, vtu_response, reason):
+    """
+    Complete a processing group payment or refund every contributor, in
+    one short transaction. Refunding a progressive collection also marks
+    the group and its paid members failed. Returns False if the payment
+    had already settled.
+    """
+    from .tasks import notify_group_payment
+
+    with transaction.atomic():
+        payment = GroupPayment.objects.select_for_update().select_related("group").get(
+            id=group_payment_id
+        )
+        if payment.status != "processing":
+            return False
+
+        if vtu_outcome(vtu_response) == "successful":
+            payment.status = "completed"
+            payment.vtu_reference = vtu_response.get(
+                "requestId", payment.vtu_reference
+            )
+            payment.save(update_fields=["status", "vtu_reference", "updated_at"])
+            transaction.on_commit(lambda: notify_group_payment.delay(payment.id))
+        else:
+            refund_group_payment(payment)
+            if payment.progressive:
+                payment.group.members.filter(payment_status="paid").update(
+                    payment_status="failed", paid_amount=0
+                )
+                payment.group.status = "failed"
+                payment.group.save(update_fields=["status", "updated_at"])
+            transaction.on_commit(
+                lambda: notify_group_payment.delay(payment.id, reason)
+            )
+    return True
+
+
+def purchase_group(group_payment_id):
+    """
+    Buy what a collected group payment is for, then settle it.
+
+    The contributions were debited and committed beforehand and the VTPass
+    request id was stored as ``vtu_reference``, so the call runs outside
+    any transaction. Setting ``sent_at`` claims the call, so a payment is
+    sent at most once. A call that may have reached VTPass without a
+    definite answer leaves the payment ``processing`` for
+    ``requery_group_payments``; details that cannot become a VTPass
+    request refund the contributors without a call. Returns the payment as
+    it stands afterwards and the provider's reason, if any.
+    """
+    payment = GroupPayment.objects.get(id=group_payment_id)
+    if payment.status != "processing":
+        return payment, ""
+
+    try:
+        details = group_vtu_details(
+            payment.payment_type,
+            payment.service_details,
+            payment.total_amount,
+            request_id=payment.vtu_reference,
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        logger.error(f"Group payment {group_payment_id} has invalid service details: {str(e)}")
+        details = None
+    if details is None:
+        return refund_unsent(group_payment_id, "Invalid plan or service details")
+
+    now = timezone.now()
+    claimed = GroupPayment.objects.filter(
+        id=group_payment_id, status="processing", sent_at__isnull=True
+    ).update(sent_at=now, updated_at=now)
+    if not claimed:
+        logger.warning(f"Group payment {group_payment_id} was already sent, skipping")
+        return GroupPayment.objects.get(id=group_payment_id), ""
+
+    try:
+        vtu_response = top_up(details)
+    except ProviderDegradedException as e:
+        return refund_unsent(group_payment_id, str(e.detail))
+    except VTUAPIException as e:
+        logger.warning(f"Group payment {group_payment_id} awaits requery: {str(e.detail)}")
+        return payment, str(e.detail)
+
+    reason = vtu_response.get("response_description", "Unknown error")
+    if vtu_outcome(vtu_response) != "unknown":
+        settle_group_payment(group_payment_id, vtu_response, reason)
+    return GroupPayment.objects.get(id=group_payment_id), reason
+
+
+def refund_unsent(group_payment_id, reason):
+    """Refund a group payment whose purchase never reached VTPass."""
+    settle_group_payment(group_payment_id, {"response_description": reason}, reason)
+    return GroupPayment.objects.get(id=group_payment_id), reason
+
+
+def requery_group_payments():
+    """
+    Settle group payments left ``processing`` by a purchase that crashed or
+    timed out, by requerying VTPass for their stored request id. Payments
+    that were never sent are queued for purchase again instead, since
+    VTPass can only answer "not found" for them. Returns the number settled.
+    """
+    from .tasks import purchase_group_payment
+
+    now = timezone.now()
+    stale_before = now - timedelta(seconds=settings.VTPASS_REQUERY_STALE_SECONDS)
+    processing = GroupPayment.objects.filter(
+        status="processing", updated_at__lt=stale_before
+    )
+
+    unsent = list(processing.filter(sent_at__isnull=True).values_list("id", flat=True))
+    # Touching updated_at keeps the next run from queueing them twice
+    GroupPayment.objects.filter(id__in=unsent, sent_at__isnull=True).update(updated_at=now)
+    for payment_id in unsent:
+        logger.warning(f"Group payment {payment_id} was never sent, queueing it again")
+        purchase_group_payment.delay(payment_id)
+
+    stale = (
+        processing.filter(sent_at__isnull=False)
+        .exclude(vtu_reference__isnull=True)
+        .exclude(vtu_reference="")
+        .values_list("id", "vtu_reference")
+    )
+
+    settled = 0
+    for payment_id, request_id in stale:
+        try:
+            vtu_response = get_receipt({"request_id": request_id})
+        except APIException as e:
+            logger.warning(f"Requery failed for group payment {payment_id}: {str(e.detail)}")
+            continue
+
+        if vtu_outcome(vtu_response) == "unknown":
+            continue
+        reason = vtu_response.get("response_description", "Unknown error")
+        settled += settle_group_payment(payment_id, vtu_response, reason)
+    return settled
@@ -0,0 +1,268 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from datetime import timedelta
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyRecord
+
+logger = logging.getLogger(__name__)
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.1
+# Never attempted (circuit open), so a retry must be allowed to run
+NOT_STORED_STATUSES = (status.HTTP_503_SERVICE_UNAVAILABLE,)
+
+
+class IdempotencyStore:
+    """
+    First-response store for one ``Idempotency-Key``.
+
+    Responses live in the cache (Redis) for fast replays and in
+    ``IdempotencyRecord`` as the durable copy. The in-flight lock is a cache
+    ``add`` (SET NX); if the cache is unreachable the unique DB row is used
+    as the lock instead.
+    """
+
+    def __init__(self, request, key):
+        scope = f"{request.user.pk}:{request.method}:{request.path}:{key}"
+        self.digest = hashlib.sha256(scope.encode()).hexdigest()
+        self.fingerprint = hashlib.sha256(
+            json.dumps(request.data, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        self.user_id = request.user.pk
+        self.path = request.path[:255]
+        self.result_key = f"idempotency:{self.digest}"
+        self.lock_key = f"idempotency:{self.digest}:lock"
+        self.token = uuid.uuid4().hex
+        self.db_locked = False
+
+    def _stored(self):
+        try:
+            stored = cache.get(self.result_key)
+            if stored is not None:
+                return stored
+        except Exception as e:
+            logger.warning(f"Idempotency cache read failed: {str(e)}")
+
+        record = (
+            IdempotencyRecord.objects.filter(
+                key=self.digest,
+                status_code__isnull=False,
+                expires_at__gt=timezone.now(),
+            )
+            .values("fingerprint", "status_code", "response_body", "response_headers")
+            .first()
+        )
+        if record is None:
+            return None
+        return {
+            "fingerprint": record["fingerprint"],
+            "status": record["status_code"],
+            "data": record["response_body"],
+            "headers": record["response_headers"],
+        }
+
+    def replay(self):
+        stored = self._stored()
+        if stored is None:
+            return None
+
+        if stored["fingerprint"] != self.fingerprint:
+            return Response(
+                {
+                    "error": f"{HEADER} was already used with a different request",
+                    "success": False,
+                },
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+
+        headers = dict(stored["headers"] or {})
+        headers[REPLAYED_HEADER] = "true"
+        return Response(stored["data"], status=stored["status"], headers=headers)
+
+    def acquire(self):
+        try:
+            return cache.add(
+                self.lock_key, self.token, timeout=settings.IDEMPOTENCY_LOCK_TIMEOUT
+            )
+        except Exception as e:
+            logger.warning(f"Idempotency cache lock failed, using DB: {str(e)}")
+
+        now = timezone.now()
+        # A crashed holder's row expires after the lock timeout
+        IdempotencyRecord.objects.filter(
+            key=self.digest, status_code__isnull=True, expires_at__lte=now
+        ).delete()
+        try:
+            IdempotencyRecord.objects.create(
+                key=self.digest,
+                user_id=self.user_id,
+                path=self.path,
+                fingerprint=self.fingerprint,
+                expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT),
+            )
+        except IntegrityError:
+            return False
+        self.db_locked = True
+        return True
+
+    def release(self):
+        if self.db_locked:
+            IdempotencyRecord.objects.filter(
+                key=self.digest, status_code__isnull=True
+            ).delete()
+            return
+        try:
+            if cache.get(self.lock_key) == self.token:
+                cache.delete(self.lock_key)
+        except Exception as e:
+            logger.warning(f"Idempotency lock release failed: {str(e)}")
+
+    def save(self, response):
+        if response.status_code in NOT_STORED_STATUSES:
+            return
+
+        # Round-trip through JSON so the cache and DB copies replay identically
+        data = json.loads(json.dumps(response.data, cls=DjangoJSONEncoder))
+        headers = {"Location": response["Location"]} if response.has_header("Location") else {}
+        stored = {
+            "fingerprint": self.fingerprint,
+            "status": response.status_code,
+            "data": data,
+            "headers": headers,
+        }
+
+        IdempotencyRecord.objects.update_or_create(
+            key=self.digest,
+            defaults={
+                "user_id": self.user_id,
+                "path": self.path,
+                "fingerprint": self.fingerprint,
+                "status_code": response.status_code,
+                "response_body": data,
+                "response_headers": headers,
+                "expires_at": timezone.now()
+                + timedelta(seconds=settings.IDEMPOTENCY_TTL),
+            },
+        )
+        try:
+            cache.set(self.result_key, stored, timeout=settings.IDEMPOTENCY_TTL)
+        except Exception as e:
+            logger.warning(f"Idempotency cache write failed: {str(e)}")
+
+
+def _key_error(key):
+    if len(key) > MAX_KEY_LENGTH:
+        return Response(
+            {
+                "error": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters",
+                "success": False,
+            },
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return None
+
+
+def _in_progress():
+    return Response(
+        {
+            "error": "A request with this Idempotency-Key is still being processed",
+            "success": False,
+        },
+        status=status.HTTP_409_CONFLICT,
+    )
+
+
+def idempotent(view_method):
+    """
+    Make a money-moving ``post`` safe to retry.
+
+    Requests carrying an ``Idempotency-Key`` header run at most once per
+    user, path and key within ``IDEMPOTENCY_TTL``; later duplicates get the
+    first response replayed. A duplicate that arrives while the first is
+    still running waits for it (up to ``IDEMPOTENCY_LOCK_WAIT`` seconds)
+    instead of running again. Requests without the header are unaffected.
+    """
+    if asyncio.iscoroutinefunction(view_method):
+
+        @wraps(view_method)
+        async def async_wrapper(self, request, *args, **kwargs):
+            key = request.headers.get(HEADER)
+            if not key:
+                return await view_method(self, request, *args, **kwargs)
+            error = _key_error(key)
+            if error is not None:
+                return error
+
+            store = IdempotencyStore(request, key)
+            deadline = time.monotonic() + settings.IDEMPOTENCY_LOCK_WAIT
+            while True:
+                replayed = await sync_to_async(store.replay)()
+                if replayed is not None:
+                    return replayed
+                if await sync_to_async(store.acquire)():
+                    break
+                if time.monotonic() >= deadline:
+                    return _in_progress()
+                await asyncio.sleep(POLL_INTERVAL)
+
+            try:
+                replayed = await sync_to_async(store.replay)()
+                if replayed is not None:
+                    return replayed
+                response = await view_method(self, request, *args, **kwargs)
+                await sync_to_async(store.save)(response)
+                return response
+            finally:
+                await sync_to_async(store.release)()
+
+        return async_wrapper
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        error = _key_error(key)
+        if error is not None:
+            return error
+
+        store = IdempotencyStore(request, key)
+        deadline = time.monotonic() + settings.IDEMPOTENCY_LOCK_WAIT
+        while True:
+            replayed = store.replay()
+            if replayed is not None:
+                return replayed
+            if store.acquire():
+                break
+            if time.monotonic() >= deadline:
+                return _in_progress()
+            time.sleep(POLL_INTERVAL)
+
+        try:
+            # The previous holder may have finished between replay and acquire
+            replayed = store.replay()
+            if replayed is not None:
+                return replayed
+            response = view_method(self, request, *args, **kwargs)
+            store.save(response)
+            return response
+        finally:
+            store.release()
+
+    return wrapper
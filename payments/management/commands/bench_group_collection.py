@@ -0,0 +1,92 @@
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from accounts.models import Profile
+from wallet import ledger
+from wallet.ledger import Posting
+from wallet.models import Wallet
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare collecting a group payment with one debit per member against "
+        "the set-based ledger.debit_all. Runs inside a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--members", type=int, nargs="+", default=[5, 50, 500]
+        )
+        parser.add_argument("--rounds", type=int, default=5)
+
+    def handle(self, *args, **options):
+        for size in options["members"]:
+            try:
+                with transaction.atomic():
+                    wallets = self.make_wallets(size)
+                    per_member = self.measure(options["rounds"], lambda: self.per_member(wallets))
+                    set_based = self.measure(options["rounds"], lambda: self.set_based(wallets))
+                    raise Rollback
+            except Rollback:
+                pass
+            self.report(size, "per-member", per_member)
+            self.report(size, "set-based", set_based)
+
+    def make_wallets(self, size):
+        run = uuid.uuid4().hex[:8]
+        users = Profile.objects.bulk_create(
+            [
+                Profile(
+                    email=f"bench-{run}-{n}@example.com",
+                    phone=f"0900{n:07d}",
+                    surname="Bench",
+                    other_names=str(n),
+                )
+                for n in range(size)
+            ]
+        )
+        Wallet.objects.bulk_create(
+            [Wallet(user=user, balance=Decimal("1000000.00")) for user in users]
+        )
+        return list(Wallet.objects.filter(user__in=users))
+
+    def per_member(self, wallets):
+        with transaction.atomic():
+            for wallet in wallets:
+                wallet.debit(amount=Decimal("100.00"), description="Bench contribution")
+
+    def set_based(self, wallets):
+        ledger.debit_all(
+            [Posting(wallet.id, Decimal("100.00"), "DEBIT", "Bench contribution") for wallet in wallets]
+        )
+
+    def measure(self, rounds, collect):
+        timings, statements = [], []
+
+        def count(execute, sql, params, many, context):
+            statements.append(sql)
+            return execute(sql, params, many, context)
+
+        for _ in range(rounds):
+            statements.clear()
+            with connection.execute_wrapper(count):
+                started = time.perf_counter()
+                collect()
+                timings.append(time.perf_counter() - started)
+        return min(timings), len(statements)
+
+    def report(self, size, label, result):
+        elapsed, queries = result
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{size:>4} members {label:>10}: {elapsed * 1000:8.1f} ms, {queries} queries"
+            )
+        )
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+from bluesea_mobile.http_client import CircuitBreaker
+from payments.vtpass import AsyncVTPassClient, VTPassClient
+
+
+class StubVTPass(ThreadingHTTPServer):
+    """Local VTPass stand-in that answers /pay after a fixed latency."""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, latency):
+        super().__init__(("127.0.0.1", 0), StubVTPassHandler)
+        self.latency = latency
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/api"
+
+    def reset_peak(self):
+        with self._lock:
+            self.peak_in_flight = 0
+
+
+class StubVTPassHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        with server._lock:
+            server.in_flight += 1
+            server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+        try:
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(server.latency)
+            body = json.dumps(
+                {"code": "000", "response_description": "TRANSACTION SUCCESSFUL"}
+            ).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server._lock:
+                server.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare sync (thread pool) and async purchase throughput against a "
+        "local VTPass stub"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=1.0,
+            help="Simulated VTPass latency in seconds",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=40,
+            help="Sync worker threads (asgiref's default executor size)",
+        )
+
+    def handle(self, *args, **options):
+        total = options["requests"]
+        server = StubVTPass(options["latency"])
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        try:
+            self.report("sync", total, server, self.run_sync(server, total, options))
+            server.reset_peak()
+            self.report("async", total, server, self.run_async(server, total))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def breaker(self):
+        # Keep the breaker out of the way: slow stub calls must not trip it.
+        return CircuitBreaker("bench", slow_call_seconds=float("inf"), min_calls=10**9)
+
+    def run_sync(self, server, total, options):
+        client = VTPassClient(base_url=server.base_url, breaker=self.breaker())
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["threads"]) as pool:
+            list(
+                pool.map(
+                    lambda n: client.top_up({"request_id": f"BENCH-SYNC-{n}"}),
+                    range(total),
+                )
+            )
+        return time.perf_counter() - started
+
+    def run_async(self, server, total):
+        client = AsyncVTPassClient(base_url=server.base_url, breaker=self.breaker())
+
+        async def run():
+            await asyncio.gather(
+                *(
+                    client.top_up({"request_id": f"BENCH-ASYNC-{n}"})
+                    for n in range(total)
+                )
+            )
+
+        started = time.perf_counter()
+        asyncio.run(run())
+        return time.perf_counter() - started
+
+    def report(self, label, total, server, elapsed):
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{label:>5}: {total} purchases in {elapsed:.2f}s "
+                f"({total / elapsed:.1f}/s), "
+                f"peak concurrent at provider: {server.peak_in_flight}"
+            )
+        )
@@ -0,0 +1,115 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("payments", "0007_fix_withdrawal_sequence"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PlanCatalogVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("version", models.PositiveIntegerField(unique=True)),
+                ("checksum", models.CharField(max_length=64)),
+                (
+                    "source",
+                    models.CharField(
+                        choices=[("seed", "Seed"), ("vtpass", "VTPass")],
+                        default="vtpass",
+                        max_length=20,
+                    ),
+                ),
+                ("is_active", models.BooleanField(db_index=True, default=False)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "ordering": ["-version"],
+            },
+        ),
+        migrations.CreateModel(
+            name="CatalogPlan",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("service_id", models.CharField(max_length=50)),
+                ("variation_code", models.CharField(max_length=100)),
+                ("label", models.CharField(max_length=200)),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=12)),
+                (
+                    "catalog_version",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="plans",
+                        to="payments.plancatalogversion",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["service_id", "amount"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("catalog_version", "service_id", "variation_code"),
+                        name="unique_catalog_plan_variation",
+                    )
+                ],
+            },
+        ),
+        migrations.AlterField(
+            model_name="mtndatatopup",
+            name="plan",
+            field=models.CharField(max_length=120),
+        ),
+        migrations.AlterField(
+            model_name="airteldatatopup",
+            name="plan",
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AlterField(
+            model_name="glodatatopup",
+            name="plan",
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AlterField(
+            model_name="etisalatdatatopup",
+            name="plan",
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AlterField(
+            model_name="dstvpayment",
+            name="dstv_plan",
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AlterField(
+            model_name="gotvpayment",
+            name="gotv_plan",
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AlterField(
+            model_name="startimespayment",
+            name="startimes_plan",
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AlterField(
+            model_name="showmaxpayment",
+            name="showmax_plan",
+            field=models.CharField(max_length=100),
+        ),
+    ]
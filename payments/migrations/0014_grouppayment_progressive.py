@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+def mark_progressive(apps, schema_editor):
+    # Only progressive collections mark their members paid
+    GroupPayment = apps.get_model("payments", "GroupPayment")
+    GroupPayment.objects.filter(group__members__payment_status="paid").update(
+        progressive=True
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("payments", "0013_airtime2cash_status"),
+        ("group_payment", "0005_update_group_models"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="grouppayment",
+            name="progressive",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_progressive, migrations.RunPython.noop),
+    ]
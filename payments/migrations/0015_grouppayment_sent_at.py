@@ -0,0 +1,23 @@
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_sent(apps, schema_editor):
+    # Whether older payments reached VTPass is unknown; keep requerying them
+    GroupPayment = apps.get_model("payments", "GroupPayment")
+    GroupPayment.objects.exclude(status="pending").update(sent_at=F("updated_at"))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("payments", "0014_grouppayment_progressive"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="grouppayment",
+            name="sent_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_sent, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,199 @@
+import logging
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from bluesea_mobile.utils import InsufficientFundsException
+from notifications.realtime import push_on_commit
+from notifications.utils import send_notification
+from wallet import ledger
+from wallet.models import Wallet
+from .models import PurchaseOrder
+from .purchases import after_purchase, purchase_description
+
+logger = logging.getLogger(__name__)
+
+RESPOND_ASYNC = "respond-async"
+
+
+def wants_async(request):
+    """Clients opt in with ``Prefer: respond-async`` (RFC 7240)."""
+    return RESPOND_ASYNC in request.headers.get("Prefer", "").lower()
+
+
+def vtu_outcome(vtu_response):
+    """
+    Classify a VTPass /pay or /requery response as successful, failed or
+    unknown.
+
+    Only a final transaction status counts as failed. Auth errors, rate
+    limits, "request id not found" and codes we do not know stay unknown,
+    so a purchase VTPass did deliver is never refunded.
+    """
+    transaction_status = (
+        (vtu_response.get("content") or {}).get("transactions") or {}
+    ).get("status")
+    if transaction_status in ("failed", "reversed"):
+        return "failed"
+    if vtu_response.get("response_description") == "TRANSACTION SUCCESSFUL":
+        return "successful"
+    return "unknown"
+
+
+def _wallet_id(user_id):
+    return Wallet.objects.values_list("id", flat=True).get(user_id=user_id)
+
+
+def _push_status(order):
+    push_on_commit(
+        order.user_id,
+        "purchase.status",
+        {
+            "order_id": str(order.id),
+            "request_id": order.request_id,
+            "kind": order.kind,
+            "status": order.status,
+        },
+    )
+
+
+def reserve_purchase(user, kind, purchase, request_id, dispatch=True):
+    """
+    Move the purchase amount from ``balance`` to ``locked_balance`` and
+    persist a pending order. The worker is queued once the reservation
+    has committed.
+
+    With ``dispatch=False`` the caller runs the VTPass call itself after
+    this returns: the order is stored already claimed (``processing``), so
+    if the caller dies mid-call the reconciler adopts and requeries it.
+    """
+    from .tasks import process_purchase_order
+
+    amount = Decimal(str(purchase["amount"]))
+    with transaction.atomic():
+        try:
+            ledger.lock(_wallet_id(user.id), amount)
+        except ledger.InsufficientFunds:
+            raise InsufficientFundsException()
+
+        order = PurchaseOrder.objects.create(
+            user=user,
+            kind=kind,
+            request_id=request_id,
+            amount=amount,
+            purchase=purchase,
+            status="pending" if dispatch else "processing",
+            attempts=0 if dispatch else 1,
+        )
+        if dispatch:
+            transaction.on_commit(lambda: process_purchase_order.delay(str(order.id)))
+    return order
+
+
+def capture_order(order_id, vtu_response):
+    """
+    Turn the reservation into a wallet debit. Returns False if the order
+    had already settled, so a late or duplicate result is a no-op.
+    """
+    with transaction.atomic():
+        order = PurchaseOrder.objects.select_for_update().get(id=order_id)
+        if order.status in PurchaseOrder.FINAL_STATUSES:
+            return False
+
+        ledger.capture(
+            order.user.wallet.id,
+            order.amount,
+            description=purchase_description(order.purchase, vtu_response),
+            reference=order.request_id,
+        )
+
+        order.status = "successful"
+        order.vtu_response = vtu_response
+        order.error_message = ""
+        order.settled_at = timezone.now()
+        order.save(
+            update_fields=[
+                "status",
+                "vtu_response",
+                "error_message",
+                "settled_at",
+                "updated_at",
+            ]
+        )
+        _push_status(order)
+
+    after_purchase(order.user, order.purchase, order.request_id)
+    return True
+
+
+def release_order(order_id, vtu_response=None, error=""):
+    """Return the reservation to the wallet. Returns False if already settled."""
+    with transaction.atomic():
+        order = PurchaseOrder.objects.select_for_update().get(id=order_id)
+        if order.status in PurchaseOrder.FINAL_STATUSES:
+            return False
+
+        ledger.unlock(_wallet_id(order.user_id), order.amount)
+
+        order.status = "failed"
+        order.vtu_response = vtu_response
+        order.error_message = error
+        order.settled_at = timezone.now()
+        order.save(
+            update_fields=[
+                "status",
+                "vtu_response",
+                "error_message",
+                "settled_at",
+                "updated_at",
+            ]
+        )
+        _push_status(order)
+
+    try:
+        send_notification(
+            user=order.user,
+            title="Purchase Failed",
+            message=(
+                f"Your purchase of ₦{order.amount} could not be completed. "
+                "The reserved amount has been returned to your wallet."
+            ),
+            notification_type="payment_failed",
+        )
+    except Exception as e:
+        logger.error(f"Error sending notification: {str(e)}")
+    return True
+
+
+def mark_order_unknown(order_id, vtu_response=None, error=""):
+    """Keep the reservation; the order needs a requery to settle."""
+    updated = (
+        PurchaseOrder.objects.filter(id=order_id)
+        .exclude(status__in=PurchaseOrder.FINAL_STATUSES)
+        .update(
+            status="unknown",
+            vtu_response=vtu_response,
+            error_message=error,
+            updated_at=timezone.now(),
+        )
+    )
+    if updated:
+        _push_status(
+            PurchaseOrder.objects.only("user_id", "request_id", "kind", "status").get(id=order_id)
+        )
+    return updated
+
+
+def settle_order(order_id, vtu_response):
+    outcome = vtu_outcome(vtu_response)
+    if outcome == "successful":
+        return capture_order(order_id, vtu_response)
+    if outcome == "failed":
+        return release_order(
+            order_id,
+            vtu_response,
+            error=str(vtu_response.get("response_description", "")),
+        )
+    mark_order_unknown(order_id, vtu_response)
+    return False
@@ -0,0 +1,304 @@
+import logging
+from datetime import timedelta
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from notifications.utils import send_notification
+from transactions.models import AccountName
+from transactions.paystack import paystack_client
+from wallet import ledger
+from .models import PayoutBatch, Withdrawal
+
+logger = logging.getLogger(__name__)
+
+# Paystack transfer outcomes, as named by its transfer.* webhooks
+SUCCESS = "success"
+FAILED = "failed"
+REVERSED = "reversed"
+
+
+def transfer_reference(withdrawal):
+    # Paystack wants 16-50 lowercase alphanumerics, dashes or underscores
+    return f"bluesea-wd-{withdrawal.id:08d}-{withdrawal.attempts}"
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=settings.PAYOUT_RETRY_BACKOFF * 2 ** max(attempts - 1, 0))
+
+
+def _notify(withdrawal, title, message, email_subject):
+    def send():
+        try:
+            send_notification(
+                user=withdrawal.user,
+                title=title,
+                message=message,
+                notification_type="payment",
+                email_subject=email_subject,
+            )
+        except Exception as e:
+            logger.error(f"Error sending withdrawal notification: {str(e)}")
+
+    transaction.on_commit(send)
+
+
+def claim_batch(size=None):
+    """
+    Move up to ``size`` due pending withdrawals into a new ``PayoutBatch``
+    and mark them processing, each with a fresh transfer reference.
+    Returns the batch, or None when nothing is due.
+
+    ``SKIP LOCKED`` lets several schedulers claim disjoint batches at once.
+    """
+    size = size or settings.PAYOUT_BATCH_SIZE
+    now = timezone.now()
+    with transaction.atomic():
+        withdrawals = list(
+            Withdrawal.objects.select_for_update(skip_locked=True)
+            .filter(status="pending")
+            .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+            .order_by("created_at")[:size]
+        )
+        if not withdrawals:
+            return None
+
+        batch = PayoutBatch.objects.create(
+            item_count=len(withdrawals),
+            total_amount=sum((w.amount for w in withdrawals), Decimal("0")),
+        )
+        for withdrawal in withdrawals:
+            withdrawal.status = "processing"
+            withdrawal.attempts += 1
+            withdrawal.batch = batch
+            withdrawal.transfer_reference = transfer_reference(withdrawal)
+            withdrawal.transfer_code = ""
+            withdrawal.submitted_at = now
+        Withdrawal.objects.bulk_update(
+            withdrawals,
+            ["status", "attempts", "batch", "transfer_reference", "transfer_code", "submitted_at"],
+        )
+    return batch
+
+
+def ensure_recipients(withdrawals):
+    """
+    ``{(account_number, bank_code): recipient_code}`` for the withdrawals'
+    accounts. Codes are kept on ``AccountName``, so Paystack is only asked,
+    in one bulk call, for accounts never paid before.
+    """
+    accounts = {(w.account_number, w.bank_code): w.account_name for w in withdrawals}
+    known = {
+        (row.account_number, row.bank_code): row.recipient_code
+        for row in AccountName.objects.filter(
+            reduce(or_, (Q(account_number=n, bank_code=b) for n, b in accounts))
+        ).exclude(recipient_code="")
+    }
+    missing = [key for key in accounts if key not in known]
+    if not missing:
+        return known
+
+    recipients = [
+        {
+            "type": "nuban",
+            "name": accounts[key],
+            "account_number": key[0],
+            "bank_code": key[1],
+            "currency": "NGN",
+        }
+        for key in missing
+    ]
+    try:
+        _, body = paystack_client.request(
+            "POST", "transferrecipient/bulk", json={"batch": recipients}
+        )
+        created = (body.get("data") or {}).get("success") or []
+    except (requests.RequestException, ValueError) as e:
+        logger.error(f"Paystack recipient creation failed: {str(e)}")
+        return known
+
+    for recipient in created:
+        details = recipient.get("details") or {}
+        key = (str(details.get("account_number")), str(details.get("bank_code")))
+        if key not in accounts:
+            continue
+        known[key] = recipient["recipient_code"]
+        AccountName.objects.update_or_create(
+            account_number=key[0],
+            bank_code=key[1],
+            defaults={"recipient_code": recipient["recipient_code"]},
+        )
+    return known
+
+
+def submit_batch(batch_id):
+    """
+    Send a claimed batch to Paystack as one bulk transfer.
+
+    Items Paystack refuses count as failed attempts and go back to the queue
+    on their own. If the call itself fails the transfers may or may not
+    exist, so the items stay processing for ``verify_stale_payouts``.
+    """
+    batch = PayoutBatch.objects.get(id=batch_id)
+    withdrawals = list(batch.withdrawals.filter(status="processing"))
+    if not withdrawals:
+        return batch
+
+    recipients = ensure_recipients(withdrawals)
+    transfers = []
+    for withdrawal in withdrawals:
+        recipient = recipients.get((withdrawal.account_number, withdrawal.bank_code))
+        if recipient is None:
+            settle_transfer(withdrawal.transfer_reference, FAILED, "Could not create transfer recipient")
+            continue
+        transfers.append(
+            {
+                "amount": int(withdrawal.amount * 100),
+                "reference": withdrawal.transfer_reference,
+                "recipient": recipient,
+                "reason": f"BlueSea withdrawal {withdrawal.payment_reference}",
+            }
+        )
+    if not transfers:
+        batch.status = "rejected"
+        batch.save(update_fields=["status"])
+        return batch
+
+    try:
+        _, body = paystack_client.request(
+            "POST",
+            "transfer/bulk",
+            json={"currency": "NGN", "source": "balance", "transfers": transfers},
+        )
+    except (requests.RequestException, ValueError) as e:
+        logger.error(f"Paystack bulk transfer for batch {batch.id} failed: {str(e)}")
+        batch.status = "unknown"
+        batch.error_message = str(e)
+        batch.save(update_fields=["status", "error_message"])
+        return batch
+
+    if not body.get("status"):
+        reason = body.get("message") or "Bulk transfer rejected"
+        for transfer in transfers:
+            settle_transfer(transfer["reference"], FAILED, reason)
+        batch.status = "rejected"
+        batch.error_message = reason
+        batch.save(update_fields=["status", "error_message"])
+        return batch
+
+    accepted = {row.get("reference"): row for row in body.get("data") or []}
+    for transfer in transfers:
+        row = accepted.get(transfer["reference"])
+        if row is None:
+            settle_transfer(transfer["reference"], FAILED, "Transfer not accepted by Paystack")
+        elif row.get("transfer_code"):
+            Withdrawal.objects.filter(transfer_reference=transfer["reference"]).update(
+                transfer_code=row["transfer_code"]
+            )
+
+    batch.status = "submitted"
+    batch.submitted_at = timezone.now()
+    batch.save(update_fields=["status", "submitted_at"])
+    return batch
+
+
+def _refund(withdrawal, reason):
+    ledger.credit(
+        withdrawal.user.wallet.id,
+        withdrawal.amount,
+        description=f"Refund for failed withdrawal {withdrawal.payment_reference}",
+        reference=f"{withdrawal.payment_reference}-REFUND",
+    )
+    withdrawal.status = "failed"
+    withdrawal.failure_reason = reason
+    withdrawal.completed_at = timezone.now()
+    withdrawal.save(update_fields=["status", "failure_reason", "completed_at"])
+    _notify(
+        withdrawal,
+        "Withdrawal Failed",
+        f"Your withdrawal of ₦{withdrawal.amount} to {withdrawal.account_name} "
+        f"({withdrawal.account_number}) failed and has been refunded to your wallet.",
+        "BlueSea - Withdrawal Failed",
+    )
+
+
+def settle_transfer(reference, outcome, reason=""):
+    """
+    Apply a Paystack transfer outcome to the withdrawal holding ``reference``.
+
+    Success completes it. A failure sends it back to the queue with backoff
+    until ``PAYOUT_MAX_ATTEMPTS``, then refunds the wallet; a reversal
+    refunds straight away. Replays and outcomes for superseded attempts
+    change nothing. Returns the withdrawal's status, or None if unknown.
+    """
+    with transaction.atomic():
+        withdrawal = (
+            Withdrawal.objects.select_for_update()
+            .select_related("user")
+            .filter(transfer_reference=reference)
+            .first()
+        )
+        if withdrawal is None:
+            return None
+
+        if outcome == REVERSED and withdrawal.status in ("processing", "successful"):
+            _refund(withdrawal, reason or "Transfer reversed")
+        elif withdrawal.status == "processing":
+            if outcome == SUCCESS:
+                withdrawal.status = "successful"
+                withdrawal.completed_at = timezone.now()
+                withdrawal.save(update_fields=["status", "completed_at"])
+                _notify(
+                    withdrawal,
+                    "Withdrawal Completed",
+                    f"Your withdrawal of ₦{withdrawal.amount} to {withdrawal.account_name} "
+                    f"({withdrawal.account_number}) was successful.",
+                    "BlueSea - Withdrawal Completed",
+                )
+            elif withdrawal.attempts < settings.PAYOUT_MAX_ATTEMPTS:
+                withdrawal.status = "pending"
+                withdrawal.failure_reason = reason
+                withdrawal.next_attempt_at = timezone.now() + retry_delay(withdrawal.attempts)
+                withdrawal.save(update_fields=["status", "failure_reason", "next_attempt_at"])
+            else:
+                _refund(withdrawal, reason)
+        return withdrawal.status
+
+
+def verify_stale_payouts():
+    """
+    Ask Paystack about transfers that have been processing for longer than
+    ``PAYOUT_STALE_SECONDS`` without a webhook. Returns per-status counts.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.PAYOUT_STALE_SECONDS)
+    references = Withdrawal.objects.filter(
+        status="processing", submitted_at__lt=cutoff
+    ).values_list("transfer_reference", flat=True)
+
+    counts = {}
+    for reference in references[: settings.PAYOUT_BATCH_SIZE]:
+        try:
+            status_code, body = paystack_client.request("GET", f"transfer/verify/{reference}")
+        except (requests.RequestException, ValueError) as e:
+            logger.error(f"Paystack transfer verify for {reference} failed: {str(e)}")
+            continue
+
+        if status_code == 404:
+            # Never created: the bulk call died before Paystack saw it
+            outcome, reason = FAILED, "Transfer was not created"
+        else:
+            data = body.get("data") or {}
+            outcome = data.get("status")
+            reason = data.get("reason") or ""
+            if outcome not in (SUCCESS, FAILED, REVERSED):
+                continue
+
+        settled = settle_transfer(reference, outcome, reason)
+        counts[settled] = counts.get(settled, 0) + 1
+    return counts
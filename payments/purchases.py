@@ -0,0 +1,333 @@
+import logging
+from functools import partial
+
+from bonus.models import Referral
+from bonus.utils import award_referral_bonus, award_vtu_purchase_points
+from notifications.utils import send_notification
+from .catalog import plan_catalog
+from .serializers import (
+    AirtimeTopUpSerializer,
+    JAMBRegistrationSerializer,
+    WAECRegitrationSerializer,
+    WAECResultCheckerSerializer,
+    ElectricityPaymentSerializer,
+    DSTVPaymentSerializer,
+    GOTVPaymentSerializer,
+    StartimesPaymentSerializer,
+    ShowMaxPaymentSerializer,
+    MTNDataTopUpSerializer,
+    AirtelDataTopUpSerializer,
+    GloDataTopUpSerializer,
+    EtisalatDataTopUpSerializer,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def get_payment_description(
+    payment_type,
+    network=None,
+    phone=None,
+    plan=None,
+    amount=0,
+    meter_number=None,
+    biller_name=None,
+    meter_type=None,
+    exam_type=None,
+    disco=None,
+):
+    phone_last4 = phone[-4:] if phone and len(phone) >= 4 else phone
+
+    descriptions = {
+        "airtime": {
+            "full": f"AIRTIME: {network.upper() if network else ''} {phone_last4} - ₦{amount}",
+            "short": f"Airtime - {network.upper() if network else ''}",
+        },
+        "data": {
+            "full": f"DATA: {network.upper() if network else ''} {phone_last4} - {plan} - ₦{amount}",
+            "short": f"Data - {network.upper() if network else ''}",
+        },
+        "dstv": {
+            "full": f"DSTV: {phone_last4} - {plan} - ₦{amount}",
+            "short": "DSTV",
+        },
+        "gotv": {
+            "full": f"GOTV: {phone_last4} - {plan} - ₦{amount}",
+            "short": "GOTV",
+        },
+        "startimes": {
+            "full": f"STARTIMES: {phone_last4} - {plan} - ₦{amount}",
+            "short": "Startimes",
+        },
+        "showmax": {
+            "full": f"SHOWMAX: {phone_last4} - {plan} - ₦{amount}",
+            "short": "Showmax",
+        },
+        "electricity": {
+            "full": f"ELECTRICITY: {biller_name.replace('-', ' ').title() if biller_name else ''} {meter_type.capitalize() if meter_type else ''} {meter_number[-4:] if meter_number else ''} - ₦{amount}",
+            "short": f"Electricity - {biller_name.replace('-', ' ').title() if biller_name else ''}",
+        },
+        "waec-registration": {
+            "full": f"WAEC Registration - ₦{amount}",
+            "short": "WAEC Registration",
+        },
+        "waec-result": {
+            "full": f"WAEC Result Checker - ₦{amount}",
+            "short": "WAEC Result",
+        },
+        "jamb": {
+            "full": f"JAMB {'UTME Mock' if exam_type == 'utme-mock' else 'UTME'} - ₦{amount}",
+            "short": "JAMB Registration",
+        },
+    }
+
+    return descriptions.get(
+        payment_type,
+        {"full": f"{payment_type.title()} - ₦{amount}", "short": payment_type.title()},
+    )
+
+
+# Each builder turns validated serializer data into a purchase dict:
+#   payload        VTPass /pay body
+#   amount         amount to charge the wallet
+#   description    ledger description; ``receipt_field`` (optional) names a
+#                  VTPass response field appended to it on success
+#   title, message, email_subject
+#                  success notification
+
+
+def build_airtime(data, request_id, user):
+    amount = int(data["amount"])
+    return {
+        "amount": amount,
+        "payload": {
+            "request_id": request_id,
+            "serviceID": data["network"],
+            "amount": amount,
+            "phone": data["phone_number"],
+        },
+        "description": get_payment_description(
+            payment_type="airtime",
+            network=data.get("network", ""),
+            phone=data.get("phone_number", ""),
+            amount=amount,
+        )["full"],
+        "title": "Airtime Purchase Successful",
+        "message": f"₦{amount} airtime purchased for {data['phone_number']}",
+        "email_subject": "BlueSea - Airtime Purchase",
+    }
+
+
+def build_data(service_id, network_label, data, request_id, user):
+    plan = plan_catalog.lookup(service_id, data["plan"])
+    return {
+        "amount": plan.amount,
+        "payload": {
+            "request_id": request_id,
+            "serviceID": service_id,
+            "billersCode": data["billersCode"],
+            "variation_code": plan.variation_code,
+            "amount": plan.amount,
+            "phone": data["phone_number"],
+        },
+        "description": get_payment_description(
+            payment_type="data",
+            network=network_label,
+            phone=data.get("billersCode", ""),
+            plan=data.get("plan", ""),
+            amount=plan.amount,
+        )["full"],
+        "title": f"{network_label} Data Purchase Successful",
+        "message": f"₦{plan.amount} {network_label} data purchased for {data['phone_number']}",
+        "email_subject": "BlueSea - Data Purchase",
+    }
+
+
+def build_tv(service_id, plan_field, label, biller_field, data, request_id, user):
+    plan = plan_catalog.lookup(service_id, data[plan_field])
+    biller_code = data[biller_field]
+    return {
+        "amount": plan.amount,
+        "payload": {
+            "request_id": request_id,
+            "serviceID": service_id,
+            "billersCode": biller_code,
+            "variation_code": plan.variation_code,
+            "amount": plan.amount,
+            "phone": data["phone_number"],
+        },
+        "description": get_payment_description(
+            payment_type=service_id,
+            phone=biller_code,
+            plan=data[plan_field],
+            amount=plan.amount,
+        )["full"],
+        "title": f"{label} Subscription Successful",
+        "message": f"{label} subscription purchased for {biller_code}",
+        "email_subject": f"BlueSea - {label} Subscription",
+    }
+
+
+def build_electricity(data, request_id, user):
+    amount = int(data["amount"])
+    return {
+        "amount": amount,
+        "payload": {
+            "request_id": request_id,
+            "serviceID": data["biller_name"],
+            "billersCode": data["billerCode"],
+            "variation_code": data["meter_type"],
+            "amount": amount,
+            "phone": user.phone,
+        },
+        "description": f"Electricity - {data['biller_name'].capitalize()}",
+        "receipt_field": "purchased_code",
+        "title": "Electricity Payment Successful",
+        "message": f"₦{amount} electricity units purchased for {data['billerCode']}",
+        "email_subject": "BlueSea - Electricity Payment",
+    }
+
+
+def build_waec_registration(data, request_id, user):
+    amount = 37500
+    return {
+        "amount": amount,
+        "payload": {
+            "request_id": request_id,
+            "serviceID": "waec-registration",
+            "variation_code": "waec-registraion",
+            "quantity": 1,
+            "phone": data["phone_number"],
+        },
+        "description": get_payment_description(
+            payment_type="waec-registration", amount=amount
+        )["full"],
+        "title": "WAEC Registration Successful",
+        "message": f"WAEC registration completed for {data['phone_number']}",
+        "email_subject": "BlueSea - WAEC Registration",
+    }
+
+
+def build_waec_result(data, request_id, user):
+    amount = 5350
+    return {
+        "amount": amount,
+        "payload": {
+            "request_id": request_id,
+            "serviceID": "waec",
+            "variation_code": "waecdirect",
+            "quantity": 1,
+            "phone": data["phone_number"],
+        },
+        "description": get_payment_description(
+            payment_type="waec-result", amount=amount
+        )["full"],
+        "title": "WAEC Result Purchase Successful",
+        "message": f"WAEC result checker PIN purchased for {data['phone_number']}",
+        "email_subject": "BlueSea - WAEC Result",
+    }
+
+
+def build_jamb(data, request_id, user):
+    exam_type = data["exam_type"]
+    amount = 7700 if exam_type == "utme-mock" else 6200
+    return {
+        "amount": amount,
+        "payload": {
+            "request_id": request_id,
+            "serviceID": "jamb",
+            "variation_code": exam_type,
+            "billersCode": data["billerCode"],
+            "phone": data["phone_number"],
+        },
+        "description": get_payment_description(
+            payment_type="jamb", exam_type=exam_type, amount=amount
+        )["full"],
+        "title": "JAMB Registration Successful",
+        "message": f"JAMB registration completed for {data['phone_number']}",
+        "email_subject": "BlueSea - JAMB Registration",
+    }
+
+
+# purchase kind -> (serializer class, builder)
+PURCHASES = {
+    "airtime": (AirtimeTopUpSerializer, build_airtime),
+    "mtn-data": (MTNDataTopUpSerializer, partial(build_data, "mtn-data", "MTN")),
+    "airtel-data": (
+        AirtelDataTopUpSerializer,
+        partial(build_data, "airtel-data", "Airtel"),
+    ),
+    "glo-data": (GloDataTopUpSerializer, partial(build_data, "glo-data", "Glo")),
+    "etisalat-data": (
+        EtisalatDataTopUpSerializer,
+        partial(build_data, "etisalat-data", "9Mobile"),
+    ),
+    "dstv": (
+        DSTVPaymentSerializer,
+        partial(build_tv, "dstv", "dstv_plan", "DSTV", "billersCode"),
+    ),
+    "gotv": (
+        GOTVPaymentSerializer,
+        partial(build_tv, "gotv", "gotv_plan", "GOTV", "billersCode"),
+    ),
+    "startimes": (
+        StartimesPaymentSerializer,
+        partial(build_tv, "startimes", "startimes_plan", "Startimes", "billersCode"),
+    ),
+    "showmax": (
+        ShowMaxPaymentSerializer,
+        partial(build_tv, "showmax", "showmax_plan", "Showmax", "phone_number"),
+    ),
+    "electricity": (ElectricityPaymentSerializer, build_electricity),
+    "waec-registration": (WAECRegitrationSerializer, build_waec_registration),
+    "waec-result": (WAECResultCheckerSerializer, build_waec_result),
+    "jamb": (JAMBRegistrationSerializer, build_jamb),
+}
+
+
+def build_purchase(kind, data, request_id, user):
+    _, builder = PURCHASES[kind]
+    return builder(data, request_id, user)
+
+
+def purchase_description(purchase, vtu_response):
+    field = purchase.get("receipt_field")
+    if field:
+        return f"{purchase['description']} {vtu_response.get(field)}"
+    return purchase["description"]
+
+
+def after_purchase(user, purchase, request_id):
+    """Bonus points, first-transaction referral bonus and notification."""
+    try:
+        award_vtu_purchase_points(
+            user=user, purchase_amount=purchase["amount"], reference=request_id
+        )
+
+        # Check for referral bonus (first transaction)
+        try:
+            referral = Referral.objects.get(
+                referred_user=user,
+                status="pending",
+                first_transaction_completed=False,
+            )
+            referral.first_transaction_completed = True
+            referral.save()
+
+            award_referral_bonus(referral.referrer, user)
+        except Referral.DoesNotExist:
+            pass
+
+    except Exception as e:
+        logger.error(f"Error awarding bonus points: {str(e)}")
+
+    try:
+        send_notification(
+            user=user,
+            title=purchase["title"],
+            message=purchase["message"],
+            notification_type="payment_success",
+            email_subject=purchase["email_subject"],
+        )
+    except Exception as e:
+        logger.error(f"Error sending notification: {str(e)}")
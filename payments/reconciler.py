@@ -0,0 +1,166 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+
+from bluesea_mobile import metrics
+from .models import PurchaseOrder
+from .orders import settle_order, vtu_outcome
+from .vtpass import get_receipt
+
+logger = logging.getLogger(__name__)
+
+RESOLVED_SUCCESSFUL = "vtpass_requery.resolved_successful"
+RESOLVED_FAILED = "vtpass_requery.resolved_failed"
+STILL_UNKNOWN = "vtpass_requery.still_unknown"
+REQUERY_ERRORS = "vtpass_requery.errors"
+COUNTERS = (RESOLVED_SUCCESSFUL, RESOLVED_FAILED, STILL_UNKNOWN, REQUERY_ERRORS)
+
+
+def backoff_seconds(attempts):
+    return min(
+        settings.VTPASS_REQUERY_BACKOFF * 2 ** max(attempts - 1, 0),
+        settings.VTPASS_REQUERY_MAX_BACKOFF,
+    )
+
+
+def stuck_orders():
+    """Orders the reconciler has given up on; these need a human."""
+    return PurchaseOrder.objects.filter(
+        status="unknown",
+        requery_attempts__gte=settings.VTPASS_REQUERY_MAX_ATTEMPTS,
+    )
+
+
+def adopt_stale_orders(now):
+    """
+    Move processing orders whose worker died over to ``unknown``.
+
+    Only ``processing`` orders may have reached VTPass, so only they need a
+    requery. The conditional UPDATE doubles as a claim: a late worker's
+    outcome can no longer settle the order behind the reconciler's back.
+    """
+    stale_before = now - timedelta(seconds=settings.VTPASS_REQUERY_STALE_SECONDS)
+    return PurchaseOrder.objects.filter(
+        status="processing", updated_at__lt=stale_before
+    ).update(status="unknown", updated_at=now)
+
+
+def redispatch_stale_orders(now):
+    """
+    Queue pending orders whose task was lost again.
+
+    A ``pending`` order was never sent, so it is safe to send it. Touching
+    ``updated_at`` keeps the next run from queueing it twice, and the
+    worker's pending -> processing claim stops duplicates from calling VTPass.
+    """
+    from .tasks import process_purchase_order
+
+    stale_before = now - timedelta(seconds=settings.VTPASS_REQUERY_STALE_SECONDS)
+    stale = PurchaseOrder.objects.filter(status="pending", updated_at__lt=stale_before)
+    order_ids = list(stale.values_list("id", flat=True))
+    PurchaseOrder.objects.filter(id__in=order_ids, status="pending").update(
+        updated_at=now
+    )
+    for order_id in order_ids:
+        process_purchase_order.delay(str(order_id))
+    return len(order_ids)
+
+
+def due_orders(now):
+    return (
+        PurchaseOrder.objects.filter(
+            status="unknown",
+            requery_attempts__lt=settings.VTPASS_REQUERY_MAX_ATTEMPTS,
+        )
+        .filter(Q(next_requery_at__isnull=True) | Q(next_requery_at__lte=now))
+        .order_by("created_at")
+    )
+
+
+def _requery(request_id):
+    try:
+        return get_receipt({"request_id": request_id}), None
+    except APIException as e:
+        return None, str(e.detail)
+
+
+def reconcile_orders(batch_size=None, concurrency=None, max_batches=50):
+    """
+    Requery every purchase order without a definite outcome and settle it.
+
+    Orders are processed in batches; each batch is claimed by pushing its
+    ``next_requery_at`` forward before any HTTP call, so overlapping runs
+    skip it. VTPass calls within a batch run on a bounded thread pool, while
+    all DB work stays on the calling thread. Settlement goes through
+    ``capture_order``/``release_order``, which settle an order at most once.
+    """
+    batch_size = batch_size or settings.VTPASS_REQUERY_BATCH_SIZE
+    concurrency = concurrency or settings.VTPASS_REQUERY_CONCURRENCY
+    stats = {
+        "adopted": 0,
+        "redispatched": 0,
+        "successful": 0,
+        "failed": 0,
+        "unknown": 0,
+        "errors": 0,
+    }
+
+    now = timezone.now()
+    stats["adopted"] = adopt_stale_orders(now)
+    stats["redispatched"] = redispatch_stale_orders(now)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(max_batches):
+            now = timezone.now()
+            batch = list(
+                due_orders(now).values_list("id", "request_id", "requery_attempts")[
+                    :batch_size
+                ]
+            )
+            if not batch:
+                break
+
+            ids = [order_id for order_id, _, _ in batch]
+            lease = timedelta(seconds=settings.VTPASS_REQUERY_MAX_BACKOFF)
+            PurchaseOrder.objects.filter(id__in=ids).update(
+                requery_attempts=F("requery_attempts") + 1,
+                next_requery_at=now + lease,
+            )
+
+            results = pool.map(_requery, [request_id for _, request_id, _ in batch])
+            for (order_id, request_id, attempts), (vtu_response, error) in zip(
+                batch, results
+            ):
+                if vtu_response is not None:
+                    outcome = vtu_outcome(vtu_response)
+                    try:
+                        settle_order(order_id, vtu_response)
+                    except Exception as e:
+                        # One bad order must not strand the rest of the batch
+                        outcome = "errors"
+                        logger.error(f"Settling {request_id} failed: {str(e)}")
+                else:
+                    outcome = "errors"
+                    logger.warning(f"Requery failed for {request_id}: {error}")
+
+                stats[outcome] += 1
+                if outcome in ("unknown", "errors"):
+                    retry_at = now + timedelta(seconds=backoff_seconds(attempts + 1))
+                    PurchaseOrder.objects.filter(id=order_id, status="unknown").update(
+                        next_requery_at=retry_at
+                    )
+
+    metrics.incr(RESOLVED_SUCCESSFUL, stats["successful"])
+    metrics.incr(RESOLVED_FAILED, stats["failed"])
+    metrics.incr(STILL_UNKNOWN, stats["unknown"])
+    metrics.incr(REQUERY_ERRORS, stats["errors"])
+
+    stats["stuck"] = stuck_orders().count()
+    if stats["stuck"]:
+        logger.error(f"{stats['stuck']} purchase orders are stuck after requery")
+    return stats
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from decimal import Decimal
+from django.conf import settings
 from .models import (
     AirtimeTopUp,
     WAECRegitration,
@@ -20,6 +21,14 @@ from .models import (
     ElectricityPaymentCustomers,
     Withdrawal
 )
+from .catalog import plan_catalog
+
+
+def validate_catalog_plan(service_id, value):
+    if plan_catalog.get(service_id, value) is None:
+        raise serializers.ValidationError(f'"{value}" is not a valid plan.')
+    return value
+
 
 class AirtimeTopUpSerializer(serializers.ModelSerializer):
     class Meta:
@@ -32,6 +41,9 @@ class MTNDataTopUpSerializer(serializers.ModelSerializer):
         model = MTNDataTopUp
         fields= ["user", "plan", "billersCode", "phone_number"]
         read_only_fields= ["user", "id","request_id", "created_at"]
+
+    def validate_plan(self, value):
+        return validate_catalog_plan("mtn-data", value)
         
 class AirtelDataTopUpSerializer(serializers.ModelSerializer):
     class Meta:
@@ -39,23 +51,35 @@ class AirtelDataTopUpSerializer(serializers.ModelSerializer):
         fields= ["user", "plan", "billersCode", "phone_number"]
         read_only_fields= ["user", "id","request_id", "created_at"]
 
+    def validate_plan(self, value):
+        return validate_catalog_plan("airtel-data", value)
+
 class GloDataTopUpSerializer(serializers.ModelSerializer):
     class Meta:
         model = GloDataTopUp
         fields= ["user", "plan", "billersCode", "phone_number"]
         read_only_fields= ["user", "id","request_id", "created_at"]
+
+    def validate_plan(self, value):
+        return validate_catalog_plan("glo-data", value)
         
 class EtisalatDataTopUpSerializer(serializers.ModelSerializer):
     class Meta:
         model = EtisalatDataTopUp
         fields= ["user", "plan", "billersCode", "phone_number"]
         read_only_fields= ["user", "id","request_id", "created_at"]
+
+    def validate_plan(self, value):
+        return validate_catalog_plan("etisalat-data", value)
         
 class DSTVPaymentSerializer(serializers.ModelSerializer):
     class Meta:
         model = DSTVPayment
         fields= ["user", "billersCode","dstv_plan","subscription_type","phone_number"]
         read_only_fields= ["user", "id","request_id","created_at"]
+
+    def validate_dstv_plan(self, value):
+        return validate_catalog_plan("dstv", value)
         
 class GOTVPaymentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -63,17 +87,26 @@ class GOTVPaymentSerializer(serializers.ModelSerializer):
         fields= ["user", "billersCode","gotv_plan","subscription_type","phone_number"]
         read_only_fields= ["user", "id","request_id","created_at"]
 
+    def validate_gotv_plan(self, value):
+        return validate_catalog_plan("gotv", value)
+
 class StartimesPaymentSerializer(serializers.ModelSerializer):
     class Meta:
         model = StartimesPayment
         fields = ["user", "billersCode","startimes_plan","phone_number"]
         read_only_fields= ["user", "id","request_id","created_at"]
+
+    def validate_startimes_plan(self, value):
+        return validate_catalog_plan("startimes", value)
         
 class ShowMaxPaymentSerializer(serializers.ModelSerializer):
     class Meta:
         model = ShowMaxPayment
         fields= ["user", "phone_number","showmax_plan"]
         read_only_fields= ["user", "id","request_id","created_at"]
+
+    def validate_showmax_plan(self, value):
+        return validate_catalog_plan("showmax", value)
         
 class ElectricityPaymentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -173,3 +206,17 @@ class WithdrawalResponseSerializer(serializers.Serializer):
     state = serializers.BooleanField()
     message = serializers.CharField()
     withdrawal = WithdrawalSerializer()
+
+
+class BulkTransferItemSerializer(serializers.Serializer):
+    recipient = serializers.CharField(max_length=254, help_text="Email or phone number")
+    amount = serializers.DecimalField(
+        max_digits=12, decimal_places=2, min_value=Decimal("0.01")
+    )
+
+
+class BulkTransferRequestSerializer(serializers.Serializer):
+    transaction_pin = serializers.CharField(write_only=True)
+    transfers = BulkTransferItemSerializer(
+        many=True, min_length=1, max_length=settings.BULK_TRANSFER_MAX_RECIPIENTS
+    )
@@ -0,0 +1,179 @@
+import logging
+
+from celery import shared_task
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.utils import timezone
+
+from bluesea_mobile.utils import ProviderDegradedException, VTUAPIException
+from notifications.utils import (
+    contribution_notifications,
+    group_payment_failures,
+    group_payment_successes,
+    send_bulk_notifications,
+    send_notification,
+)
+from .catalog import refresh_catalog
+from .group_purchases import purchase_group, requery_group_payments
+from .models import GroupPayment, IdempotencyRecord, PurchaseOrder
+from .orders import mark_order_unknown, release_order, settle_order
+from .payouts import claim_batch, submit_batch, verify_stale_payouts
+from .reconciler import reconcile_orders
+from .vtpass import top_up
+
+logger = logging.getLogger(__name__)
+User = get_user_model()
+
+
+@shared_task
+def refresh_plan_catalog():
+    version = refresh_catalog()
+    return f"Plan catalog at v{version}"
+
+
+@shared_task(bind=True, max_retries=3)
+def process_purchase_order(self, order_id):
+    # Claim the order so a redelivered message cannot call VTPass twice
+    claimed = PurchaseOrder.objects.filter(id=order_id, status="pending").update(
+        status="processing", attempts=F("attempts") + 1, updated_at=timezone.now()
+    )
+    if not claimed:
+        logger.warning(f"Purchase order {order_id} is not pending, skipping")
+        return f"Order {order_id} skipped"
+
+    order = PurchaseOrder.objects.get(id=order_id)
+    try:
+        vtu_response = top_up(order.purchase["payload"])
+    except ProviderDegradedException as e:
+        # The call never left this process, so it is safe to try again
+        if self.request.retries < self.max_retries:
+            PurchaseOrder.objects.filter(id=order_id, status="processing").update(
+                status="pending"
+            )
+            raise self.retry(exc=e, countdown=30 * (self.request.retries + 1))
+        release_order(order_id, error=str(e.detail))
+        return f"Order {order_id} failed"
+    except VTUAPIException as e:
+        # The request may have reached VTPass; only a requery can tell
+        mark_order_unknown(order_id, error=str(e.detail))
+        return f"Order {order_id} unknown"
+
+    settle_order(order_id, vtu_response)
+    return f"Order {order_id} processed"
+
+
+@shared_task
+def reconcile_purchase_orders():
+    stats = reconcile_orders()
+    logger.info(f"Purchase order reconciliation: {stats}")
+    return stats
+
+
+@shared_task
+def purge_idempotency_records():
+    deleted, _ = IdempotencyRecord.objects.filter(
+        expires_at__lte=timezone.now()
+    ).delete()
+    return f"Purged {deleted} idempotency records"
+
+
+@shared_task
+def process_withdrawal_payouts():
+    """
+    Every few minutes: claim due withdrawals in batches of
+    ``PAYOUT_BATCH_SIZE`` and hand each batch to its own worker, so one
+    Paystack call pays out a whole batch.
+    """
+    batches = 0
+    for _ in range(settings.PAYOUT_MAX_BATCHES_PER_RUN):
+        batch = claim_batch()
+        if batch is None:
+            break
+        submit_payout_batch.delay(batch.id)
+        batches += 1
+    return f"Dispatched {batches} payout batches"
+
+
+@shared_task
+def submit_payout_batch(batch_id):
+    batch = submit_batch(batch_id)
+    return f"Payout batch {batch_id} {batch.status}"
+
+
+@shared_task
+def verify_stale_payouts_task():
+    counts = verify_stale_payouts()
+    return f"Verified stale payouts: {counts}"
+
+
+@shared_task
+def notify_bulk_transfer(sender_id, total, credits):
+    """
+    Notifications for one bulk transfer: a summary to the sender and a
+    receipt to every recipient. ``credits`` is ``[(user_id, amount), ...]``.
+    """
+    users = User.objects.in_bulk([sender_id] + [user_id for user_id, _ in credits])
+    sender = users[sender_id]
+    send_notification(
+        user=sender,
+        title="Transfer Successful",
+        message=f"₦{total} transferred to {len(credits)} recipients",
+        notification_type="payment_success",
+        email_subject="BlueSea - Transfer Successful",
+    )
+    send_bulk_notifications(
+        [(users[user_id], {"amount": amount}) for user_id, amount in credits],
+        title="Funds Received",
+        message="₦{amount} received from {sender}",
+        notification_type="payment_success",
+        email_subject="BlueSea - Funds Received",
+        context={"sender": sender.email},
+    )
+    return f"Sent {len(credits) + 1} bulk transfer notifications"
+
+
+@shared_task
+def notify_group_payment(group_payment_id, reason=""):
+    """
+    One task for all of a group payment's notifications: each contributor
+    hears about their debit and the purchase, or about their refund when
+    the purchase failed. Each kind goes out as one bulk notification.
+    """
+    group_payment = GroupPayment.objects.select_related("group").get(id=group_payment_id)
+    group_name = group_payment.group.name
+    payment_type = group_payment.payment_type
+    contributions = list(group_payment.contributions.select_related("member__user"))
+
+    refunded = [(c.member, c.amount) for c in contributions if c.status == "reversed"]
+    debited = [(c.member, c.amount) for c in contributions if c.status != "reversed"]
+    try:
+        if refunded:
+            group_payment_failures(refunded, group_name, payment_type, reason)
+        if debited:
+            contribution_notifications(debited, group_name, payment_type)
+        if debited and group_payment.status == "completed":
+            group_payment_successes(
+                debited, group_name, payment_type, group_payment.vtu_reference
+            )
+    except Exception as e:
+        logger.warning(f"Failed to notify members of group payment {group_payment_id}: {str(e)}")
+    return f"Notified {len(contributions)} members of group payment {group_payment_id}"
+
+
+@shared_task
+def purchase_group_payment(group_payment_id):
+    """
+    Buy what a funded group collected for. The provider call runs outside
+    any transaction; a failed purchase refunds every contributor and fails
+    the group, one VTPass has not decided yet is left to
+    ``reconcile_group_payments``.
+    """
+    payment, _ = purchase_group(group_payment_id)
+    return f"Group payment {group_payment_id} {payment.status}"
+
+
+@shared_task
+def reconcile_group_payments():
+    settled = requery_group_payments()
+    return f"Settled {settled} stale group payments"
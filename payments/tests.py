@@ -1,3 +1,1243 @@
-from django.test import TestCase
+import asyncio
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import httpx
+import requests
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from accounts.models import Profile
+from group_payment.models import Group, GroupMember
+from transactions.models import PaystackWebhookEvent, WalletTransaction
+from transactions.webhooks import process_event
+from wallet.models import Wallet
+
+from bluesea_mobile import transaction_metrics
+from bluesea_mobile.http_client import CircuitBreaker
+from bluesea_mobile.utils import ProviderDegradedException, VTUAPIException
+
+from .catalog import PlanCatalog, refresh_catalog
+from .models import (
+    GroupPayment, GroupPaymentContribution, IdempotencyRecord, PayoutBatch, PlanCatalogVersion, PurchaseOrder, Withdrawal,
+)
+from .orders import capture_order
+from .payouts import claim_batch, settle_transfer, submit_batch, verify_stale_payouts
+from .group_purchases import requery_group_payments
+from .reconciler import reconcile_orders
+from .tasks import process_purchase_order, purchase_group_payment
+from .transfers import resolve_recipients
+from .vtpass import AsyncVTPassClient, VTPassClient
+
+
+def in_transaction():
+    """True inside an atomic block of the code under test, not the TestCase's own."""
+    return any(not getattr(block, "_from_testcase", False) for block in connection.atomic_blocks)
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self.payload = payload
+        self.status_code = status_code
+
+    def json(self):
+        return self.payload
+
+
+class VTPassClientTestCase(TestCase):
+    def setUp(self):
+        self.session = mock.Mock()
+        self.breaker = CircuitBreaker(
+            "vtpass-test", failure_rate=0.5, min_calls=4, window=4, cooldown=60
+        )
+        self.client = VTPassClient(
+            base_url="https://vtpass.test/api",
+            session=self.session,
+            breaker=self.breaker,
+        )
+
+    def test_top_up_uses_pay_timeouts(self):
+        self.session.request.return_value = FakeResponse(
+            {"code": "000", "response_description": "TRANSACTION SUCCESSFUL"}
+        )
+
+        response = self.client.top_up({"request_id": "REF-1"})
+
+        self.assertEqual(response["code"], "000")
+        _, kwargs = self.session.request.call_args
+        self.assertEqual(kwargs["timeout"], VTPassClient.TIMEOUTS["pay"])
+
+    def test_transport_errors_raise_vtu_exception(self):
+        self.session.request.side_effect = requests.ReadTimeout("timed out")
+
+        with self.assertRaises(VTUAPIException):
+            self.client.top_up({"request_id": "REF-2"})
+
+    def test_connect_errors_raise_provider_degraded(self):
+        # The request never left this process, so callers may send it again
+        self.session.request.side_effect = requests.ConnectTimeout("timed out")
+
+        with self.assertRaises(ProviderDegradedException):
+            self.client.top_up({"request_id": "REF-2"})
+
+    def test_breaker_opens_and_fails_fast(self):
+        self.session.request.side_effect = requests.ReadTimeout("timed out")
+        for _ in range(4):
+            with self.assertRaises(VTUAPIException):
+                self.client.top_up({"request_id": "REF-3"})
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.session.request.reset_mock()
+
+        with self.assertRaises(ProviderDegradedException):
+            self.client.top_up({"request_id": "REF-4"})
+        self.session.request.assert_not_called()
+
+    def test_provider_business_failures_do_not_trip_breaker(self):
+        self.session.request.return_value = FakeResponse(
+            {"code": "016", "response_description": "TRANSACTION FAILED"}
+        )
+        for _ in range(6):
+            self.client.top_up({"request_id": "REF-5"})
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+
+class AsyncVTPassClientTestCase(TestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker(
+            "vtpass-async-test", failure_rate=0.5, min_calls=2, window=2, cooldown=60
+        )
+
+    def make_client(self, handler):
+        return AsyncVTPassClient(
+            base_url="https://vtpass.test/api",
+            breaker=self.breaker,
+            transport=httpx.MockTransport(handler),
+        )
+
+    def test_top_up_posts_payload(self):
+        seen = []
+
+        def handler(request):
+            seen.append(request)
+            return httpx.Response(
+                200, json={"code": "000", "response_description": "TRANSACTION SUCCESSFUL"}
+            )
+
+        response = asyncio.run(self.make_client(handler).top_up({"request_id": "REF-6"}))
+
+        self.assertEqual(response["code"], "000")
+        self.assertEqual(str(seen[0].url), "https://vtpass.test/api/pay")
+
+    def test_server_errors_trip_shared_breaker(self):
+        client = self.make_client(lambda request: httpx.Response(502))
+
+        async def run():
+            for _ in range(2):
+                with self.assertRaises(VTUAPIException):
+                    await client.top_up({"request_id": "REF-7"})
+            with self.assertRaises(ProviderDegradedException):
+                await client.top_up({"request_id": "REF-8"})
+
+        asyncio.run(run())
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+
+class CircuitBreakerTestCase(TestCase):
+    def test_slow_calls_trip_breaker(self):
+        breaker = CircuitBreaker(
+            "slow", failure_rate=0.5, slow_call_seconds=1, min_calls=2, window=2
+        )
+        breaker.record(True, 5)
+        breaker.record(True, 5)
+
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+    def test_half_open_trial_closes_on_success(self):
+        breaker = CircuitBreaker("trial", min_calls=1, window=1, cooldown=0)
+        breaker.record(False, 0.1)
+
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(breaker.allow_request())
+        self.assertFalse(breaker.allow_request())
+
+        breaker.record(True, 0.1)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+
+def variations_response(*variations):
+    return {
+        "response_description": "000",
+        "content": {
+            "variations": [
+                {"variation_code": code, "name": name, "variation_amount": amount}
+                for code, name, amount in variations
+            ]
+        },
+    }
+
+
+class PlanCatalogTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.catalog = PlanCatalog(sync_interval=0)
+
+    def test_seed_lookup_by_label_and_code(self):
+        by_label = self.catalog.lookup("mtn-data", "110MB Daily Plan (1 Day) - N100")
+        by_code = self.catalog.lookup("mtn-data", "mtn-10mb-100")
+
+        self.assertEqual(by_label, by_code)
+        self.assertEqual(by_code.amount, 100)
+        self.assertEqual(self.catalog.version, 0)
+        with self.assertRaises(KeyError):
+            self.catalog.lookup("mtn-data", "unknown-plan")
+
+    @mock.patch("payments.catalog.get_variations")
+    def test_refresh_creates_version_and_reaches_running_index(self, get_variations):
+        self.catalog.lookup("mtn-data", "mtn-10mb-100")
+
+        def fake_variations(service_id):
+            if service_id == "mtn-data":
+                return variations_response(
+                    ("mtn-10mb-100", "N120 100MB - 24 hrs", "120.00"),
+                    ("mtn-new-plan", "N250 250MB - 24 hrs", "250.00"),
+                )
+            raise VTUAPIException(detail="VTU provider error: timed out")
+
+        get_variations.side_effect = fake_variations
+        with self.captureOnCommitCallbacks(execute=True):
+            version = refresh_catalog()
+
+        self.assertEqual(version, 1)
+        entry = self.catalog.lookup("mtn-data", "110MB Daily Plan (1 Day) - N100")
+        self.assertEqual(entry.amount, 120)
+        self.assertEqual(self.catalog.version, 1)
+        self.assertEqual(
+            self.catalog.lookup("mtn-data", "N250 250MB - 24 hrs").variation_code,
+            "mtn-new-plan",
+        )
+        # Services that failed to refresh keep their plans
+        self.assertEqual(self.catalog.lookup("gotv", "gotv-max").amount, 8500)
+
+    @mock.patch("payments.catalog.get_variations")
+    def test_unchanged_refresh_keeps_version(self, get_variations):
+        get_variations.return_value = variations_response(
+            ("mtn-10mb-100", "N100 100MB - 24 hrs", "100.00")
+        )
+        refresh_catalog(["mtn-data"])
+        refresh_catalog(["mtn-data"])
+
+        self.assertEqual(PlanCatalogVersion.objects.count(), 1)
+        self.assertEqual(
+            PlanCatalogVersion.objects.filter(is_active=True).get().version, 1
+        )
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class PlanCatalogViewTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = Profile.objects.create_user(
+            email="catalog@example.com",
+            phone="08010000009",
+            surname="Catalog",
+            other_names="User",
+            role="user",
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_etag_round_trip(self):
+        url = reverse("plan-catalog")
+        response = self.client.get(url, {"service": "gotv"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data["services"]), ["gotv"])
+        etag = response["ETag"]
+
+        response = self.client.get(
+            url, {"service": "gotv"}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class AsyncPurchaseOrderTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = Profile.objects.create_user(
+            email="orders@example.com",
+            phone="08010000010",
+            surname="Orders",
+            other_names="User",
+            role="user",
+        )
+        self.user.set_transaction_pin("1234")
+        self.wallet = Wallet.objects.create(user=self.user, balance=Decimal("1000.00"))
+        self.client.force_authenticate(self.user)
+
+    def place_order(self, amount="300"):
+        with mock.patch("payments.tasks.process_purchase_order.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse("airtime"),
+                    {
+                        "network": "mtn",
+                        "phone_number": "08012345678",
+                        "amount": amount,
+                        "transaction_pin": "1234",
+                    },
+                    HTTP_PREFER="respond-async",
+                )
+        return response, delay
+
+    def test_accept_reserves_funds_and_queues_worker(self):
+        response, delay = self.place_order()
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        order = PurchaseOrder.objects.get(id=response.data["order_id"])
+        self.assertEqual(order.status, "pending")
+        delay.assert_called_once_with(str(order.id))
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("700.00"))
+        self.assertEqual(self.wallet.locked_balance, Decimal("300.00"))
+
+        response = self.client.get(response["Location"])
+        self.assertEqual(response.data["status"], "pending")
+
+    def test_insufficient_funds_creates_no_order(self):
+        response, delay = self.place_order(amount="5000")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(PurchaseOrder.objects.exists())
+        delay.assert_not_called()
+
+    @mock.patch("payments.tasks.top_up")
+    def test_success_captures_reservation_once(self, top_up):
+        response, _ = self.place_order()
+        vtu_response = {"code": "000", "response_description": "TRANSACTION SUCCESSFUL"}
+        top_up.return_value = vtu_response
+
+        process_purchase_order.apply(args=[response.data["order_id"]])
+        # A redelivered task or late duplicate result changes nothing
+        process_purchase_order.apply(args=[response.data["order_id"]])
+        self.assertFalse(capture_order(response.data["order_id"], vtu_response))
+
+        top_up.assert_called_once()
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("700.00"))
+        self.assertEqual(self.wallet.locked_balance, Decimal("0.00"))
+        self.assertEqual(
+            WalletTransaction.objects.filter(
+                wallet=self.wallet, transaction_type="DEBIT"
+            ).count(),
+            1,
+        )
+        order = PurchaseOrder.objects.get(id=response.data["order_id"])
+        self.assertEqual(order.status, "successful")
+
+    @mock.patch("payments.tasks.top_up")
+    def test_failure_releases_reservation(self, top_up):
+        response, _ = self.place_order()
+        top_up.return_value = {
+            "code": "016",
+            "content": {"transactions": {"status": "failed"}},
+            "response_description": "TRANSACTION FAILED",
+        }
+
+        process_purchase_order.apply(args=[response.data["order_id"]])
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("1000.00"))
+        self.assertEqual(self.wallet.locked_balance, Decimal("0.00"))
+        self.assertEqual(
+            PurchaseOrder.objects.get(id=response.data["order_id"]).status, "failed"
+        )
+
+    @mock.patch("payments.tasks.top_up")
+    def test_ambiguous_outcome_keeps_reservation(self, top_up):
+        response, _ = self.place_order()
+        top_up.side_effect = VTUAPIException(detail="VTU provider error: timed out")
+
+        process_purchase_order.apply(args=[response.data["order_id"]])
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.locked_balance, Decimal("300.00"))
+        self.assertEqual(
+            PurchaseOrder.objects.get(id=response.data["order_id"]).status, "unknown"
+        )
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class SyncPurchaseTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = Profile.objects.create_user(
+            email="sync@example.com",
+            phone="08010000012",
+            surname="Sync",
+            other_names="User",
+            role="user",
+        )
+        self.user.set_transaction_pin("1234")
+        self.wallet = Wallet.objects.create(user=self.user, balance=Decimal("1000.00"))
+        self.client.force_authenticate(self.user)
+
+    def buy(self):
+        return self.client.post(
+            reverse("airtime"),
+            {
+                "network": "mtn",
+                "phone_number": "08012345678",
+                "amount": "300",
+                "transaction_pin": "1234",
+            },
+        )
+
+    def balances(self):
+        self.wallet.refresh_from_db()
+        return self.wallet.balance, self.wallet.locked_balance
+
+    @mock.patch("payments.views.top_up")
+    def test_provider_is_called_outside_any_transaction(self, top_up):
+        def pay(payload):
+            self.assertFalse(in_transaction())
+            # The reservation is already committed when VTPass is called
+            self.assertEqual(self.balances(), (Decimal("700.00"), Decimal("300.00")))
+            return {"code": "000", "response_description": "TRANSACTION SUCCESSFUL"}
+
+        top_up.side_effect = pay
+
+        response = self.buy()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["response_description"], "TRANSACTION SUCCESSFUL")
+        self.assertEqual(self.balances(), (Decimal("700.00"), Decimal("0.00")))
+        self.assertEqual(PurchaseOrder.objects.get().status, "successful")
+
+        stats = transaction_metrics.endpoint_stats()["airtime"]
+        self.assertGreaterEqual(stats["transactions"], 2)
+
+    @mock.patch("payments.views.top_up")
+    def test_timeout_leaves_order_for_the_reconciler(self, top_up):
+        top_up.side_effect = VTUAPIException(detail="VTU provider error: timed out")
+
+        response = self.buy()
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["status"], "unknown")
+        self.assertEqual(self.balances(), (Decimal("700.00"), Decimal("300.00")))
+        self.assertEqual(PurchaseOrder.objects.get().status, "unknown")
+
+    @mock.patch("payments.views.top_up")
+    def test_degraded_provider_releases_reservation(self, top_up):
+        top_up.side_effect = ProviderDegradedException()
+
+        response = self.buy()
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(self.balances(), (Decimal("1000.00"), Decimal("0.00")))
+        self.assertEqual(PurchaseOrder.objects.get().status, "failed")
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+@mock.patch("payments.async_views.async_vtpass_client.top_up", new_callable=mock.AsyncMock)
+class AsyncViewPurchaseTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = Profile.objects.create_user(
+            email="asgi@example.com",
+            phone="08010000013",
+            surname="Asgi",
+            other_names="User",
+            role="user",
+        )
+        self.user.set_transaction_pin("1234")
+        self.wallet = Wallet.objects.create(user=self.user, balance=Decimal("1000.00"))
+        self.client.force_authenticate(self.user)
+
+    def buy(self):
+        return self.client.post(
+            reverse("async-airtime"),
+            {
+                "network": "mtn",
+                "phone_number": "08012345678",
+                "amount": "300",
+                "transaction_pin": "1234",
+            },
+        )
+
+    def balances(self):
+        self.wallet.refresh_from_db()
+        return self.wallet.balance, self.wallet.locked_balance
+
+    def test_success_captures_reservation(self, top_up):
+        async def pay(payload):
+            # Reserved before the call, so a concurrent spend cannot leave it unpaid
+            self.assertEqual(
+                await sync_to_async(self.balances)(), (Decimal("700.00"), Decimal("300.00"))
+            )
+            return {"code": "000", "response_description": "TRANSACTION SUCCESSFUL"}
+
+        top_up.side_effect = pay
+
+        response = self.buy()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.balances(), (Decimal("700.00"), Decimal("0.00")))
+        self.assertEqual(PurchaseOrder.objects.get().status, "successful")
+
+    def test_timeout_leaves_order_for_the_reconciler(self, top_up):
+        top_up.side_effect = VTUAPIException(detail="VTU provider error: timed out")
+
+        response = self.buy()
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["status"], "unknown")
+        self.assertEqual(self.balances(), (Decimal("700.00"), Decimal("300.00")))
+        self.assertEqual(PurchaseOrder.objects.get().status, "unknown")
+
+    def test_degraded_provider_releases_reservation(self, top_up):
+        top_up.side_effect = ProviderDegradedException()
+
+        response = self.buy()
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(self.balances(), (Decimal("1000.00"), Decimal("0.00")))
+        self.assertEqual(PurchaseOrder.objects.get().status, "failed")
+
+
+class PurchaseOrderReconcilerTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = Profile.objects.create_user(
+            email="requery@example.com",
+            phone="08010000011",
+            surname="Requery",
+            other_names="User",
+            role="user",
+        )
+        self.wallet = Wallet.objects.create(
+            user=self.user,
+            balance=Decimal("500.00"),
+            locked_balance=Decimal("400.00"),
+        )
+
+    def make_order(self, request_id, status="unknown", amount="100.00"):
+        return PurchaseOrder.objects.create(
+            user=self.user,
+            kind="airtime",
+            request_id=request_id,
+            amount=Decimal(amount),
+            purchase={
+                "amount": amount,
+                "payload": {"request_id": request_id},
+                "description": "AIRTIME",
+                "title": "Airtime Purchase Successful",
+                "message": "Airtime purchased",
+                "email_subject": "BlueSea - Airtime Purchase",
+            },
+            status=status,
+        )
+
+    @mock.patch("payments.reconciler.get_receipt")
+    def test_settles_each_order_exactly_once(self, get_receipt):
+        delivered = self.make_order("REQ-OK")
+        rejected = self.make_order("REQ-FAIL")
+        processing = self.make_order("REQ-WAIT")
+        not_found = self.make_order("REQ-MISSING")
+        responses = {
+            "REQ-OK": {"code": "000", "response_description": "TRANSACTION SUCCESSFUL"},
+            "REQ-FAIL": {
+                "code": "000",
+                "content": {"transactions": {"status": "reversed"}},
+                "response_description": "TRANSACTION SUCCESSFUL",
+            },
+            "REQ-WAIT": {"code": "099", "response_description": "TRANSACTION PROCESSING"},
+            # Not a final status: VTPass may not have indexed the request yet
+            "REQ-MISSING": {"code": "015", "response_description": "INVALID REQUEST ID"},
+        }
+        get_receipt.side_effect = lambda body: responses[body["request_id"]]
+
+        stats = reconcile_orders(batch_size=2, concurrency=2)
+        # Orders without a final status are backed off, not requeried again
+        second = reconcile_orders(batch_size=2, concurrency=2)
+
+        self.assertEqual(
+            (stats["successful"], stats["failed"], stats["unknown"]), (1, 1, 2)
+        )
+        self.assertEqual(second["successful"] + second["failed"] + second["unknown"], 0)
+        self.assertEqual(get_receipt.call_count, 4)
+
+        for order in (delivered, rejected, processing, not_found):
+            order.refresh_from_db()
+        self.assertEqual(delivered.status, "successful")
+        self.assertEqual(rejected.status, "failed")
+        self.assertEqual(processing.status, "unknown")
+        self.assertEqual(not_found.status, "unknown")
+        self.assertIsNotNone(processing.next_requery_at)
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("600.00"))
+        self.assertEqual(self.wallet.locked_balance, Decimal("200.00"))
+        self.assertEqual(
+            WalletTransaction.objects.filter(reference="REQ-OK").count(), 1
+        )
+
+    @mock.patch("payments.reconciler.settle_order")
+    @mock.patch("payments.reconciler.get_receipt")
+    def test_settlement_error_does_not_abort_batch(self, get_receipt, settle_order):
+        broken = self.make_order("REQ-BROKEN")
+        self.make_order("REQ-NEXT")
+        get_receipt.return_value = {"code": "000", "response_description": "TRANSACTION SUCCESSFUL"}
+        settle_order.side_effect = [RuntimeError("deadlock detected"), True]
+
+        stats = reconcile_orders(batch_size=2)
+
+        self.assertEqual((stats["successful"], stats["errors"]), (1, 1))
+        self.assertEqual(settle_order.call_count, 2)
+        broken.refresh_from_db()
+        # Backed off for the next run rather than left on the batch lease
+        self.assertLess(broken.next_requery_at, timezone.now() + timedelta(minutes=5))
+
+    @mock.patch("payments.reconciler.get_receipt")
+    def test_adopts_orders_whose_worker_died(self, get_receipt):
+        order = self.make_order("REQ-STALE", status="processing")
+        PurchaseOrder.objects.filter(id=order.id).update(
+            updated_at=timezone.now() - timedelta(hours=1)
+        )
+        get_receipt.return_value = {
+            "code": "000",
+            "response_description": "TRANSACTION SUCCESSFUL",
+        }
+
+        stats = reconcile_orders()
+
+        self.assertEqual(stats["adopted"], 1)
+        order.refresh_from_db()
+        self.assertEqual(order.status, "successful")
+
+    @mock.patch("payments.tasks.process_purchase_order.delay")
+    @mock.patch("payments.reconciler.get_receipt")
+    def test_redispatches_orders_that_were_never_sent(self, get_receipt, delay):
+        order = self.make_order("REQ-LOST", status="pending")
+        PurchaseOrder.objects.filter(id=order.id).update(
+            updated_at=timezone.now() - timedelta(hours=1)
+        )
+
+        stats = reconcile_orders()
+        second = reconcile_orders()
+
+        self.assertEqual((stats["adopted"], stats["redispatched"]), (0, 1))
+        self.assertEqual(second["redispatched"], 0)
+        delay.assert_called_once_with(str(order.id))
+        get_receipt.assert_not_called()
+        order.refresh_from_db()
+        self.assertEqual(order.status, "pending")
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class IdempotencyKeyTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.sender = Profile.objects.create_user(
+            email="sender@example.com",
+            phone="08010000020",
+            surname="Sender",
+            other_names="User",
+            role="user",
+        )
+        self.sender.set_transaction_pin("1234")
+        self.recipient = Profile.objects.create_user(
+            email="recipient@example.com",
+            phone="08010000021",
+            surname="Recipient",
+            other_names="User",
+            role="user",
+        )
+        self.sender_wallet = Wallet.objects.create(
+            user=self.sender, balance=Decimal("1000.00")
+        )
+        self.recipient_wallet = Wallet.objects.create(user=self.recipient)
+        self.client.force_authenticate(self.sender)
+
+    def transfer(self, key, amount="100"):
+        return self.client.post(
+            reverse("internal-transfer"),
+            {
+                "email": "recipient@example.com",
+                "amount": amount,
+                "transaction_pin": "1234",
+            },
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_first_response(self):
+        first = self.transfer("transfer-1")
+        second = self.transfer("transfer-1")
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(second.data["reference"], first.data["reference"])
+
+        self.sender_wallet.refresh_from_db()
+        self.assertEqual(self.sender_wallet.balance, Decimal("900.00"))
+        self.assertEqual(IdempotencyRecord.objects.filter(status_code=200).count(), 1)
+
+    def test_replay_survives_cache_loss(self):
+        first = self.transfer("transfer-1")
+        cache.clear()
+        second = self.transfer("transfer-1")
+
+        self.assertEqual(second.data["reference"], first.data["reference"])
+        self.sender_wallet.refresh_from_db()
+        self.assertEqual(self.sender_wallet.balance, Decimal("900.00"))
+
+    def test_key_reused_with_different_body_is_rejected(self):
+        self.transfer("transfer-1")
+        response = self.transfer("transfer-1", amount="200")
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.sender_wallet.refresh_from_db()
+        self.assertEqual(self.sender_wallet.balance, Decimal("900.00"))
+
+    @override_settings(IDEMPOTENCY_LOCK_WAIT=0)
+    def test_in_flight_duplicate_does_not_run(self):
+        # The original request still holds the lock
+        with mock.patch(
+            "payments.idempotency.IdempotencyStore.acquire", return_value=False
+        ):
+            response = self.transfer("transfer-1")
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.sender_wallet.refresh_from_db()
+        self.assertEqual(self.sender_wallet.balance, Decimal("1000.00"))
+
+    def test_db_lock_used_when_cache_is_down(self):
+        with mock.patch(
+            "payments.idempotency.cache.add", side_effect=ConnectionError("redis down")
+        ):
+            first = self.transfer("transfer-1")
+            second = self.transfer("transfer-1")
+
+        self.assertEqual(second.data["reference"], first.data["reference"])
+        self.sender_wallet.refresh_from_db()
+        self.assertEqual(self.sender_wallet.balance, Decimal("900.00"))
+
+    def test_requests_without_key_are_not_deduplicated(self):
+        self.client.post(
+            reverse("internal-transfer"),
+            {"email": "recipient@example.com", "amount": "100", "transaction_pin": "1234"},
+        )
+        self.client.post(
+            reverse("internal-transfer"),
+            {"email": "recipient@example.com", "amount": "100", "transaction_pin": "1234"},
+        )
+
+        self.sender_wallet.refresh_from_db()
+        self.assertEqual(self.sender_wallet.balance, Decimal("800.00"))
+        self.assertFalse(IdempotencyRecord.objects.exists())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class WithdrawalValidationTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = Profile.objects.create_user(
+            email="withdraw@example.com",
+            phone="08010000070",
+            surname="Withdraw",
+            other_names="User",
+            role="user",
+        )
+        self.user.set_transaction_pin("1234")
+        self.wallet = Wallet.objects.create(user=self.user, balance=Decimal("5000.00"))
+        self.client.force_authenticate(self.user)
+        patcher = mock.patch("transactions.paystack.paystack_client.request")
+        self.paystack = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def withdraw(self, account_number="0123456789", bank_code="058"):
+        return self.client.post(
+            reverse("withdrawal"),
+            {
+                "account_name": "Typed Name",
+                "account_number": account_number,
+                "bank_code": bank_code,
+                "bank_name": "GTBank",
+                "amount": "1000.00",
+                "transaction_pin": "1234",
+            },
+        )
+
+    def paystack_responses(self, method, path, **kwargs):
+        if path == "bank":
+            return 200, {"data": [{"name": "GTBank", "code": "058"}]}
+        if kwargs["params"]["account_number"] == "0123456789":
+            return 200, {"status": True, "data": {"account_name": "ADA OBI"}}
+        return 422, {"status": False, "message": "Could not resolve account name"}
+
+    def test_withdrawals_validate_against_cached_paystack_data(self):
+        self.paystack.side_effect = self.paystack_responses
+
+        first = self.withdraw()
+        second = self.withdraw()
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.data["withdrawal"]["account_name"], "ADA OBI")
+        # One bank list fetch and one resolution served both withdrawals
+        self.assertEqual(self.paystack.call_count, 2)
+
+        self.assertEqual(self.withdraw(bank_code="999").data["error"], "Unsupported bank")
+        self.assertEqual(
+            self.withdraw(account_number="0000000000").data["error"],
+            "Could not verify bank account",
+        )
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("3000.00"))
+
+
+@override_settings(PAYOUT_BATCH_SIZE=10, PAYOUT_MAX_ATTEMPTS=2, PAYOUT_RETRY_BACKOFF=60)
+class PayoutEngineTestCase(TestCase):
+    def setUp(self):
+        self.user = Profile.objects.create_user(
+            email="payout@example.com",
+            phone="08010000080",
+            surname="Payout",
+            other_names="User",
+            role="user",
+        )
+        self.wallet = Wallet.objects.create(user=self.user, balance=Decimal("0.00"))
+        patcher = mock.patch("payments.payouts.paystack_client.request")
+        self.paystack = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.paystack.side_effect = self.paystack_responses
+        self.bulk_status = True
+
+    def make_withdrawal(self, n, amount="1000.00"):
+        return Withdrawal.objects.create(
+            user=self.user,
+            account_name=f"Holder {n}",
+            account_number=f"01234567{n:02d}",
+            bank_code="058",
+            bank_name="GTBank",
+            amount=Decimal(amount),
+            payment_reference=f"WD-TEST{n:04d}",
+        )
+
+    def paystack_responses(self, method, path, **kwargs):
+        if path == "transferrecipient/bulk":
+            return 200, {"status": True, "data": {"success": [
+                {
+                    "recipient_code": f"RCP_{r['account_number']}",
+                    "details": {"account_number": r["account_number"], "bank_code": r["bank_code"]},
+                }
+                for r in kwargs["json"]["batch"]
+            ]}}
+        if path == "transfer/bulk":
+            if not self.bulk_status:
+                return 400, {"status": False, "message": "Insufficient balance"}
+            return 200, {"status": True, "data": [
+                {"reference": t["reference"], "transfer_code": f"TRF_{t['reference'][-4:]}"}
+                for t in kwargs["json"]["transfers"]
+            ]}
+        raise AssertionError(f"Unexpected Paystack call {method} {path}")
+
+    def submit(self):
+        batch = claim_batch()
+        return submit_batch(batch.id)
+
+    def webhook(self, event, reference, reason=""):
+        row = PaystackWebhookEvent.objects.create(
+            event=event,
+            reference=reference,
+            payload={"event": event, "data": {"reference": reference, "reason": reason}},
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            return process_event(row.id)
+
+    def test_batch_is_paid_with_one_bulk_transfer(self):
+        withdrawals = [self.make_withdrawal(n) for n in range(5)]
+
+        batch = self.submit()
+        self.assertEqual(batch.status, "submitted")
+        self.assertEqual(batch.item_count, 5)
+        self.assertEqual(batch.total_amount, Decimal("5000.00"))
+        paths = [call.args[1] for call in self.paystack.call_args_list]
+        self.assertEqual(paths, ["transferrecipient/bulk", "transfer/bulk"])
+        stored = PayoutBatch.objects.get(id=batch.id)
+        self.assertEqual(stored.status, "submitted")
+        self.assertIsNotNone(stored.submitted_at)
+
+        # Recipient codes are reused, so the next batch is a single call
+        for withdrawal in withdrawals:
+            withdrawal.refresh_from_db()
+            self.assertEqual(withdrawal.status, "processing")
+            self.assertEqual(withdrawal.batch_id, batch.id)
+            self.assertEqual(withdrawal.transfer_code, f"TRF_{withdrawal.transfer_reference[-4:]}")
+            Withdrawal.objects.filter(id=withdrawal.id).update(status="pending")
+        self.paystack.reset_mock()
+        self.submit()
+        self.assertEqual([call.args[1] for call in self.paystack.call_args_list], ["transfer/bulk"])
+
+    @mock.patch("payments.payouts.send_notification")
+    def test_success_webhook_completes_withdrawal(self, send_notification):
+        withdrawal = self.make_withdrawal(1)
+        self.submit()
+        withdrawal.refresh_from_db()
+
+        self.assertEqual(self.webhook("transfer.success", withdrawal.transfer_reference), "PROCESSED")
+        withdrawal.refresh_from_db()
+        self.assertEqual(withdrawal.status, "successful")
+        self.assertIsNotNone(withdrawal.completed_at)
+        send_notification.assert_called_once()
+        self.assertEqual(self.webhook("transfer.success", "bluesea-wd-unknown-1"), "IGNORED")
+
+    @mock.patch("payments.payouts.send_notification")
+    def test_failures_retry_then_refund_once(self, send_notification):
+        withdrawal = self.make_withdrawal(1)
+        self.submit()
+        withdrawal.refresh_from_db()
+        first_reference = withdrawal.transfer_reference
+
+        self.webhook("transfer.failed", first_reference, "Account closed")
+        withdrawal.refresh_from_db()
+        self.assertEqual(withdrawal.status, "pending")
+        self.assertGreater(withdrawal.next_attempt_at, timezone.now())
+        # Not due yet
+        self.assertIsNone(claim_batch())
+
+        Withdrawal.objects.filter(id=withdrawal.id).update(next_attempt_at=timezone.now())
+        self.submit()
+        withdrawal.refresh_from_db()
+        self.assertNotEqual(withdrawal.transfer_reference, first_reference)
+
+        self.webhook("transfer.failed", withdrawal.transfer_reference, "Account closed")
+        with self.captureOnCommitCallbacks(execute=True):
+            settle_transfer(withdrawal.transfer_reference, "failed", "Account closed")
+        withdrawal.refresh_from_db()
+        self.wallet.refresh_from_db()
+        self.assertEqual(withdrawal.status, "failed")
+        self.assertEqual(withdrawal.attempts, 2)
+        self.assertEqual(self.wallet.balance, Decimal("1000.00"))
+
+    def test_rejected_bulk_transfer_requeues_items(self):
+        withdrawal = self.make_withdrawal(1)
+        self.bulk_status = False
+
+        batch = self.submit()
+        self.assertEqual(batch.status, "rejected")
+        self.assertEqual(batch.error_message, "Insufficient balance")
+        withdrawal.refresh_from_db()
+        self.assertEqual(withdrawal.status, "pending")
+        self.assertEqual(withdrawal.failure_reason, "Insufficient balance")
+
+    def test_reversal_refunds_completed_withdrawal(self):
+        withdrawal = self.make_withdrawal(1)
+        self.submit()
+        withdrawal.refresh_from_db()
+        self.webhook("transfer.success", withdrawal.transfer_reference)
+
+        self.webhook("transfer.reversed", withdrawal.transfer_reference)
+        withdrawal.refresh_from_db()
+        self.wallet.refresh_from_db()
+        self.assertEqual(withdrawal.status, "failed")
+        self.assertEqual(withdrawal.failure_reason, "Transfer reversed")
+        self.assertEqual(self.wallet.balance, Decimal("1000.00"))
+
+    @override_settings(PAYOUT_STALE_SECONDS=0)
+    def test_stale_transfers_are_verified(self):
+        withdrawal = self.make_withdrawal(1)
+        self.submit()
+        withdrawal.refresh_from_db()
+        self.paystack.side_effect = None
+        self.paystack.return_value = (200, {"status": True, "data": {"status": "success"}})
+
+        self.assertEqual(verify_stale_payouts(), {"successful": 1})
+        withdrawal.refresh_from_db()
+        self.assertEqual(withdrawal.status, "successful")
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class BulkTransferTestCase(APITestCase):
+    def setUp(self):
+        self.sender = Profile.objects.create_user(
+            email="bulk@example.com",
+            phone="08010000090",
+            surname="Bulk",
+            other_names="Sender",
+            role="user",
+        )
+        self.sender.set_transaction_pin("1234")
+        self.sender_wallet = Wallet.objects.create(user=self.sender, balance=Decimal("1000.00"))
+        self.recipients = []
+        for n in range(3):
+            user = Profile.objects.create_user(
+                email=f"payee{n}@example.com",
+                phone=f"0801000010{n}",
+                surname="Payee",
+                other_names=str(n),
+                role="user",
+            )
+            Wallet.objects.create(user=user)
+            self.recipients.append(user)
+        self.client.force_authenticate(self.sender)
+
+    def post(self, transfers, pin="1234"):
+        with mock.patch("payments.tasks.notify_bulk_transfer.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse("bulk-transfer"),
+                    {"transaction_pin": pin, "transfers": transfers},
+                    format="json",
+                )
+        return response, delay
+
+    def test_pays_all_recipients_in_one_batch(self):
+        transfers = [
+            {"recipient": "payee0@example.com", "amount": "100"},
+            {"recipient": "08010000101", "amount": "200"},
+            {"recipient": "payee2@example.com", "amount": "300"},
+            {"recipient": "nobody@example.com", "amount": "50"},
+            {"recipient": "bulk@example.com", "amount": "50"},
+        ]
+        response, delay = self.post(transfers)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total_amount"], "600.00")
+        self.assertEqual(
+            [r["status"] for r in response.data["results"]],
+            ["successful", "successful", "successful", "failed", "failed"],
+        )
+        self.assertEqual(response.data["results"][3]["error"], "Recipient not found")
+        self.assertEqual(response.data["results"][4]["error"], "Cannot transfer to yourself")
+
+        self.sender_wallet.refresh_from_db()
+        self.assertEqual(self.sender_wallet.balance, Decimal("400.00"))
+        self.assertEqual(
+            WalletTransaction.objects.filter(wallet=self.sender_wallet).count(), 1
+        )
+        balances = [Wallet.objects.get(user=user).balance for user in self.recipients]
+        self.assertEqual(balances, [Decimal("100.00"), Decimal("200.00"), Decimal("300.00")])
+        delay.assert_called_once()
+        self.assertEqual(len(delay.call_args.args[2]), 3)
+
+    def test_recipients_resolve_in_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            resolved = resolve_recipients(["payee0@example.com", "08010000101", "nobody@example.com"])
+            wallets = [user.wallet.id for user in resolved.values()]
+        self.assertEqual(len(wallets), 2)
+        # Ignore the profiler's EXPLAIN of the same query
+        selects = [q for q in queries if q["sql"].startswith("SELECT")]
+        self.assertEqual(len(selects), 1)
+
+    def test_insufficient_funds_pays_nobody(self):
+        response, delay = self.post(
+            [
+                {"recipient": "payee0@example.com", "amount": "600"},
+                {"recipient": "payee1@example.com", "amount": "600"},
+            ]
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["error"], "Insufficient funds")
+        self.sender_wallet.refresh_from_db()
+        self.assertEqual(self.sender_wallet.balance, Decimal("1000.00"))
+        self.assertFalse(WalletTransaction.objects.exists())
+        delay.assert_not_called()
+
+    def test_invalid_pin_is_rejected(self):
+        response, _ = self.post([{"recipient": "payee0@example.com", "amount": "100"}], pin="0000")
+        self.assertEqual(response.data["error"], "Invalid transaction PIN")
+        self.sender_wallet.refresh_from_db()
+        self.assertEqual(self.sender_wallet.balance, Decimal("1000.00"))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class GroupPaymentCollectionTestCase(APITestCase):
+    def setUp(self):
+        self.members = []
+        for n in range(4):
+            user = Profile.objects.create_user(
+                email=f"member{n}@example.com",
+                phone=f"0801000020{n}",
+                surname="Member",
+                other_names=str(n),
+                role="user",
+            )
+            Wallet.objects.create(user=user, balance=Decimal("500.00"))
+            self.members.append(user)
+        self.owner = self.members[0]
+        self.owner.set_transaction_pin("1234")
+        self.group = Group.objects.create(name="Family", created_by=self.owner)
+        for user in self.members:
+            GroupMember.objects.create(
+                group=self.group, user=user, role="owner" if user == self.owner else "member"
+            )
+        self.client.force_authenticate(self.owner)
+
+    def pay(self, total="1000.00", payment_type="airtime", **service_details):
+        with mock.patch("payments.tasks.notify_group_payment.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse("group-payment"),
+                    {
+                        "transaction_pin": "1234",
+                        "group_id": str(self.group.id),
+                        "payment_type": payment_type,
+                        "total_amount": total,
+                        "service_details": {
+                            "network": "mtn",
+                            "phone_number": "08012345678",
+                            **service_details,
+                        },
+                    },
+                    format="json",
+                )
+        return response, delay
+
+    def balances(self):
+        return [Wallet.objects.get(user=user).balance for user in self.members]
+
+    @mock.patch("payments.group_purchases.top_up")
+    def test_collects_all_shares_and_queues_one_notification_task(self, top_up):
+        top_up.return_value = {"response_description": "TRANSACTION SUCCESSFUL", "requestId": "GP-1"}
+
+        response, delay = self.pay()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.balances(), [Decimal("250.00")] * 4)
+        payment = GroupPayment.objects.get()
+        self.assertEqual(payment.status, "completed")
+        self.assertEqual(
+            GroupPaymentContribution.objects.filter(group_payment=payment, status="completed").count(), 4
+        )
+        self.assertEqual(WalletTransaction.objects.filter(transaction_type="DEBIT").count(), 4)
+        delay.assert_called_once_with(payment.id)
+
+    @mock.patch("payments.group_purchases.top_up")
+    def test_one_short_member_debits_nobody(self, top_up):
+        Wallet.objects.filter(user=self.members[2]).update(balance=Decimal("249.99"))
+
+        response, delay = self.pay()
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["error"], "Insufficient funds for member2@example.com")
+        self.assertEqual(self.balances(), [Decimal("500.00"), Decimal("500.00"), Decimal("249.99"), Decimal("500.00")])
+        self.assertFalse(GroupPayment.objects.exists())
+        self.assertFalse(WalletTransaction.objects.exists())
+        top_up.assert_not_called()
+        delay.assert_not_called()
+
+    @mock.patch("payments.group_purchases.top_up")
+    def test_failed_purchase_refunds_every_member(self, top_up):
+        top_up.return_value = {
+            "code": "016",
+            "content": {"transactions": {"status": "failed"}},
+            "response_description": "TRANSACTION FAILED",
+        }
+
+        response, delay = self.pay()
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.balances(), [Decimal("500.00")] * 4)
+        payment = GroupPayment.objects.get()
+        self.assertEqual(payment.status, "failed")
+        self.assertEqual(
+            set(payment.contributions.values_list("status", flat=True)), {"reversed"}
+        )
+        delay.assert_called_once_with(payment.id, "TRANSACTION FAILED")
+
+    @mock.patch("payments.group_purchases.top_up")
+    def test_unknown_plan_refunds_every_member(self, top_up):
+        response, delay = self.pay(payment_type="data", plan_id="no-such-plan")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.balances(), [Decimal("500.00")] * 4)
+        payment = GroupPayment.objects.get()
+        self.assertEqual(payment.status, "failed")
+        top_up.assert_not_called()
+        delay.assert_called_once_with(payment.id, "Invalid plan or service details")
+
+    @mock.patch("payments.group_purchases.top_up")
+    def test_9mobile_data_is_bought(self, top_up):
+        top_up.return_value = {"response_description": "TRANSACTION SUCCESSFUL", "requestId": "GP-9"}
+
+        response, _ = self.pay(payment_type="data", network="etisalat", plan_id="9mobile-sme-data-1gb")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(top_up.call_args.args[0]["serviceID"], "etisalat-data")
+        self.assertEqual(GroupPayment.objects.get().status, "completed")
+
+    @mock.patch("payments.group_purchases.get_receipt")
+    @mock.patch("payments.group_purchases.top_up")
+    def test_timeout_is_settled_by_requery(self, top_up, get_receipt):
+        def pay(payload):
+            self.assertFalse(in_transaction())
+            raise VTUAPIException(detail="VTU provider error: timed out")
+
+        top_up.side_effect = pay
+
+        response, delay = self.pay()
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        payment = GroupPayment.objects.get()
+        self.assertEqual(payment.status, "processing")
+        self.assertEqual(top_up.call_args.args[0]["request_id"], payment.vtu_reference)
+        delay.assert_not_called()
+
+        GroupPayment.objects.filter(id=payment.id).update(
+            updated_at=timezone.now() - timedelta(hours=1)
+        )
+        get_receipt.return_value = {
+            "code": "000",
+            "content": {"transactions": {"status": "failed"}},
+            "response_description": "TRANSACTION FAILED",
+        }
+        with mock.patch("payments.tasks.notify_group_payment.delay"):
+            self.assertEqual(requery_group_payments(), 1)
+
+        get_receipt.assert_called_once_with({"request_id": payment.vtu_reference})
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, "failed")
+        self.assertEqual(self.balances(), [Decimal("500.00")] * 4)
+
+    @mock.patch("payments.group_purchases.get_receipt")
+    @mock.patch("payments.group_purchases.top_up")
+    def test_unsent_payment_is_sent_again_not_requeried(self, top_up, get_receipt):
+        # The process died after the debits committed but before calling VTPass
+        with mock.patch("payments.views.purchase_group") as purchase_group:
+            purchase_group.side_effect = lambda payment_id: (GroupPayment.objects.get(id=payment_id), "")
+            self.pay()
+        payment = GroupPayment.objects.get()
+        self.assertEqual((payment.status, payment.sent_at), ("processing", None))
+        GroupPayment.objects.filter(id=payment.id).update(
+            updated_at=timezone.now() - timedelta(hours=1)
+        )
+
+        with mock.patch("payments.tasks.purchase_group_payment.delay") as delay:
+            self.assertEqual(requery_group_payments(), 0)
+            self.assertEqual(requery_group_payments(), 0)
+
+        get_receipt.assert_not_called()
+        delay.assert_called_once_with(payment.id)
+
+        top_up.return_value = {"response_description": "TRANSACTION SUCCESSFUL", "requestId": "GP-2"}
+        with mock.patch("payments.tasks.notify_group_payment.delay"):
+            purchase_group_payment(payment.id)
+            purchase_group_payment(payment.id)
+
+        top_up.assert_called_once()
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, "completed")
+        self.assertIsNotNone(payment.sent_at)
@@ -0,0 +1,111 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+
+from wallet import ledger
+from wallet.ledger import Posting
+from .tasks import notify_bulk_transfer
+from .vtpass import generate_reference_id
+
+User = get_user_model()
+
+# Marks a phone number shared by several accounts
+AMBIGUOUS = object()
+
+
+def resolve_recipients(identifiers):
+    """
+    ``{identifier: user}`` for recipient emails and phone numbers, fetched
+    with their wallets in one query. Identifiers matching nobody are left
+    out; a phone number several users share maps to ``AMBIGUOUS``.
+    """
+    emails = {i for i in identifiers if "@" in i}
+    phones = set(identifiers) - emails
+    users = User.objects.filter(
+        Q(email__in=emails) | Q(phone__in=phones)
+    ).select_related("wallet")
+
+    resolved = {}
+    for user in users:
+        if user.email in emails:
+            resolved[user.email] = user
+        if user.phone in phones:
+            resolved[user.phone] = AMBIGUOUS if user.phone in resolved else user
+    return resolved
+
+
+def _recipient_error(user, sender):
+    if user is None:
+        return "Recipient not found"
+    if user is AMBIGUOUS:
+        return "Phone number matches more than one account, use an email"
+    if user.pk == sender.pk:
+        return "Cannot transfer to yourself"
+    if not hasattr(user, "wallet"):
+        return "Recipient has no wallet"
+    return None
+
+
+def bulk_transfer(sender, transfers):
+    """
+    Pay many recipients from ``sender``'s wallet in one ledger batch.
+
+    ``transfers`` is a list of ``{"recipient": email or phone, "amount":
+    Decimal}``. Recipients that cannot be paid are reported and skipped; the
+    rest are credited together with a single debit of their total, so the
+    batch either fully lands or, on ``InsufficientFunds``, not at all.
+    Notifications go out in one task after commit.
+
+    Returns ``(reference, total, results)`` with one result per transfer.
+    """
+    resolved = resolve_recipients([item["recipient"] for item in transfers])
+    reference = generate_reference_id()
+    results, postings, credits = [], [], []
+
+    for index, item in enumerate(transfers, start=1):
+        recipient, amount = item["recipient"], item["amount"]
+        user = resolved.get(recipient)
+        error = _recipient_error(user, sender)
+        if error:
+            results.append(
+                {"recipient": recipient, "amount": str(amount), "status": "failed", "error": error}
+            )
+            continue
+
+        credit_reference = f"{reference}-{index}"
+        postings.append(
+            Posting(
+                user.wallet.id,
+                amount,
+                "CREDIT",
+                f"Internal transfer from {sender.email}",
+                credit_reference,
+            )
+        )
+        credits.append((user.pk, str(amount)))
+        results.append(
+            {
+                "recipient": recipient,
+                "amount": str(amount),
+                "status": "successful",
+                "reference": credit_reference,
+            }
+        )
+
+    total = sum((posting.amount for posting in postings), Decimal("0"))
+    if postings:
+        debit = Posting(
+            sender.wallet.id,
+            total,
+            "DEBIT",
+            f"Bulk transfer to {len(postings)} recipients",
+            reference,
+        )
+        with transaction.atomic():
+            ledger.post_many([debit] + postings)
+            transaction.on_commit(
+                lambda: notify_bulk_transfer.delay(sender.pk, str(total), credits)
+            )
+    return reference, total, results
@@ -18,7 +18,27 @@ from .views import (
     ElectricityPaymentCustomerViews,
     Airtime2CashViews,
     InternalTransferView,
+    BulkTransferView,
     WithdrawalView,
+    PlanCatalogView,
+    PurchaseOrderStatusView,
+    PurchaseReconciliationStatsView,
+    DBTransactionStatsView,
+)
+from .async_views import (
+    AsyncAirtimeTopUpView,
+    AsyncJAMBRegistrationView,
+    AsyncWAECRegitrationView,
+    AsyncWAECResultCheckerView,
+    AsyncElectricityPaymentView,
+    AsyncDSTVPaymentView,
+    AsyncGOTVPaymentView,
+    AsyncStartimesPaymentView,
+    AsyncShowMaxPaymentView,
+    AsyncMTNDataTopUpView,
+    AsyncAirtelDataTopUpView,
+    AsyncGloDataTopUpView,
+    AsyncEtisalatDataTopUpView,
 )
 
 urlpatterns = [
@@ -54,7 +74,72 @@ urlpatterns = [
     path(
         "internal-transfer/", InternalTransferView.as_view(), name="internal-transfer"
     ),
+    path(
+        "internal-transfer/bulk/", BulkTransferView.as_view(), name="bulk-transfer"
+    ),
     path(
         "withdrawal/", WithdrawalView.as_view(), name="withdrawal"
     ),
+    path("plans/", PlanCatalogView.as_view(), name="plan-catalog"),
+    path(
+        "orders/reconciliation/",
+        PurchaseReconciliationStatsView.as_view(),
+        name="purchase-reconciliation-stats",
+    ),
+    path(
+        "db-transactions/stats/",
+        DBTransactionStatsView.as_view(),
+        name="db-transaction-stats",
+    ),
+    path(
+        "orders/<uuid:order_id>/",
+        PurchaseOrderStatusView.as_view(),
+        name="purchase-order-status",
+    ),
+    # ASGI-native variants of the purchase endpoints
+    path("async/airtime/", AsyncAirtimeTopUpView.as_view(), name="async-airtime"),
+    path(
+        "async/airtel-data/",
+        AsyncAirtelDataTopUpView.as_view(),
+        name="async-airtel-data",
+    ),
+    path("async/mtn-data/", AsyncMTNDataTopUpView.as_view(), name="async-mtn-data"),
+    path("async/glo-data/", AsyncGloDataTopUpView.as_view(), name="async-glo-data"),
+    path(
+        "async/etisalat-data/",
+        AsyncEtisalatDataTopUpView.as_view(),
+        name="async-etisalat-data",
+    ),
+    path("async/dstv/", AsyncDSTVPaymentView.as_view(), name="async-dstv-payment"),
+    path("async/gotv/", AsyncGOTVPaymentView.as_view(), name="async-gotv-payment"),
+    path(
+        "async/startimes/",
+        AsyncStartimesPaymentView.as_view(),
+        name="async-startimes-payment",
+    ),
+    path(
+        "async/showmax/",
+        AsyncShowMaxPaymentView.as_view(),
+        name="async-showmax-payment",
+    ),
+    path(
+        "async/electricity/",
+        AsyncElectricityPaymentView.as_view(),
+        name="async-electricity-payment",
+    ),
+    path(
+        "async/jamb-registration/",
+        AsyncJAMBRegistrationView.as_view(),
+        name="async-jamb-registration",
+    ),
+    path(
+        "async/waec-result/",
+        AsyncWAECResultCheckerView.as_view(),
+        name="async-waec-result-checker",
+    ),
+    path(
+        "async/waec-registration/",
+        AsyncWAECRegitrationView.as_view(),
+        name="async-waec-registration",
+    ),
 ]
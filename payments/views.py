@@ -5,16 +5,26 @@ from django.db import transaction
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
 from group_payment.models import Group, GroupMember
-from .models import GroupPayment, GroupPaymentContribution, Withdrawal
+from .models import (
+    Airtime2Cash,
+    GroupPayment,
+    GroupPaymentContribution,
+    PurchaseOrder,
+    Withdrawal,
+)
 from transactions.models import WalletTransaction
+from transactions.paystack import get_account_name, is_supported_bank
+from wallet import ledger
+from wallet.ledger import InsufficientFunds, Posting
 from .serializers import (
     AirtimeTopUpSerializer,
     JAMBRegistrationSerializer,
@@ -34,30 +44,39 @@ from .serializers import (
     ElectricityPaymentCustomerSerializer,
     WithdrawalRequestSerializer,
     WithdrawalResponseSerializer,
+    BulkTransferRequestSerializer,
 )
 
 from notifications.utils import (
     send_notification,
-    contribution_notification,
-    group_payment_success,
-    group_payment_failed,
+    group_payment_failures,
 )
 from .vtpass import (
     generate_reference_id,
     top_up,
-    dstv_dict,
-    gotv_dict,
-    startimes_dict,
-    showmax_dict,
-    mtn_dict,
-    airtel_dict,
-    glo_dict,
-    etisalat_dict,
     get_customer,
     get_receipt,
 )
-
-from bluesea_mobile.utils import InsufficientFundsException, VTUAPIException
+from . import reconciler
+from .catalog import plan_catalog
+from .idempotency import idempotent
+from .group_purchases import purchase_group
+from .orders import (
+    mark_order_unknown,
+    release_order,
+    reserve_purchase,
+    settle_order,
+    wants_async,
+)
+from .transfers import bulk_transfer
+from .purchases import PURCHASES, build_purchase
+
+from bluesea_mobile import metrics, transaction_metrics
+from bluesea_mobile.utils import (
+    InsufficientFundsException,
+    ProviderDegradedException,
+    VTUAPIException,
+)
 from bonus.utils import (
     award_daily_login_bonus,
     award_points,
@@ -75,69 +94,6 @@ from drf_spectacular.types import OpenApiTypes
 logger = logging.getLogger(__name__)
 
 
-def get_payment_description(
-    payment_type,
-    network=None,
-    phone=None,
-    plan=None,
-    amount=0,
-    meter_number=None,
-    biller_name=None,
-    meter_type=None,
-    exam_type=None,
-    disco=None,
-):
-    phone_last4 = phone[-4:] if phone and len(phone) >= 4 else phone
-
-    descriptions = {
-        "airtime": {
-            "full": f"AIRTIME: {network.upper() if network else ''} {phone_last4} - ₦{amount}",
-            "short": f"Airtime - {network.upper() if network else ''}",
-        },
-        "data": {
-            "full": f"DATA: {network.upper() if network else ''} {phone_last4} - {plan} - ₦{amount}",
-            "short": f"Data - {network.upper() if network else ''}",
-        },
-        "dstv": {
-            "full": f"DSTV: {phone_last4} - {plan} - ₦{amount}",
-            "short": "DSTV",
-        },
-        "gotv": {
-            "full": f"GOTV: {phone_last4} - {plan} - ₦{amount}",
-            "short": "GOTV",
-        },
-        "startimes": {
-            "full": f"STARTIMES: {phone_last4} - {plan} - ₦{amount}",
-            "short": "Startimes",
-        },
-        "showmax": {
-            "full": f"SHOWMAX: {phone_last4} - {plan} - ₦{amount}",
-            "short": "Showmax",
-        },
-        "electricity": {
-            "full": f"ELECTRICITY: {biller_name.replace('-', ' ').title() if biller_name else ''} {meter_type.capitalize() if meter_type else ''} {meter_number[-4:] if meter_number else ''} - ₦{amount}",
-            "short": f"Electricity - {biller_name.replace('-', ' ').title() if biller_name else ''}",
-        },
-        "waec-registration": {
-            "full": f"WAEC Registration - ₦{amount}",
-            "short": "WAEC Registration",
-        },
-        "waec-result": {
-            "full": f"WAEC Result Checker - ₦{amount}",
-            "short": "WAEC Result",
-        },
-        "jamb": {
-            "full": f"JAMB {'UTME Mock' if exam_type == 'utme-mock' else 'UTME'} - ₦{amount}",
-            "short": "JAMB Registration",
-        },
-    }
-
-    return descriptions.get(
-        payment_type,
-        {"full": f"{payment_type.title()} - ₦{amount}", "short": payment_type.title()},
-    )
-
-
 def process_payment(request, amount, service_data, service_name, description=None):
     """
     Helper function to process payments consistently.
@@ -215,69 +171,76 @@ class Airtime2CashViews(APIView):
             ),
         ],
     )
+    @idempotent
     def post(self, request):
         serializer = Airtime2CashSerializer(data=request.data)
 
         if serializer.is_valid(raise_exception=True):
             request_id = generate_reference_id()
-            serializer.save(request_id=request_id, user=request.user)
-
-            with transaction.atomic():
-                amount = int(serializer.data["amount"])
-
-                user_data = {
-                    "apikey": "",
-                    "serviceName": "Airtime2Cash",
-                    "network": serializer.data["network"],
-                }
-
-                sitephone = top_up2(user_data, "merchant-verify")
-                if sitephone != "Unavailable":
-                    user_data = {
-                        "apikey": "",
-                        "network": serializer.data["network"],
-                        "sender": "",
-                        "sendernumber": serializer.data["phone_number"],
-                        "amount": amount,
-                        "ref": request_id,
-                        "sitephone": sitephone,
-                    }
-
-                    topup_response = top_up2(user_data, "airtime2cash")
+            # Stored as pending before the provider is called; the credit
+            # below settles it in its own short transaction
+            conversion = serializer.save(request_id=request_id, user=request.user)
+            amount = int(serializer.data["amount"])
+
+            user_data = {
+                "apikey": "",
+                "serviceName": "Airtime2Cash",
+                "network": serializer.data["network"],
+            }
 
-                    if topup_response.get("success"):
-                        user_wallet = request.user.wallet
-                        user_wallet.credit(amount=amount, reference=request_id)
+            sitephone = top_up2(user_data, "merchant-verify")
+            if sitephone == "Unavailable":
+                Airtime2Cash.objects.filter(id=conversion.id).update(status="failed")
+                return Response(
+                    {"success": False, "error": "Service unavailable"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
 
-                        try:
-                            send_notification(
-                                user=request.user,
-                                title="Airtime Converted",
-                                message=f"₦{amount} converted to cash successfully",
-                                notification_type="payment_success",
-                                email_subject="BlueSea - Airtime Converted",
-                            )
-                        except Exception as e:
-                            logger.error(f"Error sending notification: {str(e)}")
-
-                        return Response(
-                            {
-                                "success": True,
-                                "message": "Airtime converted successfully",
-                            },
-                            status=status.HTTP_200_OK,
-                        )
+            user_data = {
+                "apikey": "",
+                "network": serializer.data["network"],
+                "sender": "",
+                "sendernumber": serializer.data["phone_number"],
+                "amount": amount,
+                "ref": request_id,
+                "sitephone": sitephone,
+            }
 
-                    return Response(
-                        {"success": False, "error": "Conversion failed"},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
+            topup_response = top_up2(user_data, "airtime2cash")
 
+            if not topup_response.get("success"):
+                Airtime2Cash.objects.filter(id=conversion.id).update(status="failed")
                 return Response(
-                    {"success": False, "error": "Service unavailable"},
+                    {"success": False, "error": "Conversion failed"},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
+            with transaction.atomic():
+                # Claiming the pending row makes the credit happen once
+                if Airtime2Cash.objects.filter(
+                    id=conversion.id, status="pending"
+                ).update(status="successful"):
+                    request.user.wallet.credit(amount=amount, reference=request_id)
+
+            try:
+                send_notification(
+                    user=request.user,
+                    title="Airtime Converted",
+                    message=f"₦{amount} converted to cash successfully",
+                    notification_type="payment_success",
+                    email_subject="BlueSea - Airtime Converted",
+                )
+            except Exception as e:
+                logger.error(f"Error sending notification: {str(e)}")
+
+            return Response(
+                {
+                    "success": True,
+                    "message": "Airtime converted successfully",
+                },
+                status=status.HTTP_200_OK,
+            )
+
 
 class GroupPaymentViews(APIView):
     permission_classes = [IsAuthenticated]
@@ -332,6 +295,7 @@ class GroupPaymentViews(APIView):
         ],
         tags=["Payments"],
     )
+    @idempotent
     def post(self, request):
         transaction_pin = request.data.get("transaction_pin")
 
@@ -396,115 +360,41 @@ class GroupPaymentViews(APIView):
                     total_amount=total_amount,
                     service_details=service_details,
                     status="processing",
+                    vtu_reference=generate_reference_id(),
                 )
 
-                # Process each member's contribution
-                for member in members:
-                    amount = member_amounts.get(member)
-                    wallet = member.user.wallet
-
-                    if wallet.balance < amount:
-                        raise InsufficientFundsException(
-                            f"Insufficient funds for {member.user.email}"
-                        )
-
-                    # Create UNIQUE reference for each member's contribution
-                    unique_reference = (
-                        f"GP-{group_payment.id}-{member.user.id}-{uuid.uuid4().hex[:8]}"
-                    )
-
-                    # Debit wallet with unique reference
-                    wallet.debit(
-                        amount=amount,
-                        description=f"Group payment contribution - {payment_type}",
-                        reference=unique_reference,
+                # Collect every share with one conditional UPDATE; a single
+                # short member rolls the whole collection back
+                wallet_members = {member.user.wallet.id: member for member in members}
+                try:
+                    ledger.debit_all(
+                        [
+                            Posting(
+                                member.user.wallet.id,
+                                member_amounts.get(member),
+                                "DEBIT",
+                                f"Group payment contribution - {payment_type}",
+                                f"GP-{group_payment.id}-{member.user.id}-{uuid.uuid4().hex[:8]}",
+                            )
+                            for member in members
+                        ]
                     )
-
-                    # Create contribution record
-                    GroupPaymentContribution.objects.create(
-                        group_payment=group_payment,
-                        member=member,
-                        amount=amount,
-                        status="completed",
+                except InsufficientFunds as e:
+                    raise InsufficientFundsException(
+                        f"Insufficient funds for {wallet_members[e.wallet_id].user.email}"
                     )
 
-                    # Send notification
-                    try:
-                        contribution_notification(
+                GroupPaymentContribution.objects.bulk_create(
+                    [
+                        GroupPaymentContribution(
+                            group_payment=group_payment,
                             member=member,
-                            amount=amount,
-                            group_name=group.name,
-                            payment_type=payment_type,
-                        )
-                    except Exception as e:
-                        logger.warning(
-                            f"Failed to send notification to {member.user.email}: {str(e)}"
-                        )
-
-                # All debits successful, now call VTU API
-                vtu_response = self.vtu_api(payment_type, service_details, total_amount)
-
-                if vtu_response.get("response_description") == "TRANSACTION SUCCESSFUL":
-                    group_payment.status = "completed"
-                    group_payment.vtu_reference = vtu_response.get(
-                        "requestId", vtu_response.get("reference")
-                    )
-                    group_payment.save()
-
-                    # Notify all members of success
-                    for member in members:
-                        try:
-                            group_payment_success(
-                                member=member,
-                                amount=member_amounts.get(member),
-                                group_name=group.name,
-                                payment_type=payment_type,
-                                vtu_reference=vtu_response.get("requestId"),
-                            )
-                        except Exception as e:
-                            logger.warning(
-                                f"Failed to send success notification: {str(e)}"
-                            )
-
-                    return Response(
-                        {
-                            "success": True,
-                            "message": "Group payment completed successfully",
-                            "payment_id": group_payment.id,
-                            "vtu_reference": group_payment.vtu_reference,
-                            "total_amount": str(total_amount),
-                            "member_contributions": {
-                                member.user.email: str(member_amounts.get(member))
-                                for member in members
-                            },
-                        },
-                        status=status.HTTP_200_OK,
-                    )
-                else:
-                    # VTU API failed
-                    group_payment.status = "failed"
-                    group_payment.save()
-
-                    # Reverse all debits by crediting back
-                    for member in members:
-                        amount = member_amounts.get(member)
-                        wallet = member.user.wallet
-                        reversal_reference = f"REV-{group_payment.id}-{member.user.id}-{uuid.uuid4().hex[:8]}"
-
-                        wallet.credit(
-                            amount=amount,
-                            description=f"Reversal - Group payment failed",
-                            reference=reversal_reference,
+                            amount=member_amounts.get(member),
+                            status="completed",
                         )
-
-                    return Response(
-                        {
-                            "success": False,
-                            "error": f"VTU service failed: {vtu_response.get('response_description', 'Unknown error')}. All debits have been reversed.",
-                            "payment_id": group_payment.id,
-                        },
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
+                        for member in members
+                    ]
+                )
 
         except InsufficientFundsException as e:
             return Response(
@@ -514,19 +404,17 @@ class GroupPaymentViews(APIView):
             logger.error(f"Group payment error: {str(e)}", exc_info=True)
 
             # Attempt to notify members of failure
-            for member in members:
-                try:
-                    group_payment_failed(
-                        member=member,
-                        amount=member_amounts.get(member, 0),
-                        group_name=group.name,
-                        payment_type=payment_type,
-                        reason=str(e),
-                    )
-                except Exception as notif_error:
-                    logger.warning(
-                        f"Failed to send failure notification: {str(notif_error)}"
-                    )
+            try:
+                group_payment_failures(
+                    [(member, member_amounts.get(member, 0)) for member in members],
+                    group_name=group.name,
+                    payment_type=payment_type,
+                    reason=str(e),
+                )
+            except Exception as notif_error:
+                logger.warning(
+                    f"Failed to send failure notification: {str(notif_error)}"
+                )
 
             return Response(
                 {
@@ -536,6 +424,45 @@ class GroupPaymentViews(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+        # The debits have committed; VTPass is called outside any transaction
+        group_payment, reason = purchase_group(group_payment.id)
+
+        if group_payment.status == "completed":
+            return Response(
+                {
+                    "success": True,
+                    "message": "Group payment completed successfully",
+                    "payment_id": group_payment.id,
+                    "vtu_reference": group_payment.vtu_reference,
+                    "total_amount": str(total_amount),
+                    "member_contributions": {
+                        member.user.email: str(member_amounts.get(member))
+                        for member in members
+                    },
+                },
+                status=status.HTTP_200_OK,
+            )
+
+        if group_payment.status == "processing":
+            return Response(
+                {
+                    "success": False,
+                    "status": "processing",
+                    "error": f"Awaiting confirmation from the provider: {reason}",
+                    "payment_id": group_payment.id,
+                },
+                status=status.HTTP_202_ACCEPTED,
+            )
+
+        return Response(
+            {
+                "success": False,
+                "error": f"VTU service failed: {reason}. All debits have been reversed.",
+                "payment_id": group_payment.id,
+            },
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
     def _calculate_splits(self, members, total_amount, split_type, custom_splits):
         member_amounts = {}
 
@@ -551,168 +478,6 @@ class GroupPaymentViews(APIView):
 
         return member_amounts
 
-    def vtu_api(self, payment_type, service_details, amount):
-        request_id = generate_reference_id()
-
-        if payment_type == "airtime":
-            with transaction.atomic():
-                airtime_amount = int(amount)
-                details = {
-                    "request_id": request_id,
-                    "serviceID": service_details.get("network"),
-                    "amount": airtime_amount,
-                    "phone": service_details.get("phone_number"),
-                }
-            subscription_response = top_up(details)
-            return subscription_response
-
-        elif payment_type == "data":
-            if service_details.get("network") == "mtn":
-                with transaction.atomic():
-                    variation_code = mtn_dict[service_details.get("plan_id")][0]
-                    amount = mtn_dict[service_details.get("plan_id")][1]
-
-                    details = {
-                        "request_id": request_id,
-                        "serviceID": "mtn-data",
-                        "billersCode": service_details.get("billersCode"),
-                        "variation_code": variation_code,
-                        "amount": amount,
-                        "phone": service_details.get("phone_number"),
-                    }
-                subscription_response = top_up(details)
-                return subscription_response
-            elif service_details.get("network") == "airtel":
-                with transaction.atomic():
-                    variation_code = airtel_dict[service_details.get("plan_id")][0]
-                    amount = airtel_dict[service_details.get("plan_id")][1]
-
-                    details = {
-                        "request_id": request_id,
-                        "serviceID": "airtel-data",
-                        "billersCode": service_details.get("billersCode"),
-                        "variation_code": variation_code,
-                        "amount": amount,
-                        "phone": service_details.get("phone_number"),
-                    }
-                subscription_response = top_up(details)
-                return subscription_response
-
-            elif service_details.get("network") == "glo":
-                with transaction.atomic():
-                    variation_code = glo_dict[service_details.get("plan_id")][0]
-                    amount = glo_dict[service_details.get("plan_id")][1]
-
-                    details = {
-                        "request_id": request_id,
-                        "serviceID": "glo-data",
-                        "billersCode": service_details.get("billersCode"),
-                        "variation_code": variation_code,
-                        "amount": amount,
-                        "phone": service_details.get("phone_number"),
-                    }
-                subscription_response = top_up(details)
-                return subscription_response
-
-            elif service_details.get("network") == "etisalat":
-                with transaction.atomic():
-                    variation_code = etisalat_dict[service_details.get("plan_id")][0]
-                    amount = etisalat_dict[service_details.get("plan_id")][1]
-
-                    details = {
-                        "request_id": request_id,
-                        "serviceID": "etisalat-data",
-                        "billersCode": service_details.get("billersCode"),
-                        "variation_code": variation_code,
-                        "amount": amount,
-                        "phone": service_details.get("phone_number"),
-                    }
-
-        elif payment_type == "electricity":
-            # return vtu_service.purchase_electricity(
-            #     meter_number=service_details.get('meter_number'),
-            #     amount=amount,
-            #     disco=service_details.get('disco')
-            # )
-
-            with transaction.atomic():
-                electricity_amount = int(amount)
-                details = {
-                    "request_id": request_id,
-                    "serviceID": service_details.get("disco"),
-                    "billersCode": service_details.get("billersCode"),
-                    "variation_code": service_details.get("meter_type"),
-                    "amount": electricity_amount,
-                    "phone": service_details.get("phone_number"),
-                }
-            electricity_response = top_up(details)
-            return electricity_response
-
-        elif payment_type in ["dstv", "gotv", "startimes", "showmax"]:
-            plan_dict = {
-                "dstv": dstv_dict,
-                "gotv": gotv_dict,
-                "startimes": startimes_dict,
-                "showmax": showmax_dict,
-            }
-            with transaction.atomic():
-                variation_code = plan_dict[payment_type][
-                    service_details.get("plan_id")
-                ][0]
-                amount = plan_dict[payment_type][service_details.get("plan_id")][1]
-
-                details = {
-                    "request_id": request_id,
-                    "serviceID": payment_type,
-                    "billersCode": service_details.get("billersCode"),
-                    "variation_code": variation_code,
-                    "amount": amount,
-                    "phone": service_details.get("phone_number"),
-                }
-            subscription_response = top_up(details)
-            return subscription_response
-
-        elif payment_type == "jamb":
-            with transaction.atomic():
-                jamb_amount = (
-                    7700 if service_details.get("exam_type") == "utme-mock" else 6200
-                )
-                details = {
-                    "request_id": request_id,
-                    "serviceID": "jamb",
-                    "variation_code": service_details.get("exam_type"),
-                    "billersCode": service_details.get("billersCode"),
-                    "phone": service_details.get("phone_number"),
-                }
-            registration_response = top_up(details)
-            return registration_response
-
-        elif payment_type == "waec-registration":
-            with transaction.atomic():
-                waec_reg_amount = 37500
-                details = {
-                    "request_id": request_id,
-                    "serviceID": "waec-registration",
-                    "variation_code": "waec-registraion",
-                    "quantity": 1,
-                    "phone": service_details.get("phone_number"),
-                }
-            registration_response = top_up(details)
-            return registration_response
-
-        elif payment_type == "waec-result":
-            with transaction.atomic():
-                waec_result_amount = 5350
-                details = {
-                    "request_id": request_id,
-                    "serviceID": "waec",
-                    "variation_code": "waecdirect",
-                    "quantity": 1,
-                    "phone": service_details.get("phone_number"),
-                }
-            registration_response = top_up(details)
-            return registration_response
-
 
 class GroupPaymentHistory(APIView):
     permission_classes = [IsAuthenticated]
@@ -778,8 +543,139 @@ class GroupPaymentHistory(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class AirtimeTopUpViews(APIView):
+class ReservedPurchaseMixin:
+    """
+    Reserve-then-call purchase flow shared by the purchase views.
+
+    The amount is first moved to ``Wallet.locked_balance`` and a
+    ``PurchaseOrder`` is stored in one short transaction; VTPass is only
+    called after that has committed, so no row lock or connection is held
+    across the HTTP round trip. The order is then captured, released or
+    left ``unknown`` for the requery reconciler.
+
+    By default the view makes the VTPass call itself and answers with its
+    response. With ``Prefer: respond-async`` the call runs in a Celery
+    worker instead; the client gets ``202`` and polls the order status
+    endpoint.
+    """
+
+    purchase_kind = None
+
+    def reserve_order(self, request, dispatch):
+        """Returns ``(order, None)``, or ``(None, response)`` to send back as is."""
+        transaction_pin = request.data.get("transaction_pin")
+
+        if not transaction_pin:
+            return None, Response(
+                {"error": "Transaction PIN is required", "success": False},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if not request.user.pin_is_set:
+            return None, Response(
+                {"error": "Please set your transaction PIN first", "success": False},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if not request.user.verify_transaction_pin(transaction_pin):
+            return None, Response(
+                {"error": "Invalid transaction PIN", "success": False},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return self.reserve_validated_order(request, dispatch)
+
+    def reserve_validated_order(self, request, dispatch):
+        """``reserve_order`` once the transaction PIN has been checked."""
+        serializer_class, _ = PURCHASES[self.purchase_kind]
+        serializer = serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        request_id = generate_reference_id()
+        serializer.save(request_id=request_id, user=request.user)
+        try:
+            purchase = build_purchase(
+                self.purchase_kind, serializer.data, request_id, request.user
+            )
+        except KeyError:
+            return None, Response(
+                {"error": "Invalid plan selected", "success": False},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            order = reserve_purchase(
+                request.user, self.purchase_kind, purchase, request_id, dispatch
+            )
+        except InsufficientFundsException:
+            return None, Response(
+                {"error": "Insufficient Funds", "success": False},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return order, None
+
+    def order_accepted(self, order, **extra):
+        """``202`` pointing at the order's status endpoint."""
+        status_url = reverse("purchase-order-status", args=[order.id])
+        return Response(
+            {
+                "success": True,
+                "order_id": str(order.id),
+                "request_id": order.request_id,
+                "status": order.status,
+                "status_url": status_url,
+                **extra,
+            },
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": status_url},
+        )
+
+    def order_released(self, order, error):
+        # The call never left this process: hand the reservation back
+        release_order(order.id, error=error)
+        return Response(
+            {"success": False, "error": error},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+    def order_unknown(self, order, error):
+        # The request may have reached VTPass; the reconciler requeries it
+        mark_order_unknown(order.id, error=error)
+        return self.order_accepted(
+            order,
+            success=False,
+            error=f"Payment pending confirmation: {error}",
+            status="unknown",
+        )
+
+    def accept_async_purchase(self, request):
+        order, error = self.reserve_order(request, dispatch=True)
+        if error is not None:
+            return error
+        return self.order_accepted(order)
+
+    def run_purchase(self, request):
+        if wants_async(request):
+            return self.accept_async_purchase(request)
+
+        order, error = self.reserve_order(request, dispatch=False)
+        if error is not None:
+            return error
+
+        try:
+            vtu_response = top_up(order.purchase["payload"])
+        except ProviderDegradedException as e:
+            return self.order_released(order, str(e.detail))
+        except VTUAPIException as e:
+            return self.order_unknown(order, str(e.detail))
+
+        settle_order(order.id, vtu_response)
+        return Response(vtu_response)
+
+
+class AirtimeTopUpViews(ReservedPurchaseMixin, APIView):
     permission_classes = [IsAuthenticated]
+    purchase_kind = "airtime"
 
     @extend_schema(
         summary="Purchase airtime",
@@ -810,120 +706,14 @@ class AirtimeTopUpViews(APIView):
         ],
         tags=["Payments"],
     )
+    @idempotent
     def post(self, request):
-        transaction_pin = request.data.get("transaction_pin")
-
-        try:
-            if not transaction_pin:
-                return Response(
-                    {"error": "Transaction PIN is required", "success": False},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            if not request.user.pin_is_set:
-                return Response(
-                    {
-                        "error": "Please set your transaction PIN first",
-                        "success": False,
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            if not request.user.verify_transaction_pin(transaction_pin):
-                return Response(
-                    {"error": "Invalid transaction PIN", "success": False},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
+        return self.run_purchase(request)
 
-            serializer = AirtimeTopUpSerializer(data=request.data)
 
-            if serializer.is_valid(raise_exception=True):
-                request_id = generate_reference_id()
-                serializer.save(request_id=request_id, user=request.user)
-
-                with transaction.atomic():
-                    amount = int(serializer.data["amount"])
-                    data = {
-                        "request_id": request_id,
-                        "serviceID": serializer.data["network"],
-                        "amount": amount,
-                        "phone": serializer.data["phone_number"],
-                    }
-                    user_wallet = request.user.wallet
-
-                    if user_wallet.balance < amount:
-                        return Response(
-                            {"error": "Insufficient Funds", "success": False},
-                            status=status.HTTP_400_BAD_REQUEST,
-                        )
-
-                    buy_airtime_response = top_up(data)
-                    if (
-                        buy_airtime_response.get("response_description")
-                        == "TRANSACTION SUCCESSFUL"
-                    ):
-                        phone = serializer.data.get("phone_number", "")
-                        network = serializer.data.get("network", "")
-                        desc = get_payment_description(
-                            payment_type="airtime",
-                            network=network,
-                            phone=phone,
-                            amount=amount,
-                        )
-                        user_wallet.debit(
-                            amount=amount,
-                            description=desc["full"],
-                            reference=request_id,
-                        )
-
-                        # Award bonus points
-                        try:
-                            award_vtu_purchase_points(
-                                user=request.user,
-                                purchase_amount=amount,
-                                reference=request_id,
-                            )
-
-                            # Check for referral bonus (first transaction)
-                            try:
-                                referral = Referral.objects.get(
-                                    referred_user=request.user,
-                                    status="pending",
-                                    first_transaction_completed=False,
-                                )
-                                referral.first_transaction_completed = True
-                                referral.save()
-
-                                award_referral_bonus(referral.referrer, request.user)
-                            except Referral.DoesNotExist:
-                                pass
-
-                        except Exception as e:
-                            logger.error(f"Error awarding bonus points: {str(e)}")
-
-                        # Send notification
-                        try:
-                            send_notification(
-                                user=request.user,
-                                title="Airtime Purchase Successful",
-                                message=f"₦{amount} airtime purchased for {serializer.data['phone_number']}",
-                                notification_type="payment_success",
-                                email_subject="BlueSea - Airtime Purchase",
-                            )
-                        except Exception as e:
-                            logger.error(f"Error sending notification: {str(e)}")
-
-                    return Response(buy_airtime_response)
-
-        except Exception as e:
-            return Response(
-                {"success": False, "error": f"Payment failed: {str(e)}"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
-
-
-class MTNDataTopUpViews(APIView):
+class MTNDataTopUpViews(ReservedPurchaseMixin, APIView):
     permission_classes = [IsAuthenticated]
+    purchase_kind = "mtn-data"
 
     @extend_schema(
         summary="Purchase MTN data",
@@ -954,123 +744,14 @@ class MTNDataTopUpViews(APIView):
             ),
         ],
     )
+    @idempotent
     def post(self, request):
-        transaction_pin = request.data.get("transaction_pin")
-
-        try:
-            if not transaction_pin:
-                return Response(
-                    {"error": "Transaction PIN is required", "success": False},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            if not request.user.pin_is_set:
-                return Response(
-                    {
-                        "error": "Please set your transaction PIN first",
-                        "success": False,
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            if not request.user.verify_transaction_pin(transaction_pin):
-                return Response(
-                    {"error": "Invalid transaction PIN", "success": False},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            serializer = MTNDataTopUpSerializer(data=request.data)
-            if serializer.is_valid(raise_exception=True):
-                request_id = generate_reference_id()
-                serializer.save(request_id=request_id, user=request.user)
-                with transaction.atomic():
-                    amount = mtn_dict[serializer.data["plan"]][1]
-                    variation_code = mtn_dict[serializer.data["plan"]][0]
-                    data = {
-                        "request_id": request_id,
-                        "serviceID": "mtn-data",
-                        "billersCode": serializer.data["billersCode"],
-                        "variation_code": variation_code,
-                        "amount": amount,
-                        "phone": serializer.data["phone_number"],
-                    }
-                    # Wallet.debit(amount)
-                    user_wallet = request.user.wallet
-
-                    if user_wallet.balance < amount:
-                        return Response(
-                            {"error": "Insufficient Funds", "success": False},
-                            status=status.HTTP_400_BAD_REQUEST,
-                        )
-
-                    subscription_response = top_up(data)
-                    if (
-                        subscription_response.get("response_description")
-                        == "TRANSACTION SUCCESSFUL"
-                    ):
-                        phone = serializer.data.get("billersCode", "")
-                        plan = serializer.data.get("plan", "")
-                        desc = get_payment_description(
-                            payment_type="data",
-                            network="MTN",
-                            phone=phone,
-                            plan=plan,
-                            amount=amount,
-                        )
-                        user_wallet.debit(
-                            amount=amount,
-                            description=desc["full"],
-                            reference=request_id,
-                        )
-
-                        # Award bonus points
-                        try:
-                            award_vtu_purchase_points(
-                                user=request.user,
-                                purchase_amount=amount,
-                                reference=request_id,
-                            )
-
-                            # Check for referral bonus (first transaction)
-                            try:
-                                referral = Referral.objects.get(
-                                    referred_user=request.user,
-                                    status="pending",
-                                    first_transaction_completed=False,
-                                )
-                                referral.first_transaction_completed = True
-                                referral.save()
-
-                                award_referral_bonus(referral.referrer, request.user)
-                            except Referral.DoesNotExist:
-                                pass
-
-                        except Exception as e:
-                            logger.error(f"Error awarding bonus points: {str(e)}")
-
-                        # Send notification
-                        try:
-                            send_notification(
-                                user=request.user,
-                                title="MTN Data Purchase Successful",
-                                message=f"₦{amount} MTN data purchased for {serializer.data['phone_number']}",
-                                notification_type="payment_success",
-                                email_subject="BlueSea - Data Purchase",
-                            )
-                        except Exception as e:
-                            logger.error(f"Error sending notification: {str(e)}")
-
-                    return Response(subscription_response)
+        return self.run_purchase(request)
 
-        except Exception as e:
-            return Response(
-                {"success": False, "error": f"Payment failed: {str(e)}."},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
 
-
-class AirtelDataTopUpViews(APIView):
+class AirtelDataTopUpViews(ReservedPurchaseMixin, APIView):
     permission_classes = [IsAuthenticated]
+    purchase_kind = "airtel-data"
 
     @extend_schema(
         summary="Purchase Airtel data",
@@ -1101,119 +782,14 @@ class AirtelDataTopUpViews(APIView):
             ),
         ],
     )
+    @idempotent
     def post(self, request):
-        transaction_pin = request.data.get("transaction_pin")
+        return self.run_purchase(request)
 
-        try:
-            if not transaction_pin:
-                return Response(
-                    {"error": "Transaction PIN is required", "success": False},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
 
-            if not request.user.pin_is_set:
-                return Response(
-                    {
-                        "error": "Please set your transaction PIN first",
-                        "success": False,
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            if not request.user.verify_transaction_pin(transaction_pin):
-                return Response(
-                    {"error": "Invalid transaction PIN", "success": False},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            serializer = AirtelDataTopUpSerializer(data=request.data)
-            if serializer.is_valid(raise_exception=True):
-                request_id = generate_reference_id()
-                serializer.save(request_id=request_id, user=request.user)
-                with transaction.atomic():
-                    amount = airtel_dict[serializer.data["plan"]][1]
-                    variation_code = airtel_dict[serializer.data["plan"]][0]
-                    data = {
-                        "request_id": request_id,
-                        "serviceID": "airtel-data",
-                        "billersCode": serializer.data["billersCode"],
-                        "variation_code": variation_code,
-                        "amount": amount,
-                        "phone": serializer.data["phone_number"],
-                    }
-                    user_wallet = request.user.wallet
-
-                    if user_wallet.balance < amount:
-                        return Response(
-                            {"error": "Insufficient Funds", "success": False},
-                            status=status.HTTP_400_BAD_REQUEST,
-                        )
-
-                    subscription_response = top_up(data)
-                    if (
-                        subscription_response.get("response_description")
-                        == "TRANSACTION SUCCESSFUL"
-                    ):
-                        phone = serializer.data.get("billersCode", "")
-                        plan = serializer.data.get("plan", "")
-                        desc = get_payment_description(
-                            payment_type="data",
-                            network="Airtel",
-                            phone=phone,
-                            plan=plan,
-                            amount=amount,
-                        )
-                        user_wallet.debit(
-                            amount=amount,
-                            description=desc["full"],
-                            reference=request_id,
-                        )
-
-                        # Award bonus points
-                        try:
-                            award_vtu_purchase_points(
-                                user=request.user,
-                                purchase_amount=amount,
-                                reference=request_id,
-                            )
-
-                            try:
-                                referral = Referral.objects.get(
-                                    referred_user=request.user,
-                                    status="pending",
-                                    first_transaction_completed=False,
-                                )
-                                referral.first_transaction_completed = True
-                                referral.save()
-                                award_referral_bonus(referral.referrer, request.user)
-                            except Referral.DoesNotExist:
-                                pass
-                        except Exception as e:
-                            logger.error(f"Error awarding bonus points: {str(e)}")
-
-                        # Send notification
-                        try:
-                            send_notification(
-                                user=request.user,
-                                title="Airtel Data Purchase Successful",
-                                message=f"₦{amount} Airtel data purchased for {serializer.data['phone_number']}",
-                                notification_type="payment_success",
-                                email_subject="BlueSea - Data Purchase",
-                            )
-                        except Exception as e:
-                            logger.error(f"Error sending notification: {str(e)}")
-
-                    return Response(subscription_response)
-
-        except Exception as e:
-            return Response(
-                {"success": False, "error": f"Payment failed: {str(e)}."},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
-
-
-class EtisalatDataTopUpViews(APIView):
-    permission_classes = [IsAuthenticated]
+class EtisalatDataTopUpViews(ReservedPurchaseMixin, APIView):
+    permission_classes = [IsAuthenticated]
+    purchase_kind = "etisalat-data"
 
     @extend_schema(
         summary="Purchase 9Mobile data",
@@ -1244,119 +820,14 @@ class EtisalatDataTopUpViews(APIView):
             ),
         ],
     )
+    @idempotent
     def post(self, request):
-        transaction_pin = request.data.get("transaction_pin")
+        return self.run_purchase(request)
 
-        try:
-            if not transaction_pin:
-                return Response(
-                    {"error": "Transaction PIN is required", "success": False},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
 
-            if not request.user.pin_is_set:
-                return Response(
-                    {
-                        "error": "Please set your transaction PIN first",
-                        "success": False,
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            if not request.user.verify_transaction_pin(transaction_pin):
-                return Response(
-                    {"error": "Invalid transaction PIN", "success": False},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            serializer = EtisalatDataTopUpSerializer(data=request.data)
-            if serializer.is_valid(raise_exception=True):
-                request_id = generate_reference_id()
-                serializer.save(request_id=request_id, user=request.user)
-                with transaction.atomic():
-                    amount = etisalat_dict[serializer.data["plan"]][1]
-                    variation_code = etisalat_dict[serializer.data["plan"]][0]
-                    data = {
-                        "request_id": request_id,
-                        "serviceID": "etisalat-data",
-                        "billersCode": serializer.data["billersCode"],
-                        "variation_code": variation_code,
-                        "amount": amount,
-                        "phone": serializer.data["phone_number"],
-                    }
-                    user_wallet = request.user.wallet
-
-                    if user_wallet.balance < amount:
-                        return Response(
-                            {"error": "Insufficient Funds", "success": False},
-                            status=status.HTTP_400_BAD_REQUEST,
-                        )
-
-                    subscription_response = top_up(data)
-                    if (
-                        subscription_response.get("response_description")
-                        == "TRANSACTION SUCCESSFUL"
-                    ):
-                        phone = serializer.data.get("billersCode", "")
-                        plan = serializer.data.get("plan", "")
-                        desc = get_payment_description(
-                            payment_type="data",
-                            network="9Mobile",
-                            phone=phone,
-                            plan=plan,
-                            amount=amount,
-                        )
-                        user_wallet.debit(
-                            amount=amount,
-                            description=desc["full"],
-                            reference=request_id,
-                        )
-
-                        # Award bonus points
-                        try:
-                            award_vtu_purchase_points(
-                                user=request.user,
-                                purchase_amount=amount,
-                                reference=request_id,
-                            )
-
-                            try:
-                                referral = Referral.objects.get(
-                                    referred_user=request.user,
-                                    status="pending",
-                                    first_transaction_completed=False,
-                                )
-                                referral.first_transaction_completed = True
-                                referral.save()
-                                award_referral_bonus(referral.referrer, request.user)
-                            except Referral.DoesNotExist:
-                                pass
-                        except Exception as e:
-                            logger.error(f"Error awarding bonus points: {str(e)}")
-
-                        # Send notification
-                        try:
-                            send_notification(
-                                user=request.user,
-                                title="9Mobile Data Purchase Successful",
-                                message=f"₦{amount} 9Mobile data purchased for {serializer.data['phone_number']}",
-                                notification_type="payment_success",
-                                email_subject="BlueSea - Data Purchase",
-                            )
-                        except Exception as e:
-                            logger.error(f"Error sending notification: {str(e)}")
-
-                    return Response(subscription_response)
-
-        except Exception as e:
-            return Response(
-                {"success": False, "error": f"Payment failed: {str(e)}."},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
-
-
-class GloDataTopUpViews(APIView):
+class GloDataTopUpViews(ReservedPurchaseMixin, APIView):
     permission_classes = [IsAuthenticated]
+    purchase_kind = "glo-data"
 
     @extend_schema(
         summary="Purchase Glo data",
@@ -1387,122 +858,14 @@ class GloDataTopUpViews(APIView):
             ),
         ],
     )
+    @idempotent
     def post(self, request):
-        transaction_pin = request.data.get("transaction_pin")
+        return self.run_purchase(request)
 
-        try:
-            if not transaction_pin:
-                return Response(
-                    {"error": "Transaction PIN is required", "success": False},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            if not request.user.pin_is_set:
-                return Response(
-                    {
-                        "error": "Please set your transaction PIN first",
-                        "success": False,
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            if not request.user.verify_transaction_pin(transaction_pin):
-                return Response(
-                    {"error": "Invalid transaction PIN", "success": False},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            serializer = GloDataTopUpSerializer(data=request.data)
-            if serializer.is_valid(raise_exception=True):
-                request_id = generate_reference_id()
-                serializer.save(request_id=request_id, user=request.user)
-                with transaction.atomic():
-                    amount = glo_dict[serializer.data["plan"]][1]
-                    variation_code = glo_dict[serializer.data["plan"]][0]
-                    data = {
-                        "request_id": request_id,
-                        "serviceID": "glo-data",
-                        "billersCode": serializer.data["billersCode"],
-                        "variation_code": variation_code,
-                        "amount": amount,
-                        "phone": serializer.data["phone_number"],
-                    }
-                    # Wallet.debit(amount)
-                    user_wallet = request.user.wallet
-
-                    if user_wallet.balance < amount:
-                        return Response(
-                            {"error": "Insufficient Funds", "success": False},
-                            status=status.HTTP_400_BAD_REQUEST,
-                        )
 
-                    subscription_response = top_up(data)
-                    if (
-                        subscription_response.get("response_description")
-                        == "TRANSACTION SUCCESSFUL"
-                    ):
-                        phone = serializer.data.get("billersCode", "")
-                        plan = serializer.data.get("plan", "")
-                        desc = get_payment_description(
-                            payment_type="data",
-                            network="Glo",
-                            phone=phone,
-                            plan=plan,
-                            amount=amount,
-                        )
-                        user_wallet.debit(
-                            amount=amount,
-                            description=desc["full"],
-                            reference=request_id,
-                        )
-
-                        # Award bonus points
-                        try:
-                            award_vtu_purchase_points(
-                                user=request.user,
-                                purchase_amount=amount,
-                                reference=request_id,
-                            )
-
-                            # Check for referral bonus (first transaction)
-                            try:
-                                referral = Referral.objects.get(
-                                    referred_user=request.user,
-                                    status="pending",
-                                    first_transaction_completed=False,
-                                )
-                                referral.first_transaction_completed = True
-                                referral.save()
-
-                                award_referral_bonus(referral.referrer, request.user)
-                            except Referral.DoesNotExist:
-                                pass
-
-                        except Exception as e:
-                            logger.error(f"Error awarding bonus points: {str(e)}")
-
-                        # Send notification
-                        try:
-                            send_notification(
-                                user=request.user,
-                                title="Glo Data Purchase Successful",
-                                message=f"₦{amount} Glo data purchased for {serializer.data['phone_number']}",
-                                notification_type="payment_success",
-                                email_subject="BlueSea - Data Purchase",
-                            )
-                        except Exception as e:
-                            logger.error(f"Error sending notification: {str(e)}")
-
-                    return Response(subscription_response)
-        except Exception as e:
-            return Response(
-                {"success": False, "error": f"Payment failed: {str(e)}."},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
-
-
-class DSTVPaymentViews(APIView):
+class DSTVPaymentViews(ReservedPurchaseMixin, APIView):
     permission_classes = [IsAuthenticated]
+    purchase_kind = "dstv"
 
     @extend_schema(
         summary="Pay for DSTV subscription",
@@ -1534,122 +897,14 @@ class DSTVPaymentViews(APIView):
             ),
         ],
     )
+    @idempotent
     def post(self, request):
-        transaction_pin = request.data.get("transaction_pin")
-
-        try:
-            if not transaction_pin:
-                return Response(
-                    {"error": "Transaction PIN is required", "success": False},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            if not request.user.pin_is_set:
-                return Response(
-                    {
-                        "error": "Please set your transaction PIN first",
-                        "success": False,
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            if not request.user.verify_transaction_pin(transaction_pin):
-                return Response(
-                    {"error": "Invalid transaction PIN", "success": False},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
+        return self.run_purchase(request)
 
-            serializer = DSTVPaymentSerializer(data=request.data)
-            if serializer.is_valid(raise_exception=True):
-                request_id = generate_reference_id()
-                serializer.save(request_id=request_id, user=request.user)
-                with transaction.atomic():
-                    amount = dstv_dict[serializer.data["dstv_plan"]][1]
-                    variation_code = dstv_dict[serializer.data["dstv_plan"]][0]
-                    data = {
-                        "request_id": request_id,
-                        "serviceID": "dstv",
-                        "billersCode": serializer.data["billersCode"],
-                        "variation_code": variation_code,
-                        "amount": amount,
-                        "phone": serializer.data["phone_number"],
-                    }
 
-                    user_wallet = request.user.wallet
-
-                    if user_wallet.balance < amount:
-                        return Response(
-                            {"error": "Insufficient Funds", "success": False},
-                            status=status.HTTP_400_BAD_REQUEST,
-                        )
-
-                    subscription_response = top_up(data)
-                    if (
-                        subscription_response.get("response_description")
-                        == "TRANSACTION SUCCESSFUL"
-                    ):
-                        phone = serializer.data.get("phone_number", "")
-                        plan = serializer.data.get("showmax_plan", "")
-                        desc = get_payment_description(
-                            payment_type="showmax",
-                            phone=phone,
-                            plan=plan,
-                            amount=amount,
-                        )
-                        user_wallet.debit(
-                            amount=amount,
-                            description=desc["full"],
-                            reference=request_id,
-                        )
-
-                        # Award bonus points
-                        try:
-                            award_vtu_purchase_points(
-                                user=request.user,
-                                purchase_amount=amount,
-                                reference=request_id,
-                            )
-
-                            # Check for referral bonus (first transaction)
-                            try:
-                                referral = Referral.objects.get(
-                                    referred_user=request.user,
-                                    status="pending",
-                                    first_transaction_completed=False,
-                                )
-                                referral.first_transaction_completed = True
-                                referral.save()
-
-                                award_referral_bonus(referral.referrer, request.user)
-                            except Referral.DoesNotExist:
-                                pass
-
-                        except Exception as e:
-                            logger.error(f"Error awarding bonus points: {str(e)}")
-
-                        # Send notification
-                        try:
-                            send_notification(
-                                user=request.user,
-                                title="DSTV Subscription Successful",
-                                message=f"DSTV subscription purchased for {serializer.data['billersCode']}",
-                                notification_type="payment_success",
-                                email_subject="BlueSea - DSTV Subscription",
-                            )
-                        except Exception as e:
-                            logger.error(f"Error sending notification: {str(e)}")
-
-                    return Response(subscription_response)
-
-        except Exception as e:
-            return Response(
-                {"success": False, "error": f"Payment failed: {str(e)}."},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
-
-
-class GOTVPaymentViews(APIView):
+class GOTVPaymentViews(ReservedPurchaseMixin, APIView):
     permission_classes = [IsAuthenticated]
+    purchase_kind = "gotv"
 
     @extend_schema(
         summary="Pay for GOTV subscription",
@@ -1681,122 +936,14 @@ class GOTVPaymentViews(APIView):
             ),
         ],
     )
+    @idempotent
     def post(self, request):
-        transaction_pin = request.data.get("transaction_pin")
-
-        try:
-            if not transaction_pin:
-                return Response(
-                    {"error": "Transaction PIN is required", "success": False},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            if not request.user.pin_is_set:
-                return Response(
-                    {
-                        "error": "Please set your transaction PIN first",
-                        "success": False,
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            if not request.user.verify_transaction_pin(transaction_pin):
-                return Response(
-                    {"error": "Invalid transaction PIN", "success": False},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            serializer = GOTVPaymentSerializer(data=request.data)
-            if serializer.is_valid(raise_exception=True):
-                request_id = generate_reference_id()
-                serializer.save(request_id=request_id, user=request.user)
-                with transaction.atomic():
-                    amount = gotv_dict[serializer.data["gotv_plan"]][1]
-                    variation_code = gotv_dict[serializer.data["gotv_plan"]][0]
-                    data = {
-                        "request_id": request_id,
-                        "serviceID": "gotv",
-                        "billersCode": serializer.data["billersCode"],
-                        "variation_code": variation_code,
-                        "amount": amount,
-                        "phone": serializer.data["phone_number"],
-                    }
-
-                    user_wallet = request.user.wallet
-
-                    if user_wallet.balance < amount:
-                        return Response(
-                            {"error": "Insufficient Funds", "success": False},
-                            status=status.HTTP_400_BAD_REQUEST,
-                        )
-
-                    subscription_response = top_up(data)
-                    if (
-                        subscription_response.get("response_description")
-                        == "TRANSACTION SUCCESSFUL"
-                    ):
-                        phone = serializer.data.get("billersCode", "")
-                        plan = serializer.data.get("gotv_plan", "")
-                        desc = get_payment_description(
-                            payment_type="gotv",
-                            phone=phone,
-                            plan=plan,
-                            amount=amount,
-                        )
-                        user_wallet.debit(
-                            amount=amount,
-                            description=desc["full"],
-                            reference=request_id,
-                        )
-
-                        # Award bonus points
-                        try:
-                            award_vtu_purchase_points(
-                                user=request.user,
-                                purchase_amount=amount,
-                                reference=request_id,
-                            )
-
-                            # Check for referral bonus (first transaction)
-                            try:
-                                referral = Referral.objects.get(
-                                    referred_user=request.user,
-                                    status="pending",
-                                    first_transaction_completed=False,
-                                )
-                                referral.first_transaction_completed = True
-                                referral.save()
-
-                                award_referral_bonus(referral.referrer, request.user)
-                            except Referral.DoesNotExist:
-                                pass
-
-                        except Exception as e:
-                            logger.error(f"Error awarding bonus points: {str(e)}")
-
-                        # Send notification
-                        try:
-                            send_notification(
-                                user=request.user,
-                                title="GOTV Subscription Successful",
-                                message=f"GOTV subscription purchased for {serializer.data['billersCode']}",
-                                notification_type="payment_success",
-                                email_subject="BlueSea - GOTV Subscription",
-                            )
-                        except Exception as e:
-                            logger.error(f"Error sending notification: {str(e)}")
+        return self.run_purchase(request)
 
-                    return Response(subscription_response)
 
-        except Exception as e:
-            return Response(
-                {"success": False, "error": f"Payment failed: {str(e)}."},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
-
-
-class StartimesPaymentViews(APIView):
+class StartimesPaymentViews(ReservedPurchaseMixin, APIView):
     permission_classes = [IsAuthenticated]
+    purchase_kind = "startimes"
 
     @extend_schema(
         summary="Pay for Startimes subscription",
@@ -1827,124 +974,14 @@ class StartimesPaymentViews(APIView):
             ),
         ],
     )
+    @idempotent
     def post(self, request):
-        transaction_pin = request.data.get("transaction_pin")
-
-        try:
-            if not transaction_pin:
-                return Response(
-                    {"error": "Transaction PIN is required", "success": False},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            if not request.user.pin_is_set:
-                return Response(
-                    {
-                        "error": "Please set your transaction PIN first",
-                        "success": False,
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            if not request.user.verify_transaction_pin(transaction_pin):
-                return Response(
-                    {"error": "Invalid transaction PIN", "success": False},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            serializer = StartimesPaymentSerializer(data=request.data)
-            if serializer.is_valid(raise_exception=True):
-                request_id = generate_reference_id()
-                serializer.save(request_id=request_id, user=request.user)
-                with transaction.atomic():
-                    amount = startimes_dict[serializer.data["startimes_plan"]][1]
-                    variation_code = startimes_dict[serializer.data["startimes_plan"]][
-                        0
-                    ]
-                    data = {
-                        "request_id": request_id,
-                        "serviceID": "startimes",
-                        "billersCode": serializer.data["billersCode"],
-                        "variation_code": variation_code,
-                        "amount": amount,
-                        "phone": serializer.data["phone_number"],
-                    }
-
-                    user_wallet = request.user.wallet
-
-                    if user_wallet.balance < amount:
-                        return Response(
-                            {"error": "Insufficient Funds", "success": False},
-                            status=status.HTTP_400_BAD_REQUEST,
-                        )
-
-                    subscription_response = top_up(data)
-                    if (
-                        subscription_response.get("response_description")
-                        == "TRANSACTION SUCCESSFUL"
-                    ):
-                        phone = serializer.data.get("billersCode", "")
-                        plan = serializer.data.get("startimes_plan", "")
-                        desc = get_payment_description(
-                            payment_type="startimes",
-                            phone=phone,
-                            plan=plan,
-                            amount=amount,
-                        )
-                        user_wallet.debit(
-                            amount=amount,
-                            description=desc["full"],
-                            reference=request_id,
-                        )
-
-                        # Award bonus points
-                        try:
-                            award_vtu_purchase_points(
-                                user=request.user,
-                                purchase_amount=amount,
-                                reference=request_id,
-                            )
-
-                            # Check for referral bonus (first transaction)
-                            try:
-                                referral = Referral.objects.get(
-                                    referred_user=request.user,
-                                    status="pending",
-                                    first_transaction_completed=False,
-                                )
-                                referral.first_transaction_completed = True
-                                referral.save()
-
-                                award_referral_bonus(referral.referrer, request.user)
-                            except Referral.DoesNotExist:
-                                pass
-
-                        except Exception as e:
-                            logger.error(f"Error awarding bonus points: {str(e)}")
-
-                        # Send notification
-                        try:
-                            send_notification(
-                                user=request.user,
-                                title="Startimes Subscription Successful",
-                                message=f"Startimes subscription purchased for {serializer.data['billersCode']}",
-                                notification_type="payment_success",
-                                email_subject="BlueSea - Startimes Subscription",
-                            )
-                        except Exception as e:
-                            logger.error(f"Error sending notification: {str(e)}")
-
-                    return Response(subscription_response)
-
-        except Exception as e:
-            return Response(
-                {"success": False, "error": f"Payment failed: {str(e)}."},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
+        return self.run_purchase(request)
 
 
-class ShowMaxPaymentViews(APIView):
+class ShowMaxPaymentViews(ReservedPurchaseMixin, APIView):
     permission_classes = [IsAuthenticated]
+    purchase_kind = "showmax"
 
     @extend_schema(
         summary="Pay for ShowMax subscription",
@@ -1974,121 +1011,14 @@ class ShowMaxPaymentViews(APIView):
             ),
         ],
     )
+    @idempotent
     def post(self, request):
-        transaction_pin = request.data.get("transaction_pin")
-
-        try:
-            if not transaction_pin:
-                return Response(
-                    {"error": "Transaction PIN is required", "success": False},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            if not request.user.pin_is_set:
-                return Response(
-                    {
-                        "error": "Please set your transaction PIN first",
-                        "success": False,
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            if not request.user.verify_transaction_pin(transaction_pin):
-                return Response(
-                    {"error": "Invalid transaction PIN", "success": False},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            serializer = ShowMaxPaymentSerializer(data=request.data)
-            if serializer.is_valid(raise_exception=True):
-                request_id = generate_reference_id()
-                serializer.save(request_id=request_id, user=request.user)
-                with transaction.atomic():
-                    amount = showmax_dict[serializer.data["showmax_plan"]][1]
-                    variation_code = showmax_dict[serializer.data["showmax_plan"]][0]
-                    data = {
-                        "request_id": request_id,
-                        "serviceID": "showmax",
-                        "billersCode": serializer.data["phone_number"],
-                        "variation_code": variation_code,
-                        "amount": amount,
-                        "phone": serializer.data["phone_number"],
-                    }
-
-                    user_wallet = request.user.wallet
+        return self.run_purchase(request)
 
-                    if user_wallet.balance < amount:
-                        return Response(
-                            {"error": "Insufficient Funds", "success": False},
-                            status=status.HTTP_400_BAD_REQUEST,
-                        )
-
-                    subscription_response = top_up(data)
-                    if (
-                        subscription_response.get("response_description")
-                        == "TRANSACTION SUCCESSFUL"
-                    ):
-                        phone = serializer.data.get("billersCode", "")
-                        plan = serializer.data.get("startimes_plan", "")
-                        desc = get_payment_description(
-                            payment_type="startimes",
-                            phone=phone,
-                            plan=plan,
-                            amount=amount,
-                        )
-                        user_wallet.debit(
-                            amount=amount,
-                            description=desc["full"],
-                            reference=request_id,
-                        )
-
-                        # Award bonus points
-                        try:
-                            award_vtu_purchase_points(
-                                user=request.user,
-                                purchase_amount=amount,
-                                reference=request_id,
-                            )
-
-                            # Check for referral bonus (first transaction)
-                            try:
-                                referral = Referral.objects.get(
-                                    referred_user=request.user,
-                                    status="pending",
-                                    first_transaction_completed=False,
-                                )
-                                referral.first_transaction_completed = True
-                                referral.save()
-
-                                award_referral_bonus(referral.referrer, request.user)
-                            except Referral.DoesNotExist:
-                                pass
-
-                        except Exception as e:
-                            logger.error(f"Error awarding bonus points: {str(e)}")
-
-                        # Send notification
-                        try:
-                            send_notification(
-                                user=request.user,
-                                title="GOTV Subscription Successful",
-                                message=f"GOTV subscription purchased for {serializer.data['billersCode']}",
-                                notification_type="payment_success",
-                                email_subject="BlueSea - GOTV Subscription",
-                            )
-                        except Exception as e:
-                            logger.error(f"Error sending notification: {str(e)}")
 
-                    return Response(subscription_response)
-        except Exception as e:
-            return Response(
-                {"success": False, "error": f"Payment failed: {str(e)}."},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
-
-
-class ElectricityPaymentViews(APIView):
+class ElectricityPaymentViews(ReservedPurchaseMixin, APIView):
     permission_classes = [IsAuthenticated]
+    purchase_kind = "electricity"
 
     @extend_schema(
         summary="Pay electricity bill",
@@ -2120,113 +1050,14 @@ class ElectricityPaymentViews(APIView):
             ),
         ],
     )
+    @idempotent
     def post(self, request):
-        transaction_pin = request.data.get("transaction_pin")
+        return self.run_purchase(request)
 
-        try:
-            if not transaction_pin:
-                return Response(
-                    {"error": "Transaction PIN is required", "success": False},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
 
-            if not request.user.pin_is_set:
-                return Response(
-                    {
-                        "error": "Please set your transaction PIN first",
-                        "success": False,
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            if not request.user.verify_transaction_pin(transaction_pin):
-                return Response(
-                    {"error": "Invalid transaction PIN", "success": False},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
-            serializer = ElectricityPaymentSerializer(data=request.data)
-            if serializer.is_valid(raise_exception=True):
-                request_id = generate_reference_id()
-                serializer.save(request_id=request_id, user=request.user)
-                with transaction.atomic():
-                    amount = int(serializer.data["amount"])
-                    data = {
-                        "request_id": request_id,
-                        "serviceID": serializer.data.get("biller_name"),
-                        "billersCode": serializer.data["billerCode"],
-                        "variation_code": serializer.data["meter_type"],
-                        "amount": amount,
-                        "phone": request.user.phone,
-                    }
-                    user_wallet = request.user.wallet
-
-                    if user_wallet.balance < amount:
-                        return Response(
-                            {"error": "Insufficient Funds", "success": False},
-                            status=status.HTTP_400_BAD_REQUEST,
-                        )
-
-                    electricity_response = top_up(data)
-
-                    if (
-                        electricity_response.get("response_description")
-                        == "TRANSACTION SUCCESSFUL"
-                    ):
-                        user_wallet.debit(
-                            amount=amount,
-                            reference=request_id,
-                            description=f"Electricity - {serializer.data['biller_name'].capitalize()} {electricity_response.get('purchased_code')}",
-                        )
-
-                        # Award bonus points
-                        try:
-                            award_vtu_purchase_points(
-                                user=request.user,
-                                purchase_amount=amount,
-                                reference=request_id,
-                            )
-
-                            # Check for referral bonus (first transaction)
-                            try:
-                                referral = Referral.objects.get(
-                                    referred_user=request.user,
-                                    status="pending",
-                                    first_transaction_completed=False,
-                                )
-                                referral.first_transaction_completed = True
-                                referral.save()
-
-                                award_referral_bonus(referral.referrer, request.user)
-                            except Referral.DoesNotExist:
-                                pass
-
-                        except Exception as e:
-                            logger.error(f"Error awarding bonus points: {str(e)}")
-
-                        # Send notification
-                        try:
-                            send_notification(
-                                user=request.user,
-                                title="Electricity Payment Successful",
-                                message=f"₦{amount} electricity units purchased for {serializer.data['billersCode']}",
-                                notification_type="payment_success",
-                                email_subject="BlueSea - Electricity Payment",
-                            )
-                        except Exception as e:
-                            logger.error(f"Error sending notification: {str(e)}")
-
-                    return Response(electricity_response)
-
-        except Exception as e:
-            return Response(
-                {"success": False, "error": f"Payment failed: {str(e)}."},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
-
-
-class WAECRegitrationViews(APIView):
+class WAECRegitrationViews(ReservedPurchaseMixin, APIView):
     permission_classes = [IsAuthenticated]
+    purchase_kind = "waec-registration"
 
     @extend_schema(
         summary="WAEC registration",
@@ -2252,105 +1083,14 @@ class WAECRegitrationViews(APIView):
             ),
         ],
     )
+    @idempotent
     def post(self, request):
-        transaction_pin = request.data.get("transaction_pin")
-
-        if not transaction_pin:
-            return Response(
-                {"error": "Transaction PIN is required"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        if not request.user.pin_is_set:
-            return Response(
-                {"error": "Please set your transaction PIN first"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        if not request.user.verify_transaction_pin(transaction_pin):
-            return Response(
-                {"error": "Invalid transaction PIN"}, status=status.HTTP_400_BAD_REQUEST
-            )
-
-        serializer = WAECRegitrationSerializer(data=request.data)
-        if serializer.is_valid(raise_exception=True):
-            request_id = generate_reference_id()
-            serializer.save(request_id=request_id, user=request.user)
-            with transaction.atomic():
-                amount = 37500
-                data = {
-                    "request_id": request_id,
-                    "serviceID": "waec-registration",
-                    "variation_code": "waec-registraion",
-                    "quantity": 1,
-                    "phone": serializer.data["phone_number"],
-                }
+        return self.run_purchase(request)
 
-                user_wallet = request.user.wallet
-
-                if user_wallet.balance < amount:
-                    return Response(
-                        {"error": "Insufficient Funds", "success": False},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
 
-                registration_response = top_up(data)
-                if (
-                    registration_response.get("response_description")
-                    == "TRANSACTION SUCCESSFUL"
-                ):
-                    desc = get_payment_description(
-                        payment_type="waec-registration",
-                        amount=amount,
-                    )
-                    user_wallet.debit(
-                        amount=amount,
-                        description=f"{desc['full']} {registration_response.get('purchased_code')}",
-                        reference=request_id,
-                    )
-
-                    # Award bonus points
-                    try:
-                        award_vtu_purchase_points(
-                            user=request.user,
-                            purchase_amount=amount,
-                            reference=request_id,
-                        )
-
-                        # Check for referral bonus (first transaction)
-                        try:
-                            referral = Referral.objects.get(
-                                referred_user=request.user,
-                                status="pending",
-                                first_transaction_completed=False,
-                            )
-                            referral.first_transaction_completed = True
-                            referral.save()
-
-                            award_referral_bonus(referral.referrer, request.user)
-                        except Referral.DoesNotExist:
-                            pass
-
-                    except Exception as e:
-                        logger.error(f"Error awarding bonus points: {str(e)}")
-
-                    # Send notification
-                    try:
-                        send_notification(
-                            user=request.user,
-                            title="WAEC Registration Successful",
-                            message=f"WAEC registration completed for {serializer.data['phone_number']}",
-                            notification_type="payment_success",
-                            email_subject="BlueSea - WAEC Registration",
-                        )
-                    except Exception as e:
-                        logger.error(f"Error sending notification: {str(e)}")
-
-                return Response(registration_response)
-
-
-class WAECResultCheckerViews(APIView):
+class WAECResultCheckerViews(ReservedPurchaseMixin, APIView):
     permission_classes = [IsAuthenticated]
+    purchase_kind = "waec-result"
 
     @extend_schema(
         summary="Purchase WAEC result checker",
@@ -2376,105 +1116,14 @@ class WAECResultCheckerViews(APIView):
             ),
         ],
     )
+    @idempotent
     def post(self, request):
-        transaction_pin = request.data.get("transaction_pin")
-
-        if not transaction_pin:
-            return Response(
-                {"error": "Transaction PIN is required"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        if not request.user.pin_is_set:
-            return Response(
-                {"error": "Please set your transaction PIN first"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        if not request.user.verify_transaction_pin(transaction_pin):
-            return Response(
-                {"error": "Invalid transaction PIN"}, status=status.HTTP_400_BAD_REQUEST
-            )
-
-        serializer = WAECResultCheckerSerializer(data=request.data)
-        if serializer.is_valid(raise_exception=True):
-            request_id = generate_reference_id()
-            serializer.save(request_id=request_id, user=request.user)
-            with transaction.atomic():
-                amount = 5350
-                data = {
-                    "request_id": request_id,
-                    "serviceID": "waec",
-                    "variation_code": "waecdirect",
-                    "quantity": 1,
-                    "phone": serializer.data["phone_number"],
-                }
-
-                user_wallet = request.user.wallet
-
-                if user_wallet.balance < amount:
-                    return Response(
-                        {"error": "Insufficient Funds", "success": False},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
-
-                registration_response = top_up(data)
-                if (
-                    registration_response.get("response_description")
-                    == "TRANSACTION SUCCESSFUL"
-                ):
-                    desc = get_payment_description(
-                        payment_type="waec-registration",
-                        amount=amount,
-                    )
-                    user_wallet.debit(
-                        amount=amount,
-                        description=f"{desc['full']} {registration_response.get('purchased_code')}",
-                        reference=request_id,
-                    )
-
-                    # Award bonus points
-                    try:
-                        award_vtu_purchase_points(
-                            user=request.user,
-                            purchase_amount=amount,
-                            reference=request_id,
-                        )
-
-                        # Check for referral bonus (first transaction)
-                        try:
-                            referral = Referral.objects.get(
-                                referred_user=request.user,
-                                status="pending",
-                                first_transaction_completed=False,
-                            )
-                            referral.first_transaction_completed = True
-                            referral.save()
-
-                            award_referral_bonus(referral.referrer, request.user)
-                        except Referral.DoesNotExist:
-                            pass
-
-                    except Exception as e:
-                        logger.error(f"Error awarding bonus points: {str(e)}")
-
-                    # Send notification
-                    try:
-                        send_notification(
-                            user=request.user,
-                            title="WAEC Result Purchase Successful",
-                            message=f"WAEC result checker PIN purchased for {serializer.data['phone_number']}",
-                            notification_type="payment_success",
-                            email_subject="BlueSea - WAEC Result",
-                        )
-                    except Exception as e:
-                        logger.error(f"Error sending notification: {str(e)}")
-
-                return Response(registration_response)
+        return self.run_purchase(request)
 
 
-class JAMBRegistrationViews(APIView):
+class JAMBRegistrationViews(ReservedPurchaseMixin, APIView):
     permission_classes = [IsAuthenticated]
+    purchase_kind = "jamb"
 
     @extend_schema(
         summary="JAMB registration",
@@ -2504,105 +1153,9 @@ class JAMBRegistrationViews(APIView):
             ),
         ],
     )
+    @idempotent
     def post(self, request):
-        transaction_pin = request.data.get("transaction_pin")
-
-        if not transaction_pin:
-            return Response(
-                {"error": "Transaction PIN is required"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        if not request.user.pin_is_set:
-            return Response(
-                {"error": "Please set your transaction PIN first"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        if not request.user.verify_transaction_pin(transaction_pin):
-            return Response(
-                {"error": "Invalid transaction PIN"}, status=status.HTTP_400_BAD_REQUEST
-            )
-
-        serializer = JAMBRegistrationSerializer(data=request.data)
-
-        if serializer.is_valid(raise_exception=True):
-            request_id = generate_reference_id()
-            serializer.save(request_id=request_id, user=request.user)
-
-            with transaction.atomic():
-                amount = 7700 if serializer.data["exam_type"] == "utme-mock" else 6200
-                data = {
-                    "request_id": request_id,
-                    "serviceID": "jamb",
-                    "variation_code": serializer.data["exam_type"],
-                    "billersCode": serializer.data["billerCode"],
-                    "phone": serializer.data["phone_number"],
-                }
-
-                user_wallet = request.user.wallet
-
-                if user_wallet.balance < amount:
-                    return Response(
-                        {"error": "Insufficient Funds", "success": False},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
-
-                jamb_registration_response = top_up(data)
-                if (
-                    jamb_registration_response.get("response_description")
-                    == "TRANSACTION SUCCESSFUL"
-                ):
-                    exam_type = serializer.data.get("exam_type", "")
-                    desc = get_payment_description(
-                        payment_type="jamb",
-                        exam_type=exam_type,
-                        amount=amount,
-                    )
-                    user_wallet.debit(
-                        amount=amount,
-                        description=f"{desc['full']} {jamb_registration_response.get('purchased_code')}",
-                        reference=request_id,
-                    )
-
-                    # Award bonus points
-                    try:
-                        award_vtu_purchase_points(
-                            user=request.user,
-                            purchase_amount=amount,
-                            reference=request_id,
-                        )
-
-                        # Check for referral bonus (first transaction)
-                        try:
-                            referral = Referral.objects.get(
-                                referred_user=request.user,
-                                status="pending",
-                                first_transaction_completed=False,
-                            )
-                            referral.first_transaction_completed = True
-                            referral.save()
-
-                            award_referral_bonus(referral.referrer, request.user)
-                        except Referral.DoesNotExist:
-                            pass
-
-                    except Exception as e:
-                        logger.error(f"Error awarding bonus points: {str(e)}")
-
-                    # Send notification
-                    try:
-                        send_notification(
-                            user=request.user,
-                            title="JAMB Registration Successful",
-                            message=f"JAMB registration completed for {serializer.data['phone_number']}",
-                            notification_type="payment_success",
-                            email_subject="BlueSea - JAMB Registration",
-                        )
-                    except Exception as e:
-                        logger.error(f"Error sending notification: {str(e)}")
-
-                return Response(jamb_registration_response)
+        return self.run_purchase(request)
 
 
 class ElectricityPaymentCustomerViews(APIView):
@@ -2664,6 +1217,11 @@ class ElectricityPaymentCustomerViews(APIView):
                     {"success": False, "error": "Invalid User Input"},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
+        except ProviderDegradedException as e:
+            return Response(
+                {"success": False, "error": str(e.detail)},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
         except Exception as e:
             return Response(
                 {"success": False, "error": f"Request failed: {str(e)}."},
@@ -2707,6 +1265,7 @@ class InternalTransferView(APIView):
         ],
         tags=["Payments"],
     )
+    @idempotent
     def post(self, request):
         transaction_pin = request.data.get("transaction_pin")
         recipient_email = request.data.get("email")
@@ -2828,6 +1387,107 @@ class InternalTransferView(APIView):
             )
 
 
+class BulkTransferView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Transfer funds to many users",
+        description=(
+            "Pay up to BULK_TRANSFER_MAX_RECIPIENTS BlueSea users, each by email or phone, "
+            "in one request. Requires JWT and transaction PIN. Recipients that cannot be paid "
+            "are reported as failed; the rest are paid together, or none are if the wallet "
+            "cannot cover their total."
+        ),
+        request=BulkTransferRequestSerializer,
+        responses={
+            200: OpenApiTypes.OBJECT,
+            400: OpenApiTypes.OBJECT,
+            500: OpenApiTypes.OBJECT,
+        },
+        examples=[
+            OpenApiExample(
+                "Bulk Transfer",
+                value={
+                    "transaction_pin": "1234",
+                    "transfers": [
+                        {"recipient": "ada@example.com", "amount": "5000"},
+                        {"recipient": "08012345678", "amount": "2500"},
+                    ],
+                },
+                request_only=True,
+            ),
+            OpenApiExample(
+                "Response Example",
+                value={
+                    "success": True,
+                    "message": "1 of 2 transfers successful",
+                    "reference": "20260820120000-1A2B3C4D",
+                    "total_amount": "5000.00",
+                    "results": [
+                        {
+                            "recipient": "ada@example.com",
+                            "amount": "5000.00",
+                            "status": "successful",
+                            "reference": "20260820120000-1A2B3C4D-1",
+                        },
+                        {
+                            "recipient": "08012345678",
+                            "amount": "2500.00",
+                            "status": "failed",
+                            "error": "Recipient not found",
+                        },
+                    ],
+                },
+                response_only=True,
+            ),
+        ],
+        tags=["Payments"],
+    )
+    @idempotent
+    def post(self, request):
+        serializer = BulkTransferRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        if not request.user.pin_is_set:
+            return Response(
+                {"error": "Please set your transaction PIN first", "success": False},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if not request.user.verify_transaction_pin(data["transaction_pin"]):
+            return Response(
+                {"error": "Invalid transaction PIN", "success": False},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            reference, total, results = bulk_transfer(request.user, data["transfers"])
+        except InsufficientFunds:
+            return Response(
+                {"error": "Insufficient funds", "success": False},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        except Exception as e:
+            logger.error(f"Bulk transfer failed: {str(e)}")
+            return Response(
+                {"success": False, "error": f"Transfer failed: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+        paid = sum(1 for result in results if result["status"] == "successful")
+        return Response(
+            {
+                "success": paid > 0,
+                "message": f"{paid} of {len(results)} transfers successful",
+                "reference": reference,
+                "total_amount": str(total),
+                "results": results,
+            },
+            status=status.HTTP_200_OK if paid else status.HTTP_400_BAD_REQUEST,
+        )
+
+
 class WithdrawalView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -2876,6 +1536,7 @@ class WithdrawalView(APIView):
             ),
         ],
     )
+    @idempotent
     def post(self, request):
         serializer = WithdrawalRequestSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -2900,6 +1561,22 @@ class WithdrawalView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        # Bank list and resolved accounts are cached, so this rarely leaves the process
+        if not is_supported_bank(bank_code):
+            return Response(
+                {"error": "Unsupported bank", "success": False},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        resolved = get_account_name(account_number, bank_code)
+        if not resolved["success"]:
+            return Response(
+                {"error": "Could not verify bank account", "success": False},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        # Pay out to the holder the bank reports, not the name typed in
+        account_name = resolved["account_name"]
+
         user_wallet = request.user.wallet
         if user_wallet.balance < amount:
             return Response(
@@ -2958,3 +1635,136 @@ class WithdrawalView(APIView):
                 {"success": False, "error": f"Withdrawal failed: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
+
+
+class PlanCatalogView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Data and TV plan catalog",
+        description=(
+            "Current data and TV plans with prices, grouped by VTPass service ID. "
+            "Send the returned `ETag` back in `If-None-Match` to get a 304 when "
+            "the catalog has not changed. Either `variation_code` or `label` can "
+            "be submitted as the plan on the purchase endpoints."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="service",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Only return plans for this service ID, e.g. `mtn-data`",
+                required=False,
+            ),
+        ],
+        responses={200: OpenApiTypes.OBJECT, 304: None},
+        tags=["Payments"],
+    )
+    def get(self, request):
+        payload = plan_catalog.as_payload()
+        etag = plan_catalog.etag
+        service = request.query_params.get("service")
+        if service:
+            payload = {
+                "version": payload["version"],
+                "services": {service: payload["services"].get(service, [])},
+            }
+            etag = f'{etag[:-1]}-{service}"'
+
+        headers = {"ETag": etag, "Cache-Control": "private, max-age=300"}
+        if request.headers.get("If-None-Match") == etag:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(payload, headers=headers)
+
+
+class PurchaseOrderStatusView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Async purchase status",
+        description=(
+            "Poll the status of a purchase submitted with "
+            "`Prefer: respond-async`. `status` is one of pending, processing, "
+            "unknown, successful or failed; `result` holds the VTPass response "
+            "once the order has settled."
+        ),
+        responses={200: OpenApiTypes.OBJECT, 404: OpenApiTypes.OBJECT},
+        tags=["Payments"],
+    )
+    def get(self, request, order_id):
+        order = (
+            PurchaseOrder.objects.filter(id=order_id, user=request.user)
+            .values(
+                "id",
+                "kind",
+                "request_id",
+                "amount",
+                "status",
+                "vtu_response",
+                "created_at",
+                "settled_at",
+            )
+            .first()
+        )
+        if order is None:
+            return Response(
+                {"error": "Order not found", "success": False},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        settled = order["status"] in PurchaseOrder.FINAL_STATUSES
+        return Response(
+            {
+                "order_id": str(order["id"]),
+                "kind": order["kind"],
+                "request_id": order["request_id"],
+                "amount": str(order["amount"]),
+                "status": order["status"],
+                "result": order["vtu_response"] if settled else None,
+                "created_at": order["created_at"],
+                "settled_at": order["settled_at"],
+            }
+        )
+
+
+class PurchaseReconciliationStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(
+        summary="Purchase requery reconciler counters",
+        description=(
+            "Admin only. Cumulative counters from the VTPass requery reconciler "
+            "plus live counts of orders still awaiting an outcome and orders "
+            "stuck after the maximum number of requeries."
+        ),
+        responses={200: OpenApiTypes.OBJECT},
+        tags=["Payments"],
+    )
+    def get(self, request):
+        return Response(
+            {
+                "counters": metrics.get_counters(*reconciler.COUNTERS),
+                "awaiting_requery": PurchaseOrder.objects.filter(
+                    status="unknown"
+                ).count(),
+                "stuck": reconciler.stuck_orders().count(),
+            }
+        )
+
+
+class DBTransactionStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(
+        summary="DB transaction duration per endpoint",
+        description=(
+            "Admin only. For every endpoint that has opened database "
+            "transactions: how many, their total and mean duration in "
+            "milliseconds, and how many were held open at least "
+            "`DB_TRANSACTION_SLOW_MS`."
+        ),
+        responses={200: OpenApiTypes.OBJECT},
+        tags=["Payments"],
+    )
+    def get(self, request):
+        return Response(transaction_metrics.endpoint_stats())
@@ -1,7 +1,18 @@
+import asyncio
+import logging
+import time
 import uuid
+import weakref
 from datetime import datetime
+import httpx
 import requests
 from django.conf import settings
+from urllib3.exceptions import NewConnectionError
+
+from bluesea_mobile.http_client import CircuitBreaker, pooled_session
+from bluesea_mobile.utils import ProviderDegradedException, VTUAPIException
+
+logger = logging.getLogger(__name__)
 
 BASE_URL = settings.VTPASS_BASE_URL
 
@@ -13,7 +24,7 @@ headers = {
 }
 
 
-
+# Seed data for payments.catalog; live prices come from the plan catalog
 mtn_dict = {
     "1.5GB Weekly Plan (7 Days) - N1,000": ("mtn-1500mb-1000", 1000),
     "1.8GB + 6mins + 5 SMS, Monthly - N1500": ("mtn-1800mb-1500", 1500),
@@ -335,26 +346,190 @@ def generate_reference_id():
     return reference_id
 
 
+class VTPassClient:
+    """
+    Shared VTPass HTTP client.
+
+    Keeps a keep-alive connection pool, applies per-endpoint connect/read
+    timeouts and runs every call through a circuit breaker so a degraded
+    upstream fails fast instead of tying up workers.
+    """
+
+    # (connect, read) seconds per endpoint
+    TIMEOUTS = {
+        "pay": (settings.VTPASS_CONNECT_TIMEOUT, settings.VTPASS_PAY_READ_TIMEOUT),
+        "requery": (settings.VTPASS_CONNECT_TIMEOUT, settings.VTPASS_READ_TIMEOUT),
+        "merchant-verify": (
+            settings.VTPASS_CONNECT_TIMEOUT,
+            settings.VTPASS_READ_TIMEOUT,
+        ),
+        "service-variations": (
+            settings.VTPASS_CONNECT_TIMEOUT,
+            settings.VTPASS_READ_TIMEOUT,
+        ),
+    }
+
+    def __init__(self, base_url=None, session=None, breaker=None):
+        self.base_url = base_url or BASE_URL
+        self.session = session or pooled_session(
+            headers=headers, pool_maxsize=settings.VTPASS_POOL_MAXSIZE
+        )
+        self.breaker = breaker or CircuitBreaker(
+            "vtpass",
+            failure_rate=settings.VTPASS_BREAKER_FAILURE_RATE,
+            slow_call_seconds=settings.VTPASS_BREAKER_SLOW_CALL_SECONDS,
+            min_calls=settings.VTPASS_BREAKER_MIN_CALLS,
+            window=settings.VTPASS_BREAKER_WINDOW,
+            cooldown=settings.VTPASS_BREAKER_COOLDOWN,
+        )
+
+    @staticmethod
+    def never_sent(error):
+        """True if ``error`` was raised before a connection to VTPass existed."""
+        if isinstance(error, requests.ConnectTimeout):
+            return True
+        reason = getattr(error.args[0], "reason", None) if error.args else None
+        return isinstance(error, requests.ConnectionError) and isinstance(
+            reason, NewConnectionError
+        )
+
+    def _request(self, method, endpoint, **kwargs):
+        if not self.breaker.allow_request():
+            logger.warning(f"VTPass circuit open, rejecting {endpoint} call")
+            raise ProviderDegradedException()
+
+        started = time.monotonic()
+        try:
+            response = self.session.request(
+                method,
+                f"{self.base_url}/{endpoint}",
+                timeout=self.TIMEOUTS[endpoint],
+                **kwargs,
+            )
+            if response.status_code >= 500:
+                raise requests.HTTPError(
+                    f"VTPass returned HTTP {response.status_code}", response=response
+                )
+            data = response.json()
+        except (requests.RequestException, ValueError) as e:
+            self.breaker.record(False, time.monotonic() - started)
+            logger.error(f"VTPass {endpoint} call failed: {str(e)}")
+            if self.never_sent(e):
+                # Nothing reached VTPass, so the caller may safely send again
+                raise ProviderDegradedException(detail=f"VTU provider unreachable: {str(e)}")
+            raise VTUAPIException(detail=f"VTU provider error: {str(e)}")
+
+        self.breaker.record(True, time.monotonic() - started)
+        return data
+
+    def top_up(self, user_data):
+        return self._request("POST", "pay", json=user_data)
+
+    def get_variations(self, service_id="waec"):
+        return self._request(
+            "GET", "service-variations", params={"serviceID": service_id}
+        )
+
+    def get_customer(self, user_data):
+        return self._request("POST", "merchant-verify", json=user_data)
+
+    def get_receipt(self, request_id):
+        return self._request("POST", "requery", json=request_id)
+
+
+class AsyncVTPassClient:
+    """
+    asyncio counterpart of ``VTPassClient`` for the ASGI purchase views.
+
+    Shares the circuit breaker of the sync client so both paths see the
+    same view of upstream health.
+    """
+
+    def __init__(self, base_url=None, breaker=None, transport=None):
+        self.base_url = base_url or BASE_URL
+        self.breaker = breaker or vtpass_client.breaker
+        self.transport = transport
+        self._clients = weakref.WeakKeyDictionary()
+
+    def _client(self):
+        # httpx pools are bound to the event loop that created them
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                # requests drops unset (None) headers, httpx rejects them
+                headers={k: v for k, v in headers.items() if v is not None},
+                # limits live on the transport; httpx ignores client-level
+                # limits once a transport is passed explicitly
+                transport=self.transport
+                or httpx.AsyncHTTPTransport(
+                    retries=2,
+                    limits=httpx.Limits(
+                        max_connections=settings.VTPASS_ASYNC_MAX_CONNECTIONS,
+                        max_keepalive_connections=settings.VTPASS_POOL_MAXSIZE,
+                    ),
+                ),
+            )
+            self._clients[loop] = client
+        return client
+
+    async def _request(self, method, endpoint, **kwargs):
+        if not self.breaker.allow_request():
+            logger.warning(f"VTPass circuit open, rejecting {endpoint} call")
+            raise ProviderDegradedException()
+
+        connect, read = VTPassClient.TIMEOUTS[endpoint]
+        started = time.monotonic()
+        try:
+            response = await self._client().request(
+                method,
+                f"{self.base_url}/{endpoint}",
+                timeout=httpx.Timeout(read, connect=connect),
+                **kwargs,
+            )
+            if response.status_code >= 500:
+                raise httpx.HTTPStatusError(
+                    f"VTPass returned HTTP {response.status_code}",
+                    request=response.request,
+                    response=response,
+                )
+            data = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            self.breaker.record(False, time.monotonic() - started)
+            logger.error(f"VTPass {endpoint} call failed: {str(e)}")
+            if isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout)):
+                # Nothing reached VTPass, so the caller may safely send again
+                raise ProviderDegradedException(detail=f"VTU provider unreachable: {str(e)}")
+            raise VTUAPIException(detail=f"VTU provider error: {str(e)}")
+
+        self.breaker.record(True, time.monotonic() - started)
+        return data
+
+    async def top_up(self, user_data):
+        return await self._request("POST", "pay", json=user_data)
+
+    async def get_customer(self, user_data):
+        return await self._request("POST", "merchant-verify", json=user_data)
+
+    async def get_receipt(self, request_id):
+        return await self._request("POST", "requery", json=request_id)
+
+
+vtpass_client = VTPassClient()
+async_vtpass_client = AsyncVTPassClient()
+
+
 def top_up(user_data):
-    response = requests.post(f"{BASE_URL}/pay", headers=headers, json=user_data)
-    return response.json()
+    return vtpass_client.top_up(user_data)
 
 
-def get_variations():
-    response = requests.get(
-        f"{BASE_URL}/service-variations?serviceID=waec",
-        headers=headers,
-    )
-    return response.json()
+def get_variations(service_id="waec"):
+    return vtpass_client.get_variations(service_id)
 
 
 def get_customer(user_data):
-    response = requests.post(
-        f"{BASE_URL}/merchant-verify", headers=headers, json=user_data
-    )
-    return response.json()
+    return vtpass_client.get_customer(user_data)
 
 
 def get_receipt(request_id):
-    response = requests.post(f"{BASE_URL}/requery", headers=headers, json=request_id)
-    return response.json()
\ No newline at end of file
+    return vtpass_client.get_receipt(request_id)
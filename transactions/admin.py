@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.contrib import messages
-from .models import WalletTransaction, FundWallet, AccountName
+from .models import WalletTransaction, FundWallet, AccountName, PaystackWebhookEvent
 
 
 def _status_badge(status):
@@ -104,6 +104,29 @@ class FundWalletAdmin(admin.ModelAdmin):
 
 @admin.register(AccountName)
 class AccountNameAdmin(admin.ModelAdmin):
-    list_display = ['account_number', 'bank_code']
+    list_display = ['account_number', 'bank_code', 'account_name', 'resolved_at']
     search_fields = ['account_number', 'bank_code']
     list_per_page = 25
+
+
+@admin.register(PaystackWebhookEvent)
+class PaystackWebhookEventAdmin(admin.ModelAdmin):
+    list_display = ['event', 'reference', 'status_display', 'attempts', 'received_at', 'processed_at']
+    list_filter = ['status', 'event', 'received_at']
+    search_fields = ['reference']
+    readonly_fields = [
+        'event', 'reference', 'payload', 'status', 'attempts',
+        'error_message', 'received_at', 'processed_at'
+    ]
+    date_hierarchy = 'received_at'
+    list_per_page = 30
+    actions = ['reprocess_events']
+
+    def status_display(self, obj):
+        return _status_badge(obj.status)
+    status_display.short_description = 'Status'
+
+    def reprocess_events(self, request, queryset):
+        updated = queryset.exclude(status='PROCESSED').update(status='RECEIVED', attempts=0, error_message='')
+        self.message_user(request, f'{updated} event(s) queued for reprocessing.', messages.SUCCESS)
+    reprocess_events.short_description = 'Reprocess selected events'
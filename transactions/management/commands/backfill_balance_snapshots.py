@@ -0,0 +1,93 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from transactions.models import WalletTransaction
+from wallet.models import Wallet
+
+
+class Command(BaseCommand):
+    help = 'Fill balance_before/balance_after on wallet transactions recorded before snapshots existed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Transactions written per UPDATE batch')
+        parser.add_argument('--wallet-batch', type=int, default=100,
+                            help='Wallets fetched per chunk')
+        parser.add_argument('--wallet', type=int, help='Only backfill this wallet id')
+
+    def handle(self, *args, **options):
+        pending = (
+            WalletTransaction.objects.filter(balance_after__isnull=True)
+            .order_by('wallet_id')
+            .values_list('wallet_id', flat=True)
+            .distinct()
+        )
+        if options['wallet']:
+            pending = pending.filter(wallet_id=options['wallet'])
+
+        wallets = rows = 0
+        last_id = 0
+        while True:
+            chunk = list(pending.filter(wallet_id__gt=last_id)[:options['wallet_batch']])
+            if not chunk:
+                break
+            for wallet_id in chunk:
+                rows += self.backfill_wallet(wallet_id, options['batch_size'])
+                wallets += 1
+            last_id = chunk[-1]
+            self.stdout.write(f'{wallets} wallets, {rows} transactions backfilled')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'\nBackfilled {rows} transaction(s) across {wallets} wallet(s)')
+        )
+
+    def backfill_wallet(self, wallet_id, batch_size):
+        """
+        Walk a wallet's unsnapshotted history backwards from a known balance.
+
+        Legacy rows all predate the first snapshotted posting, so the anchor
+        is that posting's ``balance_before`` or, failing that, the current
+        funds held. Anchoring at the present keeps today's balance exact even
+        if old balance changes never made it into the ledger. The wallet row
+        stays locked so no posting lands while the anchor is in use.
+        """
+        with transaction.atomic():
+            wallet = Wallet.objects.select_for_update().get(id=wallet_id)
+            history = WalletTransaction.objects.filter(wallet_id=wallet_id)
+            first_snapshot = (
+                history.filter(balance_before__isnull=False)
+                .order_by('created_at', 'id')
+                .values_list('balance_before', flat=True)
+                .first()
+            )
+            after = (
+                first_snapshot
+                if first_snapshot is not None
+                else wallet.balance + wallet.locked_balance
+            )
+
+            batch = []
+            count = 0
+            legacy = (
+                history.filter(balance_after__isnull=True)
+                .order_by('-created_at', '-id')
+                .only('id', 'amount', 'transaction_type', 'status')
+            )
+            for txn in legacy.iterator(chunk_size=batch_size):
+                moved = txn.amount if txn.status == 'COMPLETED' else Decimal('0.00')
+                if txn.transaction_type == 'CREDIT':
+                    moved = -moved
+                txn.balance_after = after
+                txn.balance_before = after + moved
+                after = txn.balance_before
+                batch.append(txn)
+                if len(batch) >= batch_size:
+                    WalletTransaction.objects.bulk_update(batch, ['balance_before', 'balance_after'])
+                    count += len(batch)
+                    batch = []
+            if batch:
+                WalletTransaction.objects.bulk_update(batch, ['balance_before', 'balance_after'])
+                count += len(batch)
+        return count
@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0003_wallettransaction_balance_snapshots'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='wallettransaction',
+            name='wallet_txn_history_idx',
+        ),
+        migrations.AddIndex(
+            model_name='wallettransaction',
+            index=models.Index(fields=['wallet', '-created_at', '-id'], name='wallet_txn_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0006_paystackwebhookevent'),
+    ]
+
+    operations = [
+        # Nothing ever wrote these rows; integers also dropped leading zeros
+        migrations.AlterField(
+            model_name='accountname',
+            name='account_number',
+            field=models.CharField(max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='accountname',
+            name='bank_code',
+            field=models.CharField(max_length=10),
+        ),
+        migrations.AddField(
+            model_name='accountname',
+            name='account_name',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='accountname',
+            name='resolved_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='accountname',
+            constraint=models.UniqueConstraint(fields=('account_number', 'bank_code'), name='unique_resolved_account'),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0007_accountname_resolution_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accountname',
+            name='recipient_code',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+    ]
@@ -23,10 +23,16 @@ class WalletTransaction(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='COMPLETED')
     description = models.TextField(max_length=255, blank=True, null=True)
     reference = models.CharField(max_length=100, unique=True)
+    # Funds held (balance + locked_balance) around this posting; null until backfilled
+    balance_before = models.DecimalField(max_digits=12, decimal_places=2, blank=True, null=True)
+    balance_after = models.DecimalField(max_digits=12, decimal_places=2, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['wallet', '-created_at', '-id'], name='wallet_txn_recent_idx'),
+        ]
 
     def __str__(self):
         return f"{self.transaction_type} - {self.amount} - {self.status} - {self.wallet.user.username}"
@@ -46,6 +52,82 @@ class FundWallet(models.Model):
 
 
 class AccountName(models.Model):
-    account_number = models.IntegerField()
-    bank_code = models.IntegerField()
+    """Resolved bank account holder, cached from Paystack's /bank/resolve."""
+    account_number = models.CharField(max_length=10)
+    bank_code = models.CharField(max_length=10)
+    account_name = models.CharField(max_length=100, blank=True, default='')
+    resolved_at = models.DateTimeField(blank=True, null=True)
+    # Paystack transfer recipient for payouts to this account
+    recipient_code = models.CharField(max_length=50, blank=True, default='')
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['account_number', 'bank_code'], name='unique_resolved_account'),
+        ]
+
+    def __str__(self):
+        return f"{self.account_number} ({self.bank_code}) - {self.account_name}"
+
+
+
+class StatementExport(models.Model):
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('jsonl', 'JSON Lines'),
+    ]
+    EXPORT_STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='statement_exports')
+    wallet = models.ForeignKey("wallet.Wallet", on_delete=models.CASCADE, related_name='statement_exports')
+    export_format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='csv')
+    start_date = models.DateTimeField(blank=True, null=True)
+    end_date = models.DateTimeField(blank=True, null=True)
+    status = models.CharField(max_length=10, choices=EXPORT_STATUS_CHOICES, default='PENDING')
+    file = models.FileField(upload_to='statements/', blank=True, null=True)
+    row_count = models.PositiveIntegerField(default=0)
+    error_message = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.export_format.upper()} statement for {self.user.email} - {self.status}"
+
+
+class PaystackWebhookEvent(models.Model):
+    """Verified Paystack webhook, stored as received and processed by a worker."""
+    INBOX_STATUS_CHOICES = [
+        ('RECEIVED', 'Received'),
+        ('PROCESSED', 'Processed'),
+        ('IGNORED', 'Ignored'),
+        ('FAILED', 'Failed'),
+    ]
+
+    event = models.CharField(max_length=50)
+    reference = models.CharField(max_length=100)
+    payload = models.JSONField()
+    status = models.CharField(max_length=10, choices=INBOX_STATUS_CHOICES, default='RECEIVED')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error_message = models.TextField(blank=True, default='')
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'reference'], name='unique_paystack_event_reference'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'id'], name='paystack_event_inbox_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event} {self.reference} - {self.status}"
@@ -1,6 +1,6 @@
-from rest_framework.pagination import PageNumberPagination
+from bluesea_mobile.pagination import KeysetPagination
 
-class WalletTransactionPagination(PageNumberPagination):
+class WalletTransactionPagination(KeysetPagination):
     # Default number of transactions per page
     page_size = 5
     
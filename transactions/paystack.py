@@ -1,6 +1,15 @@
-import json
+import logging
+from datetime import timedelta
+
 import requests
 from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from bluesea_mobile.http_client import pooled_session
+from .models import AccountName
+
+logger = logging.getLogger(__name__)
 
 
 BASE_URL = "https://api.paystack.co"
@@ -10,53 +19,129 @@ HEADERS = {
     "Content-Type": "application/json"
 }
 
+BANKS_CACHE_KEY = "paystack:banks"
+NETWORK_ERROR = {"success": False, "message": "Network error"}
+
+
+class PaystackClient:
+    """
+    Paystack API over one keep-alive connection pool per process, with
+    bounded connect/read timeouts so a slow Paystack cannot pin workers.
+    """
+
+    def __init__(self, base_url=None, session=None):
+        self.base_url = base_url or BASE_URL
+        self.session = session or pooled_session(
+            headers=HEADERS, pool_maxsize=settings.PAYSTACK_POOL_MAXSIZE
+        )
+        self.timeout = (settings.PAYSTACK_CONNECT_TIMEOUT, settings.PAYSTACK_READ_TIMEOUT)
+
+    def request(self, method, path, **kwargs):
+        """Returns ``(status_code, body)``; raises ``requests.RequestException``/``ValueError``."""
+        response = self.session.request(
+            method, f"{self.base_url}/{path}", timeout=self.timeout, **kwargs
+        )
+        return response.status_code, response.json()
+
+
+paystack_client = PaystackClient()
 
 
 def checkout(payload):
-    url = f"{BASE_URL}/transaction/initialize"
-    
     try:
-        response = requests.post(url, json=payload, headers=HEADERS)
-        # data = response.json()
-        # print("Paystack response:", data)
-
-        response_data = response.json()
+        _, response_data = paystack_client.request("POST", "transaction/initialize", json=payload)
 
         if response_data.get('status') == True:
             return True, response_data['data']['authorization_url']
         else:
             return False, "Failed to initiate payment! Please try again later"
     except Exception as e:
-        # print("Paystack error:", str(e))
+        logger.error(f"Paystack checkout failed: {str(e)}")
         return False, "An error occurred while processing the payment. Please try again later."
-        
+
+
+def fetch_nigerian_banks():
+    """Bank name -> code straight from Paystack, refreshing the cached copy."""
+    _, body = paystack_client.request("GET", "bank")
+    banks = {bank["name"]: bank["code"] for bank in body["data"]}
+    cache.set(BANKS_CACHE_KEY, banks, timeout=settings.PAYSTACK_BANKS_CACHE_TTL)
+    return banks
 
 
 def get_nigerian_banks():
-    response = requests.get(
-       url= f"{BASE_URL}/bank",
-        headers = HEADERS
-    )
-    banks = response.json()["data"]
-    return {bank["name"]: bank["code"] for bank in banks}
+    """
+    Bank name -> code. Served from the cache, which ``refresh_paystack_banks``
+    rewrites daily well inside its TTL; Paystack is only asked on a cold cache.
+    """
+    banks = cache.get(BANKS_CACHE_KEY)
+    if banks is None:
+        banks = fetch_nigerian_banks()
+    return banks
+
+
+def is_supported_bank(bank_code):
+    """False only when the bank list is known and ``bank_code`` is not on it."""
+    try:
+        return str(bank_code) in get_nigerian_banks().values()
+    except (requests.RequestException, ValueError, KeyError) as e:
+        # An unreachable bank list must not block payouts
+        logger.warning(f"Paystack bank list unavailable: {str(e)}")
+        return True
+
+
+def _account_cache_key(account_number, bank_code):
+    return f"paystack:account:{bank_code}:{account_number}"
 
 
 def get_account_name(account_number: str, bank_code: str):
-    url = f"{BASE_URL}/bank/resolve"
+    """
+    Resolve the holder of a bank account, cached per (account_number,
+    bank_code) in Redis and in ``AccountName`` for
+    ``PAYSTACK_ACCOUNT_NAME_TTL``. Accounts Paystack cannot resolve are
+    remembered briefly; network failures are not cached at all.
+    """
+    account_number, bank_code = str(account_number), str(bank_code)
+    key = _account_cache_key(account_number, bank_code)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    ttl = settings.PAYSTACK_ACCOUNT_NAME_TTL
+    record = AccountName.objects.filter(
+        account_number=account_number,
+        bank_code=bank_code,
+        resolved_at__gte=timezone.now() - timedelta(seconds=ttl),
+    ).first()
+    if record is not None:
+        result = {"success": True, "account_name": record.account_name}
+        remaining = ttl - (timezone.now() - record.resolved_at).total_seconds()
+        cache.set(key, result, timeout=max(int(remaining), 1))
+        return result
+
     params = {
         "account_number": account_number,
         "bank_code": bank_code
     }
-    
-    response = requests.get(url, params=params , headers=HEADERS)
-    
-    if response.status_code == 200:
-        data = response.json()
-        if data.get("status"):
-            account_name = data["data"]["account_name"]
-            return {"success": True, "account_name": account_name}
-        else:
-            return {"success": False, "message": data.get("message")}
-    else:
-        return {"success": False, "message": "Network error"}
+    try:
+        status_code, data = paystack_client.request("GET", "bank/resolve", params=params)
+    except (requests.RequestException, ValueError) as e:
+        logger.error(f"Paystack account resolution failed: {str(e)}")
+        return dict(NETWORK_ERROR)
 
+    if status_code >= 500 or status_code == 429:
+        return dict(NETWORK_ERROR)
+
+    if not data.get("status"):
+        result = {"success": False, "message": data.get("message")}
+        cache.set(key, result, timeout=settings.PAYSTACK_ACCOUNT_NAME_NEGATIVE_TTL)
+        return result
+
+    account_name = data["data"]["account_name"]
+    AccountName.objects.update_or_create(
+        account_number=account_number,
+        bank_code=bank_code,
+        defaults={"account_name": account_name, "resolved_at": timezone.now()},
+    )
+    result = {"success": True, "account_name": account_name}
+    cache.set(key, result, timeout=ttl)
+    return result
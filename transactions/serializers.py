@@ -13,9 +13,10 @@ class WalletTransactionSerializer(serializers.ModelSerializer):
         model = WalletTransaction
         fields = [
             'id', 'transaction_type', 'amount', 'formatted_amount', 
-            'description', 'reference', 'status', 'created_at', 'username'
+            'description', 'reference', 'status', 'balance_before', 'balance_after',
+            'created_at', 'username'
         ]
-        read_only_fields = ['id', 'created_at']
+        read_only_fields = ['id', 'balance_before', 'balance_after', 'created_at']
     
     @extend_schema_field(OpenApiTypes.STR)
     def get_formatted_amount(self, obj):
@@ -43,6 +44,8 @@ class AccountNameSerializer(serializers.ModelSerializer):
         model = AccountName
         fields = ['id', 'account_number', 'bank_code']
         read_only_fields =['id']
+        # Input only; the resolution cache may already hold this account
+        validators = []
 
 
 class InitializeFundingSerializer(serializers.Serializer):
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from bluesea_mobile.utils import BalanceHistoryUnavailable
+from .models import WalletTransaction
+
+
+def balance_at(wallet, moment):
+    """
+    Funds held (balance + locked_balance) just before ``moment``.
+
+    Reads the ``balance_after`` snapshot of the last posting before
+    ``moment`` — one lookup on the (wallet, -created_at, -id) index instead of
+    summing the ledger.
+    """
+    if moment <= wallet.created_at:
+        return Decimal("0.00")
+
+    history = WalletTransaction.objects.filter(wallet=wallet)
+    last = (
+        history.filter(created_at__lt=moment)
+        .order_by("-created_at", "-id")
+        .values("balance_after")
+        .first()
+    )
+    if last is not None:
+        value = last["balance_after"]
+    else:
+        # Nothing posted yet: whatever the first posting started from
+        first = history.order_by("created_at", "id").values("balance_before").first()
+        if first is None:
+            return wallet.balance + wallet.locked_balance
+        value = first["balance_before"]
+
+    if value is None:
+        raise BalanceHistoryUnavailable()
+    return value
+
+
+def parse_period(query_params):
+    """
+    ``start_date``/``end_date`` query params as aware datetimes (or None).
+
+    Accepts dates or ISO timestamps; a bare ``end_date`` includes that whole
+    day. Raises ``ValueError`` naming the bad parameter.
+    """
+    bounds = []
+    for param in ("start_date", "end_date"):
+        raw = query_params.get(param)
+        if not raw:
+            bounds.append(None)
+            continue
+        try:
+            parsed_date = parse_date(raw)
+            moment = parse_datetime(raw) if parsed_date is None else None
+        except ValueError:
+            parsed_date = moment = None
+        if parsed_date is not None:
+            if param == "end_date":
+                parsed_date += timedelta(days=1)
+            moment = datetime.combine(parsed_date, datetime.min.time())
+        if moment is None:
+            raise ValueError(f"Invalid {param}")
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        bounds.append(moment)
+    return tuple(bounds)
+
+
+def _money(value):
+    return Decimal(str(value or 0)).quantize(Decimal("0.01"))
+
+
+def month_bounds(year, month):
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime(year, month, 1), tz)
+    if month == 12:
+        end = timezone.make_aware(datetime(year + 1, 1, 1), tz)
+    else:
+        end = timezone.make_aware(datetime(year, month + 1, 1), tz)
+    return start, end
+
+
+def monthly_statement(wallet, year, month):
+    start, end = month_bounds(year, month)
+    totals = WalletTransaction.objects.filter(
+        wallet=wallet, created_at__gte=start, created_at__lt=end, status="COMPLETED"
+    ).aggregate(
+        credits=Sum("amount", filter=Q(transaction_type="CREDIT")),
+        debits=Sum("amount", filter=Q(transaction_type="DEBIT")),
+        count=Count("id"),
+    )
+    return {
+        "period_start": start,
+        "period_end": end,
+        "opening_balance": balance_at(wallet, start),
+        "closing_balance": balance_at(wallet, min(end, timezone.now())),
+        "total_credits": _money(totals["credits"]),
+        "total_debits": _money(totals["debits"]),
+        "transaction_count": totals["count"],
+    }
@@ -0,0 +1,91 @@
+import logging
+import tempfile
+
+from celery import shared_task
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+
+from notifications.utils import send_notification
+from .exports import FORMATS, export_download_url, statement_rows
+from .models import StatementExport
+from .paystack import fetch_nigerian_banks
+from .webhooks import process_pending_events
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def generate_statement_export(export_id):
+    """
+    Write a statement export to storage and notify the user with a link.
+
+    Rows stream from a server-side cursor into a temporary file, so neither
+    the worker's memory nor the request cycle grows with the ledger.
+    """
+    claimed = StatementExport.objects.filter(id=export_id, status='PENDING').update(status='RUNNING')
+    if not claimed:
+        return f"Statement export {export_id} is not pending, skipping"
+
+    export = StatementExport.objects.select_related('user').get(id=export_id)
+    render, _, extension = FORMATS[export.export_format]
+    try:
+        row_count = 0
+
+        def counted(rows):
+            nonlocal row_count
+            for row in rows:
+                row_count += 1
+                yield row
+
+        with tempfile.TemporaryFile(mode='w+b') as tmp:
+            rows = statement_rows(export.wallet_id, export.start_date, export.end_date)
+            for chunk in render(counted(rows)):
+                tmp.write(chunk.encode())
+            tmp.seek(0)
+            export.file.save(f"statement_{export.id}.{extension}", File(tmp), save=False)
+
+        export.row_count = row_count
+        export.status = 'COMPLETED'
+        export.completed_at = timezone.now()
+        export.save(update_fields=['file', 'row_count', 'status', 'completed_at'])
+    except Exception as e:
+        logger.error(f"Statement export {export_id} failed: {str(e)}")
+        export.status = 'FAILED'
+        export.error_message = str(e)
+        export.save(update_fields=['status', 'error_message'])
+        raise
+
+    download_url = settings.SITE_URL + export_download_url(export)
+    try:
+        send_notification(
+            user=export.user,
+            title="Statement Ready",
+            message=f"Your statement with {row_count} transactions is ready: {download_url}",
+            notification_type='wallet',
+            email_subject="BlueSea - Your Statement Is Ready",
+            context={'download_url': download_url},
+        )
+    except Exception as e:
+        logger.error(f"Error sending notification: {str(e)}")
+
+    return f"Statement export {export_id} completed with {row_count} rows"
+
+
+@shared_task
+def process_paystack_events():
+    """Drain the Paystack webhook inbox; queued per webhook and swept every minute."""
+    counts = process_pending_events()
+    return f"Processed Paystack events: {counts}"
+
+
+@shared_task
+def refresh_paystack_banks():
+    """Daily: re-fetch the bank list so requests never wait on Paystack for it."""
+    try:
+        banks = fetch_nigerian_banks()
+    except Exception as e:
+        # The cached list stays valid until its TTL runs out
+        logger.error(f"Paystack bank list refresh failed: {str(e)}")
+        return "Paystack bank list refresh failed"
+    return f"Cached {len(banks)} Paystack banks"
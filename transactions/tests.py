@@ -1,3 +1,429 @@
-from django.test import TestCase
+import base64
+import hashlib
+import hmac
+import json
+import tempfile
+from datetime import datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import requests
+from asgiref.sync import sync_to_async
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import Profile
+from notifications.models import Notification
+from transactions.exports import EXPORT_FIELDS
+from transactions import paystack
+from transactions.models import AccountName, FundWallet, PaystackWebhookEvent, StatementExport, WalletTransaction
+from transactions.statements import balance_at
+from transactions.tasks import generate_statement_export, refresh_paystack_banks
+from transactions.webhooks import process_pending_events
+from wallet import ledger
+from wallet.models import Wallet
+
+
+def make_wallet(email, phone, balance="0.00"):
+    user = Profile.objects.create_user(
+        email=email,
+        phone=phone,
+        surname="Statement",
+        other_names="User",
+        role="user",
+    )
+    return Wallet.objects.create(user=user, balance=Decimal(balance))
+
+
+def snapshots(wallet):
+    return list(
+        WalletTransaction.objects.filter(wallet=wallet)
+        .order_by("created_at", "id")
+        .values_list("balance_before", "balance_after")
+    )
+
+
+class BalanceSnapshotTestCase(TestCase):
+    def setUp(self):
+        self.wallet = make_wallet("snap@example.com", "08010000040", "100.00")
+        self.other = make_wallet("snap2@example.com", "08010000041")
+
+    def test_postings_record_running_balance(self):
+        ledger.credit(self.wallet.id, 50)
+        ledger.debit(self.wallet.id, 30)
+        ledger.post_many(
+            [
+                ledger.Posting(self.wallet.id, 20, "DEBIT"),
+                ledger.Posting(self.other.id, 20, "CREDIT"),
+                ledger.Posting(self.wallet.id, 5, "CREDIT"),
+            ]
+        )
+
+        self.assertEqual(
+            snapshots(self.wallet),
+            [
+                (Decimal("100.00"), Decimal("150.00")),
+                (Decimal("150.00"), Decimal("120.00")),
+                (Decimal("120.00"), Decimal("100.00")),
+                (Decimal("100.00"), Decimal("105.00")),
+            ],
+        )
+        self.assertEqual(snapshots(self.other), [(Decimal("0.00"), Decimal("20.00"))])
+
+    def test_backfill_walks_back_from_current_balance(self):
+        Wallet.objects.filter(id=self.wallet.id).update(balance=Decimal("380.00"))
+        for amount, kind in (("500.00", "CREDIT"), ("200.00", "DEBIT"), ("80.00", "CREDIT")):
+            WalletTransaction.objects.create(
+                wallet=self.wallet,
+                amount=Decimal(amount),
+                transaction_type=kind,
+                reference=f"legacy-{amount}",
+            )
+        # A non-completed posting moves nothing
+        WalletTransaction.objects.create(
+            wallet=self.wallet,
+            amount=Decimal("999.00"),
+            transaction_type="DEBIT",
+            status="FAILED",
+            reference="legacy-failed",
+        )
+        ledger.debit(self.wallet.id, 40)
+
+        out = StringIO()
+        call_command("backfill_balance_snapshots", "--batch-size", "2", stdout=out)
+
+        self.assertIn("Backfilled 4 transaction(s) across 1 wallet(s)", out.getvalue())
+        self.assertEqual(
+            snapshots(self.wallet),
+            [
+                (Decimal("0.00"), Decimal("500.00")),
+                (Decimal("500.00"), Decimal("300.00")),
+                (Decimal("300.00"), Decimal("380.00")),
+                (Decimal("380.00"), Decimal("380.00")),
+                (Decimal("380.00"), Decimal("340.00")),
+            ],
+        )
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class StatementViewTestCase(APITestCase):
+    def setUp(self):
+        self.wallet = make_wallet("statement@example.com", "08010000042")
+        Wallet.objects.filter(id=self.wallet.id).update(
+            created_at=timezone.make_aware(datetime(2026, 1, 1))
+        )
+        self.wallet.refresh_from_db()
+        self.client.force_authenticate(self.wallet.user)
+
+        self.post(datetime(2026, 1, 10), "CREDIT", "1000")
+        self.post(datetime(2026, 2, 3), "DEBIT", "250")
+        self.post(datetime(2026, 2, 20), "CREDIT", "100")
+        self.post(datetime(2026, 3, 5), "DEBIT", "50")
+
+    def post(self, when, kind, amount):
+        if kind == "CREDIT":
+            ledger.credit(self.wallet.id, amount, reference=f"{kind}-{when:%m%d}")
+        else:
+            ledger.debit(self.wallet.id, amount, reference=f"{kind}-{when:%m%d}")
+        WalletTransaction.objects.filter(reference=f"{kind}-{when:%m%d}").update(
+            created_at=timezone.make_aware(when)
+        )
+
+    def test_monthly_statement(self):
+        response = self.client.get(reverse("monthly-statement"), {"month": "2026-02"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["opening_balance"], "1000.00")
+        self.assertEqual(response.data["closing_balance"], "850.00")
+        self.assertEqual(response.data["total_credits"], "100.00")
+        self.assertEqual(response.data["total_debits"], "250.00")
+        self.assertEqual(response.data["transaction_count"], 2)
+
+    def test_balance_at(self):
+        response = self.client.get(
+            reverse("balance-at"), {"at": "2026-02-10T00:00:00"}
+        )
+        self.assertEqual(response.data["balance"], "750.00")
+
+        self.assertEqual(
+            balance_at(self.wallet, self.wallet.created_at - timedelta(days=1)),
+            Decimal("0.00"),
+        )
+
+    def test_unbackfilled_history_is_reported(self):
+        WalletTransaction.objects.update(balance_before=None, balance_after=None)
+
+        response = self.client.get(reverse("monthly-statement"), {"month": "2026-02"})
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    def test_invalid_month(self):
+        response = self.client.get(reverse("monthly-statement"), {"month": "Feb"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class WalletTransactionHistoryTestCase(APITestCase):
+    def setUp(self):
+        self.wallet = make_wallet("history@example.com", "08010000043", "1000.00")
+        self.client.force_authenticate(self.wallet.user)
+        for i in range(7):
+            ledger.debit(self.wallet.id, 10, reference=f"debit-{i}")
+        for i in range(5):
+            ledger.credit(self.wallet.id, 10, reference=f"credit-{i}")
+        # Identical timestamps must still page without gaps or repeats
+        WalletTransaction.objects.filter(reference__in=["debit-5", "debit-6", "credit-0"]).update(
+            created_at=timezone.make_aware(datetime(2026, 3, 1, 12))
+        )
+
+    def fetch_all(self, params):
+        seen = []
+        url = reverse("wallet-transactions")
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", response.data)
+            seen.extend(row["reference"] for row in response.data["results"])
+            url, params = response.data["next"], None
+        return seen
+
+    def test_cursor_pages_cover_history_once_in_order(self):
+        seen = self.fetch_all({"page_size": 5})
+
+        expected = list(
+            WalletTransaction.objects.filter(wallet=self.wallet)
+            .order_by("-created_at", "-id")
+            .values_list("reference", flat=True)
+        )
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(seen), 12)
+
+    def test_filters(self):
+        self.assertEqual(len(self.fetch_all({"type": "credit", "page_size": 2})), 5)
+        self.assertEqual(
+            self.fetch_all({"start_date": "2026-03-01", "end_date": "2026-03-01"}),
+            ["credit-0", "debit-6", "debit-5"],
+        )
+
+    def test_bad_cursor(self):
+        response = self.client.get(reverse("wallet-transactions"), {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_with_bad_pk(self):
+        cursor = base64.urlsafe_b64encode(b"2026-03-01T00:00:00+00:00|abc").decode()
+        response = self.client.get(reverse("wallet-transactions"), {"cursor": cursor})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, STATEMENT_EXPORT_CHUNK_SIZE=2)
+class StatementExportTestCase(APITestCase):
+    def setUp(self):
+        self.wallet = make_wallet("export@example.com", "08010000044", "100.00")
+        self.client.force_authenticate(self.wallet.user)
+        for i in range(5):
+            ledger.credit(self.wallet.id, 10, description=f"Top up, #{i}", reference=f"export-{i}")
+
+    def test_streams_csv(self):
+        response = self.client.get(reverse("statement-export"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], ",".join(EXPORT_FIELDS))
+        self.assertEqual(len(lines), 6)
+        self.assertIn('export-0,CREDIT,10.00,COMPLETED,"Top up, #0",100.00,110.00', lines[1])
+
+    def test_streams_jsonl(self):
+        response = self.client.get(reverse("statement-export"), {"export_format": "jsonl"})
+
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([row["reference"] for row in rows], [f"export-{i}" for i in range(5)])
+        self.assertEqual(rows[-1]["balance_after"], "150.00")
+
+    async def test_streams_asynchronously_under_asgi(self):
+        token = await sync_to_async(AccessToken.for_user)(self.wallet.user)
+        response = await self.async_client.get(
+            reverse("statement-export"), headers={"Authorization": f"Bearer {token}"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.is_async)
+        lines = b"".join([chunk async for chunk in response.streaming_content]).decode().splitlines()
+        self.assertEqual(lines[0], ",".join(EXPORT_FIELDS))
+        self.assertEqual([line.split(",")[1] for line in lines[1:]], [f"export-{i}" for i in range(5)])
+
+    @override_settings(STATEMENT_EXPORT_SYNC_LIMIT=3)
+    def test_large_export_runs_in_background(self):
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            with mock.patch("transactions.views.generate_statement_export.delay") as delay:
+                with self.captureOnCommitCallbacks(execute=True):
+                    response = self.client.get(reverse("statement-export"))
+
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            export_id = response.data["export_id"]
+            delay.assert_called_once_with(export_id)
+
+            generate_statement_export(export_id)
+
+            export = StatementExport.objects.get(id=export_id)
+            self.assertEqual((export.status, export.row_count), ("COMPLETED", 5))
+            self.assertTrue(
+                Notification.objects.filter(user=self.wallet.user, title="Statement Ready").exists()
+            )
+
+            status_response = self.client.get(response["Location"])
+            download_url = status_response.data["download_url"]
+            self.client.force_authenticate(None)
+            download = self.client.get(download_url)
+            self.assertEqual(download.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(b"".join(download.streaming_content).splitlines()), 6)
+
+            tampered = self.client.get(download_url[:-2] + "xx")
+            self.assertEqual(tampered.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, PAYSTACK_SECRET_KEY="sk_test_webhook")
+class PaystackWebhookInboxTestCase(APITestCase):
+    def setUp(self):
+        self.wallet = make_wallet("paystack@example.com", "08010000060", "100.00")
+        self.funding = FundWallet.objects.create(
+            user=self.wallet.user, amount=Decimal("2500.00"), payment_reference="PSK-REF-1"
+        )
+
+    def deliver(self, data, signature=None):
+        body = json.dumps(data).encode()
+        if signature is None:
+            signature = hmac.new(b"sk_test_webhook", body, hashlib.sha512).hexdigest()
+        with mock.patch("transactions.views.process_paystack_events.delay") as delay:
+            response = self.client.post(
+                reverse("paystack-webhook"), body, content_type="application/json",
+                HTTP_X_PAYSTACK_SIGNATURE=signature,
+            )
+        return response, delay
+
+    def charge(self, reference="PSK-REF-1", amount=250000):
+        return {"event": "charge.success", "data": {"reference": reference, "amount": amount}}
+
+    def test_acknowledges_without_touching_the_wallet(self):
+        response, delay = self.deliver(self.charge())
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        delay.assert_called_once_with()
+        event = PaystackWebhookEvent.objects.get()
+        self.assertEqual((event.event, event.reference, event.status), ("charge.success", "PSK-REF-1", "RECEIVED"))
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("100.00"))
+
+    def test_rejects_bad_signature(self):
+        response, delay = self.deliver(self.charge(), signature="0" * 128)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        delay.assert_not_called()
+        self.assertFalse(PaystackWebhookEvent.objects.exists())
+
+    def test_replayed_event_is_stored_and_credited_once(self):
+        self.deliver(self.charge())
+        response, delay = self.deliver(self.charge())
+        self.assertEqual(response.data, {"success": True, "duplicate": True})
+        delay.assert_not_called()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(process_pending_events(), {"PROCESSED": 1})
+        self.assertEqual(process_pending_events(), {})
+
+        self.wallet.refresh_from_db()
+        self.funding.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("2600.00"))
+        self.assertEqual(self.funding.status, "COMPLETED")
+        self.assertEqual(WalletTransaction.objects.filter(reference="PSK-REF-1").count(), 1)
+        self.assertTrue(Notification.objects.filter(user=self.wallet.user).exists())
+
+    def test_events_are_handled_in_arrival_order(self):
+        self.deliver(self.charge(amount=100))
+        self.deliver(self.charge(reference="PSK-UNKNOWN"))
+        self.deliver({"event": "transfer.success", "data": {"reference": "TRF-1"}})
+
+        self.assertEqual(process_pending_events(), {"FAILED": 1, "IGNORED": 2})
+        self.assertEqual(
+            list(PaystackWebhookEvent.objects.values_list("reference", "status")),
+            [("PSK-REF-1", "FAILED"), ("PSK-UNKNOWN", "IGNORED"), ("TRF-1", "IGNORED")],
+        )
+        self.funding.refresh_from_db()
+        self.assertEqual(self.funding.status, "FAILED")
+
+    @override_settings(PAYSTACK_WEBHOOK_MAX_ATTEMPTS=2)
+    def test_handler_errors_are_retried_then_failed(self):
+        self.deliver(self.charge())
+        with mock.patch("transactions.webhooks.ledger.credit", side_effect=RuntimeError("db down")):
+            self.assertEqual(process_pending_events(), {"RECEIVED": 1})
+            self.assertEqual(process_pending_events(), {"FAILED": 1})
+
+        event = PaystackWebhookEvent.objects.get()
+        self.assertEqual((event.attempts, event.error_message), (2, "db down"))
+        self.funding.refresh_from_db()
+        self.assertEqual(self.funding.status, "PENDING")
+
+
+class PaystackCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(paystack.paystack_client, "request")
+        self.request = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_resolved_account_is_served_locally(self):
+        self.request.return_value = (200, {"status": True, "data": {"account_name": "ADA OBI"}})
+
+        for _ in range(3):
+            self.assertEqual(
+                paystack.get_account_name("0123456789", "058"),
+                {"success": True, "account_name": "ADA OBI"},
+            )
+        self.assertEqual(self.request.call_count, 1)
+
+        # A cold cache falls back to the AccountName row before Paystack
+        cache.clear()
+        self.assertEqual(paystack.get_account_name("0123456789", "058")["account_name"], "ADA OBI")
+        self.assertEqual(self.request.call_count, 1)
+
+        AccountName.objects.update(resolved_at=timezone.now() - timedelta(days=31))
+        cache.clear()
+        paystack.get_account_name("0123456789", "058")
+        self.assertEqual(self.request.call_count, 2)
+        self.assertEqual(AccountName.objects.get().account_number, "0123456789")
+
+    def test_failures_are_cached_only_when_definitive(self):
+        self.request.return_value = (422, {"status": False, "message": "Could not resolve account name"})
+        paystack.get_account_name("0000000000", "058")
+        result = paystack.get_account_name("0000000000", "058")
+        self.assertEqual(result, {"success": False, "message": "Could not resolve account name"})
+        self.assertEqual(self.request.call_count, 1)
+
+        self.request.side_effect = requests.Timeout("slow")
+        self.assertEqual(paystack.get_account_name("1111111111", "058")["message"], "Network error")
+        paystack.get_account_name("1111111111", "058")
+        self.assertEqual(self.request.call_count, 3)
+        self.assertFalse(AccountName.objects.exists())
+
+    def test_bank_list_is_cached_and_refreshed(self):
+        self.request.return_value = (200, {"data": [{"name": "GTBank", "code": "058"}]})
+        self.assertEqual(paystack.get_nigerian_banks(), {"GTBank": "058"})
+        self.assertTrue(paystack.is_supported_bank("058"))
+        self.assertFalse(paystack.is_supported_bank("999"))
+        self.assertEqual(self.request.call_count, 1)
+
+        self.request.return_value = (200, {"data": [{"name": "Kuda", "code": "50211"}]})
+        refresh_paystack_banks()
+        self.assertEqual(paystack.get_nigerian_banks(), {"Kuda": "50211"})
+
+        # A failed refresh keeps serving the cached list
+        self.request.side_effect = requests.ConnectionError("down")
+        refresh_paystack_banks()
+        self.assertTrue(paystack.is_supported_bank("50211"))
@@ -3,6 +3,11 @@ from .views import *
 
 urlpatterns = [
     path('history/', GetWalletTransaction.as_view(), name='wallet-transactions'),
+    path('balance-at/', BalanceAtView.as_view(), name='balance-at'),
+    path('statement/', MonthlyStatementView.as_view(), name='monthly-statement'),
+    path('statement/export/', StatementExportView.as_view(), name='statement-export'),
+    path('statement/exports/<uuid:export_id>/', StatementExportStatusView.as_view(), name='statement-export-status'),
+    path('statement/exports/<uuid:export_id>/download/', StatementExportDownloadView.as_view(), name='statement-export-download'),
     path('fund-wallet/', InitializeFunding.as_view(), name='initialize-funding'),
     path('webhook/paystack/', PaymentWebhook.as_view(), name='paystack-webhook'),
     path('account-name/', AccountNameView.as_view(), name='account-name'),
@@ -6,7 +6,7 @@ from rest_framework.response import Response
 import json
 from decimal import Decimal
 from rest_framework.views import APIView
-from .models import WalletTransaction, FundWallet
+from .models import WalletTransaction, FundWallet, StatementExport
 from .serializers import WalletTransactionSerializer, WalletFundingSerializer, AccountNameSerializer, InitializeFundingSerializer
 from wallet.models import Wallet
 from wallet.serializers import WalletSerializer
@@ -14,13 +14,21 @@ import uuid
 from .paystack import checkout, get_account_name
 from django.utils import timezone
 from django.conf import settings
-import hmac
-import hashlib
 import logging
 from django.db import transaction
-from drf_spectacular.utils import extend_schema, OpenApiExample, inline_serializer
+from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiParameter, inline_serializer
 from drf_spectacular.types import OpenApiTypes
 from .pagination import WalletTransactionPagination 
+from .statements import balance_at, monthly_statement, parse_period
+from .exports import FORMATS, STATEMENT_EXPORT_SALT, arender, astatement_chunks, export_download_url, statement_rows
+from .tasks import generate_statement_export, process_paystack_events
+from .webhooks import store_event, valid_signature
+from django.core import signing
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, StreamingHttpResponse
+from django.urls import reverse
+from datetime import datetime
+from django.utils.dateparse import parse_datetime
 from notifications.utils import send_notification
 
 
@@ -35,17 +43,33 @@ class GetWalletTransaction(APIView):
 
     @extend_schema(
         summary="Get wallet transactions",
-        description="Retrieve all wallet transactions for the authenticated user, paginated.",
+        description=(
+            "Retrieve the authenticated user's wallet transactions, newest first. "
+            "Follow the `next` link to load older transactions."
+        ),
+        parameters=[
+            OpenApiParameter(name="cursor", type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+                             required=False, description="Cursor from the previous page's `next` link"),
+            OpenApiParameter(name="page_size", type=OpenApiTypes.INT, location=OpenApiParameter.QUERY,
+                             required=False, description="Items per page (max 50)"),
+            OpenApiParameter(name="type", type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+                             required=False, enum=["CREDIT", "DEBIT"]),
+            OpenApiParameter(name="status", type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+                             required=False, enum=["PENDING", "COMPLETED", "FAILED", "CANCELLED"]),
+            OpenApiParameter(name="start_date", type=OpenApiTypes.DATETIME, location=OpenApiParameter.QUERY,
+                             required=False, description="Only transactions at or after this time"),
+            OpenApiParameter(name="end_date", type=OpenApiTypes.DATETIME, location=OpenApiParameter.QUERY,
+                             required=False, description="Only transactions before this time; a bare date includes that day"),
+        ],
         responses={
             200: inline_serializer(
                 "PaginatedWalletTransactions",
                 fields={
-                    "count": serializers.IntegerField(),
                     "next": serializers.URLField(allow_null=True),
-                    "previous": serializers.URLField(allow_null=True),
                     "results": WalletTransactionSerializer(many=True),
                 },
             ),
+            400: OpenApiTypes.OBJECT,
             404: OpenApiTypes.OBJECT,
         },
         tags=['Wallet & Transactions']
@@ -55,22 +79,292 @@ class GetWalletTransaction(APIView):
         
         try:
             wallet = Wallet.objects.get(user=user)
-            
-            # 1. Get the full queryset, ordering is important!
-            transactions = WalletTransaction.objects.filter(wallet=wallet).order_by('-created_at') 
-            
-            # 2. Apply pagination to the queryset
-            page = self.paginator.paginate_queryset(transactions, request, view=self)
-            
-            # 3. Serialize the paginated result (the 'page' object)
-            serializer = WalletTransactionSerializer(page, many=True)
-            
-            # 4. Return the paginated response
-            return self.paginator.get_paginated_response(serializer.data)
-            
         except Wallet.DoesNotExist: 
             return Response({"error": "Wallet not found"}, status=status.HTTP_404_NOT_FOUND)
 
+        transactions = WalletTransaction.objects.filter(wallet=wallet).select_related('wallet__user')
+
+        transaction_type = request.query_params.get('type')
+        if transaction_type:
+            transactions = transactions.filter(transaction_type=transaction_type.upper())
+
+        transaction_status = request.query_params.get('status')
+        if transaction_status:
+            transactions = transactions.filter(status=transaction_status.upper())
+
+        try:
+            start, end = parse_period(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if start is not None:
+            transactions = transactions.filter(created_at__gte=start)
+        if end is not None:
+            transactions = transactions.filter(created_at__lt=end)
+
+        # Keyset pagination on (created_at, id): no COUNT and no OFFSET scans
+        page = self.paginator.paginate_queryset(transactions, request, view=self)
+        serializer = WalletTransactionSerializer(page, many=True)
+        return self.paginator.get_paginated_response(serializer.data)
+
+
+class BalanceAtView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Get wallet balance at a point in time",
+        description=(
+            "Funds held (balance plus reserved funds) just before the given time. "
+            "Defaults to now."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="at",
+                type=OpenApiTypes.DATETIME,
+                location=OpenApiParameter.QUERY,
+                required=False,
+                description="ISO 8601 timestamp, e.g. 2026-01-31T23:59:59+01:00",
+            )
+        ],
+        responses={
+            200: inline_serializer(
+                "BalanceAt",
+                fields={
+                    "at": serializers.DateTimeField(),
+                    "balance": serializers.DecimalField(max_digits=12, decimal_places=2),
+                },
+            ),
+            400: OpenApiTypes.OBJECT,
+            404: OpenApiTypes.OBJECT,
+        },
+        tags=['Wallet & Transactions']
+    )
+    def get(self, request):
+        raw_at = request.query_params.get('at')
+        if raw_at:
+            moment = parse_datetime(raw_at)
+            if moment is None:
+                return Response({"error": "Invalid 'at' timestamp"}, status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(moment):
+                moment = timezone.make_aware(moment)
+        else:
+            moment = timezone.now()
+
+        try:
+            wallet = Wallet.objects.get(user=request.user)
+        except Wallet.DoesNotExist:
+            return Response({"error": "Wallet not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({"at": moment, "balance": str(balance_at(wallet, moment))})
+
+
+class MonthlyStatementView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Get monthly wallet statement",
+        description="Opening and closing balance plus credit/debit totals for a calendar month.",
+        parameters=[
+            OpenApiParameter(
+                name="month",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                required=True,
+                description="Month as YYYY-MM",
+            )
+        ],
+        responses={
+            200: inline_serializer(
+                "MonthlyStatement",
+                fields={
+                    "period_start": serializers.DateTimeField(),
+                    "period_end": serializers.DateTimeField(),
+                    "opening_balance": serializers.DecimalField(max_digits=12, decimal_places=2),
+                    "closing_balance": serializers.DecimalField(max_digits=12, decimal_places=2),
+                    "total_credits": serializers.DecimalField(max_digits=12, decimal_places=2),
+                    "total_debits": serializers.DecimalField(max_digits=12, decimal_places=2),
+                    "transaction_count": serializers.IntegerField(),
+                },
+            ),
+            400: OpenApiTypes.OBJECT,
+            404: OpenApiTypes.OBJECT,
+        },
+        tags=['Wallet & Transactions']
+    )
+    def get(self, request):
+        try:
+            month = datetime.strptime(request.query_params.get('month', ''), '%Y-%m')
+        except ValueError:
+            return Response({"error": "month must be in YYYY-MM format"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            wallet = Wallet.objects.get(user=request.user)
+        except Wallet.DoesNotExist:
+            return Response({"error": "Wallet not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        statement = monthly_statement(wallet, month.year, month.month)
+        for field in ('opening_balance', 'closing_balance', 'total_credits', 'total_debits'):
+            statement[field] = str(statement[field])
+        return Response(statement)
+
+
+class StatementExportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Export wallet statement",
+        description=(
+            "Stream the full wallet statement as CSV or JSON Lines, oldest first. "
+            "Large statements (or `background=true`) are generated in the background: "
+            "the response is 202 and a notification with a download link follows."
+        ),
+        parameters=[
+            OpenApiParameter(name="export_format", type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+                             required=False, enum=["csv", "jsonl"], description="Defaults to csv"),
+            OpenApiParameter(name="start_date", type=OpenApiTypes.DATETIME, location=OpenApiParameter.QUERY,
+                             required=False),
+            OpenApiParameter(name="end_date", type=OpenApiTypes.DATETIME, location=OpenApiParameter.QUERY,
+                             required=False, description="A bare date includes that day"),
+            OpenApiParameter(name="background", type=OpenApiTypes.BOOL, location=OpenApiParameter.QUERY,
+                             required=False, description="Always generate in the background"),
+        ],
+        responses={
+            (200, 'text/csv'): OpenApiTypes.STR,
+            (200, 'application/x-ndjson'): OpenApiTypes.STR,
+            202: OpenApiTypes.OBJECT,
+            400: OpenApiTypes.OBJECT,
+            404: OpenApiTypes.OBJECT,
+        },
+        tags=['Wallet & Transactions']
+    )
+    def get(self, request):
+        export_format = request.query_params.get('export_format', 'csv').lower()
+        if export_format not in FORMATS:
+            return Response({"error": "Invalid export_format. Use 'csv' or 'jsonl'"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            start, end = parse_period(request.query_params)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            wallet = Wallet.objects.get(user=request.user)
+        except Wallet.DoesNotExist:
+            return Response({"error": "Wallet not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        background = request.query_params.get('background', '').lower() == 'true'
+        if not background:
+            # Bounded count: stops at the limit instead of counting the whole ledger
+            limit = settings.STATEMENT_EXPORT_SYNC_LIMIT
+            in_range = WalletTransaction.objects.filter(wallet=wallet)
+            if start is not None:
+                in_range = in_range.filter(created_at__gte=start)
+            if end is not None:
+                in_range = in_range.filter(created_at__lt=end)
+            background = in_range[:limit + 1].count() > limit
+
+        if background:
+            export = StatementExport.objects.create(
+                user=request.user,
+                wallet=wallet,
+                export_format=export_format,
+                start_date=start,
+                end_date=end,
+            )
+            transaction.on_commit(lambda: generate_statement_export.delay(str(export.id)))
+            status_url = reverse('statement-export-status', args=[export.id])
+            return Response(
+                {
+                    "success": True,
+                    "message": "Your statement is being prepared. We will notify you when it is ready.",
+                    "export_id": str(export.id),
+                    "status": export.status,
+                    "status_url": request.build_absolute_uri(status_url),
+                },
+                status=status.HTTP_202_ACCEPTED,
+                headers={"Location": status_url},
+            )
+
+        render, content_type, extension = FORMATS[export_format]
+        if isinstance(request._request, ASGIRequest):
+            # A sync iterator would be drained into a list before the first byte under ASGI
+            content = arender(render, astatement_chunks(wallet.id, start, end))
+        else:
+            content = render(statement_rows(wallet.id, start, end))
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response["Content-Disposition"] = (
+            f'attachment; filename="statement_{timezone.now().strftime("%Y%m%d")}.{extension}"'
+        )
+        return response
+
+
+class StatementExportStatusView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Get statement export status",
+        responses={200: OpenApiTypes.OBJECT, 404: OpenApiTypes.OBJECT},
+        tags=['Wallet & Transactions']
+    )
+    def get(self, request, export_id):
+        try:
+            export = StatementExport.objects.get(id=export_id, user=request.user)
+        except StatementExport.DoesNotExist:
+            return Response({"error": "Export not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        data = {
+            "export_id": str(export.id),
+            "export_format": export.export_format,
+            "status": export.status,
+            "row_count": export.row_count,
+            "created_at": export.created_at,
+            "completed_at": export.completed_at,
+            "download_url": None,
+        }
+        if export.status == 'COMPLETED':
+            data["download_url"] = request.build_absolute_uri(export_download_url(export))
+        elif export.status == 'FAILED':
+            data["error"] = export.error_message
+        return Response(data)
+
+
+class StatementExportDownloadView(APIView):
+    # The signed token in the emailed link is the credential
+    permission_classes = [AllowAny]
+
+    @extend_schema(
+        summary="Download statement export",
+        parameters=[
+            OpenApiParameter(name="token", type=OpenApiTypes.STR, location=OpenApiParameter.QUERY,
+                             required=True, description="Signed token from the download link"),
+        ],
+        responses={(200, 'application/octet-stream'): OpenApiTypes.BINARY, 404: OpenApiTypes.OBJECT},
+        tags=['Wallet & Transactions']
+    )
+    def get(self, request, export_id):
+        try:
+            signed_id = signing.loads(
+                request.query_params.get('token', ''),
+                salt=STATEMENT_EXPORT_SALT,
+                max_age=settings.STATEMENT_EXPORT_LINK_MAX_AGE,
+            )
+        except signing.BadSignature:
+            signed_id = None
+        if signed_id != str(export_id):
+            return Response({"error": "Invalid or expired download link"}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            export = StatementExport.objects.get(id=export_id, status='COMPLETED')
+        except StatementExport.DoesNotExist:
+            return Response({"error": "Export not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        _, content_type, extension = FORMATS[export.export_format]
+        return FileResponse(
+            export.file.open('rb'),
+            as_attachment=True,
+            filename=f'statement_{export.created_at.strftime("%Y%m%d")}.{extension}',
+            content_type=content_type,
+        )
+
 
         
 class InitializeFunding(APIView):
@@ -163,155 +457,38 @@ class InitializeFunding(APIView):
             return Response({"success": False, "error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 class PaymentWebhook(APIView):
+    """
+    Paystack webhook receiver. A verified event is written to the inbox and
+    acknowledged straight away; ``process_paystack_events`` does the work, so
+    Paystack never waits on locks or email and its retries are no-ops.
+    """
     authentication_classes = []
     permission_classes = [AllowAny]
-    def verify_signature(self, request):
-        signature = request.headers.get('X-Paystack-Signature')
-        if not signature:
-            return False
-        
-        hash = hmac.new(
-            settings.PAYSTACK_SECRET_KEY.encode('utf-8'),
-            request.body,
-            hashlib.sha512
-        ).hexdigest()
-
-        return hash == signature
 
     @extend_schema(exclude=True)
     def post(self, request, *args, **kwargs):
+        body = request.body
+        if not valid_signature(body, request.headers.get('X-Paystack-Signature')):
+            logger.error("Invalid Paystack signature")
+            return Response({"success": False, "error": "Invalid signature"}, status=status.HTTP_401_UNAUTHORIZED)
+
         try:
-            # logger.info("Received webhook payload: %s", request.body.decode('utf-8'))
+            data = json.loads(body)
+        except ValueError:
+            return Response({"success": False, "error": "Invalid payload"}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(data, dict):
+            return Response({"success": False, "error": "Invalid payload"}, status=status.HTTP_400_BAD_REQUEST)
 
-            # verify signature
-            if not self.verify_signature(request):
-                logger.error("Invalid Paystack signature")
-                return Response({"success": False, "error": "Invalid signature"}, status=status.HTTP_401_UNAUTHORIZED)
-            
-            data = json.loads(request.body)
-            event = data.get('event')
-            # logger.info("Processing webhook event: %s", event)
-
-            # handle successful charge
-            if event == 'charge.success':
-                payload = data.get('data', {})
-                reference = payload.get('reference')
-                raw_amount = Decimal(str(payload.get('amount', '0')))
-                amount = raw_amount / Decimal('100')
-
-                # logger.info("Processing successful charge - Reference: %s, Raw Amount: %s, Converted Amount: %s", 
-                #           reference, raw_amount, amount)
-
-                try:
-                    with transaction.atomic():
-                        # Get funding request with lock
-                        funding_request = FundWallet.objects.select_for_update().get(
-                            payment_reference=reference,
-                            status='PENDING'
-                        )
-                        
-                        # logger.info("Found pending funding request: Amount: %s, User: %s", 
-                        #           funding_request.amount, 
-                        #           funding_request.user.email if funding_request.user else 'None')
-
-                        # Get wallet with lock
-                        try:
-                            wallet = Wallet.objects.select_for_update().get(user=funding_request.user)
-                            logger.info("Found wallet for user: %s, Current balance: %s", 
-                                      funding_request.user.email, wallet.balance)
-                        except Wallet.DoesNotExist:
-                            logger.error("Wallet not found for user: %s", funding_request.user.email)
-                            funding_request.status = 'FAILED'
-                            funding_request.save()
-                            return Response({
-                                "success": False, 
-                                "error": "Wallet not found"
-                            }, status=status.HTTP_404_NOT_FOUND)
-
-                        request_amount = Decimal(str(funding_request.amount))
-                        webhook_amount = Decimal(str(amount))
-
-                        if abs(request_amount - webhook_amount) > Decimal('0.01'):
-                            logger.error("Amount mismatch - Expected: %s, Got: %s", 
-                                      request_amount, webhook_amount)
-                            funding_request.status = 'FAILED'
-                            funding_request.save()
-                            return Response({
-                                "success": False, 
-                                "error": f"Amount mismatch. Expected {request_amount}, got {webhook_amount}"
-                            }, status=status.HTTP_400_BAD_REQUEST)
-
-                        try:
-                            # Update status to processing
-                            funding_request.status = 'PROCESSING'
-                            funding_request.save()
-
-                            # Update wallet balance directly
-                            old_balance = wallet.balance
-                            wallet.balance += webhook_amount
-                            wallet.save(update_fields=['balance', 'updated_at'])
-                            
-                            # Create transaction record
-                            WalletTransaction.objects.create(
-                                wallet=wallet,
-                                amount=webhook_amount,
-                                transaction_type='CREDIT',
-                                description="Wallet Funding",
-                                reference=reference
-                            )
-                            
-                            # Update funding request status
-                            funding_request.status = 'COMPLETED'
-                            funding_request.completed_at = timezone.now()
-                            funding_request.save()
-                            
-                            # logger.info(
-                            #     "Wallet funded successfully. Old balance: %s, New balance: %s", 
-                            #     old_balance, wallet.balance
-                            # )
-
-                            try:
-                                send_notification(
-                                user=request.user,
-                                title="Deposite To Bluesea Account",
-                                message=f"Successful Deposite of ₦{webhook_amount}",
-                                notification_type="Account Deposite",
-                                email_subject="BlueSea - Deposite",
-                            )
-                            except Exception as e:
-                                  logger.error(f"Error awarding bonus points: {str(e)}")
-                            
-                            return Response({
-                                "success": True, 
-                                "message": "Payment processed successfully",
-                                "old_balance": str(old_balance),
-                                "new_balance": str(wallet.balance)
-                            })
-
-                        except Exception as e:
-                            # logger.error("Error updating wallet: %s", str(e), exc_info=True)
-                            funding_request.status = 'FAILED'
-                            funding_request.save()
-                            return Response({
-                                "success": False, 
-                                "error": str(e)
-                            }, status=status.HTTP_400_BAD_REQUEST)
-                    
-                except FundWallet.DoesNotExist:
-                    # logger.error("Invalid payment reference: %s", reference)
-                    return Response({
-                        "success": False, 
-                        "error": "Invalid payment reference"
-                    }, status=status.HTTP_404_NOT_FOUND)
-                
-            return Response({"success": True})
-                
+        if store_event(data, body) is None:
+            return Response({"success": True, "duplicate": True})
+
+        try:
+            process_paystack_events.delay()
         except Exception as e:
-            # logger.error("Unexpected error in webhook handler: %s", str(e), exc_info=True)
-            return Response({
-                "success": False, 
-                "error": str(e)
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            # The periodic sweep picks the event up
+            logger.error(f"Could not queue Paystack event processing: {str(e)}")
+        return Response({"success": True})
+
 
 class AccountNameView(APIView):
     permission_classes = [IsAuthenticated]
@@ -0,0 +1,181 @@
+import hashlib
+import hmac
+import logging
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from notifications.utils import send_notification
+from payments.payouts import FAILED, REVERSED, SUCCESS, settle_transfer
+from wallet import ledger
+from wallet.models import Wallet
+from .models import FundWallet, PaystackWebhookEvent
+
+logger = logging.getLogger(__name__)
+
+
+def valid_signature(body, signature):
+    """Constant-time check of Paystack's HMAC-SHA512 ``X-Paystack-Signature``."""
+    if not signature or not settings.PAYSTACK_SECRET_KEY:
+        return False
+    expected = hmac.new(
+        settings.PAYSTACK_SECRET_KEY.encode('utf-8'), body, hashlib.sha512
+    ).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def event_reference(data, body):
+    """Paystack's reference for the event, falling back to its id or a body digest."""
+    payload = data.get('data') or {}
+    reference = payload.get('reference') or payload.get('id')
+    if reference:
+        return str(reference)[:100]
+    return hashlib.sha256(body).hexdigest()
+
+
+def store_event(data, body):
+    """
+    Insert the event into the inbox. Returns the new row, or None when the
+    same event for the same reference is already there (a Paystack retry).
+    """
+    try:
+        with transaction.atomic():
+            return PaystackWebhookEvent.objects.create(
+                event=str(data.get('event') or '')[:50],
+                reference=event_reference(data, body),
+                payload=data,
+            )
+    except IntegrityError:
+        return None
+
+
+def handle_charge_success(event):
+    """
+    Credit the wallet behind a pending funding request exactly once.
+    Returns the inbox status and a note for ``error_message``.
+    """
+    payload = event.payload.get('data') or {}
+    reference = payload.get('reference')
+    amount = Decimal(str(payload.get('amount', '0'))) / Decimal('100')
+
+    funding_request = (
+        FundWallet.objects.select_for_update()
+        .select_related('user')
+        .filter(payment_reference=reference)
+        .first()
+    )
+    if funding_request is None:
+        return 'IGNORED', f"Unknown payment reference {reference}"
+    if funding_request.status != 'PENDING':
+        return 'IGNORED', f"Funding request already {funding_request.status}"
+
+    if abs(funding_request.amount - amount) > Decimal('0.01'):
+        funding_request.status = 'FAILED'
+        funding_request.save(update_fields=['status'])
+        return 'FAILED', f"Amount mismatch. Expected {funding_request.amount}, got {amount}"
+
+    try:
+        wallet_id = Wallet.objects.values_list('id', flat=True).get(user=funding_request.user)
+    except Wallet.DoesNotExist:
+        funding_request.status = 'FAILED'
+        funding_request.save(update_fields=['status'])
+        return 'FAILED', f"Wallet not found for {funding_request.user.email}"
+
+    ledger.credit(wallet_id, amount, description="Wallet Funding", reference=reference)
+    funding_request.status = 'COMPLETED'
+    funding_request.completed_at = timezone.now()
+    funding_request.save(update_fields=['status', 'completed_at'])
+
+    user = funding_request.user
+
+    def notify():
+        try:
+            send_notification(
+                user=user,
+                title="Deposite To Bluesea Account",
+                message=f"Successful Deposite of ₦{amount}",
+                notification_type="Account Deposite",
+                email_subject="BlueSea - Deposite",
+            )
+        except Exception as e:
+            logger.error(f"Error sending notification: {str(e)}")
+
+    transaction.on_commit(notify)
+    return 'PROCESSED', ''
+
+
+def transfer_handler(outcome):
+    """Handler settling the withdrawal behind a transfer.* event."""
+
+    def handle(event):
+        payload = event.payload.get('data') or {}
+        reference = payload.get('reference')
+        if settle_transfer(reference, outcome, payload.get('reason') or '') is None:
+            return 'IGNORED', f"Unknown transfer reference {reference}"
+        return 'PROCESSED', ''
+
+    return handle
+
+
+HANDLERS = {
+    'charge.success': handle_charge_success,
+    'transfer.success': transfer_handler(SUCCESS),
+    'transfer.failed': transfer_handler(FAILED),
+    'transfer.reversed': transfer_handler(REVERSED),
+}
+
+
+def process_event(event_id):
+    """
+    Run the handler for one inbox row, at most once.
+
+    The row is claimed with ``SKIP LOCKED``, so concurrent consumers never
+    process it twice. Handler side effects commit together with the new
+    status. A handler error rolls them back and leaves the row RECEIVED for
+    the next pass, until ``PAYSTACK_WEBHOOK_MAX_ATTEMPTS`` marks it FAILED.
+    Returns the row's status, or None if another consumer holds it.
+    """
+    with transaction.atomic():
+        event = (
+            PaystackWebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(id=event_id, status='RECEIVED')
+            .first()
+        )
+        if event is None:
+            return None
+
+        handler = HANDLERS.get(event.event)
+        event.attempts += 1
+        if handler is None:
+            event.status, event.error_message = 'IGNORED', f"No handler for {event.event}"
+        else:
+            try:
+                with transaction.atomic():
+                    event.status, event.error_message = handler(event)
+            except Exception as e:
+                logger.error(f"Paystack event {event.id} ({event.event}) failed: {str(e)}")
+                event.error_message = str(e)
+                if event.attempts >= settings.PAYSTACK_WEBHOOK_MAX_ATTEMPTS:
+                    event.status = 'FAILED'
+
+        if event.status != 'RECEIVED':
+            event.processed_at = timezone.now()
+        event.save(update_fields=['status', 'attempts', 'error_message', 'processed_at'])
+        return event.status
+
+
+def process_pending_events():
+    """Process the oldest waiting inbox rows in arrival order. Returns per-status counts."""
+    pending = list(
+        PaystackWebhookEvent.objects.filter(status='RECEIVED')
+        .order_by('id')
+        .values_list('id', flat=True)[: settings.PAYSTACK_WEBHOOK_BATCH_SIZE]
+    )
+    counts = {}
+    for event_id in pending:
+        outcome = process_event(event_id)
+        if outcome is not None:
+            counts[outcome] = counts.get(outcome, 0) + 1
+    return counts
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
 
-from .models import UpdateUserModel
+from .models import NotificationPreference, UpdateUserModel
 
 
 @admin.register(UpdateUserModel)
@@ -66,3 +66,11 @@ class UpdateUserModelAdmin(admin.ModelAdmin):
                 obj.image.url,
             )
         return "No image"
+
+
+@admin.register(NotificationPreference)
+class NotificationPreferenceAdmin(admin.ModelAdmin):
+    list_display = ["user", "notification_type", "channel", "updated_at"]
+    list_filter = ["notification_type", "channel"]
+    search_fields = ["user__email"]
+    raw_id_fields = ["user"]
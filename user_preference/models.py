@@ -18,3 +18,37 @@ class UpdateUserModel(models.Model):
     street_address = models.CharField(max_length=100, blank=True, null=True)
     landmark = models.CharField(max_length=50, blank=True, null=True)
     postal_code = models.CharField(max_length=10, blank=True, null=True)
+
+
+class NotificationPreference(models.Model):
+    """
+    How a user wants one ``Notification.notification_type`` delivered.
+    Types without a row use ``NOTIFICATION_DEFAULT_CHANNELS``.
+    """
+
+    IN_APP = "in_app"
+    EMAIL = "email"
+    DIGEST = "digest"
+    CHANNELS = [
+        (IN_APP, "In-app only"),
+        (EMAIL, "Email"),
+        (DIGEST, "Email digest"),
+    ]
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="notification_preferences"
+    )
+    notification_type = models.CharField(max_length=20)
+    channel = models.CharField(max_length=10, choices=CHANNELS)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "notification_type"],
+                name="unique_notification_preference",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.notification_type}: {self.channel}"
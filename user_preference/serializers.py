@@ -1,6 +1,7 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
-from .models import UpdateUserModel
+from notifications.models import Notification
+from .models import NotificationPreference, UpdateUserModel
 
 User = get_user_model()
 
@@ -53,3 +54,12 @@ class UserPreferenceSerializer(serializers.ModelSerializer):
             "landmark",
             "postal_code",
         ]
+
+
+class NotificationChannelSerializer(serializers.Serializer):
+    notification_type = serializers.ChoiceField(choices=Notification.NOTIFICATION_TYPES)
+    channel = serializers.ChoiceField(choices=NotificationPreference.CHANNELS)
+
+
+class NotificationPreferencesSerializer(serializers.Serializer):
+    preferences = NotificationChannelSerializer(many=True)
@@ -1,3 +1,65 @@
-from django.test import TestCase
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from accounts.models import Profile
+from .models import NotificationPreference
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class NotificationPreferenceViewTestCase(APITestCase):
+    def setUp(self):
+        self.user = Profile.objects.create_user(
+            email="prefs@example.com",
+            phone="08010000110",
+            surname="Prefs",
+            other_names="User",
+            role="user",
+        )
+        self.client.force_authenticate(self.user)
+        self.url = reverse("user_preference:notification-preferences")
+
+    def channels(self, response):
+        return {item["notification_type"]: item["channel"] for item in response.data["preferences"]}
+
+    def test_defaults_until_user_chooses(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        channels = self.channels(response)
+        self.assertEqual((channels["contribution"], channels["payment_failed"]), ("digest", "email"))
+
+        for channel in ("in_app", "email"):
+            response = self.client.put(
+                self.url,
+                {"preferences": [{"notification_type": "contribution", "channel": channel}]},
+                format="json",
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(self.channels(response)["contribution"], channel)
+        self.assertEqual(NotificationPreference.objects.filter(user=self.user).count(), 1)
+
+    def test_bonus_and_error_types_can_be_set(self):
+        channels = self.channels(self.client.get(self.url))
+        self.assertEqual((channels["earned"], channels["redeemed"]), ("digest", "digest"))
+        self.assertIn("error", channels)
+
+        response = self.client.put(
+            self.url,
+            {"preferences": [{"notification_type": "earned", "channel": "in_app"}]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.channels(response)["earned"], "in_app")
+
+    def test_rejects_unknown_channel(self):
+        response = self.client.put(
+            self.url,
+            {"preferences": [{"notification_type": "contribution", "channel": "sms"}]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(NotificationPreference.objects.exists())
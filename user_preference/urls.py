@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import CurrentUserView, CheckUsers
+from .views import CurrentUserView, CheckUsers, NotificationPreferenceView
 
 # Define the app namespace
 app_name = 'user_preference'
@@ -7,4 +7,5 @@ app_name = 'user_preference'
 urlpatterns = [
     path('user/', CurrentUserView.as_view(), name='user'),
     path('check/<str:email>/', CheckUsers.as_view(), name='check'),
+    path('notifications/', NotificationPreferenceView.as_view(), name='notification-preferences'),
 ]
\ No newline at end of file
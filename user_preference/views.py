@@ -3,13 +3,16 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from .serializers import (
     CurrentUserSerializer,
+    NotificationPreferencesSerializer,
     UpdateUserSerializer,
     UserPreferenceSerializer,
 )
-from .models import UpdateUserModel
+from .models import NotificationPreference, UpdateUserModel
 from rest_framework import status
 from rest_framework.parsers import MultiPartParser, FormParser
 from accounts.models import Profile
+from notifications.models import Notification
+from notifications.preferences import default_channel
 from drf_spectacular.utils import (
     extend_schema,
     OpenApiExample,
@@ -210,3 +213,80 @@ class CheckUsers(APIView):
             return Response(
                 {"state": False, "error": str(e)}, status=status.HTTP_400_BAD_REQUEST
             )
+
+
+class NotificationPreferenceView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def preferences(self, user):
+        chosen = dict(
+            NotificationPreference.objects.filter(user=user).values_list(
+                "notification_type", "channel"
+            )
+        )
+        return {
+            "preferences": [
+                {
+                    "notification_type": notification_type,
+                    "channel": chosen.get(notification_type, default_channel(notification_type)),
+                }
+                for notification_type, _ in Notification.NOTIFICATION_TYPES
+            ]
+        }
+
+    @extend_schema(
+        summary="Get notification channel preferences",
+        description=(
+            "How each notification type reaches the user: `email` sends it at "
+            "once, `digest` rolls it into the twice-daily digest email and "
+            "`in_app` sends no email. Types the user never set show their default."
+        ),
+        responses={200: NotificationPreferencesSerializer},
+        tags=["User Profile"],
+    )
+    def get(self, request):
+        return Response(self.preferences(request.user), status=status.HTTP_200_OK)
+
+    @extend_schema(
+        summary="Update notification channel preferences",
+        description="Set the channel for one or more notification types; others are left as they are",
+        request=NotificationPreferencesSerializer,
+        responses={
+            200: NotificationPreferencesSerializer,
+            400: OpenApiTypes.OBJECT,
+        },
+        examples=[
+            OpenApiExample(
+                "Update Request",
+                value={
+                    "preferences": [
+                        {"notification_type": "contribution", "channel": "in_app"},
+                        {"notification_type": "payment_success", "channel": "digest"},
+                    ]
+                },
+                request_only=True,
+            ),
+        ],
+        tags=["User Profile"],
+    )
+    def put(self, request):
+        serializer = NotificationPreferencesSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        chosen = {
+            item["notification_type"]: item["channel"]
+            for item in serializer.validated_data["preferences"]
+        }
+        NotificationPreference.objects.bulk_create(
+            [
+                NotificationPreference(
+                    user=request.user, notification_type=notification_type, channel=channel
+                )
+                for notification_type, channel in chosen.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["user", "notification_type"],
+            update_fields=["channel", "updated_at"],
+        )
+        return Response(self.preferences(request.user), status=status.HTTP_200_OK)
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.contrib import messages
-from .models import Wallet
+from .models import LedgerDiscrepancy, LedgerReconciliationRun, Wallet
 
 
 @admin.register(Wallet)
@@ -71,3 +71,39 @@ class WalletAdmin(admin.ModelAdmin):
         updated = queryset.update(is_active=True)
         self.message_user(request, f'{updated} wallet(s) unfrozen.', messages.SUCCESS)
     unfreeze_wallets.short_description = 'Unfreeze selected wallets'
+
+
+@admin.register(LedgerReconciliationRun)
+class LedgerReconciliationRunAdmin(admin.ModelAdmin):
+    list_display = [
+        'id', 'status', 'wallets_checked', 'discrepancy_count',
+        'ranges_done', 'ranges_total', 'started_at', 'finished_at'
+    ]
+    list_filter = ['status', 'started_at']
+    readonly_fields = [
+        'status', 'range_size', 'ranges_total', 'ranges_done', 'wallets_checked',
+        'discrepancy_count', 'started_at', 'finished_at'
+    ]
+    list_per_page = 25
+    date_hierarchy = 'started_at'
+
+
+@admin.register(LedgerDiscrepancy)
+class LedgerDiscrepancyAdmin(admin.ModelAdmin):
+    list_display = [
+        'wallet', 'run', 'balance', 'locked_balance', 'ledger_balance',
+        'difference', 'transaction_count', 'is_resolved', 'created_at'
+    ]
+    list_filter = ['is_resolved', 'run']
+    search_fields = ['wallet__user__email']
+    readonly_fields = [
+        'run', 'wallet', 'balance', 'locked_balance', 'ledger_balance',
+        'difference', 'transaction_count', 'created_at'
+    ]
+    list_per_page = 25
+    actions = ['mark_resolved']
+
+    def mark_resolved(self, request, queryset):
+        updated = queryset.update(is_resolved=True)
+        self.message_user(request, f'{updated} discrepancy(ies) marked resolved.', messages.SUCCESS)
+    mark_resolved.short_description = 'Mark selected discrepancies resolved'
@@ -0,0 +1,143 @@
+import logging
+import threading
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from bluesea_mobile import metrics
+from notifications.realtime import push
+from .models import Wallet
+
+logger = logging.getLogger(__name__)
+
+HITS = "wallet_balance_cache.hits"
+MISSES = "wallet_balance_cache.misses"
+COUNTERS = (HITS, MISSES)
+
+# Compare-and-set: only replace the cached balance with a newer version
+_STORE_IF_NEWER = """
+local current = redis.call('GET', KEYS[1])
+if current then
+    local version = tonumber(string.match(current, '^(%d+)|'))
+    if version and version >= tonumber(ARGV[1]) then
+        return 0
+    end
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+# Backends without server-side scripts (locmem) live in one process, so a
+# process lock is enough to make their compare-and-set atomic
+_local_lock = threading.Lock()
+
+
+def _key(user_id):
+    return f"wallet:balance:{user_id}"
+
+
+def _redis():
+    """The raw Redis client behind ``django_redis``, or None for other backends."""
+    get_client = getattr(getattr(cache, "client", None), "get_client", None)
+    return get_client(write=True) if get_client else None
+
+
+def _encode(version, balance, locked_balance):
+    return f"{version}|{balance}|{locked_balance}"
+
+
+def _decode(value):
+    if isinstance(value, bytes):
+        value = value.decode()
+    version, balance, locked_balance = value.split("|")
+    return int(version), Decimal(balance), Decimal(locked_balance)
+
+
+def store(user_id, version, balance, locked_balance):
+    """
+    Cache a wallet's balances unless the cache already holds the same or a
+    newer ``version``. Returns True if the value was written.
+
+    Versions come from ``Wallet.version``, which every write bumps under the
+    row lock, so a writer that commits late can never roll the cache back.
+    """
+    key = _key(user_id)
+    value = _encode(version, balance, locked_balance)
+    timeout = settings.WALLET_BALANCE_CACHE_TTL
+    try:
+        redis = _redis()
+        if redis is not None:
+            return bool(redis.eval(_STORE_IF_NEWER, 1, cache.make_key(key), version, value, timeout))
+        with _local_lock:
+            current = cache.get(key)
+            if current is not None and _decode(current)[0] >= version:
+                return False
+            cache.set(key, value, timeout)
+            return True
+    except Exception as e:
+        logger.warning(f"Wallet balance cache write failed: {str(e)}")
+        return False
+
+
+def publish_on_commit(user_id, version, balance, locked_balance):
+    """
+    Once the surrounding transaction commits, never before, write the new
+    balances through to the cache and push them to the user's open sockets.
+    """
+
+    def publish():
+        store(user_id, version, balance, locked_balance)
+        push(
+            user_id,
+            "wallet.balance",
+            {"balance": str(balance), "locked_balance": str(locked_balance)},
+        )
+
+    transaction.on_commit(publish)
+
+
+def _cached(user_id):
+    redis = _redis()
+    if redis is not None:
+        value = redis.get(cache.make_key(_key(user_id)))
+    else:
+        value = cache.get(_key(user_id))
+    return None if value is None else _decode(value)
+
+
+def get_balance(user_id):
+    """
+    ``(balance, locked_balance)`` of the user's wallet, from the cache when
+    it has them and from the database (repopulating the cache) when not.
+    Raises ``Wallet.DoesNotExist``.
+    """
+    try:
+        cached = _cached(user_id)
+    except Exception as e:
+        logger.warning(f"Wallet balance cache read failed: {str(e)}")
+        cached = None
+
+    if cached is not None:
+        metrics.incr(HITS)
+        return cached[1], cached[2]
+
+    metrics.incr(MISSES)
+    version, balance, locked_balance = (
+        Wallet.objects.filter(user_id=user_id)
+        .values_list("version", "balance", "locked_balance")
+        .get()
+    )
+    store(user_id, version, balance, locked_balance)
+    return balance, locked_balance
+
+
+def stats():
+    counters = metrics.get_counters(*COUNTERS)
+    lookups = counters[HITS] + counters[MISSES]
+    return {
+        "hits": counters[HITS],
+        "misses": counters[MISSES],
+        "hit_rate": round(counters[HITS] / lookups, 4) if lookups else None,
+    }
@@ -0,0 +1,281 @@
+import uuid
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from transactions.models import WalletTransaction
+from . import balance_cache
+from .models import Wallet
+
+CENT = Decimal("0.01")
+
+Posting = namedtuple(
+    "Posting",
+    ["wallet_id", "amount", "transaction_type", "description", "reference"],
+    defaults=("", None),
+)
+
+
+class InsufficientFunds(ValueError):
+    def __init__(self, wallet_id):
+        self.wallet_id = wallet_id
+        super().__init__("Insufficient funds")
+
+
+def _to_amount(amount):
+    amount = Decimal(str(amount)).quantize(CENT)
+    if amount < 0:
+        raise ValueError("Amount must be positive")
+    return amount
+
+
+def _apply_deltas(wallet_id, deltas):
+    """
+    Add each ``{field: delta}`` (fields ``balance``/``locked_balance``) in one
+    conditional ``UPDATE ... RETURNING`` and return the wallet's new
+    ``(balance, locked_balance)``.
+
+    The arithmetic happens in the database, so concurrent postings never
+    lose updates. A negative delta only applies while its field covers it;
+    otherwise nothing is written and ``InsufficientFunds`` is raised. Every
+    write bumps ``version`` and the new balances go to the balance cache
+    once the transaction commits.
+    """
+    table = connection.ops.quote_name(Wallet._meta.db_table)
+    updated_at = Wallet._meta.get_field("updated_at").get_db_prep_value(
+        timezone.now(), connection
+    )
+    assignments, params, guards, guard_params = [], [], [], []
+    for field, delta in deltas.items():
+        column = connection.ops.quote_name(field)
+        assignments.append(f"{column} = {column} + %s")
+        params.append(delta)
+        if delta < 0:
+            guards.append(f" AND {column} >= %s")
+            guard_params.append(-delta)
+    sql = (
+        f"UPDATE {table} SET {', '.join(assignments)}, version = version + 1, "
+        f"updated_at = %s WHERE id = %s{''.join(guards)} "
+        "RETURNING user_id, version, balance, locked_balance"
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + [updated_at, wallet_id] + guard_params)
+        row = cursor.fetchone()
+
+    if row is None:
+        if not Wallet.objects.filter(id=wallet_id).exists():
+            raise Wallet.DoesNotExist(f"Wallet {wallet_id} does not exist")
+        raise InsufficientFunds(wallet_id)
+    user_id, version, balance, locked_balance = row
+    balance = Decimal(str(balance)).quantize(CENT)
+    locked_balance = Decimal(str(locked_balance)).quantize(CENT)
+    balance_cache.publish_on_commit(user_id, version, balance, locked_balance)
+    return balance, locked_balance
+
+
+def _apply_delta(wallet_id, delta, field="balance"):
+    return _apply_deltas(wallet_id, {field: delta})
+
+
+def _post(wallet_id, amount, transaction_type, description, reference, field="balance"):
+    amount = _to_amount(amount)
+    delta = amount if transaction_type == "CREDIT" else -amount
+    with transaction.atomic():
+        balance, locked_balance = _apply_delta(wallet_id, delta, field)
+        held = balance + locked_balance
+        WalletTransaction.objects.create(
+            wallet_id=wallet_id,
+            amount=amount,
+            transaction_type=transaction_type,
+            description=description,
+            reference=reference or str(uuid.uuid4()),
+            balance_before=held - delta,
+            balance_after=held,
+        )
+    return balance, locked_balance
+
+
+def credit(wallet_id, amount, description="Credit", reference=None):
+    """Credit the wallet and record the transaction. Returns the new balance."""
+    if Decimal(str(amount)) <= 0:
+        raise ValueError("Amount must be positive")
+    return _post(wallet_id, amount, "CREDIT", description, reference)[0]
+
+
+def debit(wallet_id, amount, description="Debit", reference=None):
+    """
+    Debit the wallet and record the transaction. Returns the new balance;
+    raises ``InsufficientFunds`` (a ``ValueError``) without writing anything
+    if the balance does not cover ``amount``.
+    """
+    return _post(wallet_id, amount, "DEBIT", description, reference)[0]
+
+
+def capture(wallet_id, amount, description="Debit", reference=None):
+    """
+    Debit funds previously moved to ``locked_balance`` by a reservation.
+    Returns the new ``locked_balance``.
+    """
+    return _post(
+        wallet_id, amount, "DEBIT", description, reference, field="locked_balance"
+    )[1]
+
+
+def lock(wallet_id, amount):
+    """
+    Reserve ``amount`` by moving it from ``balance`` to ``locked_balance``.
+    No transaction is recorded: the funds are still held until ``capture``
+    debits them or ``unlock`` hands them back. Returns the new
+    ``(balance, locked_balance)``.
+    """
+    amount = _to_amount(amount)
+    return _apply_deltas(wallet_id, {"balance": -amount, "locked_balance": amount})
+
+
+def unlock(wallet_id, amount):
+    """Return a reservation from ``locked_balance`` to ``balance``."""
+    amount = _to_amount(amount)
+    return _apply_deltas(wallet_id, {"balance": amount, "locked_balance": -amount})
+
+
+def post_many(postings):
+    """
+    Apply many ``Posting``s atomically: all of them or none.
+
+    Postings are netted per wallet, so each wallet gets one conditional
+    UPDATE (in id order, which keeps concurrent batches from deadlocking)
+    and all transaction rows go in with one ``bulk_create``. A wallet whose
+    net movement would overdraw it raises ``InsufficientFunds`` and rolls
+    the whole batch back. Returns ``{wallet_id: new_balance}``.
+    """
+    postings = [
+        posting._replace(amount=_to_amount(posting.amount)) for posting in postings
+    ]
+    net = defaultdict(Decimal)
+    for posting in postings:
+        if posting.transaction_type not in ("CREDIT", "DEBIT"):
+            raise ValueError(f"Unknown transaction type {posting.transaction_type}")
+        sign = 1 if posting.transaction_type == "CREDIT" else -1
+        net[posting.wallet_id] += sign * posting.amount
+
+    with transaction.atomic():
+        held = {}
+        balances = {}
+        for wallet_id in sorted(net):
+            balance, locked_balance = _apply_delta(wallet_id, net[wallet_id])
+            balances[wallet_id] = balance
+            # Snapshots replay the postings from the pre-batch total
+            held[wallet_id] = balance + locked_balance - net[wallet_id]
+
+        rows = []
+        for posting in postings:
+            sign = 1 if posting.transaction_type == "CREDIT" else -1
+            before = held[posting.wallet_id]
+            held[posting.wallet_id] = before + sign * posting.amount
+            rows.append(
+                WalletTransaction(
+                    wallet_id=posting.wallet_id,
+                    amount=posting.amount,
+                    transaction_type=posting.transaction_type,
+                    description=posting.description,
+                    reference=posting.reference or str(uuid.uuid4()),
+                    balance_before=before,
+                    balance_after=held[posting.wallet_id],
+                )
+            )
+        WalletTransaction.objects.bulk_create(rows)
+    return balances
+
+
+def debit_all(postings, field="balance"):
+    """
+    Debit several wallets, one ``Posting`` each, as a single set-based step.
+    ``field="locked_balance"`` captures reservations instead, as
+    ``capture_all`` does.
+
+    The wallets are locked in id order (so concurrent batches cannot
+    deadlock), then one conditional ``UPDATE`` debits every wallet that
+    covers its amount. If any wallet is short nothing is kept and
+    ``InsufficientFunds`` names the first such wallet. All transaction rows
+    go in with one ``bulk_create``. Returns ``{wallet_id: new_balance}``.
+    """
+    postings = [
+        posting._replace(amount=_to_amount(posting.amount)) for posting in postings
+    ]
+    amounts = {posting.wallet_id: posting.amount for posting in postings}
+    if len(amounts) != len(postings):
+        raise ValueError("debit_all takes one posting per wallet")
+    if any(posting.transaction_type != "DEBIT" for posting in postings):
+        raise ValueError("debit_all only takes DEBIT postings")
+    if not postings:
+        return {}
+
+    table = connection.ops.quote_name(Wallet._meta.db_table)
+    updated_at = Wallet._meta.get_field("updated_at").get_db_prep_value(
+        timezone.now(), connection
+    )
+    column = connection.ops.quote_name(field)
+    wallet_ids = sorted(amounts)
+    cases = " ".join("WHEN %s THEN %s" for _ in wallet_ids)
+    case_params = [value for wallet_id in wallet_ids for value in (wallet_id, amounts[wallet_id])]
+    placeholders = ", ".join("%s" for _ in wallet_ids)
+    sql = (
+        f"UPDATE {table} SET {column} = {column} - CASE id {cases} END, "
+        f"version = version + 1, updated_at = %s "
+        f"WHERE id IN ({placeholders}) AND {column} >= CASE id {cases} END "
+        "RETURNING id, user_id, version, balance, locked_balance"
+    )
+
+    with transaction.atomic():
+        locked = list(
+            Wallet.objects.select_for_update()
+            .filter(id__in=wallet_ids)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        missing = set(wallet_ids) - set(locked)
+        if missing:
+            raise Wallet.DoesNotExist(f"Wallet {min(missing)} does not exist")
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, case_params + [updated_at] + wallet_ids + case_params)
+            rows = cursor.fetchall()
+        if len(rows) < len(wallet_ids):
+            # Leaving the atomic block rolls back the wallets already debited
+            short = set(wallet_ids) - {row[0] for row in rows}
+            raise InsufficientFunds(min(short))
+
+        balances, held = {}, {}
+        for wallet_id, user_id, version, balance, locked_balance in rows:
+            balance = Decimal(str(balance)).quantize(CENT)
+            locked_balance = Decimal(str(locked_balance)).quantize(CENT)
+            balance_cache.publish_on_commit(user_id, version, balance, locked_balance)
+            balances[wallet_id] = balance
+            held[wallet_id] = balance + locked_balance
+
+        WalletTransaction.objects.bulk_create(
+            [
+                WalletTransaction(
+                    wallet_id=posting.wallet_id,
+                    amount=posting.amount,
+                    transaction_type="DEBIT",
+                    description=posting.description,
+                    reference=posting.reference or str(uuid.uuid4()),
+                    balance_before=held[posting.wallet_id] + posting.amount,
+                    balance_after=held[posting.wallet_id],
+                )
+                for posting in postings
+            ]
+        )
+    return balances
+
+
+def capture_all(postings):
+    """
+    Capture several wallets' reservations from ``locked_balance`` in one
+    set-based step; see ``debit_all``. Returns ``{wallet_id: new_balance}``.
+    """
+    return debit_all(postings, field="locked_balance")
@@ -0,0 +1,62 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from wallet.models import LedgerReconciliationRun
+from wallet.reconciliation import fail_run, reconcile_range, start_run
+
+
+class Command(BaseCommand):
+    help = 'Check every wallet balance against the sum of its completed ledger postings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--range-size', type=int, default=settings.LEDGER_RECONCILE_RANGE_SIZE,
+                            help='Wallet ids aggregated per query')
+        parser.add_argument('--workers', type=int, default=settings.LEDGER_RECONCILE_WORKERS,
+                            help='Ranges reconciled in parallel, each on its own connection')
+        parser.add_argument('--celery', action='store_true',
+                            help='Dispatch the ranges to Celery workers instead of running them here')
+
+    def handle(self, *args, **options):
+        if options['celery']:
+            from wallet.tasks import reconcile_wallet_ledgers
+
+            reconcile_wallet_ledgers.delay(options['range_size'])
+            self.stdout.write(self.style.SUCCESS('Ledger reconciliation dispatched to Celery'))
+            return
+
+        run, ranges = start_run(options['range_size'])
+        self.stdout.write(f'Run {run.id}: {len(ranges)} range(s) of {run.range_size} wallet ids')
+
+        try:
+            if options['workers'] > 1:
+                with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                    for _ in pool.map(lambda bounds: self.reconcile(run.id, *bounds), ranges):
+                        pass
+            else:
+                for start, end in ranges:
+                    reconcile_range(run.id, start, end)
+        except Exception:
+            fail_run(run.id)
+            raise
+
+        run = LedgerReconciliationRun.objects.get(id=run.id)
+        summary = f'\n{run.wallets_checked} wallet(s) checked, {run.discrepancy_count} discrepancy(ies)'
+        if run.discrepancy_count:
+            self.stdout.write(self.style.ERROR(summary))
+            for item in run.discrepancies.order_by('wallet_id')[:20]:
+                self.stdout.write(
+                    f'  wallet {item.wallet_id}: held {item.balance + item.locked_balance}, '
+                    f'ledger {item.ledger_balance}, difference {item.difference}'
+                )
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
+
+    @staticmethod
+    def reconcile(run_id, start, end):
+        try:
+            return reconcile_range(run_id, start, end)
+        finally:
+            connection.close()
@@ -1,10 +1,9 @@
 from django.db import models
+from django.db.models import F
 # from django.contrib.auth.models import User
 from django.conf import settings
 from django.core.validators import MinValueValidator
 from decimal import Decimal
-import uuid
-from transactions.models import WalletTransaction
 
 
 class Wallet(models.Model):
@@ -14,47 +13,88 @@ class Wallet(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
+    # Bumped by every balance write; orders writes to the balance cache
+    version = models.PositiveBigIntegerField(default=0)
 
     def __str__(self):
         return f"{self.user.username}'s Wallet - {self.balance}"
 
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+
+        # Direct saves bypass the ledger, so bump the version here too and
+        # publish the saved balances (cache and sockets) after commit
+        self.version = F("version") + 1
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "version"}
+        super().save(*args, **kwargs)
+        self.refresh_from_db(fields=["version"])
+
+        from .balance_cache import publish_on_commit
+
+        publish_on_commit(self.user_id, self.version, self.balance, self.locked_balance)
+
     @property
     def available_balance(self):
         return self.balance
     
 
     def credit(self, amount, description="Credit", reference=None):
-        if amount <= 0:
-            raise ValueError("Amount must be positive")
-        
-        amount = Decimal(str(amount))
-        
-        self.balance += amount
-        self.save()
-
-        # create transaction record
-        WalletTransaction.objects.create(
-            wallet=self,
-            amount=amount,
-            transaction_type='CREDIT',
-            description=description,
-            reference=reference or str(uuid.uuid4())
-        )
+        from .ledger import credit
+
+        self.balance = credit(self.pk, amount, description, reference)
+        return self.balance
 
     def debit(self, amount, description="Debit", reference=None):
-        if amount < 0:
-            raise ValueError("Amount must be positive")
-        
-        if self.balance < Decimal(amount):
-            raise ValueError("Insufficient funds")
-        
-        self.balance -= Decimal(amount)
-        self.save()
-
-        WalletTransaction.objects.create(
-           wallet=self,
-            amount=Decimal(amount),
-            transaction_type='DEBIT',
-            description=description,
-            reference=reference or str(uuid.uuid4())
-        )
\ No newline at end of file
+        from .ledger import debit
+
+        self.balance = debit(self.pk, amount, description, reference)
+        return self.balance
+
+
+class LedgerReconciliationRun(models.Model):
+    STATUS_CHOICES = [
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed'),
+    ]
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='RUNNING')
+    range_size = models.PositiveIntegerField()
+    ranges_total = models.PositiveIntegerField(default=0)
+    ranges_done = models.PositiveIntegerField(default=0)
+    wallets_checked = models.PositiveIntegerField(default=0)
+    discrepancy_count = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f"Ledger reconciliation {self.id} - {self.status} ({self.discrepancy_count} discrepancies)"
+
+
+class LedgerDiscrepancy(models.Model):
+    run = models.ForeignKey(LedgerReconciliationRun, on_delete=models.CASCADE, related_name='discrepancies')
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name='ledger_discrepancies')
+    balance = models.DecimalField(max_digits=10, decimal_places=2)
+    locked_balance = models.DecimalField(max_digits=10, decimal_places=2)
+    # Completed credits minus completed debits
+    ledger_balance = models.DecimalField(max_digits=14, decimal_places=2)
+    # (balance + locked_balance) - ledger_balance
+    difference = models.DecimalField(max_digits=14, decimal_places=2)
+    transaction_count = models.PositiveIntegerField(default=0)
+    is_resolved = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['run', 'wallet'], name='unique_discrepancy_per_run'),
+        ]
+
+    def __str__(self):
+        return f"Wallet {self.wallet_id} off by {self.difference} (run {self.run_id})"
@@ -0,0 +1,127 @@
+import logging
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, Max, Min, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import LedgerDiscrepancy, LedgerReconciliationRun, Wallet
+
+logger = logging.getLogger(__name__)
+
+CENT = Decimal("0.01")
+
+_COMPLETED = Q(transactions__status="COMPLETED")
+
+
+def wallet_ranges(range_size):
+    """Half-open ``[start, end)`` wallet id ranges covering every wallet."""
+    bounds = Wallet.objects.aggregate(low=Min("id"), high=Max("id"))
+    if bounds["low"] is None:
+        return []
+    return [
+        (start, min(start + range_size, bounds["high"] + 1))
+        for start in range(bounds["low"], bounds["high"] + 1, range_size)
+    ]
+
+
+def ledger_totals(start_id, end_id):
+    """
+    ``(wallet_id, balance, locked_balance, ledger_balance, transaction_count)``
+    for every wallet with ``start_id <= id < end_id``.
+
+    One ``LEFT JOIN ... GROUP BY`` per range: the balances and the ledger sums
+    come from the same statement, so they share a snapshot and a posting that
+    lands mid-run can never show up as drift.
+    """
+    signed_amount = Case(
+        When(transactions__transaction_type="CREDIT", then=F("transactions__amount")),
+        default=-F("transactions__amount"),
+    )
+    return (
+        Wallet.objects.filter(id__gte=start_id, id__lt=end_id)
+        .annotate(
+            ledger_balance=Coalesce(
+                Sum(signed_amount, filter=_COMPLETED),
+                Value(Decimal("0")),
+                output_field=DecimalField(max_digits=14, decimal_places=2),
+            ),
+            transaction_count=Count("transactions", filter=_COMPLETED),
+        )
+        .order_by()
+        .values_list("id", "balance", "locked_balance", "ledger_balance", "transaction_count")
+    )
+
+
+def start_run(range_size=None):
+    """Open a reconciliation run and return it with the ranges it has to cover."""
+    range_size = range_size or settings.LEDGER_RECONCILE_RANGE_SIZE
+    ranges = wallet_ranges(range_size)
+    run = LedgerReconciliationRun.objects.create(range_size=range_size, ranges_total=len(ranges))
+    if not ranges:
+        _finish(run.id)
+    return run, ranges
+
+
+def reconcile_range(run_id, start_id, end_id):
+    """
+    Compare held funds (``balance + locked_balance``) against the ledger for
+    one id range and record every mismatch on the run.
+
+    Safe to retry: the discrepancy rows and the run counters commit together,
+    and a wallet can only be reported once per run.
+    """
+    checked = 0
+    found = []
+    for wallet_id, balance, locked, ledger, count in ledger_totals(start_id, end_id):
+        checked += 1
+        ledger = Decimal(str(ledger)).quantize(CENT)
+        difference = (balance + locked - ledger).quantize(CENT)
+        if difference:
+            found.append(
+                LedgerDiscrepancy(
+                    run_id=run_id,
+                    wallet_id=wallet_id,
+                    balance=balance,
+                    locked_balance=locked,
+                    ledger_balance=ledger,
+                    difference=difference,
+                    transaction_count=count,
+                )
+            )
+
+    with transaction.atomic():
+        LedgerDiscrepancy.objects.bulk_create(found, ignore_conflicts=True)
+        LedgerReconciliationRun.objects.filter(id=run_id).update(
+            ranges_done=F("ranges_done") + 1,
+            wallets_checked=F("wallets_checked") + checked,
+            discrepancy_count=F("discrepancy_count") + len(found),
+        )
+    _finish(run_id)
+    return checked, len(found)
+
+
+def fail_run(run_id):
+    LedgerReconciliationRun.objects.filter(id=run_id, status="RUNNING").update(
+        status="FAILED", finished_at=timezone.now()
+    )
+
+
+def _finish(run_id):
+    """Mark the run completed once its last range is in; only one caller wins."""
+    finished = LedgerReconciliationRun.objects.filter(
+        id=run_id, status="RUNNING", ranges_done__gte=F("ranges_total")
+    ).update(status="COMPLETED", finished_at=timezone.now())
+    if not finished:
+        return
+
+    run = LedgerReconciliationRun.objects.get(id=run_id)
+    if run.discrepancy_count:
+        logger.error(
+            f"Ledger reconciliation {run_id}: {run.discrepancy_count} of "
+            f"{run.wallets_checked} wallets disagree with their ledger"
+        )
+    else:
+        logger.info(f"Ledger reconciliation {run_id}: {run.wallets_checked} wallets balanced")
@@ -0,0 +1,30 @@
+import logging
+
+from celery import group, shared_task
+from django.db import DatabaseError
+
+from .reconciliation import fail_run, reconcile_range, start_run
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def reconcile_wallet_ledgers(range_size=None):
+    """Nightly: fan the wallet id space out to workers, one range per task."""
+    run, ranges = start_run(range_size)
+    if ranges:
+        group(reconcile_wallet_range.s(run.id, start, end) for start, end in ranges).apply_async()
+    return f"Ledger reconciliation {run.id} dispatched {len(ranges)} ranges"
+
+
+@shared_task(bind=True, max_retries=3)
+def reconcile_wallet_range(self, run_id, start_id, end_id):
+    try:
+        checked, found = reconcile_range(run_id, start_id, end_id)
+    except DatabaseError as exc:
+        if self.request.retries >= self.max_retries:
+            logger.error(f"Ledger reconciliation {run_id} range {start_id}-{end_id} failed: {str(exc)}")
+            fail_run(run_id)
+            raise
+        raise self.retry(exc=exc, countdown=30)
+    return f"Wallets {start_id}-{end_id}: {checked} checked, {found} discrepancies"
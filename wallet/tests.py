@@ -1,3 +1,361 @@
-from django.test import TestCase
+import threading
+from io import StringIO
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import OperationalError, close_old_connections, connection
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from accounts.models import Profile
+from bluesea_mobile import metrics
+from transactions.models import WalletTransaction
+from wallet import balance_cache
+from wallet.ledger import (
+    InsufficientFunds, Posting, credit, debit, debit_all, lock, post_many, unlock,
+)
+from wallet.models import LedgerDiscrepancy, LedgerReconciliationRun, Wallet
+from wallet.reconciliation import reconcile_range, start_run
+
+
+def make_wallet(email, phone, balance="0.00"):
+    user = Profile.objects.create_user(
+        email=email,
+        phone=phone,
+        surname="Ledger",
+        other_names="User",
+        role="user",
+    )
+    return Wallet.objects.create(user=user, balance=Decimal(balance))
+
+
+class WalletLedgerTestCase(TestCase):
+    def setUp(self):
+        self.wallet = make_wallet("ledger@example.com", "08010000030", "500.00")
+        self.other = make_wallet("other@example.com", "08010000031", "100.00")
+
+    def test_debit_and_credit_return_new_balance(self):
+        self.assertEqual(debit(self.wallet.id, "120.50", reference="d-1"), Decimal("379.50"))
+        self.assertEqual(credit(self.wallet.id, 20, reference="c-1"), Decimal("399.50"))
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("399.50"))
+        self.assertEqual(
+            list(
+                WalletTransaction.objects.filter(wallet=self.wallet)
+                .order_by("reference")
+                .values_list("reference", "transaction_type", "amount")
+            ),
+            [("c-1", "CREDIT", Decimal("20.00")), ("d-1", "DEBIT", Decimal("120.50"))],
+        )
+
+    def test_overdraw_writes_nothing(self):
+        with self.assertRaises(InsufficientFunds):
+            debit(self.wallet.id, "500.01")
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("500.00"))
+        self.assertFalse(WalletTransaction.objects.exists())
+
+    def test_model_methods_use_ledger(self):
+        stale = Wallet.objects.get(id=self.wallet.id)
+        self.wallet.debit(100)
+        # A stale instance no longer overwrites the earlier debit
+        stale.debit(100)
+
+        self.assertEqual(stale.balance, Decimal("300.00"))
+        with self.assertRaises(ValueError):
+            stale.credit(0)
+
+    def test_post_many_is_all_or_nothing(self):
+        balances = post_many(
+            [
+                Posting(self.wallet.id, "200", "DEBIT", "Transfer", "t-out"),
+                Posting(self.other.id, "200", "CREDIT", "Transfer", "t-in"),
+            ]
+        )
+        self.assertEqual(
+            balances, {self.wallet.id: Decimal("300.00"), self.other.id: Decimal("300.00")}
+        )
+
+        with self.assertRaises(InsufficientFunds) as raised:
+            post_many(
+                [
+                    Posting(self.wallet.id, "50", "CREDIT"),
+                    Posting(self.other.id, "301", "DEBIT"),
+                ]
+            )
+        self.assertEqual(raised.exception.wallet_id, self.other.id)
+
+        self.wallet.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("300.00"))
+        self.assertEqual(self.other.balance, Decimal("300.00"))
+        self.assertEqual(WalletTransaction.objects.count(), 2)
+
+
+    def test_debit_all_is_one_update_all_or_nothing(self):
+        third = make_wallet("third@example.com", "08010000032", "50.00")
+        with self.assertRaises(InsufficientFunds) as raised:
+            debit_all(
+                [
+                    Posting(self.wallet.id, "100", "DEBIT"),
+                    Posting(self.other.id, "100", "DEBIT"),
+                    Posting(third.id, "50.01", "DEBIT"),
+                ]
+            )
+        self.assertEqual(raised.exception.wallet_id, third.id)
+        self.assertEqual(
+            list(Wallet.objects.order_by("id").values_list("balance", flat=True)),
+            [Decimal("500.00"), Decimal("100.00"), Decimal("50.00")],
+        )
+        self.assertFalse(WalletTransaction.objects.exists())
+
+        balances = debit_all(
+            [
+                Posting(self.wallet.id, "100", "DEBIT", "Share", "s-1"),
+                Posting(self.other.id, "100", "DEBIT", "Share", "s-2"),
+                Posting(third.id, "50", "DEBIT", "Share", "s-3"),
+            ]
+        )
+        self.assertEqual(
+            balances,
+            {self.wallet.id: Decimal("400.00"), self.other.id: Decimal("0.00"), third.id: Decimal("0.00")},
+        )
+        row = WalletTransaction.objects.get(reference="s-1")
+        self.assertEqual((row.balance_before, row.balance_after), (Decimal("500.00"), Decimal("400.00")))
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.version, 1)
+
+class WalletLedgerConcurrencyTestCase(TransactionTestCase):
+    THREADS = 8
+    DEBITS_PER_THREAD = 25
+
+    def test_parallel_debits_never_lose_updates_or_overdraw(self):
+        # 200 debits of 7.00 against 1000.00: exactly 142 can succeed
+        wallet = make_wallet("stress@example.com", "08010000032", "1000.00")
+        results = {"ok": 0, "insufficient": 0}
+        lock = threading.Lock()
+        barrier = threading.Barrier(self.THREADS)
+
+        def worker():
+            barrier.wait()
+            try:
+                for _ in range(self.DEBITS_PER_THREAD):
+                    while True:
+                        try:
+                            debit(wallet.id, "7.00")
+                            outcome = "ok"
+                        except InsufficientFunds:
+                            outcome = "insufficient"
+                        except OperationalError:
+                            # SQLite serialises writers; Postgres never gets here
+                            if connection.vendor != "sqlite":
+                                raise
+                            continue
+                        break
+                    with lock:
+                        results[outcome] += 1
+            finally:
+                close_old_connections()
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        wallet.refresh_from_db()
+        self.assertEqual(results["ok"], 142)
+        self.assertEqual(results["insufficient"], 200 - 142)
+        self.assertEqual(wallet.balance, Decimal("6.00"))
+        self.assertEqual(
+            WalletTransaction.objects.filter(wallet=wallet, transaction_type="DEBIT").count(),
+            142,
+        )
+
+
+class LedgerReconciliationTestCase(TestCase):
+    def setUp(self):
+        self.wallets = [
+            make_wallet(f"recon{i}@example.com", f"0801000004{i}") for i in range(5)
+        ]
+        for index, wallet in enumerate(self.wallets):
+            credit(wallet.id, "100.00")
+            debit(wallet.id, f"{index}.25")
+        # A failed posting moves no money and must not count
+        WalletTransaction.objects.create(
+            wallet=self.wallets[0], amount="40.00", transaction_type="DEBIT",
+            status="FAILED", reference="recon-failed",
+        )
+
+    def test_balanced_wallets_report_nothing(self):
+        run, ranges = start_run(range_size=2)
+        self.assertEqual(len(ranges), 3)
+        for start, end in ranges:
+            reconcile_range(run.id, start, end)
+
+        run.refresh_from_db()
+        self.assertEqual(run.status, "COMPLETED")
+        self.assertEqual(run.ranges_done, 3)
+        self.assertEqual(run.wallets_checked, 5)
+        self.assertEqual(run.discrepancy_count, 0)
+        self.assertIsNotNone(run.finished_at)
+
+    def test_drift_is_recorded_once(self):
+        drifted = self.wallets[3]
+        # Money moved into locked_balance is still held; only the untracked change is drift
+        Wallet.objects.filter(id=drifted.id).update(
+            balance=Decimal("50.00"), locked_balance=Decimal("46.50")
+        )
+        Wallet.objects.filter(id=self.wallets[1].id).update(
+            balance=Decimal("20.00"), locked_balance=Decimal("78.75")
+        )
+
+        run, ranges = start_run(range_size=2)
+        for start, end in ranges:
+            reconcile_range(run.id, start, end)
+        # A retried range does not duplicate its findings
+        reconcile_range(run.id, *ranges[1])
+
+        discrepancy = LedgerDiscrepancy.objects.get(run=run)
+        self.assertEqual(discrepancy.wallet_id, drifted.id)
+        self.assertEqual(discrepancy.ledger_balance, Decimal("96.75"))
+        self.assertEqual(discrepancy.difference, Decimal("-0.25"))
+        self.assertEqual(discrepancy.transaction_count, 2)
+
+    def test_command_runs_every_range(self):
+        Wallet.objects.filter(id=self.wallets[0].id).update(balance=Decimal("0.00"))
+
+        call_command("reconcile_wallet_ledgers", range_size=2, workers=1, stdout=StringIO())
+
+        run = LedgerReconciliationRun.objects.get()
+        self.assertEqual(run.status, "COMPLETED")
+        self.assertEqual(run.wallets_checked, 5)
+        self.assertEqual(
+            list(run.discrepancies.values_list("wallet_id", "difference")),
+            [(self.wallets[0].id, Decimal("-99.75"))],
+        )
+
+
+class WalletBalanceCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.wallet = make_wallet("cache@example.com", "08010000050", "300.00")
+        self.user_id = self.wallet.user_id
+
+    def test_miss_reads_database_then_hits(self):
+        self.assertEqual(balance_cache.get_balance(self.user_id), (Decimal("300.00"), Decimal("0.00")))
+        self.assertEqual(balance_cache.get_balance(self.user_id), (Decimal("300.00"), Decimal("0.00")))
+        self.assertEqual(balance_cache.stats(), {"hits": 1, "misses": 1, "hit_rate": 0.5})
+
+    def test_ledger_writes_through_after_commit(self):
+        balance_cache.get_balance(self.user_id)
+        with self.captureOnCommitCallbacks(execute=True):
+            debit(self.wallet.id, "100.00")
+            lock(self.wallet.id, "50.00")
+        self.assertEqual(balance_cache.get_balance(self.user_id), (Decimal("150.00"), Decimal("50.00")))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            unlock(self.wallet.id, "50.00")
+            self.wallet.refresh_from_db()
+            self.wallet.is_active = False
+            self.wallet.save()
+        self.assertEqual(balance_cache.get_balance(self.user_id), (Decimal("200.00"), Decimal("0.00")))
+        self.assertEqual(metrics.get_counters(balance_cache.MISSES)[balance_cache.MISSES], 1)
+
+    def test_rolled_back_write_never_reaches_cache(self):
+        balance_cache.get_balance(self.user_id)
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(InsufficientFunds):
+                with transaction.atomic():
+                    credit(self.wallet.id, "10.00")
+                    debit(self.wallet.id, "1000.00")
+        self.assertEqual(balance_cache.get_balance(self.user_id), (Decimal("300.00"), Decimal("0.00")))
+
+    def test_older_version_cannot_overwrite_newer(self):
+        self.assertTrue(balance_cache.store(self.user_id, 5, Decimal("10.00"), Decimal("0.00")))
+        self.assertFalse(balance_cache.store(self.user_id, 4, Decimal("99.00"), Decimal("0.00")))
+        self.assertFalse(balance_cache.store(self.user_id, 5, Decimal("99.00"), Decimal("0.00")))
+        self.assertEqual(balance_cache.get_balance(self.user_id), (Decimal("10.00"), Decimal("0.00")))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class WalletBalanceViewTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.wallet = make_wallet("view@example.com", "08010000051", "1250.50")
+        self.client.force_authenticate(self.wallet.user)
+
+    def test_balance_served_from_cache(self):
+        self.client.get(reverse("wallet-balance"))
+        Wallet.objects.filter(id=self.wallet.id).update(balance=Decimal("1.00"))
+
+        response = self.client.get(reverse("wallet-balance"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["balance"], "₦1,250.50")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            debit(self.wallet.id, "0.50")
+        response = self.client.get(reverse("wallet-balance"))
+        self.assertEqual(response.data["available_balance"], "₦0.50")
+
+
+class WalletBalanceCacheConcurrencyTestCase(TransactionTestCase):
+    THREADS = 6
+    DEBITS_PER_THREAD = 20
+
+    def test_reads_during_concurrent_debits_never_go_back_in_time(self):
+        cache.clear()
+        wallet = make_wallet("hammer@example.com", "08010000052", "1000.00")
+        done = threading.Event()
+        seen = []
+        barrier = threading.Barrier(self.THREADS + 1)
+
+        def writer():
+            barrier.wait()
+            try:
+                for _ in range(self.DEBITS_PER_THREAD):
+                    while True:
+                        try:
+                            debit(wallet.id, "5.00")
+                        except OperationalError:
+                            # SQLite serialises writers; Postgres never gets here
+                            if connection.vendor != "sqlite":
+                                raise
+                            continue
+                        break
+            finally:
+                connection.close()
+
+        def reader():
+            barrier.wait()
+            try:
+                while not done.is_set():
+                    try:
+                        seen.append(balance_cache.get_balance(wallet.user_id)[0])
+                    except OperationalError:
+                        if connection.vendor != "sqlite":
+                            raise
+            finally:
+                connection.close()
+
+        writers = [threading.Thread(target=writer) for _ in range(self.THREADS)]
+        reader_thread = threading.Thread(target=reader)
+        for thread in writers + [reader_thread]:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        done.set()
+        reader_thread.join()
+
+        # Debits only ever lower the balance, so a stale write-through would show up as a rise
+        self.assertTrue(seen)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+        wallet.refresh_from_db()
+        self.assertEqual(wallet.balance, Decimal("400.00"))
+        self.assertEqual(balance_cache.get_balance(wallet.user_id), (Decimal("400.00"), Decimal("0.00")))
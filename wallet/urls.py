@@ -3,4 +3,5 @@ from . import views
 
 urlpatterns = [
     path('balance/', views.WalletBalance.as_view(), name='wallet-balance'),
+    path('balance/cache-stats/', views.WalletBalanceCacheStatsView.as_view(), name='wallet-balance-cache-stats'),
 ]
\ No newline at end of file
@@ -1,7 +1,8 @@
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from . import balance_cache
 from .models import Wallet
 from .serializers import WalletSerializer
 
@@ -36,10 +37,10 @@ class WalletBalance(APIView):
     )
     def get(self, request):
         try:
-            wallet_user = Wallet.objects.get(user=request.user)
-            wallet = f"₦{wallet_user.balance:,.2f}"
-            locked = f"₦{wallet_user.locked_balance:,.2f}"
-            available = f"₦{wallet_user.available_balance:,.2f}"
+            balance, locked_balance = balance_cache.get_balance(request.user.id)
+            wallet = f"₦{balance:,.2f}"
+            locked = f"₦{locked_balance:,.2f}"
+            available = f"₦{balance:,.2f}"
 
             return Response(
                 {
@@ -53,3 +54,16 @@ class WalletBalance(APIView):
             return Response(
                 {"error": "Wallet not found."}, status=status.HTTP_404_NOT_FOUND
             )
+
+
+class WalletBalanceCacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(
+        summary="Wallet balance cache counters",
+        description="Admin only. Cumulative hits, misses and hit rate of the wallet balance cache.",
+        responses={200: OpenApiTypes.OBJECT},
+        tags=["Wallet"],
+    )
+    def get(self, request):
+        return Response(balance_cache.stats())